@@ -1,6 +1,7 @@
 """
 0x.ship MVP - Main Flask Application
 """
+import logging
 import os
 from flask import Flask, jsonify, send_from_directory
 from flask_cors import CORS
@@ -9,6 +10,8 @@ from flask_compress import Compress
 from config import config
 from extensions import db, jwt, migrate, socketio
 
+logger = logging.getLogger(__name__)
+
 
 def import_models():
     """Import all models - needed for db.create_all()"""
@@ -25,6 +28,7 @@ def import_models():
     from models.saved_project import SavedProject
     from models.project_view import ProjectView
     from models.validator_permissions import ValidatorPermissions
+    from models.validator_category import ValidatorCategory
     from models.project_update import ProjectUpdate
     from models.chain import Chain, ChainProject, ChainProjectRequest, ChainFollower
     from models.chain_post import ChainPost, ChainPostReaction
@@ -35,12 +39,24 @@ def import_models():
     from models.traveler import Traveler
     from models.itinerary import Itinerary
     from models.safety_rating import SafetyRating
+    from models.itinerary_safety_stats import ItinerarySafetyStats
+    from models.itinerary_route import ItineraryRoute
     from models.travel_intel import TravelIntel
     from models.day_plan import DayPlan
     from models.embedded_business import EmbeddedBusiness
     from models.hidden_gem import HiddenGem
     from models.safety_alert import SafetyAlert
+    from models.geo_point import GeoPoint
+    from models.location_cache import LocationExtraction, GeocodeCache
+    from models.content_index import ContentIndex
     from models.traveler_certification import TravelerCertification
+    from models.traveler_stats import TravelerStats
+    from models.alert_subscription import AlertSubscription
+    from models.email_outbox import OutboxEmail
+    from models.chain_transaction import ChainTransaction, SignerNonce
+    from models.trip_ledger import TripLedgerEntry, TripBalanceSnapshot
+    from models.content_dense_id import ContentDenseId
+    from models.vote_event import VoteEvent
     from models.sbt_verification import SBTVerification
     from models.travel_group import TravelGroup
     from models.travel_group_member import TravelGroupMember
@@ -129,13 +145,75 @@ def initialize_root_admins():
         print(f"[ADMIN] Error initializing root admins: {e}")
 
 
+def init_database(app):
+    """Create missing tables and make sure root admins are flagged (idempotent)"""
+    with app.app_context():
+        import_models()
+        db.create_all()
+
+        # Verify tables were created (only log if there's an issue)
+        from sqlalchemy import inspect
+        inspector = inspect(db.engine)
+        tables = inspector.get_table_names()
+
+        if not tables:
+            print("WARNING: No database tables found after db.create_all()")
+            print("Check that models are properly defined and imported.")
+
+        # Initialize root admin users
+        initialize_root_admins()
+
+
+def init_cache_clients(app, ping=True):
+    """Initialize Upstash Redis clients used by CacheService and RedisUserCache"""
+    try:
+        upstash_url = app.config.get('UPSTASH_REDIS_URL')
+        upstash_token = app.config.get('UPSTASH_REDIS_TOKEN')
+        if upstash_url and upstash_token:
+            from utils.cache import CacheService
+            CacheService.initialize(upstash_url, upstash_token, ping=ping)
+
+            try:
+                from services.redis_cache_service import RedisUserCache
+                RedisUserCache.initialize(upstash_url, upstash_token)
+            except Exception as e:
+                logger.warning("Redis user cache unavailable: %s", e)
+        else:
+            logger.warning("UPSTASH_REDIS_URL or UPSTASH_REDIS_TOKEN not set in environment")
+    except Exception as e:
+        logger.warning("Redis cache initialization error, continuing without Redis cache: %s", e)
+
+
+def register_cli_commands(app):
+    """Register maintenance commands (flask --app app <command>)"""
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create tables and initialize root admins"""
+        init_database(app)
+        print("[App] Database initialized")
+
+
+def configure_logging(app):
+    """Route module loggers to stderr at LOG_LEVEL (keeps gunicorn's handlers if present)"""
+    level = getattr(logging, str(app.config.get('LOG_LEVEL', 'INFO')).upper(), logging.INFO)
+    logging.basicConfig(level=level, format='%(asctime)s %(levelname)s [%(name)s] %(message)s')
+    logging.getLogger().setLevel(level)
+
+
 def create_app(config_name=None):
-    """Application factory"""
+    """
+    Application factory for the web process
+
+    Kept side-effect free so every gunicorn worker boots fast: no table creation,
+    no cache warming and no background threads. See worker.py / scheduler.py.
+    """
     if config_name is None:
         config_name = os.getenv('FLASK_ENV', 'development')
 
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    configure_logging(app)
 
     # Initialize extensions
     db.init_app(app)
@@ -165,190 +243,56 @@ def create_app(config_name=None):
     # Register error handlers
     register_error_handlers(app)
 
+    # Per-endpoint latency, query / Redis / HTTP timing, GET /metrics, opt-in profiles
+    from utils.instrumentation import init_instrumentation
+    init_instrumentation(app)
+
     # Register blueprints (this also imports models through routes)
     register_blueprints(app)
 
-    # Import models BEFORE creating tables
+    # Import models so the mappers are configured before the first request
     import_models()
 
-    # NOTE: Event listeners disabled - using direct function calls in routes instead
-    # This prevents double-counting when routes manually update denormalized fields
-    # from models.event_listeners import setup_all_listeners
-    # setup_all_listeners()
+    # Mirror GPS columns into the geo_points index on every write
+    from services.geo_index import GeoIndex
+    GeoIndex.register_listeners()
 
-    # Create database tables
-    with app.app_context():
-        # Create all tables
-        db.create_all()
+    # Mirror projects/itineraries into content_index on every write
+    from services.content_index import ContentIndexService
+    ContentIndexService.register_listeners()
 
-        # Verify tables were created (only log if there's an issue)
-        from sqlalchemy import inspect
-        inspector = inspect(db.engine)
-        tables = inspector.get_table_names()
+    # Mirror validator permissions into the validator_categories index
+    from services.validator_index import ValidatorIndex
+    ValidatorIndex.register_listeners()
 
-        if not tables:
-            print("WARNING: No database tables found after db.create_all()")
-            print("Check that models are properly defined and imported.")
+    # Start email delivery once the enqueueing transaction commits
+    from services.email_outbox import EmailOutbox
+    EmailOutbox.register_listeners()
 
-        # Initialize root admin users
-        initialize_root_admins()
+    # Derive AI-alert subscriptions from traveler profiles and itineraries
+    from services.alert_audience import AlertAudience
+    AlertAudience.register_listeners()
 
-        # PERFORMANCE: Initialize Redis Cache (Instagram-style instant updates)
-        try:
-            upstash_url = app.config.get('UPSTASH_REDIS_URL')
-            upstash_token = app.config.get('UPSTASH_REDIS_TOKEN')
-            if upstash_url and upstash_token:
-                from services.redis_cache_service import RedisUserCache
-                from utils.cache import CacheService
+    # NOTE: Event listeners disabled - using direct function calls in routes instead
+    # This prevents double-counting when routes manually update denormalized fields
+    # from models.event_listeners import setup_all_listeners
+    # setup_all_listeners()
 
-                RedisUserCache.initialize(upstash_url, upstash_token)
-                CacheService.initialize(upstash_url, upstash_token)
-                print("[App] Upstash Redis cache initialized successfully")
-            else:
-                print("[App] WARNING: UPSTASH_REDIS_URL or UPSTASH_REDIS_TOKEN not set in environment")
-        except ImportError as e:
-            print(f"[App] WARNING: Redis cache service import error: {e}")
-            print("[App] Redis cache will not be available")
-        except Exception as e:
-            print(f"[App] WARNING: Redis cache initialization error: {e}")
-            print("[App] Application will continue without Redis cache")
+    # PERFORMANCE: Build Redis clients without a network round-trip.
+    # Upstash is HTTP-based, so the first real command doubles as the health check.
+    init_cache_clients(app, ping=False)
 
-        # Initialize trending tags tracker
-        try:
-            from utils.trending_tags import init_trending_tags
-            init_trending_tags()
-            print("[TRENDING] Trending tags tracker initialized")
-        except Exception as e:
-            print(f"[TRENDING] Warning: Failed to initialize trending tags: {e}")
-
-        # PERFORMANCE: Start background cache warmer (sequential, stable)
-        # Skip if disabled (e.g., during migrations to avoid deadlocks)
-        if not app.config.get('TESTING') and not os.environ.get('DISABLE_CACHE_WARMER'):
-            from utils.cache_warmer import CacheWarmer
-
-            # Development mode toggle: skip startup warming for faster dev startup
-            in_dev = os.environ.get('IN_DEV', 'false').lower() == 'true'
-
-            if in_dev:
-                # 🚀 DEVELOPMENT MODE: Skip startup cache warming
-                print("[DEV] IN_DEV=true - Skipping startup cache warming for fast startup")
-                print("[DEV] Note: First requests will be slower as data loads on demand")
-                # Still start background warmer to keep cache fresh
-                CacheWarmer.start_background_warmer(app, interval=300)
-                print("[PERFORMANCE] Background cache warmer started - updating every 5 minutes")
-            else:
-                # ⚡ PRODUCTION MODE: Warm cache immediately on startup
-                # This eliminates the 10-60 second first-load delay
-                print("[PERFORMANCE] Pre-warming critical caches on startup...")
-                try:
-                    CacheWarmer.warm_all()
-                    print("[PERFORMANCE] Startup cache warming completed!")
-                except Exception as e:
-                    print(f"[PERFORMANCE] Warning: Startup cache warming failed: {e}")
-
-                # Start background warmer (runs every 5 minutes, sequential to avoid crashes)
-                CacheWarmer.start_background_warmer(app, interval=300)
-                print("[PERFORMANCE] Background cache warmer started - updating every 5 minutes")
-
-        # PERFORMANCE: Start background MV refresh worker
-        # Skip if disabled (e.g., during testing or when running standalone worker)
-        disable_mv_worker = os.environ.get('DISABLE_MV_WORKER', 'false').lower() in ('true', '1', 'yes')
-        if not app.config.get('TESTING') and not disable_mv_worker:
-            from workers.mv_refresh_worker import MVRefreshWorker
-            # Start background worker (processes MV refresh queue every 2 seconds)
-            MVRefreshWorker.start_background_worker(app, poll_interval=2, max_workers=3)
-            print("[PERFORMANCE] MV refresh worker started - processing queue every 2s")
-
-        # REAL-TIME: Start Redis pub/sub listener for Celery scoring events
-        # Bridges Celery → Redis → Flask → Socket.IO for instant score updates
-        if not app.config.get('TESTING'):
-            from services.scoring_events_subscriber import ScoringEventsSubscriber
-            ScoringEventsSubscriber.start_subscriber(app)
-
-        # PERFORMANCE: Start daily reconciliation scheduler
-        # Skip if disabled (e.g., during testing)
-        if not app.config.get('TESTING') and not os.environ.get('DISABLE_RECONCILIATION'):
-            from workers.reconciliation_scheduler import ReconciliationScheduler
-            # Schedule daily reconciliation at 3 AM
-            reconciliation_hour = int(os.environ.get('RECONCILIATION_HOUR', '3'))  # Default: 3 AM
-            ReconciliationScheduler.start_daily_scheduler(app, hour=reconciliation_hour)
-            print(f"[PERFORMANCE] Daily reconciliation scheduled at {reconciliation_hour}:00 AM")
-
-        # AI SCORING: Start Celery worker and beat scheduler
-        # Skip if disabled (e.g., during testing or if running Celery separately)
-        # CRITICAL: Also skip if we're already inside a Celery worker to prevent infinite spawn loop
-        # Check if we're inside a Celery task by trying to access current_task.request
-        is_inside_celery_worker = False
-        try:
-            from celery import current_task
-            # If we can access request, we're inside a task
-            _ = current_task.request
-            is_inside_celery_worker = True
-        except (AttributeError, RuntimeError):
-            # Not inside a Celery task
-            is_inside_celery_worker = False
-
-        if not app.config.get('TESTING') and not os.environ.get('DISABLE_CELERY') and not is_inside_celery_worker:
-            from tasks.retry_failed_scores import setup_periodic_tasks
-            from celery_app import celery
-            import threading
-            import subprocess
-            import sys
-
-            # Setup periodic tasks for Celery Beat
-            setup_periodic_tasks(celery)
-
-            def run_celery_worker():
-                """Run Celery worker in background thread"""
-                try:
-                    # Start Celery worker
-                    worker = celery.Worker(
-                        pool='solo',  # Use solo pool for Windows compatibility
-                        loglevel='info',
-                        concurrency=2
-                    )
-                    worker.start()
-                except Exception as e:
-                    print(f"[AI SCORING] Celery worker error: {e}")
-
-            def run_celery_beat():
-                """Run Celery beat scheduler in background thread"""
-                try:
-                    # Start Celery beat
-                    beat = celery.Beat(loglevel='info')
-                    beat.run()
-                except Exception as e:
-                    print(f"[AI SCORING] Celery beat error: {e}")
-
-            def run_vote_sync_scheduler():
-                """Fallback scheduler for vote sync - runs every 60 seconds"""
-                import time
-                print("[VOTE SYNC] Starting fallback vote sync scheduler...")
-                while True:
-                    try:
-                        time.sleep(60)  # Wait 60 seconds
-                        # Queue the task asynchronously - if worker is busy, it gets queued
-                        from tasks.vote_tasks import sync_votes_to_db
-                        sync_votes_to_db.delay()
-                        print(f"[VOTE SYNC] Vote sync task queued")
-                    except Exception as e:
-                        print(f"[VOTE SYNC] Error queuing sync task: {e}")
-
-            # Start Celery worker in background thread
-            worker_thread = threading.Thread(target=run_celery_worker, daemon=True)
-            worker_thread.start()
-            print("[AI SCORING] Celery worker started in background")
-
-            # Start Celery beat in background thread
-            beat_thread = threading.Thread(target=run_celery_beat, daemon=True)
-            beat_thread.start()
-            print("[AI SCORING] Celery beat scheduler started in background")
-            print("[AI SCORING] Retry failed scores task scheduled (every 30 minutes)")
-
-            # Start fallback vote sync scheduler (more reliable than beat on Windows)
-            vote_sync_thread = threading.Thread(target=run_vote_sync_scheduler, daemon=True)
-            vote_sync_thread.start()
-            print("[VOTE SYNC] Fallback vote sync scheduler started (every 60s)")
+    # Schema creation and root admin bootstrap are deployment steps, not per-worker work.
+    # Run `flask init-db` once per deploy, or set AUTO_INIT_DB=true for local dev.
+    register_cli_commands(app)
+    if app.config.get('AUTO_INIT_DB'):
+        init_database(app)
+
+    # NOTE: Background loops (cache warmer, MV refresh, reconciliation, Celery) no longer
+    # start here - every gunicorn worker used to run its own copy. Run them once via:
+    #   python worker.py      -> scoring events subscriber, Celery worker (scale freely)
+    #   python scheduler.py   -> leader-elected jobs: cache warmer, MV refresh,
+    #                            reconciliation, vote sync, Celery beat
 
     # Root route
     @app.route('/', methods=['GET'])
@@ -458,6 +402,7 @@ def register_blueprints(app):
     from routes.remix_chat import remix_chat_bp
     from routes.route_map import route_map_bp
     from routes.booking_chat import booking_chat_bp
+    from routes.geo import geo_bp
 
     # QR Verification / Vendor Routes
     from routes.vendor_auth import vendor_auth_bp
@@ -507,6 +452,7 @@ def register_blueprints(app):
     app.register_blueprint(remix_chat_bp, url_prefix='/api/remix')
     app.register_blueprint(route_map_bp, url_prefix='/api/route-map')
     app.register_blueprint(booking_chat_bp, url_prefix='/api/booking')
+    app.register_blueprint(geo_bp, url_prefix='/api/geo')
 
     # QR Verification / Vendor Portal
     app.register_blueprint(vendor_auth_bp, url_prefix='/api/vendor')
@@ -27,7 +27,8 @@ def make_celery(app=None):
         app.import_name,
         broker=app.config["CELERY_BROKER_URL"],
         backend=app.config["CELERY_RESULT_BACKEND"],
-        include=["tasks.scoring_tasks", "tasks.vote_tasks", "tasks.feed_cache_tasks", "tasks.ai_analysis_tasks"]
+        include=["tasks.scoring_tasks", "tasks.vote_tasks", "tasks.feed_cache_tasks", "tasks.ai_analysis_tasks",
+                 "tasks.email_tasks", "tasks.chain_tasks"]
     )
     
     celery.conf.update(
@@ -53,30 +54,27 @@ def make_celery(app=None):
                 'task': 'sync_votes_to_db',
                 'schedule': 60.0,  # Every 60 seconds
             },
-            # Refresh most requested projects cache every hour
-            'refresh-most-requested-hourly': {
-                'task': 'refresh_most_requested_projects_cache',
-                'schedule': 3600.0,  # 1 hour in seconds
+            # Most requested / featured / category / rising stars / connections caches
+            # are re-warmed on demand by the scheduler's cache_warmer (utils/cache_demand.py)
+            # Drain the email outbox (enqueue also kicks a run; this picks up retries)
+            'deliver-email-outbox': {
+                'task': 'deliver_email_outbox',
+                'schedule': 30.0,  # Every 30 seconds
             },
-            # Refresh recent connections cache every hour
-            'refresh-connections-hourly': {
-                'task': 'refresh_recent_connections_cache',
-                'schedule': 3600.0,  # 1 hour in seconds
-            },
-            # Refresh featured projects cache every hour
-            'refresh-featured-hourly': {
-                'task': 'refresh_featured_projects_cache',
-                'schedule': 3600.0,  # 1 hour in seconds
+            # Delete delivered outbox emails daily
+            'purge-email-outbox-daily': {
+                'task': 'purge_email_outbox',
+                'schedule': 86400.0,  # 24 hours in seconds
             },
-            # Refresh category caches every hour
-            'refresh-categories-hourly': {
-                'task': 'refresh_category_caches',
-                'schedule': 3600.0,  # 1 hour in seconds
+            # Sign and broadcast queued SBT transactions (enqueue also kicks a run)
+            'submit-chain-transactions': {
+                'task': 'submit_chain_transactions',
+                'schedule': 15.0,  # Every 15 seconds
             },
-            # Refresh rising stars cache every hour
-            'refresh-rising-stars-hourly': {
-                'task': 'refresh_rising_stars_cache',
-                'schedule': 3600.0,  # 1 hour in seconds
+            # Apply SBT transaction receipts
+            'poll-chain-receipts': {
+                'task': 'poll_chain_receipts',
+                'schedule': 10.0,  # Every 10 seconds
             },
             # Full feed cache refresh every 24 hours
             'refresh-all-feed-daily': {
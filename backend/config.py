@@ -57,6 +57,22 @@ class Config:
     UPSTASH_REDIS_URL = os.getenv('UPSTASH_REDIS_URL', 'https://capable-terrapin-42349.upstash.io')
     UPSTASH_REDIS_TOKEN = os.getenv('UPSTASH_REDIS_TOKEN', '')
 
+    # Adaptive cache warming (utils/cache_demand.py, utils/cache_warmer.py)
+    CACHE_DEMAND_SAMPLE_RATE = float(os.getenv('CACHE_DEMAND_SAMPLE_RATE', 0.1))  # Share of reads counted per key
+    CACHE_WARM_MIN_READS = float(os.getenv('CACHE_WARM_MIN_READS', 5))  # Estimated reads over ~5-10 min to count as hot
+    CACHE_WARM_LEAD_SECONDS = int(os.getenv('CACHE_WARM_LEAD_SECONDS', 90))  # Re-warm this close to expiry
+    CACHE_WARM_BUDGET_KEYS = int(os.getenv('CACHE_WARM_BUDGET_KEYS', 50))  # Per cycle
+    CACHE_WARM_BUDGET_SECONDS = float(os.getenv('CACHE_WARM_BUDGET_SECONDS', 5))  # Per cycle (capped at CacheWarmer.MAX_BUDGET_SECONDS)
+
+    # Logging and instrumentation (utils/instrumentation.py)
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')  # Bearer token for GET /metrics (loopback only when unset)
+    SLOW_QUERY_MS = int(os.getenv('SLOW_QUERY_MS', 200))  # Log statements slower than this
+    N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', 10))  # Same statement this often in one request
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').lower() == 'true'  # Honour `X-Profile: 1` with X-Metrics-Token
+    PROFILE_DIR = os.getenv('PROFILE_DIR', '/tmp/tripit-profiles')
+
     # AWS/S3
     AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID')
     AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
@@ -104,6 +120,12 @@ class Config:
     BLOCKCHAIN_DEPLOYER_ADDRESS = os.getenv('BLOCKCHAIN_DEPLOYER_ADDRESS')
     BLOCKCHAIN_DEPLOYER_PRIVATE_KEY = os.getenv('BLOCKCHAIN_DEPLOYER_PRIVATE_KEY')
     BLOCKCHAIN_GAS_PRICE_MULTIPLIER = float(os.getenv('BLOCKCHAIN_GAS_PRICE_MULTIPLIER', 1.2))
+    BLOCKCHAIN_CONFIRMATIONS = int(os.getenv('BLOCKCHAIN_CONFIRMATIONS', 1))  # Blocks before a receipt is applied
+
+    # Chain reads (utils/chain_reader.py)
+    MULTICALL3_ADDRESS = os.getenv('MULTICALL3_ADDRESS', '0xcA11bde05977b3631167028862bE2a173976CA11')  # Same on most EVM chains
+    CHAIN_OWNERSHIP_CACHE_SECONDS = int(os.getenv('CHAIN_OWNERSHIP_CACHE_SECONDS', 60))
+    IPFS_GATEWAY_URL = os.getenv('IPFS_GATEWAY_URL', 'https://ipfs.io/ipfs/')
 
     # Backend Signer (for SBT minting - server-side wallet)
     BACKEND_SIGNER_ADDRESS = os.getenv('BACKEND_SIGNER_ADDRESS')
@@ -120,6 +142,12 @@ class Config:
     OPENAI_MAX_TOKENS = int(os.getenv('OPENAI_MAX_TOKENS', 2000))
     OPENAI_TEMPERATURE = float(os.getenv('OPENAI_TEMPERATURE', 0.3))
 
+    # AI alert emails: recipients per outbox enqueue batch
+    AI_ALERT_EMAIL_BATCH_SIZE = int(os.getenv('AI_ALERT_EMAIL_BATCH_SIZE', 50))
+
+    # Mapbox (server-side geocoding for route maps, results cached in geocode_cache)
+    MAPBOX_ACCESS_TOKEN = os.getenv('MAPBOX_ACCESS_TOKEN')
+
     # Celery Configuration (Upstash Redis as broker)
     # Note: Celery with Upstash requires special configuration
     # For HTTP-based Redis, we'll use the Upstash REST API URL
@@ -153,6 +181,9 @@ class Config:
     SCORING_RETRY_BACKOFF = int(os.getenv('SCORING_RETRY_BACKOFF', 300))  # 5 minutes
     SCORING_GITHUB_CACHE_DAYS = int(os.getenv('SCORING_GITHUB_CACHE_DAYS', 7))
 
+    # Validator auto-assignment: validators per new project, least-loaded first (0 = every match)
+    AUTO_ASSIGN_MAX_VALIDATORS = int(os.getenv('AUTO_ASSIGN_MAX_VALIDATORS', 0))
+
     # CORS
     CORS_ORIGINS = "*"  # Allow all origins
 
@@ -184,6 +215,23 @@ class Config:
     ZEPTO_SENDER_ADDRESS = os.getenv('ZEPTO_SENDER_ADDRESS') or os.getenv('ZEPTOMAIL_FROM_EMAIL')
     ZEPTO_SENDER_NAME = os.getenv('ZEPTO_SENDER_NAME') or os.getenv('ZEPTOMAIL_FROM_NAME') or 'Team Zer0'
     ZEPTO_MAIL_AGENT_ALIAS = os.getenv('ZEPTO_MAIL_AGENT_ALIAS') or os.getenv('ZEPTOMAIL_MAIL_AGENT_ALIAS')
+    ZEPTO_BATCH_ENDPOINT = os.getenv('ZEPTO_BATCH_ENDPOINT') or (
+        ZEPTO_ENDPOINT.rstrip('/') + '/batch' if ZEPTO_ENDPOINT else None
+    )
+
+    # Email outbox (services/email_outbox.py)
+    EMAIL_TRANSPORT = os.getenv('EMAIL_TRANSPORT', 'zepto')  # zepto, sink (JSON lines to EMAIL_SINK_PATH)
+    EMAIL_SINK_PATH = os.getenv('EMAIL_SINK_PATH', 'email_sink.jsonl')
+    EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 6))
+    EMAIL_DEDUPE_WINDOW_SECONDS = int(os.getenv('EMAIL_DEDUPE_WINDOW_SECONDS', 600))
+    # Sends per minute per recipient domain, per worker; overrides as "gmail.com=300,yahoo.com=100"
+    EMAIL_DOMAIN_RATE_LIMIT = int(os.getenv('EMAIL_DOMAIN_RATE_LIMIT', 600))
+    EMAIL_DOMAIN_RATE_LIMITS = {
+        domain.strip().lower(): int(limit)
+        for domain, _, limit in (
+            item.partition('=') for item in os.getenv('EMAIL_DOMAIN_RATE_LIMITS', '').split(',') if '=' in item
+        )
+    }
 
     # Google OAuth
     GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID')
@@ -193,6 +241,10 @@ class Config:
     # Performance Optimization - Materialized Views
     ENABLE_FEED_MV = os.getenv('ENABLE_FEED_MV', 'true').lower() == 'true'
 
+    # Startup: create tables + root admins inside create_app (dev convenience only).
+    # Production runs `flask init-db` once per deploy instead of once per worker.
+    AUTO_INIT_DB = os.getenv('AUTO_INIT_DB', 'false').lower() == 'true'
+
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -209,6 +261,7 @@ class TestingConfig(Config):
     SQLALCHEMY_ENGINE_OPTIONS = {
         'connect_args': {'check_same_thread': False}
     }
+    EMAIL_TRANSPORT = 'sink'
 
 
 class ProductionConfig(Config):
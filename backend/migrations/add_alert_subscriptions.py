@@ -0,0 +1,35 @@
+"""
+Migration: Add the alert_subscriptions index and backfill it
+Run this with: python migrations/add_alert_subscriptions.py
+
+Creates alert_subscriptions (models/alert_subscription.py) and derives every
+traveler's destination / interest / area topics, so AI alerts are routed to
+subscribed travelers instead of every active traveler.
+Safe to re-run: the backfill replaces each traveler's rows.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from extensions import db
+from models.alert_subscription import AlertSubscription
+from services.alert_audience import AlertAudience
+
+
+def migrate():
+    """Create alert_subscriptions and backfill it from travelers and itineraries"""
+    app = create_app()
+
+    with app.app_context():
+        print("=== Adding Alert Subscriptions ===\n")
+
+        AlertSubscription.__table__.create(db.engine, checkfirst=True)
+        print("[OK] alert_subscriptions table ready")
+
+        total = AlertAudience.rebuild(batch_size=500)
+        print(f"\n=== Alert subscriptions backfilled ({total} rows) ===")
+
+
+if __name__ == '__main__':
+    migrate()
@@ -0,0 +1,56 @@
+-- ============================================================================
+-- CHAIN TRANSACTIONS (durable queue for backend-signed SBT transactions)
+-- ============================================================================
+-- Purpose: SBT mints, reputation and profile hash updates are queued and
+--          signed with locally sequenced nonces instead of being sent and
+--          awaited inside the request (models/chain_transaction.py,
+--          services/chain_transactions.py)
+-- Run time: Instant (new empty tables)
+-- Impact: Zero downtime
+-- ============================================================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS chain_transactions (
+    id VARCHAR(36) PRIMARY KEY,
+    kind VARCHAR(20) NOT NULL,  -- mint, reputation, profile_hash
+    traveler_id VARCHAR(36) REFERENCES travelers(id) ON DELETE SET NULL,
+    sbt_id VARCHAR(256),
+    args JSON NOT NULL,
+
+    -- Submission: queued, submitted, confirmed, failed
+    status VARCHAR(20) DEFAULT 'queued' NOT NULL,
+    signer_address VARCHAR(42),
+    nonce BIGINT,
+    tx_hash VARCHAR(66),
+    raw_tx TEXT,
+    attempts INT DEFAULT 0 NOT NULL,
+    last_error TEXT,
+
+    -- Receipt
+    block_number BIGINT,
+    gas_used BIGINT,
+
+    created_at TIMESTAMP DEFAULT NOW() NOT NULL,
+    submitted_at TIMESTAMP,
+    confirmed_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_chain_transactions_traveler_id ON chain_transactions(traveler_id);
+CREATE INDEX IF NOT EXISTS ix_chain_transactions_tx_hash ON chain_transactions(tx_hash);
+
+-- Submitter claim and receipt poll
+CREATE INDEX IF NOT EXISTS idx_chain_tx_status ON chain_transactions(status, created_at);
+
+-- Coalescing of queued updates to the same token
+CREATE INDEX IF NOT EXISTS idx_chain_tx_pending_kind ON chain_transactions(kind, sbt_id, status);
+
+-- Nonce sequencer: one row per signer, locked while nonces are assigned
+CREATE TABLE IF NOT EXISTS signer_nonces (
+    address VARCHAR(42) PRIMARY KEY,
+    chain_id BIGINT,
+    next_nonce BIGINT DEFAULT 0 NOT NULL,
+    updated_at TIMESTAMP DEFAULT NOW() NOT NULL
+);
+
+COMMIT;
@@ -0,0 +1,35 @@
+-- ============================================================================
+-- CHAIN TRANSACTIONS: ONE ACTIVE MINT PER TRAVELER
+-- ============================================================================
+-- Purpose: ChainTxQueue.enqueue checks for a queued/submitted mint before
+--          inserting one; this partial unique index closes the race where
+--          two concurrent requests both pass that check
+--          (models/chain_transaction.py, services/chain_transactions.py)
+-- Run after: add_chain_transactions.sql
+-- Run time: Instant (small table)
+-- Impact: Zero downtime
+-- Note: only still-queued duplicates are failed below. If a traveler has two
+--       *submitted* mints, wait for the receipt poller to settle them first.
+-- ============================================================================
+
+BEGIN;
+
+-- Keep the oldest active mint per traveler; later queued duplicates never went out
+UPDATE chain_transactions AS duplicate
+SET status = 'failed',
+    last_error = 'Duplicate mint (another mint was already in flight)'
+WHERE duplicate.kind = 'mint'
+  AND duplicate.status = 'queued'
+  AND EXISTS (
+      SELECT 1 FROM chain_transactions AS earlier
+      WHERE earlier.kind = 'mint'
+        AND earlier.traveler_id = duplicate.traveler_id
+        AND earlier.status IN ('queued', 'submitted')
+        AND (earlier.created_at, earlier.id) < (duplicate.created_at, duplicate.id)
+  );
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_chain_tx_active_mint
+    ON chain_transactions(traveler_id)
+    WHERE kind = 'mint' AND status IN ('queued', 'submitted');
+
+COMMIT;
@@ -0,0 +1,41 @@
+-- ============================================================================
+-- CONTENT DENSE IDS (integer ids for per-user vote bitmaps)
+-- ============================================================================
+-- Purpose: Maps project / itinerary UUIDs to small sequential integers used
+--          as field offsets in the user:{id}:votes:bits Redis bitmaps
+--          (services/vote_bitmaps.py). Ids are assigned on first use; this
+--          backfill numbers already-voted content first, oldest vote first,
+--          then the remaining published itineraries and projects.
+-- Run time: Seconds (one row per project / itinerary)
+-- Impact: Zero downtime. Old user:{id}:upvotes / :downvotes sets are no
+--         longer read and expire on their own within 24 hours.
+-- ============================================================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS content_dense_ids (
+    id BIGSERIAL PRIMARY KEY,  -- 0 is never assigned
+    content_id VARCHAR(36) NOT NULL UNIQUE,  -- projects.id or itineraries.id
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+INSERT INTO content_dense_ids (content_id)
+SELECT project_id
+FROM votes
+GROUP BY project_id
+ORDER BY MIN(created_at)
+ON CONFLICT (content_id) DO NOTHING;
+
+INSERT INTO content_dense_ids (content_id)
+SELECT id FROM itineraries
+WHERE is_published = TRUE AND is_deleted = FALSE
+ORDER BY created_at
+ON CONFLICT (content_id) DO NOTHING;
+
+INSERT INTO content_dense_ids (content_id)
+SELECT id FROM projects
+WHERE is_deleted = FALSE
+ORDER BY created_at
+ON CONFLICT (content_id) DO NOTHING;
+
+COMMIT;
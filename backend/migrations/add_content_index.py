@@ -0,0 +1,59 @@
+"""
+Migration: Add the content_index table and backfill it
+Run this with: python migrations/add_content_index.py
+
+Creates content_index (models/content_index.py) and indexes every project
+and itinerary. On Postgres also adds a trigram index so the cross-type
+search (`search_text LIKE '%term%'`) does not scan the table.
+Safe to re-run: the backfill replaces each row's entry.
+
+Deploy step: run this with the release that starts reading content_index.
+Until rows exist, get_all_content / get_user_content / get_featured_content /
+count_user_content read projects and itineraries directly, but search and
+content cards only see indexed rows.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from app import create_app
+from extensions import db
+from models.content_index import ContentIndex
+from services.content_index import ContentIndexService
+
+
+def migrate():
+    """Create content_index and backfill it from projects and itineraries"""
+    app = create_app()
+
+    with app.app_context():
+        print("=== Adding Content Index ===\n")
+
+        ContentIndex.__table__.create(db.engine, checkfirst=True)
+        print("[OK] content_index table ready")
+
+        if db.engine.dialect.name == 'postgresql':
+            try:
+                db.session.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                db.session.execute(text("""
+                    CREATE INDEX IF NOT EXISTS idx_content_index_search_trgm
+                    ON content_index USING gin (search_text gin_trgm_ops)
+                """))
+                db.session.commit()
+                print("[OK] Trigram search index ready")
+            except Exception as e:
+                db.session.rollback()
+                print(f"[WARN] Skipped trigram index (pg_trgm unavailable): {e}")
+
+        counts = ContentIndexService.rebuild(batch_size=500)
+        for content_type, count in counts.items():
+            print(f"[OK] Indexed {count} {content_type} rows")
+
+        total = db.session.query(ContentIndex).count()
+        print(f"\n=== Content index backfilled ({total} rows) ===")
+
+
+if __name__ == '__main__':
+    migrate()
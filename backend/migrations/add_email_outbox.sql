@@ -0,0 +1,43 @@
+-- ============================================================================
+-- EMAIL OUTBOX (durable queue of outgoing email)
+-- ============================================================================
+-- Purpose: EmailService enqueues ZeptoMail payloads here instead of calling
+--          the provider inside the request; the deliver_email_outbox task
+--          drains due rows (models/email_outbox.py, services/email_outbox.py)
+-- Run time: Instant (new empty table)
+-- Impact: Zero downtime
+-- ============================================================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id VARCHAR(36) PRIMARY KEY,
+    idempotency_key VARCHAR(128) NOT NULL UNIQUE,
+    kind VARCHAR(50) NOT NULL,
+
+    -- Recipient (rate limits are per domain)
+    to_address VARCHAR(255) NOT NULL,
+    recipient_domain VARCHAR(255) NOT NULL,
+
+    -- Provider payload; identical content is sent as one batch call
+    payload JSON NOT NULL,
+    content_hash VARCHAR(64) NOT NULL,
+
+    -- Delivery state: pending, sending, sent, failed
+    status VARCHAR(20) DEFAULT 'pending' NOT NULL,
+    attempts INT DEFAULT 0 NOT NULL,
+    next_attempt_at TIMESTAMP DEFAULT NOW() NOT NULL,
+    claimed_at TIMESTAMP,
+    last_error TEXT,
+
+    created_at TIMESTAMP DEFAULT NOW() NOT NULL,
+    sent_at TIMESTAMP
+);
+
+-- Worker claim: due pending rows (and stale 'sending' claims) in order
+CREATE INDEX IF NOT EXISTS idx_email_outbox_due ON email_outbox(status, next_attempt_at);
+
+-- Daily purge of delivered rows
+CREATE INDEX IF NOT EXISTS idx_email_outbox_sent ON email_outbox(status, sent_at);
+
+COMMIT;
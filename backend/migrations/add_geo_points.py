@@ -0,0 +1,38 @@
+"""
+Migration: Add the geo_points index table and backfill it
+Run this with: python migrations/add_geo_points.py
+
+Creates geo_points (models/geo_point.py) with its geohash prefix index and
+indexes every itinerary, safety alert, hidden gem and travel intel GPS value.
+Safe to re-run: the backfill replaces each entity's points.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from extensions import db
+from models.geo_point import GeoPoint
+from services.geo_index import GeoIndex
+
+
+def migrate():
+    """Create geo_points and backfill it from the source tables"""
+    app = create_app()
+
+    with app.app_context():
+        print("=== Adding Geo Index ===\n")
+
+        GeoPoint.__table__.create(db.engine, checkfirst=True)
+        print("[OK] geo_points table ready")
+
+        counts = GeoIndex.rebuild(batch_size=1000)
+        for entity_type, count in counts.items():
+            print(f"[OK] Indexed {count} {entity_type} rows")
+
+        total = db.session.query(GeoPoint).count()
+        print(f"\n=== Geo index backfilled ({total} points) ===")
+
+
+if __name__ == '__main__':
+    migrate()
@@ -0,0 +1,341 @@
+-- ============================================================================
+-- INCREMENTAL REFRESH FOR FEED + LEADERBOARD VIEWS
+-- ============================================================================
+-- Purpose: Stop recomputing mv_feed_projects / mv_leaderboard_* on every vote,
+--          comment or badge. The three views become plain tables that
+--          workers/mv_refresh_worker.py patches row-by-row from a delta table.
+--
+-- How it works:
+--   1. Row-level triggers record the changed project/user ids in
+--      mv_refresh_delta (one row per view + id, duplicates collapse)
+--   2. The existing statement-level triggers still call queue_mv_refresh(),
+--      so the worker wakes up exactly as before (NOTIFY mv_refresh)
+--   3. The worker sees the relation is a table (relkind 'r') and, in a single
+--      transaction, deletes + re-inserts only the changed ids from the
+--      v_*_source view, then renumbers only the leaderboard rows between the
+--      patched rows' old and new positions
+--   4. The nightly reconciliation job does a full rebuild, which also
+--      refreshes the age term of trending_score for untouched rows
+--
+-- Readers keep querying mv_feed_projects / mv_leaderboard_* unchanged.
+-- The leaderboard tables hold every eligible row (no LIMIT 1000) so rank is
+-- exact after each patch; readers already page with ORDER BY rank LIMIT n.
+--
+-- Run time: roughly one full refresh of each view
+-- Impact: Brief lock on the three views while they are swapped
+-- ============================================================================
+
+BEGIN;
+
+-- ============================================================================
+-- DELTA TABLE
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS mv_refresh_delta (
+    view_name TEXT NOT NULL,
+    row_id TEXT NOT NULL,
+    queued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (view_name, row_id)
+);
+
+COMMENT ON TABLE mv_refresh_delta IS 'Changed row ids pending an incremental refresh (drained by MVRefreshWorker)';
+
+
+-- ============================================================================
+-- SOURCE VIEWS (same definitions as the materialized views they replace)
+-- ============================================================================
+
+CREATE OR REPLACE VIEW v_feed_projects_source AS
+SELECT
+    p.id,
+    p.title,
+    p.tagline,
+    p.description,
+    p.tech_stack,
+    p.demo_url,
+    p.github_url,
+    p.created_at,
+    p.updated_at,
+    p.is_featured,
+
+    -- Creator info (denormalized)
+    p.user_id,
+    u.username as creator_username,
+    u.display_name as creator_display_name,
+    u.avatar_url as creator_avatar_url,
+    u.email_verified as creator_is_verified,
+
+    -- Chain info (first chain if exists, projects can be in multiple chains)
+    cp.chain_id,
+    c.name as chain_name,
+    c.slug as chain_slug,
+    c.logo_url as chain_logo_url,
+
+    -- Engagement metrics (pre-computed)
+    p.proof_score,
+    COALESCE(comment_counts.count, 0) as comment_count,
+    COALESCE(upvote_counts.count, 0) as upvote_count,
+    COALESCE(downvote_counts.count, 0) as downvote_count,
+    COALESCE(badge_counts.count, 0) as badge_count,
+
+    -- Net score for sorting (upvotes - downvotes)
+    (COALESCE(upvote_counts.count, 0) - COALESCE(downvote_counts.count, 0)) as net_score,
+
+    -- Trending score (for sorting)
+    -- Formula: proof_score * 0.5 + comments * 2 + upvotes * 1.5 - downvotes * 1 - age_penalty
+    (
+        p.proof_score * 0.5 +
+        COALESCE(comment_counts.count, 0) * 2 +
+        COALESCE(upvote_counts.count, 0) * 1.5 -
+        COALESCE(downvote_counts.count, 0) * 1 +
+        (EXTRACT(EPOCH FROM (CURRENT_TIMESTAMP - p.created_at)) / 3600) * -0.1
+    ) as trending_score
+
+FROM projects p
+JOIN users u ON p.user_id = u.id
+LEFT JOIN LATERAL (
+    SELECT chain_id
+    FROM chain_projects
+    WHERE project_id = p.id
+    LIMIT 1
+) cp ON true
+LEFT JOIN chains c ON cp.chain_id = c.id
+-- Correlated per-project counts so a patch for N ids only touches N projects
+LEFT JOIN LATERAL (
+    SELECT COUNT(*) as count FROM comments WHERE project_id = p.id
+) comment_counts ON true
+LEFT JOIN LATERAL (
+    SELECT COUNT(*) as count FROM votes WHERE project_id = p.id AND vote_type = 'up'
+) upvote_counts ON true
+LEFT JOIN LATERAL (
+    SELECT COUNT(*) as count FROM votes WHERE project_id = p.id AND vote_type = 'down'
+) downvote_counts ON true
+LEFT JOIN LATERAL (
+    SELECT COUNT(*) as count FROM validation_badges WHERE project_id = p.id
+) badge_counts ON true
+WHERE p.id IS NOT NULL;
+
+COMMENT ON VIEW v_feed_projects_source IS 'Row source for the incrementally maintained mv_feed_projects table';
+
+
+CREATE OR REPLACE VIEW v_leaderboard_projects_source AS
+SELECT
+    p.id,
+    p.title,
+    p.proof_score,
+    p.user_id,
+    u.username,
+    u.avatar_url as profile_image,
+    u.email_verified as is_verified,
+
+    -- Metrics
+    COALESCE(badge_counts.count, 0) as badge_count,
+    COALESCE(comment_counts.count, 0) as comment_count,
+    COALESCE(vote_counts.count, 0) as vote_count,
+
+    -- Rank is recomputed by the worker after each patch
+    NULL::BIGINT as rank,
+    p.created_at
+
+FROM projects p
+JOIN users u ON p.user_id = u.id
+LEFT JOIN LATERAL (
+    SELECT COUNT(*) as count FROM validation_badges WHERE project_id = p.id
+) badge_counts ON true
+LEFT JOIN LATERAL (
+    SELECT COUNT(*) as count FROM comments WHERE project_id = p.id
+) comment_counts ON true
+LEFT JOIN LATERAL (
+    SELECT COUNT(*) as count FROM votes WHERE project_id = p.id AND vote_type = 'up'
+) vote_counts ON true
+WHERE p.is_deleted = FALSE AND p.proof_score > 0;
+
+COMMENT ON VIEW v_leaderboard_projects_source IS 'Row source for the incrementally maintained mv_leaderboard_projects table';
+
+
+CREATE OR REPLACE VIEW v_leaderboard_builders_source AS
+SELECT
+    u.id,
+    u.username,
+    u.avatar_url as profile_image,
+    u.bio,
+    u.email_verified as is_verified,
+
+    -- Karma (main metric) - from dashboard stats for consistency
+    COALESCE(uds.karma_score, 0) as total_karma,
+
+    -- Supporting metrics
+    COALESCE(uds.project_count, 0) as project_count,
+    COALESCE(uds.badges_given, 0) as badges_given,
+    COALESCE(uds.comment_count, 0) as comment_count,
+
+    -- Rank is recomputed by the worker after each patch
+    NULL::BIGINT as rank,
+    u.created_at
+
+FROM users u
+LEFT JOIN user_dashboard_stats uds ON u.id = uds.user_id
+WHERE u.is_active = TRUE;
+
+COMMENT ON VIEW v_leaderboard_builders_source IS 'Row source for the incrementally maintained mv_leaderboard_builders table';
+
+
+-- ============================================================================
+-- SWAP MATERIALIZED VIEWS FOR TABLES
+-- ============================================================================
+
+CREATE TABLE mv_feed_projects_next AS SELECT * FROM v_feed_projects_source;
+CREATE TABLE mv_leaderboard_projects_next AS SELECT * FROM v_leaderboard_projects_source;
+CREATE TABLE mv_leaderboard_builders_next AS SELECT * FROM v_leaderboard_builders_source;
+
+UPDATE mv_leaderboard_projects_next t
+SET rank = r.rank
+FROM (
+    SELECT id, ROW_NUMBER() OVER (ORDER BY -proof_score, created_at, id) as rank
+    FROM mv_leaderboard_projects_next
+) r
+WHERE t.id = r.id;
+
+UPDATE mv_leaderboard_builders_next t
+SET rank = r.rank
+FROM (
+    SELECT id, ROW_NUMBER() OVER (ORDER BY -total_karma, created_at, id) as rank
+    FROM mv_leaderboard_builders_next
+) r
+WHERE t.id = r.id;
+
+DROP MATERIALIZED VIEW IF EXISTS mv_feed_projects;
+DROP MATERIALIZED VIEW IF EXISTS mv_leaderboard_projects;
+DROP MATERIALIZED VIEW IF EXISTS mv_leaderboard_builders;
+
+ALTER TABLE mv_feed_projects_next RENAME TO mv_feed_projects;
+ALTER TABLE mv_leaderboard_projects_next RENAME TO mv_leaderboard_projects;
+ALTER TABLE mv_leaderboard_builders_next RENAME TO mv_leaderboard_builders;
+
+ALTER TABLE mv_feed_projects ADD PRIMARY KEY (id);
+ALTER TABLE mv_leaderboard_projects ADD PRIMARY KEY (id);
+ALTER TABLE mv_leaderboard_builders ADD PRIMARY KEY (id);
+
+-- Same read indexes as the materialized views
+CREATE INDEX IF NOT EXISTS idx_mv_feed_trending ON mv_feed_projects(trending_score DESC, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_mv_feed_newest ON mv_feed_projects(created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_mv_feed_top_rated ON mv_feed_projects(net_score DESC, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_mv_feed_featured ON mv_feed_projects(is_featured DESC, trending_score DESC);
+
+CREATE INDEX IF NOT EXISTS idx_mv_leaderboard_projects_rank ON mv_leaderboard_projects(rank);
+CREATE INDEX IF NOT EXISTS idx_mv_leaderboard_projects_score ON mv_leaderboard_projects(proof_score DESC);
+-- Rank key (INCREMENTAL_VIEWS rank_key): neighbour lookups when re-ranking a window
+CREATE INDEX IF NOT EXISTS idx_mv_leaderboard_projects_rank_key ON mv_leaderboard_projects((-proof_score), created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_mv_leaderboard_builders_rank ON mv_leaderboard_builders(rank);
+CREATE INDEX IF NOT EXISTS idx_mv_leaderboard_builders_karma ON mv_leaderboard_builders(total_karma DESC);
+CREATE INDEX IF NOT EXISTS idx_mv_leaderboard_builders_rank_key ON mv_leaderboard_builders((-total_karma), created_at, id);
+
+COMMENT ON TABLE mv_feed_projects IS 'Feed rows, maintained incrementally from v_feed_projects_source';
+COMMENT ON TABLE mv_leaderboard_projects IS 'Projects ranked by proof score, maintained incrementally';
+COMMENT ON TABLE mv_leaderboard_builders IS 'Builders ranked by total karma, maintained incrementally';
+
+
+-- ============================================================================
+-- DELTA CAPTURE TRIGGERS
+-- ============================================================================
+
+-- Generic capture: TG_ARGV[0] is the key column, TG_ARGV[1..] the target views
+CREATE OR REPLACE FUNCTION capture_mv_delta()
+RETURNS TRIGGER AS $$
+DECLARE
+    key_value TEXT;
+    i INT;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        key_value := to_jsonb(OLD) ->> TG_ARGV[0];
+    ELSE
+        key_value := to_jsonb(NEW) ->> TG_ARGV[0];
+    END IF;
+
+    IF key_value IS NOT NULL THEN
+        FOR i IN 1 .. TG_NARGS - 1 LOOP
+            INSERT INTO mv_refresh_delta (view_name, row_id)
+            VALUES (TG_ARGV[i], key_value)
+            ON CONFLICT (view_name, row_id) DO NOTHING;
+        END LOOP;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION capture_mv_delta IS 'Record a changed row id for incremental MV refresh (args: key column, view names...)';
+
+-- Creator fields are denormalized onto every project row of the feed
+CREATE OR REPLACE FUNCTION capture_user_projects_mv_delta()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO mv_refresh_delta (view_name, row_id)
+    SELECT v.view_name, p.id
+    FROM projects p
+    CROSS JOIN (VALUES ('mv_feed_projects'), ('mv_leaderboard_projects')) v(view_name)
+    WHERE p.user_id = NEW.id
+    ON CONFLICT (view_name, row_id) DO NOTHING;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_mv_delta_projects ON projects;
+CREATE TRIGGER trg_mv_delta_projects
+AFTER INSERT OR UPDATE OR DELETE ON projects
+FOR EACH ROW EXECUTE FUNCTION capture_mv_delta('id', 'mv_feed_projects', 'mv_leaderboard_projects');
+
+DROP TRIGGER IF EXISTS trg_mv_delta_votes ON votes;
+CREATE TRIGGER trg_mv_delta_votes
+AFTER INSERT OR UPDATE OR DELETE ON votes
+FOR EACH ROW EXECUTE FUNCTION capture_mv_delta('project_id', 'mv_feed_projects', 'mv_leaderboard_projects');
+
+DROP TRIGGER IF EXISTS trg_mv_delta_comments ON comments;
+CREATE TRIGGER trg_mv_delta_comments
+AFTER INSERT OR DELETE ON comments
+FOR EACH ROW EXECUTE FUNCTION capture_mv_delta('project_id', 'mv_feed_projects', 'mv_leaderboard_projects');
+
+DROP TRIGGER IF EXISTS trg_mv_delta_badges ON validation_badges;
+CREATE TRIGGER trg_mv_delta_badges
+AFTER INSERT OR DELETE ON validation_badges
+FOR EACH ROW EXECUTE FUNCTION capture_mv_delta('project_id', 'mv_feed_projects', 'mv_leaderboard_projects');
+
+DROP TRIGGER IF EXISTS trg_mv_delta_chain_projects ON chain_projects;
+CREATE TRIGGER trg_mv_delta_chain_projects
+AFTER INSERT OR DELETE ON chain_projects
+FOR EACH ROW EXECUTE FUNCTION capture_mv_delta('project_id', 'mv_feed_projects');
+
+DROP TRIGGER IF EXISTS trg_mv_delta_dashboard_stats ON user_dashboard_stats;
+CREATE TRIGGER trg_mv_delta_dashboard_stats
+AFTER INSERT OR UPDATE ON user_dashboard_stats
+FOR EACH ROW EXECUTE FUNCTION capture_mv_delta('user_id', 'mv_leaderboard_builders');
+
+DROP TRIGGER IF EXISTS trg_mv_delta_users ON users;
+CREATE TRIGGER trg_mv_delta_users
+AFTER INSERT OR UPDATE OF username, avatar_url, bio, email_verified, is_active ON users
+FOR EACH ROW EXECUTE FUNCTION capture_mv_delta('id', 'mv_leaderboard_builders');
+
+DROP TRIGGER IF EXISTS trg_mv_delta_user_projects ON users;
+CREATE TRIGGER trg_mv_delta_user_projects
+AFTER UPDATE OF username, display_name, avatar_url, email_verified ON users
+FOR EACH ROW EXECUTE FUNCTION capture_user_projects_mv_delta();
+
+COMMIT;
+
+-- ============================================================================
+-- ROLLBACK (back to full materialized views)
+-- ============================================================================
+-- DROP TRIGGER IF EXISTS trg_mv_delta_projects ON projects;
+-- DROP TRIGGER IF EXISTS trg_mv_delta_votes ON votes;
+-- DROP TRIGGER IF EXISTS trg_mv_delta_comments ON comments;
+-- DROP TRIGGER IF EXISTS trg_mv_delta_badges ON validation_badges;
+-- DROP TRIGGER IF EXISTS trg_mv_delta_chain_projects ON chain_projects;
+-- DROP TRIGGER IF EXISTS trg_mv_delta_dashboard_stats ON user_dashboard_stats;
+-- DROP TRIGGER IF EXISTS trg_mv_delta_users ON users;
+-- DROP TRIGGER IF EXISTS trg_mv_delta_user_projects ON users;
+-- DROP TABLE IF EXISTS mv_feed_projects, mv_leaderboard_projects, mv_leaderboard_builders;
+-- DROP TABLE IF EXISTS mv_refresh_delta;
+-- Then re-run enhance_feed_mv.sql and the leaderboard section of phase2_materialized_views.sql
@@ -0,0 +1,54 @@
+"""
+Migration: Add itinerary_routes (compact route geometry) and backfill it
+Run this with: python migrations/add_itinerary_routes.py
+
+Parses every itinerary's route_gpx (or route_waypoints) once into encoded
+polylines at preview/medium/full resolution plus bbox, distance and
+elevation gain (models/itinerary_route.py). Safe to re-run: unchanged
+sources are skipped by hash.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from extensions import db
+from models.itinerary import Itinerary
+from models.itinerary_route import ItineraryRoute
+from utils.route_geometry import RouteGeometryError
+
+
+def migrate(batch_size=200):
+    """Create itinerary_routes and build geometry for existing itineraries"""
+    app = create_app()
+
+    with app.app_context():
+        print("=== Adding Itinerary Route Geometry ===\n")
+
+        ItineraryRoute.__table__.create(db.engine, checkfirst=True)
+        print("[OK] itinerary_routes table ready")
+
+        built, failed, last_id = 0, 0, ''
+        while True:
+            itineraries = Itinerary.query.filter(Itinerary.id > last_id).order_by(Itinerary.id).limit(batch_size).all()
+            if not itineraries:
+                break
+
+            for itinerary in itineraries:
+                try:
+                    with db.session.begin_nested():
+                        if ItineraryRoute.sync_from_itinerary(itinerary):
+                            built += 1
+                except RouteGeometryError as e:
+                    failed += 1
+                    print(f"[WARN] Itinerary {itinerary.id}: {e}")
+
+            db.session.commit()
+            last_id = itineraries[-1].id
+            print(f"  ... processed up to {last_id}")
+
+        print(f"\n=== Route geometry built for {built} itineraries ({failed} unparseable GPX) ===")
+
+
+if __name__ == '__main__':
+    migrate()
@@ -0,0 +1,77 @@
+-- ============================================================================
+-- ITINERARY SAFETY STATS (running safety-rating aggregates)
+-- ============================================================================
+-- Purpose: Replace the per-write reload of every SafetyRating row with
+--          count/sum aggregates updated in the rating's own transaction
+--          (models/itinerary_safety_stats.py)
+-- Run time: One GROUP BY over safety_ratings for the backfill
+-- Impact: Zero downtime (new table + backfill)
+-- ============================================================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS itinerary_safety_stats (
+    itinerary_id VARCHAR(36) PRIMARY KEY REFERENCES itineraries(id) ON DELETE CASCADE,
+
+    -- Overall score: all ratings and verified-traveler ratings
+    ratings_count INT DEFAULT 0 NOT NULL,
+    ratings_sum INT DEFAULT 0 NOT NULL,
+    verified_count INT DEFAULT 0 NOT NULL,
+    verified_sum INT DEFAULT 0 NOT NULL,
+
+    -- Per-dimension sums (sub-scores are optional)
+    accommodation_count INT DEFAULT 0 NOT NULL,
+    accommodation_sum INT DEFAULT 0 NOT NULL,
+    route_count INT DEFAULT 0 NOT NULL,
+    route_sum INT DEFAULT 0 NOT NULL,
+    community_count INT DEFAULT 0 NOT NULL,
+    community_sum INT DEFAULT 0 NOT NULL,
+    women_safety_count INT DEFAULT 0 NOT NULL,
+    women_safety_sum INT DEFAULT 0 NOT NULL,
+
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+
+COMMENT ON TABLE itinerary_safety_stats IS 'Running safety rating aggregates per itinerary (updated on rating insert/update/delete)';
+
+-- Backfill from existing ratings
+INSERT INTO itinerary_safety_stats (
+    itinerary_id,
+    ratings_count, ratings_sum, verified_count, verified_sum,
+    accommodation_count, accommodation_sum,
+    route_count, route_sum,
+    community_count, community_sum,
+    women_safety_count, women_safety_sum
+)
+SELECT
+    itinerary_id,
+    COUNT(*),
+    COALESCE(SUM(overall_safety_score), 0),
+    COUNT(*) FILTER (WHERE verified_traveler),
+    COALESCE(SUM(overall_safety_score) FILTER (WHERE verified_traveler), 0),
+    COUNT(accommodation_safety),
+    COALESCE(SUM(accommodation_safety), 0),
+    COUNT(route_safety),
+    COALESCE(SUM(route_safety), 0),
+    COUNT(community_safety),
+    COALESCE(SUM(community_safety), 0),
+    COUNT(women_safety_score),
+    COALESCE(SUM(women_safety_score), 0)
+FROM safety_ratings
+GROUP BY itinerary_id
+ON CONFLICT (itinerary_id) DO UPDATE SET
+    ratings_count = EXCLUDED.ratings_count,
+    ratings_sum = EXCLUDED.ratings_sum,
+    verified_count = EXCLUDED.verified_count,
+    verified_sum = EXCLUDED.verified_sum,
+    accommodation_count = EXCLUDED.accommodation_count,
+    accommodation_sum = EXCLUDED.accommodation_sum,
+    route_count = EXCLUDED.route_count,
+    route_sum = EXCLUDED.route_sum,
+    community_count = EXCLUDED.community_count,
+    community_sum = EXCLUDED.community_sum,
+    women_safety_count = EXCLUDED.women_safety_count,
+    women_safety_sum = EXCLUDED.women_safety_sum,
+    updated_at = CURRENT_TIMESTAMP;
+
+COMMIT;
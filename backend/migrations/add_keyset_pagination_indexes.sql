@@ -0,0 +1,78 @@
+-- ============================================================================
+-- KEYSET PAGINATION INDEXES
+-- ============================================================================
+-- Purpose: Composite indexes matching the cursor orderings in
+--          utils/pagination.py callers, so `WHERE (key, id) < (:last)
+--          ORDER BY key DESC, id DESC LIMIT n` is a single index range scan
+--          at any page depth. COALESCE expressions must match the SortKey
+--          defaults in the routes.
+-- Run time: Depends on table size (index builds)
+-- Impact: Zero downtime (IF NOT EXISTS; run CONCURRENTLY variants by hand on
+--         very large tables)
+-- ============================================================================
+
+BEGIN;
+
+-- Itinerary feed (routes/itineraries.py ITINERARY_SORT_KEYS)
+CREATE INDEX IF NOT EXISTS idx_itineraries_feed_trending
+    ON itineraries (COALESCE(proof_score, 0.0) DESC, created_at DESC, id DESC)
+    WHERE is_deleted = false AND is_published = true;
+
+CREATE INDEX IF NOT EXISTS idx_itineraries_feed_newest
+    ON itineraries (created_at DESC, id DESC)
+    WHERE is_deleted = false AND is_published = true;
+
+CREATE INDEX IF NOT EXISTS idx_itineraries_feed_top_rated
+    ON itineraries (COALESCE(safety_score, 0.0) DESC, COALESCE(proof_score, 0.0) DESC, id DESC)
+    WHERE is_deleted = false AND is_published = true;
+
+CREATE INDEX IF NOT EXISTS idx_itineraries_feed_most_helpful
+    ON itineraries (COALESCE(helpful_votes, 0) DESC, id DESC)
+    WHERE is_deleted = false AND is_published = true;
+
+-- Top-level comments per itinerary
+CREATE INDEX IF NOT EXISTS idx_comments_project_keyset
+    ON comments (project_id, created_at DESC, id DESC)
+    WHERE parent_id IS NULL AND is_deleted = false;
+
+-- Chain posts (routes/chain_posts.py CHAIN_POST_SORT_KEYS)
+CREATE INDEX IF NOT EXISTS idx_chain_posts_keyset_hot
+    ON chain_posts (chain_id, COALESCE(is_pinned, false) DESC, COALESCE(upvote_count, 0) DESC, created_at DESC, id DESC)
+    WHERE parent_id IS NULL AND is_deleted = false AND is_hidden = false;
+
+CREATE INDEX IF NOT EXISTS idx_chain_posts_keyset_new
+    ON chain_posts (chain_id, COALESCE(is_pinned, false) DESC, created_at DESC, id DESC)
+    WHERE parent_id IS NULL AND is_deleted = false AND is_hidden = false;
+
+CREATE INDEX IF NOT EXISTS idx_chain_posts_keyset_active
+    ON chain_posts (chain_id, COALESCE(is_pinned, false) DESC, COALESCE(last_activity_at, created_at) DESC, id DESC)
+    WHERE parent_id IS NULL AND is_deleted = false AND is_hidden = false;
+
+-- Travel intel per itinerary
+CREATE INDEX IF NOT EXISTS idx_travel_intel_keyset_newest
+    ON travel_intel (itinerary_id, created_at DESC, id DESC)
+    WHERE parent_intel_id IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_travel_intel_keyset_helpful
+    ON travel_intel (itinerary_id, COALESCE(helpful_votes, 0) DESC, id DESC)
+    WHERE parent_intel_id IS NULL;
+
+-- Women guides (rating, popularity)
+CREATE INDEX IF NOT EXISTS idx_women_guides_keyset
+    ON women_guides (COALESCE(average_rating, 0.0) DESC, COALESCE(total_reviews, 0) DESC, id DESC)
+    WHERE is_active = true;
+
+-- Matched travel groups
+CREATE INDEX IF NOT EXISTS idx_travel_groups_keyset
+    ON travel_groups (created_at DESC, id DESC)
+    WHERE is_active = true;
+
+COMMIT;
+
+-- Refresh planner statistics (used for estimated totals)
+ANALYZE itineraries;
+ANALYZE comments;
+ANALYZE chain_posts;
+ANALYZE travel_intel;
+ANALYZE women_guides;
+ANALYZE travel_groups;
@@ -0,0 +1,41 @@
+-- ============================================================================
+-- ROUTE MAP LOCATION CACHES
+-- ============================================================================
+-- Purpose: Persist route-map location extraction per plan content hash and
+--          geocoding results per place (services/route_locations.py), so a
+--          route map is one primary-key lookup after its first view
+-- Run time: Instant (new empty tables)
+-- Impact: Zero downtime
+-- ============================================================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS location_extractions (
+    content_hash VARCHAR(64) PRIMARY KEY,  -- sha256(extractor version, destination, plan)
+    itinerary_id VARCHAR(36) REFERENCES itineraries(id) ON DELETE CASCADE,
+    method VARCHAR(20) NOT NULL,           -- ai, fallback
+    waypoints JSON NOT NULL DEFAULT '[]',  -- [{day, location, description, lat?, lng?}]
+    geocoded BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_location_extractions_itinerary
+    ON location_extractions(itinerary_id);
+
+COMMENT ON TABLE location_extractions IS 'Cached day-by-day location extraction for route maps, keyed by plan content hash';
+
+CREATE TABLE IF NOT EXISTS geocode_cache (
+    query_key VARCHAR(255) PRIMARY KEY,    -- normalized (lowercased, collapsed whitespace) query
+    query_text VARCHAR(255) NOT NULL,
+    found BOOLEAN NOT NULL DEFAULT TRUE,   -- FALSE = provider had no match (retried after 7 days)
+    lat DOUBLE PRECISION,
+    lon DOUBLE PRECISION,
+    place_name VARCHAR(500),
+    provider VARCHAR(30) NOT NULL DEFAULT 'mapbox',
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE geocode_cache IS 'Local forward-geocoding cache for route map place names';
+
+COMMIT;
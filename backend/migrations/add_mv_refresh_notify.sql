@@ -0,0 +1,39 @@
+-- ============================================================================
+-- MV REFRESH QUEUE: LISTEN/NOTIFY WAKEUPS
+-- ============================================================================
+-- Purpose: Wake the leader-elected job runner as soon as a refresh is queued
+--          instead of polling process_mv_refresh_queue() every 2 seconds
+-- Channel: mv_refresh (payload = view name)
+-- Run time: < 1 second
+-- Impact: Zero downtime (adds a trigger, no table changes)
+-- ============================================================================
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION notify_mv_refresh_queued()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- NOTIFY is delivered on commit and collapsed per transaction/payload,
+    -- so bursts of statement-level triggers produce a single wakeup
+    PERFORM pg_notify('mv_refresh', NEW.view_name);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_notify_mv_refresh_insert ON mv_refresh_queue;
+CREATE TRIGGER trg_notify_mv_refresh_insert
+AFTER INSERT ON mv_refresh_queue
+FOR EACH ROW
+WHEN (NEW.status = 'pending')
+EXECUTE FUNCTION notify_mv_refresh_queued();
+
+DROP TRIGGER IF EXISTS trg_notify_mv_refresh_update ON mv_refresh_queue;
+CREATE TRIGGER trg_notify_mv_refresh_update
+AFTER UPDATE OF status, refresh_requested_at ON mv_refresh_queue
+FOR EACH ROW
+WHEN (NEW.status = 'pending')
+EXECUTE FUNCTION notify_mv_refresh_queued();
+
+COMMENT ON FUNCTION notify_mv_refresh_queued IS 'NOTIFY mv_refresh when a view refresh is queued (consumed by workers/job_runner.py)';
+
+COMMIT;
@@ -0,0 +1,29 @@
+-- ============================================================================
+-- RECONCILIATION CHECKPOINTS
+-- ============================================================================
+-- Purpose: Let workers/reconciliation_job.py resume an interrupted run from
+--          the last committed chunk instead of rescanning every user
+-- Written: In the same transaction as each chunk's fixes
+-- Run time: < 1 second
+-- Impact: Zero downtime (new table only)
+-- ============================================================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS reconciliation_checkpoints (
+    reconciler TEXT PRIMARY KEY,             -- dashboard_stats, message_conversations, ...
+    run_id TEXT NOT NULL,
+    last_key JSONB,                          -- keyset position, e.g. ["<user_id>"]
+    status TEXT NOT NULL DEFAULT 'running',  -- running, completed
+    rows_scanned BIGINT DEFAULT 0 NOT NULL,
+    discrepancies_found BIGINT DEFAULT 0 NOT NULL,
+    discrepancies_fixed BIGINT DEFAULT 0 NOT NULL,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL,
+
+    CONSTRAINT check_reconciliation_status CHECK (status IN ('running', 'completed'))
+);
+
+COMMENT ON TABLE reconciliation_checkpoints IS 'Keyset progress of the chunked nightly reconciliation job';
+
+COMMIT;
@@ -0,0 +1,21 @@
+-- ============================================================================
+-- THREAD LOADER INDEXES
+-- ============================================================================
+-- Purpose: Parent-id indexes for the recursive CTE in
+--          services/thread_loader.py (each recursion step is an index
+--          lookup of the previous level's ids). chain_posts.parent_id is
+--          already indexed (idx_chain_posts_parent).
+-- Run time: Depends on table size (index builds)
+-- Impact: Zero downtime
+-- ============================================================================
+
+BEGIN;
+
+CREATE INDEX IF NOT EXISTS idx_comments_parent_created
+    ON comments (parent_id, created_at)
+    WHERE is_deleted = false;
+
+CREATE INDEX IF NOT EXISTS idx_travel_intel_parent_created
+    ON travel_intel (parent_intel_id, created_at);
+
+COMMIT;
@@ -0,0 +1,265 @@
+-- ============================================================================
+-- TRAVELER STATS (trigger-maintained contribution counters)
+-- ============================================================================
+-- Purpose: One row of contribution counters per traveler so profile, bootstrap
+--          and scoring reads stop running a COUNT(*) per content type
+--          (models/traveler_stats.py, services/traveler_stats.py)
+-- Updates: Real-time via triggers on itineraries, snaps, safety_ratings,
+--          travel_intel, comments, traveler_certifications and travelers
+-- Repair:  workers/reconciliation_job.py (reconcile_traveler_stats)
+-- Impact: Zero downtime (new table + triggers + backfill)
+-- ============================================================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS traveler_stats (
+    traveler_id VARCHAR(36) PRIMARY KEY REFERENCES travelers(id) ON DELETE CASCADE,
+
+    -- Itinerary stats
+    itinerary_count INT DEFAULT 0 NOT NULL,
+    published_itinerary_count INT DEFAULT 0 NOT NULL,
+    itinerary_upvotes INT DEFAULT 0 NOT NULL,
+
+    -- Contribution stats
+    snap_count INT DEFAULT 0 NOT NULL,
+    safety_rating_count INT DEFAULT 0 NOT NULL,
+    intel_count INT DEFAULT 0 NOT NULL,
+    comment_count INT DEFAULT 0 NOT NULL,
+    certification_count INT DEFAULT 0 NOT NULL,
+
+    -- TRIP token (mirrors travelers.trip_earnings_total)
+    trip_earned DOUBLE PRECISION DEFAULT 0 NOT NULL,
+
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    last_updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+
+-- MAX() lookups for travel-history score normalization
+CREATE INDEX IF NOT EXISTS idx_traveler_stats_itineraries ON traveler_stats(itinerary_count);
+CREATE INDEX IF NOT EXISTS idx_traveler_stats_snaps ON traveler_stats(snap_count);
+CREATE INDEX IF NOT EXISTS idx_traveler_stats_ratings ON traveler_stats(safety_rating_count);
+
+COMMENT ON TABLE traveler_stats IS 'Real-time denormalized contribution counters per traveler';
+COMMENT ON COLUMN traveler_stats.itinerary_upvotes IS 'Sum of upvotes on published, non-deleted itineraries';
+
+
+-- ============================================================================
+-- HELPER FUNCTIONS
+-- ============================================================================
+
+-- ----------------------------------------------------------------------------
+-- Function: bump_traveler_counter
+-- Purpose:  Add a delta to one counter column, creating the row if needed.
+--           The row is only created for travelers that still exist, so
+--           cascaded deletes of a traveler's content don't recreate it.
+-- ----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION bump_traveler_counter(p_traveler_id VARCHAR, p_column TEXT, p_delta INT)
+RETURNS VOID AS $$
+BEGIN
+    IF p_traveler_id IS NULL OR p_delta = 0 THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO traveler_stats (traveler_id)
+    SELECT id FROM travelers WHERE id = p_traveler_id
+    ON CONFLICT (traveler_id) DO NOTHING;
+
+    EXECUTE format(
+        'UPDATE traveler_stats SET %I = GREATEST(0, %I + $1), last_updated_at = CURRENT_TIMESTAMP WHERE traveler_id = $2',
+        p_column, p_column
+    ) USING p_delta, p_traveler_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ----------------------------------------------------------------------------
+-- Function: apply_traveler_itinerary
+-- Purpose:  Add (p_sign = 1) or remove (p_sign = -1) one itinerary row's
+--           contribution to its creator's itinerary counters
+-- ----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION apply_traveler_itinerary(
+    p_traveler_id VARCHAR, p_sign INT, p_is_deleted BOOLEAN, p_is_published BOOLEAN, p_upvotes INT
+)
+RETURNS VOID AS $$
+BEGIN
+    IF p_traveler_id IS NULL OR COALESCE(p_is_deleted, FALSE) THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO traveler_stats (traveler_id)
+    SELECT id FROM travelers WHERE id = p_traveler_id
+    ON CONFLICT (traveler_id) DO NOTHING;
+
+    UPDATE traveler_stats
+    SET itinerary_count = GREATEST(0, itinerary_count + p_sign),
+        published_itinerary_count = GREATEST(0, published_itinerary_count
+            + CASE WHEN COALESCE(p_is_published, FALSE) THEN p_sign ELSE 0 END),
+        itinerary_upvotes = GREATEST(0, itinerary_upvotes
+            + CASE WHEN COALESCE(p_is_published, FALSE) THEN p_sign * COALESCE(p_upvotes, 0) ELSE 0 END),
+        last_updated_at = CURRENT_TIMESTAMP
+    WHERE traveler_id = p_traveler_id;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- ============================================================================
+-- TRIGGER FUNCTIONS
+-- ============================================================================
+
+-- ----------------------------------------------------------------------------
+-- Trigger 1: Itinerary counters (count, published count, upvotes)
+-- Old row's contribution out, new row's contribution in; the UPDATE trigger
+-- only fires for the columns that feed the counters.
+-- ----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION update_traveler_itinerary_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM apply_traveler_itinerary(OLD.created_by_traveler_id, -1, OLD.is_deleted, OLD.is_published, OLD.upvotes);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM apply_traveler_itinerary(NEW.created_by_traveler_id, 1, NEW.is_deleted, NEW.is_published, NEW.upvotes);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_traveler_itinerary_stats ON itineraries;
+CREATE TRIGGER trg_traveler_itinerary_stats
+AFTER INSERT OR DELETE OR UPDATE OF created_by_traveler_id, is_deleted, is_published, upvotes ON itineraries
+FOR EACH ROW EXECUTE FUNCTION update_traveler_itinerary_stats();
+
+-- ----------------------------------------------------------------------------
+-- Trigger 2: Generic per-row counter
+-- TG_ARGV[0] = owner column, TG_ARGV[1] = traveler_stats counter,
+-- TG_ARGV[2] = optional soft-delete column (rows with it TRUE don't count)
+-- ----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION update_traveler_counter()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_owner_column TEXT := TG_ARGV[0];
+    v_counter TEXT := TG_ARGV[1];
+    v_deleted_column TEXT := TG_ARGV[2];
+    v_row JSONB;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        v_row := to_jsonb(OLD);
+        IF NOT COALESCE((v_row ->> v_deleted_column)::BOOLEAN, FALSE) THEN
+            PERFORM bump_traveler_counter(v_row ->> v_owner_column, v_counter, -1);
+        END IF;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        v_row := to_jsonb(NEW);
+        IF NOT COALESCE((v_row ->> v_deleted_column)::BOOLEAN, FALSE) THEN
+            PERFORM bump_traveler_counter(v_row ->> v_owner_column, v_counter, 1);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_traveler_snap_stats ON snaps;
+CREATE TRIGGER trg_traveler_snap_stats
+AFTER INSERT OR DELETE OR UPDATE OF user_id, is_deleted ON snaps
+FOR EACH ROW EXECUTE FUNCTION update_traveler_counter('user_id', 'snap_count', 'is_deleted');
+
+DROP TRIGGER IF EXISTS trg_traveler_rating_stats ON safety_ratings;
+CREATE TRIGGER trg_traveler_rating_stats
+AFTER INSERT OR DELETE OR UPDATE OF traveler_id ON safety_ratings
+FOR EACH ROW EXECUTE FUNCTION update_traveler_counter('traveler_id', 'safety_rating_count');
+
+DROP TRIGGER IF EXISTS trg_traveler_intel_stats ON travel_intel;
+CREATE TRIGGER trg_traveler_intel_stats
+AFTER INSERT OR DELETE OR UPDATE OF traveler_id ON travel_intel
+FOR EACH ROW EXECUTE FUNCTION update_traveler_counter('traveler_id', 'intel_count');
+
+DROP TRIGGER IF EXISTS trg_traveler_comment_stats ON comments;
+CREATE TRIGGER trg_traveler_comment_stats
+AFTER INSERT OR DELETE OR UPDATE OF user_id ON comments
+FOR EACH ROW EXECUTE FUNCTION update_traveler_counter('user_id', 'comment_count');
+
+DROP TRIGGER IF EXISTS trg_traveler_certification_stats ON traveler_certifications;
+CREATE TRIGGER trg_traveler_certification_stats
+AFTER INSERT OR DELETE OR UPDATE OF traveler_id ON traveler_certifications
+FOR EACH ROW EXECUTE FUNCTION update_traveler_counter('traveler_id', 'certification_count');
+
+-- ----------------------------------------------------------------------------
+-- Trigger 3: New travelers get a row; TRIP earnings are mirrored
+-- ----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION update_traveler_trip_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO traveler_stats (traveler_id, trip_earned)
+    VALUES (NEW.id, COALESCE(NEW.trip_earnings_total, 0))
+    ON CONFLICT (traveler_id) DO UPDATE
+    SET trip_earned = EXCLUDED.trip_earned,
+        last_updated_at = CURRENT_TIMESTAMP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_traveler_trip_stats ON travelers;
+CREATE TRIGGER trg_traveler_trip_stats
+AFTER INSERT OR UPDATE OF trip_earnings_total ON travelers
+FOR EACH ROW EXECUTE FUNCTION update_traveler_trip_stats();
+
+
+-- ============================================================================
+-- BACKFILL
+-- ============================================================================
+
+INSERT INTO traveler_stats (
+    traveler_id,
+    itinerary_count, published_itinerary_count, itinerary_upvotes,
+    snap_count, safety_rating_count, intel_count, comment_count, certification_count,
+    trip_earned
+)
+SELECT
+    t.id,
+    COALESCE(i.itinerary_count, 0),
+    COALESCE(i.published_itinerary_count, 0),
+    COALESCE(i.itinerary_upvotes, 0),
+    COALESCE(s.snap_count, 0),
+    COALESCE(r.safety_rating_count, 0),
+    COALESCE(ti.intel_count, 0),
+    COALESCE(c.comment_count, 0),
+    COALESCE(tc.certification_count, 0),
+    COALESCE(t.trip_earnings_total, 0)
+FROM travelers t
+LEFT JOIN (
+    SELECT created_by_traveler_id AS traveler_id,
+           COUNT(*) AS itinerary_count,
+           COUNT(*) FILTER (WHERE is_published = TRUE) AS published_itinerary_count,
+           COALESCE(SUM(upvotes) FILTER (WHERE is_published = TRUE), 0)::INT AS itinerary_upvotes
+    FROM itineraries
+    WHERE is_deleted = FALSE
+    GROUP BY created_by_traveler_id
+) i ON i.traveler_id = t.id
+LEFT JOIN (
+    SELECT user_id AS traveler_id, COUNT(*) AS snap_count
+    FROM snaps WHERE is_deleted = FALSE GROUP BY user_id
+) s ON s.traveler_id = t.id
+LEFT JOIN (
+    SELECT traveler_id, COUNT(*) AS safety_rating_count FROM safety_ratings GROUP BY traveler_id
+) r ON r.traveler_id = t.id
+LEFT JOIN (
+    SELECT traveler_id, COUNT(*) AS intel_count FROM travel_intel GROUP BY traveler_id
+) ti ON ti.traveler_id = t.id
+LEFT JOIN (
+    SELECT user_id AS traveler_id, COUNT(*) AS comment_count FROM comments GROUP BY user_id
+) c ON c.traveler_id = t.id
+LEFT JOIN (
+    SELECT traveler_id, COUNT(*) AS certification_count FROM traveler_certifications GROUP BY traveler_id
+) tc ON tc.traveler_id = t.id
+ON CONFLICT (traveler_id) DO UPDATE SET
+    itinerary_count = EXCLUDED.itinerary_count,
+    published_itinerary_count = EXCLUDED.published_itinerary_count,
+    itinerary_upvotes = EXCLUDED.itinerary_upvotes,
+    snap_count = EXCLUDED.snap_count,
+    safety_rating_count = EXCLUDED.safety_rating_count,
+    intel_count = EXCLUDED.intel_count,
+    comment_count = EXCLUDED.comment_count,
+    certification_count = EXCLUDED.certification_count,
+    trip_earned = EXCLUDED.trip_earned,
+    last_updated_at = CURRENT_TIMESTAMP;
+
+COMMIT;
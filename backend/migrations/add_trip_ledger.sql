@@ -0,0 +1,69 @@
+-- ============================================================================
+-- TRIP LEDGER (append-only TRIP token transactions + balance snapshots)
+-- ============================================================================
+-- Purpose: Every TRIP award / spend / transfer is appended to trip_ledger and
+--          the travelers totals are adjusted with one atomic UPDATE in the
+--          same transaction (utils/trip_economy.py). trip_balance_snapshots
+--          records the hourly check of those totals against the ledger.
+-- Run time: Seconds (one opening entry per traveler with TRIP activity)
+-- Impact: Zero downtime
+-- ============================================================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS trip_ledger (
+    id BIGSERIAL PRIMARY KEY,
+    traveler_id VARCHAR(36) NOT NULL REFERENCES travelers(id) ON DELETE CASCADE,
+    entry_type VARCHAR(20) NOT NULL,  -- earn, spend, adjustment
+    transaction_type VARCHAR(50) NOT NULL,
+    amount DOUBLE PRECISION NOT NULL,  -- signed: spends are negative
+    balance_after DOUBLE PRECISION,
+    reference_id VARCHAR(100),
+    transfer_id VARCHAR(36),
+    idempotency_key VARCHAR(200) UNIQUE,
+    description TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_trip_ledger_traveler ON trip_ledger (traveler_id, id);
+
+CREATE TABLE IF NOT EXISTS trip_balance_snapshots (
+    id BIGSERIAL PRIMARY KEY,
+    traveler_id VARCHAR(36) NOT NULL REFERENCES travelers(id) ON DELETE CASCADE,
+    ledger_entry_id BIGINT NOT NULL,
+    balance DOUBLE PRECISION NOT NULL,
+    earned DOUBLE PRECISION NOT NULL,
+    spent DOUBLE PRECISION NOT NULL,
+    ledger_balance DOUBLE PRECISION NOT NULL,
+    drift DOUBLE PRECISION NOT NULL DEFAULT 0,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_trip_snapshots_traveler ON trip_balance_snapshots (traveler_id, id);
+CREATE INDEX IF NOT EXISTS idx_trip_snapshots_created ON trip_balance_snapshots (created_at);
+
+-- Opening entries so the ledger sums match the existing totals
+INSERT INTO trip_ledger (traveler_id, entry_type, transaction_type, amount, description, idempotency_key)
+SELECT id, 'earn', 'opening_balance', COALESCE(trip_earnings_total, 0),
+       'Opening balance (earned before the ledger)', 'opening:earn:' || id
+FROM travelers
+WHERE COALESCE(trip_earnings_total, 0) <> 0
+ON CONFLICT (idempotency_key) DO NOTHING;
+
+INSERT INTO trip_ledger (traveler_id, entry_type, transaction_type, amount, description, idempotency_key)
+SELECT id, 'spend', 'opening_balance', -COALESCE(trip_spent_total, 0),
+       'Opening balance (spent before the ledger)', 'opening:spend:' || id
+FROM travelers
+WHERE COALESCE(trip_spent_total, 0) <> 0
+ON CONFLICT (idempotency_key) DO NOTHING;
+
+-- Balances that never matched earned - spent
+INSERT INTO trip_ledger (traveler_id, entry_type, transaction_type, amount, description, idempotency_key)
+SELECT id, 'adjustment', 'opening_balance',
+       COALESCE(trip_token_balance, 0) - (COALESCE(trip_earnings_total, 0) - COALESCE(trip_spent_total, 0)),
+       'Opening balance adjustment', 'opening:adjustment:' || id
+FROM travelers
+WHERE COALESCE(trip_token_balance, 0) - (COALESCE(trip_earnings_total, 0) - COALESCE(trip_spent_total, 0)) <> 0
+ON CONFLICT (idempotency_key) DO NOTHING;
+
+COMMIT;
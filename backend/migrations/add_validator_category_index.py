@@ -0,0 +1,45 @@
+"""
+Migration: Add the validator_categories index and backfill it
+Run this with: python migrations/add_validator_category_index.py
+
+Creates validator_categories (models/validator_category.py) from every
+validator's permissions, plus a (validator_id, status) index on
+validator_assignments for the open-assignment counts used to balance load.
+Run after add_validator_categories.py (allowed_categories must exist).
+Safe to re-run: the backfill replaces each validator's rows.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from app import create_app
+from extensions import db
+from models.validator_category import ValidatorCategory
+from services.validator_index import ValidatorIndex
+
+
+def migrate():
+    """Create validator_categories and backfill it from validator_permissions"""
+    app = create_app()
+
+    with app.app_context():
+        print("=== Adding Validator Category Index ===\n")
+
+        ValidatorCategory.__table__.create(db.engine, checkfirst=True)
+        print("[OK] validator_categories table ready")
+
+        db.session.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_validator_assignments_validator_status
+            ON validator_assignments (validator_id, status)
+        """))
+        db.session.commit()
+        print("[OK] validator_assignments (validator_id, status) index ready")
+
+        total = ValidatorIndex.rebuild()
+        print(f"\n=== Validator category index backfilled ({total} rows) ===")
+
+
+if __name__ == '__main__':
+    migrate()
@@ -0,0 +1,72 @@
+-- ============================================================================
+-- VOTE STREAM PROCESSING (idempotent stream consumer + incremental counters)
+-- ============================================================================
+-- Purpose: vote_events becomes the idempotency record for
+--          workers/vote_stream_worker.py: one row per applied request_id,
+--          written in the same transaction as the votes change. Stored
+--          upvotes/downvotes are moved by deltas from then on, so they are
+--          recounted from votes once here as the starting baseline.
+-- Run time: Seconds (one pass over vote_events and votes)
+-- Impact: Zero downtime. Run before deploying the worker; votes cast between
+--         the recount and the deploy are corrected by the daily reconciliation.
+-- ============================================================================
+
+BEGIN;
+
+-- Stream entry id for replay / audit (NULL when applied by the Celery fallback)
+ALTER TABLE vote_events ADD COLUMN IF NOT EXISTS stream_id VARCHAR(32);
+
+-- Keep the first event of any duplicated request_id, then enforce uniqueness
+DELETE FROM vote_events a
+USING vote_events b
+WHERE a.request_id = b.request_id
+  AND a.ctid > b.ctid;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_vote_events_request_id ON vote_events(request_id);
+
+-- Counter baseline
+WITH counts AS (
+    SELECT project_id,
+           COUNT(*) FILTER (WHERE vote_type = 'up') AS upvotes,
+           COUNT(*) FILTER (WHERE vote_type = 'down') AS downvotes
+    FROM votes
+    GROUP BY project_id
+)
+UPDATE itineraries i
+SET upvotes = COALESCE(c.upvotes, 0),
+    downvotes = COALESCE(c.downvotes, 0)
+FROM itineraries src
+LEFT JOIN counts c ON c.project_id = src.id
+WHERE i.id = src.id
+  AND (i.upvotes IS DISTINCT FROM COALESCE(c.upvotes, 0)
+       OR i.downvotes IS DISTINCT FROM COALESCE(c.downvotes, 0));
+
+WITH counts AS (
+    SELECT project_id,
+           COUNT(*) FILTER (WHERE vote_type = 'up') AS upvotes,
+           COUNT(*) FILTER (WHERE vote_type = 'down') AS downvotes
+    FROM votes
+    GROUP BY project_id
+)
+UPDATE projects p
+SET upvotes = COALESCE(c.upvotes, 0),
+    downvotes = COALESCE(c.downvotes, 0)
+FROM projects src
+LEFT JOIN counts c ON c.project_id = src.id
+WHERE p.id = src.id
+  AND (p.upvotes IS DISTINCT FROM COALESCE(c.upvotes, 0)
+       OR p.downvotes IS DISTINCT FROM COALESCE(c.downvotes, 0));
+
+UPDATE content_index ci
+SET upvotes = src.upvotes,
+    downvotes = src.downvotes,
+    updated_at = NOW()
+FROM (
+    SELECT id, COALESCE(upvotes, 0) AS upvotes, COALESCE(downvotes, 0) AS downvotes FROM itineraries
+    UNION ALL
+    SELECT id, COALESCE(upvotes, 0), COALESCE(downvotes, 0) FROM projects
+) src
+WHERE ci.id = src.id
+  AND (ci.upvotes <> src.upvotes OR ci.downvotes <> src.downvotes);
+
+COMMIT;
@@ -23,6 +23,7 @@ from .project_update import ProjectUpdate
 from .project_view import ProjectView
 from .validator_assignment import ValidatorAssignment
 from .validator_permissions import ValidatorPermissions
+from .validator_category import ValidatorCategory
 from .investor_request import InvestorRequest
 from .admin_scoring_config import AdminScoringConfig
 
@@ -31,12 +32,24 @@ from .traveler import Traveler
 from .itinerary import Itinerary
 from .itinerary_view import ItineraryView
 from .safety_rating import SafetyRating
+from .itinerary_safety_stats import ItinerarySafetyStats
+from .itinerary_route import ItineraryRoute
 from .travel_intel import TravelIntel
 from .day_plan import DayPlan
 from .embedded_business import EmbeddedBusiness
 from .hidden_gem import HiddenGem
 from .safety_alert import SafetyAlert
+from .geo_point import GeoPoint
+from .location_cache import LocationExtraction, GeocodeCache
+from .content_index import ContentIndex
 from .traveler_certification import TravelerCertification
+from .traveler_stats import TravelerStats
+from .alert_subscription import AlertSubscription
+from .email_outbox import OutboxEmail
+from .chain_transaction import ChainTransaction, SignerNonce
+from .trip_ledger import TripLedgerEntry, TripBalanceSnapshot
+from .content_dense_id import ContentDenseId
+from .vote_event import VoteEvent
 from .sbt_verification import SBTVerification
 from .travel_group import TravelGroup, travel_group_itineraries
 from .travel_group_member import TravelGroupMember
@@ -82,6 +95,7 @@ __all__ = [
     'ProjectView',
     'ValidatorAssignment',
     'ValidatorPermissions',
+    'ValidatorCategory',
     'InvestorRequest',
     'AdminScoringConfig',
     # New TripIt Models (Phase 1)
@@ -89,12 +103,27 @@ __all__ = [
     'Itinerary',
     'ItineraryView',
     'SafetyRating',
+    'ItinerarySafetyStats',
+    'ItineraryRoute',
     'TravelIntel',
     'DayPlan',
     'EmbeddedBusiness',
     'HiddenGem',
     'SafetyAlert',
+    'GeoPoint',
+    'LocationExtraction',
+    'GeocodeCache',
+    'ContentIndex',
     'TravelerCertification',
+    'TravelerStats',
+    'AlertSubscription',
+    'OutboxEmail',
+    'ChainTransaction',
+    'SignerNonce',
+    'TripLedgerEntry',
+    'TripBalanceSnapshot',
+    'ContentDenseId',
+    'VoteEvent',
     'SBTVerification',
     'TravelGroup',
     'TravelGroupMember',
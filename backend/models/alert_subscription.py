@@ -0,0 +1,23 @@
+"""
+Alert subscription model - topic -> traveler inverted index for AI alerts
+"""
+from extensions import db
+
+
+class AlertSubscription(db.Model):
+    """
+    One (topic, traveler) pair an AI alert can be routed on
+
+    Topics are 'destination:<name>', 'interest:<name>' and 'area:<geohash-4>'
+    (a ~20x40km cell), derived from the traveler's profile and the
+    itineraries they have published. An alert resolves its audience with one
+    primary-key range scan per topic. Maintained by services/alert_audience.py.
+    """
+
+    __tablename__ = 'alert_subscriptions'
+
+    topic = db.Column(db.String(150), primary_key=True)
+    traveler_id = db.Column(db.String(36), db.ForeignKey('travelers.id', ondelete='CASCADE'), primary_key=True, index=True)
+
+    def __repr__(self):
+        return f'<AlertSubscription {self.topic} -> {self.traveler_id}>'
@@ -0,0 +1,93 @@
+"""
+Chain transaction models - durable queue of backend-signed SBT transactions
+"""
+from datetime import datetime
+from uuid import uuid4
+
+from extensions import db
+
+
+class ChainTransaction(db.Model):
+    """
+    One queued contract call (SBT mint, reputation update, profile hash update)
+
+    Requests enqueue here instead of sending and waiting for a receipt
+    inside the request. services/chain_transactions.py signs queued rows
+    with sequential nonces, persists the signed transaction before
+    broadcasting it, and a receipt poller applies the outcome to the
+    traveler / SBTVerification rows. Reputation updates for several tokens
+    can share one multicall transaction (same tx_hash). A 'cancel' row is a
+    0-value self-transfer that takes over the nonce of a transaction that was
+    never mined.
+    """
+
+    __tablename__ = 'chain_transactions'
+
+    KINDS = ('mint', 'reputation', 'profile_hash', 'cancel')
+    STATUSES = ('queued', 'submitted', 'confirmed', 'failed')
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid4()))
+    kind = db.Column(db.String(20), nullable=False)
+    traveler_id = db.Column(db.String(36), db.ForeignKey('travelers.id', ondelete='SET NULL'), nullable=True, index=True)
+    sbt_id = db.Column(db.String(256), nullable=True)  # Token id (set on mint confirmation)
+    args = db.Column(db.JSON, nullable=False, default=dict)  # Contract call arguments
+
+    # Submission
+    status = db.Column(db.String(20), default='queued', nullable=False)
+    signer_address = db.Column(db.String(42), nullable=True)
+    nonce = db.Column(db.BigInteger, nullable=True)
+    tx_hash = db.Column(db.String(66), nullable=True, index=True)
+    raw_tx = db.Column(db.Text, nullable=True)  # Signed transaction, re-broadcast if the node drops it
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.Text, nullable=True)
+
+    # Receipt
+    block_number = db.Column(db.BigInteger, nullable=True)
+    gas_used = db.Column(db.BigInteger, nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    submitted_at = db.Column(db.DateTime, nullable=True)
+    confirmed_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('idx_chain_tx_status', 'status', 'created_at'),
+        db.Index('idx_chain_tx_pending_kind', 'kind', 'sbt_id', 'status'),
+        # At most one mint in flight per traveler
+        db.Index('uq_chain_tx_active_mint', 'traveler_id', unique=True,
+                 postgresql_where=db.text("kind = 'mint' AND status IN ('queued', 'submitted')"),
+                 sqlite_where=db.text("kind = 'mint' AND status IN ('queued', 'submitted')")),
+    )
+
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'sbt_id': self.sbt_id,
+            'tx_hash': self.tx_hash,
+            'block_number': self.block_number,
+            'gas_used': self.gas_used,
+            'error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'confirmed_at': self.confirmed_at.isoformat() if self.confirmed_at else None,
+        }
+
+    def __repr__(self):
+        return f'<ChainTransaction {self.kind} {self.status} nonce={self.nonce}>'
+
+
+class SignerNonce(db.Model):
+    """
+    Next nonce of a backend signer
+
+    Submitters lock this row while assigning nonces, so concurrent workers
+    never sign two transactions with the same nonce.
+    """
+
+    __tablename__ = 'signer_nonces'
+
+    address = db.Column(db.String(42), primary_key=True)
+    chain_id = db.Column(db.BigInteger, nullable=True)
+    next_nonce = db.Column(db.BigInteger, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
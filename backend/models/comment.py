@@ -29,9 +29,10 @@ class Comment(db.Model):
     # Self-referential relationship for nested comments
     replies = db.relationship('Comment', backref=db.backref('parent', remote_side=[id]),
                                cascade='all, delete-orphan')
+    author = db.relationship('Traveler', foreign_keys=[user_id])
 
-    def to_dict(self, include_author=False):
-        """Convert to dictionary"""
+    def to_dict(self, include_author=False, reply_count=None):
+        """Convert to dictionary (reply_count: precomputed, skips loading replies)"""
         data = {
             'id': self.id,
             'project_id': self.project_id,
@@ -43,10 +44,10 @@ class Comment(db.Model):
             'is_deleted': self.is_deleted,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
-            'reply_count': len(self.replies),
+            'reply_count': len(self.replies) if reply_count is None else reply_count,
         }
         if include_author:
-            data['author'] = self.author.to_dict()
+            data['author'] = self.author.to_dict() if self.author else None
         return data
 
     def __repr__(self):
@@ -0,0 +1,22 @@
+"""
+Content dense id model - small integer ids for projects and itineraries
+"""
+from datetime import datetime
+
+from extensions import db
+
+
+class ContentDenseId(db.Model):
+    """
+    Permanent content id (project or itinerary UUID) -> dense integer mapping
+
+    Dense ids are bit offsets into the per-user vote bitmaps
+    (services/vote_bitmaps.py). They are assigned once, in first-seen order,
+    and never reused; 0 is reserved so a bitmap can be created empty.
+    """
+
+    __tablename__ = 'content_dense_ids'
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer(), 'sqlite'), primary_key=True, autoincrement=True)
+    content_id = db.Column(db.String(36), nullable=False, unique=True)  # projects.id or itineraries.id
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
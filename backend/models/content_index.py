@@ -0,0 +1,67 @@
+"""
+Content index model - one row per project or itinerary
+"""
+from datetime import datetime
+
+from extensions import db
+
+
+class ContentIndex(db.Model):
+    """
+    Cross-type directory of projects and itineraries
+
+    Keyed by the content id, so "which table is this id in?" is one primary
+    key lookup, and mixed listings (newest, top score, by owner, featured,
+    search) are one indexed query instead of two queries merged in Python.
+    Maintained by services/content_index.py on every write.
+    """
+
+    __tablename__ = 'content_index'
+
+    id = db.Column(db.String(36), primary_key=True)  # projects.id / itineraries.id
+    content_type = db.Column(db.String(20), nullable=False)  # project, itinerary
+    owner_id = db.Column(db.String(36), nullable=True)  # projects.user_id / itineraries.created_by_traveler_id
+
+    # Status flags
+    is_deleted = db.Column(db.Boolean, default=False, nullable=False)
+    is_published = db.Column(db.Boolean, default=True, nullable=False)  # Projects are always published
+    is_featured = db.Column(db.Boolean, default=False, nullable=False)
+
+    # Sort keys
+    created_at = db.Column(db.DateTime, nullable=True)
+    proof_score = db.Column(db.Float, default=0.0, nullable=False)
+    upvotes = db.Column(db.Integer, default=0, nullable=False)
+    downvotes = db.Column(db.Integer, default=0, nullable=False)
+    comment_count = db.Column(db.Integer, default=0, nullable=False)
+
+    # Listing payload
+    title = db.Column(db.String(300), nullable=True)
+    search_text = db.Column(db.Text, nullable=True)  # Lower-cased searchable fields
+    card = db.Column(db.JSON, nullable=False, default=dict)  # Compact card for lists
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('idx_content_index_newest', 'is_deleted', 'created_at', 'id'),
+        db.Index('idx_content_index_score', 'is_deleted', 'proof_score', 'id'),
+        db.Index('idx_content_index_owner', 'owner_id', 'is_deleted', 'created_at'),
+        db.Index('idx_content_index_featured', 'is_featured', 'is_deleted', 'created_at'),
+    )
+
+    def to_card(self):
+        """Card payload plus the index's live counters"""
+        return {
+            **(self.card or {}),
+            'id': self.id,
+            'content_type': self.content_type,
+            'owner_id': self.owner_id,
+            'is_featured': self.is_featured,
+            'proof_score': self.proof_score,
+            'upvotes': self.upvotes,
+            'downvotes': self.downvotes,
+            'comment_count': self.comment_count,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
+
+    def __repr__(self):
+        return f'<ContentIndex {self.content_type} {self.id[:8]}...>'
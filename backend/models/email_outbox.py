@@ -0,0 +1,52 @@
+"""
+Email outbox model - durable queue of outgoing emails
+"""
+from datetime import datetime
+from uuid import uuid4
+
+from extensions import db
+
+
+class OutboxEmail(db.Model):
+    """
+    One queued email (ZeptoMail payload) awaiting delivery
+
+    EmailService enqueues here instead of calling the provider from the
+    request; services/email_outbox.py drains due rows with a pooled HTTP
+    session, groups identical messages into batch sends, applies per-domain
+    rate limits and retries failures with backoff.
+    """
+
+    __tablename__ = 'email_outbox'
+
+    STATUSES = ('pending', 'sending', 'sent', 'failed')
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid4()))
+    idempotency_key = db.Column(db.String(128), unique=True, nullable=False)
+    kind = db.Column(db.String(50), nullable=False)  # welcome, admin_otp, ai_alert, ...
+
+    # Recipient (rate limits are per domain)
+    to_address = db.Column(db.String(255), nullable=False)
+    recipient_domain = db.Column(db.String(255), nullable=False)
+
+    # Provider payload; content_hash groups identical messages for batch sends
+    payload = db.Column(db.JSON, nullable=False)
+    content_hash = db.Column(db.String(64), nullable=False)
+
+    # Delivery state
+    status = db.Column(db.String(20), default='pending', nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('idx_email_outbox_due', 'status', 'next_attempt_at'),
+        db.Index('idx_email_outbox_sent', 'status', 'sent_at'),
+    )
+
+    def __repr__(self):
+        return f'<OutboxEmail {self.kind} -> {self.to_address} ({self.status})>'
@@ -0,0 +1,56 @@
+"""
+Geo point model - numeric, geohash-indexed copy of every stored GPS coordinate
+"""
+from datetime import datetime
+
+from extensions import db
+
+
+class GeoPoint(db.Model):
+    """
+    One indexed coordinate of an itinerary, safety alert, hidden gem or intel
+
+    The source models keep their "lat,lon" strings; services/geo_index.py
+    mirrors them here on every write so radius / bounding-box lookups are
+    geohash-prefix range scans instead of full-table parses.
+    """
+
+    __tablename__ = 'geo_points'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+
+    # Source row
+    entity_type = db.Column(db.String(30), nullable=False)  # itinerary, safety_alert, hidden_gem, travel_intel
+    entity_id = db.Column(db.String(36), nullable=False)
+    itinerary_id = db.Column(db.String(36), nullable=True, index=True)
+    kind = db.Column(db.String(20), nullable=False)  # start, end, waypoint, alert, gem, intel
+    seq = db.Column(db.Integer, default=0, nullable=False)  # Order along the route
+
+    # Coordinates
+    lat = db.Column(db.Float, nullable=False)
+    lon = db.Column(db.Float, nullable=False)
+    geohash = db.Column(db.String(12), nullable=False)
+
+    # Active alerts / published itineraries only show up in "near me" queries
+    is_active = db.Column(db.Boolean, default=True, nullable=False)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Pattern ops so `geohash LIKE 'prefix%'` is an index range scan under any collation
+        db.Index('idx_geo_points_type_geohash', 'entity_type', 'geohash',
+                 postgresql_ops={'geohash': 'varchar_pattern_ops'}),
+        db.Index('idx_geo_points_entity', 'entity_type', 'entity_id'),
+    )
+
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'entity_type': self.entity_type,
+            'entity_id': self.entity_id,
+            'itinerary_id': self.itinerary_id,
+            'kind': self.kind,
+            'lat': self.lat,
+            'lon': self.lon,
+            'geohash': self.geohash,
+        }
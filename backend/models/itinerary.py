@@ -42,7 +42,7 @@ class Itinerary(db.Model):
     budget_currency = db.Column(db.String(3), nullable=True, default='USD')
 
     # Route & GPS
-    route_gpx = db.Column(db.Text, nullable=True)  # GPX format for route
+    route_gpx = db.deferred(db.Column(db.Text, nullable=True))  # Raw GPX upload; parsed geometry lives in itinerary_routes
     route_map_url = db.Column(db.String(500), nullable=True)  # URL to map
     demo_url = db.Column(db.String(500), nullable=True)  # Booking/blog/reference link
     route_waypoints = db.Column(db.JSON, default=[])  # Array of GPS points: [{lat, lon, name, elevation}, ...]
@@ -121,6 +121,8 @@ class Itinerary(db.Model):
     safety_alerts_list = db.relationship('SafetyAlert', backref='itinerary', lazy='dynamic', cascade='all, delete-orphan')
     safety_ratings_list = db.relationship('SafetyRating', backref='itinerary', lazy='dynamic', cascade='all, delete-orphan')
     travel_intel_list = db.relationship('TravelIntel', backref='itinerary', lazy='dynamic', cascade='all, delete-orphan')
+    # Joined so list pages get bbox + preview without a query per row (heavy columns are deferred)
+    route_geometry = db.relationship('ItineraryRoute', uselist=False, lazy='joined', cascade='all, delete-orphan')
     # travel_groups relationship defined in TravelGroup model with backref
 
     def calculate_proof_score(self):
@@ -179,7 +181,8 @@ class Itinerary(db.Model):
             'estimated_budget_max': self.estimated_budget_max,
             'budget_amount': self.budget_amount,
             'budget_currency': self.budget_currency,
-            'route_gpx': self.route_gpx,
+            # Raw GPX stays out of list payloads: bbox + preview here, full track via /route
+            'route': self.route_geometry.to_summary_dict() if self.route_geometry else None,
             'route_map_url': self.route_map_url,
             'demo_url': self.demo_url,
             'best_season': self.best_season,
@@ -0,0 +1,117 @@
+"""
+Itinerary route model - parsed, compact route geometry
+"""
+import hashlib
+import json
+from datetime import datetime
+
+from extensions import db
+from utils.route_geometry import RESOLUTIONS, build_geometry, parse_gpx, points_from_waypoints
+
+
+class ItineraryRoute(db.Model):
+    """
+    Route geometry of an itinerary, computed once when the GPX/waypoints change
+
+    List responses only read the summary columns and the preview polyline;
+    the medium/full polylines and elevations are deferred and served by the
+    dedicated route endpoint.
+    """
+
+    __tablename__ = 'itinerary_routes'
+
+    itinerary_id = db.Column(db.String(36), db.ForeignKey('itineraries.id', ondelete='CASCADE'), primary_key=True)
+
+    source = db.Column(db.String(20), nullable=False)  # gpx, waypoints
+    source_hash = db.Column(db.String(40), nullable=False)  # sha1 of the input, skips unchanged re-uploads
+
+    # Summary
+    point_count = db.Column(db.Integer, default=0, nullable=False)
+    min_lat = db.Column(db.Float, nullable=False)
+    min_lon = db.Column(db.Float, nullable=False)
+    max_lat = db.Column(db.Float, nullable=False)
+    max_lon = db.Column(db.Float, nullable=False)
+    distance_km = db.Column(db.Float, default=0.0, nullable=False)
+    elevation_gain_m = db.Column(db.Float, nullable=True)
+    elevation_loss_m = db.Column(db.Float, nullable=True)
+    min_elevation_m = db.Column(db.Float, nullable=True)
+    max_elevation_m = db.Column(db.Float, nullable=True)
+
+    # Encoded polylines per resolution (precision 5)
+    preview_polyline = db.Column(db.Text, nullable=False)
+    preview_point_count = db.Column(db.Integer, default=0, nullable=False)
+    medium_polyline = db.deferred(db.Column(db.Text, nullable=False))
+    medium_point_count = db.Column(db.Integer, default=0, nullable=False)
+    full_polyline = db.deferred(db.Column(db.Text, nullable=False))
+    full_point_count = db.Column(db.Integer, default=0, nullable=False)
+    full_elevations = db.deferred(db.Column(db.Text, nullable=True))  # Encoded meters, aligned with full_polyline
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @staticmethod
+    def source_for(itinerary):
+        """(source, payload) the geometry is built from: GPX wins over waypoints"""
+        if itinerary.route_gpx and itinerary.route_gpx.strip():
+            return 'gpx', itinerary.route_gpx
+        if itinerary.route_waypoints:
+            return 'waypoints', json.dumps(itinerary.route_waypoints, sort_keys=True)
+        return None, None
+
+    @classmethod
+    def sync_from_itinerary(cls, itinerary):
+        """
+        (Re)build the geometry if the itinerary's GPX/waypoints changed
+
+        Runs in the caller's transaction. Raises RouteGeometryError for
+        unparseable GPX so the upload can be rejected.
+        """
+        source, payload = cls.source_for(itinerary)
+        route = itinerary.route_geometry
+
+        if source is None:
+            itinerary.route_geometry = None  # delete-orphan removes the row
+            return None
+
+        source_hash = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+        if route and route.source_hash == source_hash:
+            return route
+
+        points = parse_gpx(payload) if source == 'gpx' else points_from_waypoints(itinerary.route_waypoints)
+        geometry = build_geometry(points)
+        if geometry is None:
+            itinerary.route_geometry = None
+            return None
+
+        if route is None:
+            route = cls()
+            itinerary.route_geometry = route
+
+        route.source = source
+        route.source_hash = source_hash
+        for key, value in geometry.items():
+            setattr(route, key, value)
+        route.updated_at = datetime.utcnow()
+        return route
+
+    def polyline_for(self, resolution):
+        """Encoded polyline of one of RESOLUTIONS"""
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f'Unknown resolution: {resolution}')
+        return getattr(self, f'{resolution}_polyline')
+
+    def bbox(self):
+        return [self.min_lat, self.min_lon, self.max_lat, self.max_lon]
+
+    def to_summary_dict(self):
+        """Compact route info for list/detail payloads"""
+        return {
+            'bbox': self.bbox(),
+            'distance_km': self.distance_km,
+            'elevation_gain_m': self.elevation_gain_m,
+            'elevation_loss_m': self.elevation_loss_m,
+            'point_count': self.point_count,
+            'preview_polyline': self.preview_polyline,
+            'preview_point_count': self.preview_point_count,
+            'source': self.source,
+            'version': self.source_hash[:12],
+        }
@@ -0,0 +1,145 @@
+"""
+Itinerary safety stats model (running safety-rating aggregates)
+"""
+from datetime import datetime
+
+from sqlalchemy import text
+
+from extensions import db
+
+
+class ItinerarySafetyStats(db.Model):
+    """
+    Running count/sum aggregates of safety ratings per itinerary
+
+    Maintained atomically by apply_rating_delta() in the same transaction as
+    the rating write, so averages never require reloading every rating.
+    """
+
+    __tablename__ = 'itinerary_safety_stats'
+
+    # Sub-score dimensions with their SafetyRating column
+    DIMENSIONS = {
+        'accommodation': 'accommodation_safety',
+        'route': 'route_safety',
+        'community': 'community_safety',
+        'women_safety': 'women_safety_score',
+    }
+
+    itinerary_id = db.Column(db.String(36), db.ForeignKey('itineraries.id', ondelete='CASCADE'), primary_key=True)
+
+    # Overall score, all ratings and verified-traveler ratings only
+    ratings_count = db.Column(db.Integer, default=0, nullable=False)
+    ratings_sum = db.Column(db.Integer, default=0, nullable=False)
+    verified_count = db.Column(db.Integer, default=0, nullable=False)
+    verified_sum = db.Column(db.Integer, default=0, nullable=False)
+
+    # Per-dimension sums (sub-scores are optional, so each has its own count)
+    accommodation_count = db.Column(db.Integer, default=0, nullable=False)
+    accommodation_sum = db.Column(db.Integer, default=0, nullable=False)
+    route_count = db.Column(db.Integer, default=0, nullable=False)
+    route_sum = db.Column(db.Integer, default=0, nullable=False)
+    community_count = db.Column(db.Integer, default=0, nullable=False)
+    community_sum = db.Column(db.Integer, default=0, nullable=False)
+    women_safety_count = db.Column(db.Integer, default=0, nullable=False)
+    women_safety_sum = db.Column(db.Integer, default=0, nullable=False)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    @classmethod
+    def rating_values(cls, rating) -> dict:
+        """Snapshot of the columns a rating contributes to the aggregates"""
+        values = {
+            'score': rating.overall_safety_score,
+            'verified': bool(rating.verified_traveler),
+        }
+        for dimension, column in cls.DIMENSIONS.items():
+            values[dimension] = getattr(rating, column)
+        return values
+
+    @classmethod
+    def apply_rating_delta(cls, itinerary_id: str, old: dict = None, new: dict = None) -> dict:
+        """
+        Atomically fold a rating insert/update/delete into the aggregates
+
+        Args:
+            itinerary_id: Itinerary the rating belongs to
+            old: rating_values() before the change (None for inserts)
+            new: rating_values() after the change (None for deletes)
+
+        Returns:
+            The updated aggregate row as a dict (caller commits)
+        """
+        deltas = {column: 0 for column in cls._aggregate_columns()}
+
+        for values, sign in ((old, -1), (new, 1)):
+            if not values or values.get('score') is None:
+                continue
+            deltas['ratings_count'] += sign
+            deltas['ratings_sum'] += sign * int(values['score'])
+            if values.get('verified'):
+                deltas['verified_count'] += sign
+                deltas['verified_sum'] += sign * int(values['score'])
+            for dimension in cls.DIMENSIONS:
+                if values.get(dimension) is not None:
+                    deltas[f'{dimension}_count'] += sign
+                    deltas[f'{dimension}_sum'] += sign * int(values[dimension])
+
+        columns = list(deltas)
+        # Single upsert: concurrent raters add to the row instead of overwriting it
+        row = db.session.execute(text(f"""
+            INSERT INTO itinerary_safety_stats (itinerary_id, {", ".join(columns)}, updated_at)
+            VALUES (:itinerary_id, {", ".join(f":{c}" for c in columns)}, CURRENT_TIMESTAMP)
+            ON CONFLICT (itinerary_id) DO UPDATE SET
+                {", ".join(f"{c} = itinerary_safety_stats.{c} + EXCLUDED.{c}" for c in columns)},
+                updated_at = CURRENT_TIMESTAMP
+            RETURNING {", ".join(columns)}
+        """), {'itinerary_id': itinerary_id, **deltas}).mappings().first()
+
+        return dict(row)
+
+    @classmethod
+    def _aggregate_columns(cls):
+        columns = ['ratings_count', 'ratings_sum', 'verified_count', 'verified_sum']
+        for dimension in cls.DIMENSIONS:
+            columns += [f'{dimension}_count', f'{dimension}_sum']
+        return columns
+
+    @staticmethod
+    def safety_score_from(stats: dict):
+        """
+        (safety_score, safety_ratings_count) as shown on the itinerary
+
+        Verified ratings win; all ratings are the fallback when none are verified.
+        """
+        if stats.get('verified_count'):
+            return round(stats['verified_sum'] / stats['verified_count'], 2), stats['verified_count']
+        if stats.get('ratings_count'):
+            return round(stats['ratings_sum'] / stats['ratings_count'], 2), stats['ratings_count']
+        return 0, 0
+
+    def to_dict(self):
+        """Compact stats for the API"""
+        stats = {column: getattr(self, column) or 0 for column in self._aggregate_columns()}
+        safety_score, counted = self.safety_score_from(stats)
+
+        def avg(total, count):
+            return round(total / count, 2) if count else None
+
+        return {
+            'itinerary_id': self.itinerary_id,
+            'safety_score': safety_score,
+            'safety_ratings_count': counted,
+            'ratings_count': stats['ratings_count'],
+            'verified_count': stats['verified_count'],
+            'average_all': avg(stats['ratings_sum'], stats['ratings_count']),
+            'average_verified': avg(stats['verified_sum'], stats['verified_count']),
+            'dimensions': {
+                dimension: {
+                    'average': avg(stats[f'{dimension}_sum'], stats[f'{dimension}_count']),
+                    'count': stats[f'{dimension}_count'],
+                }
+                for dimension in self.DIMENSIONS
+            },
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
@@ -0,0 +1,60 @@
+"""
+Location cache models - persisted route-map extraction and geocoding results
+"""
+from datetime import datetime
+
+from extensions import db
+
+
+class LocationExtraction(db.Model):
+    """
+    Day-by-day locations extracted from an itinerary plan
+
+    Keyed by a hash of (extractor version, destination, plan text), so an
+    itinerary is only sent to the AI/fallback extractor again when its plan
+    actually changes.
+    """
+
+    __tablename__ = 'location_extractions'
+
+    content_hash = db.Column(db.String(64), primary_key=True)
+    itinerary_id = db.Column(db.String(36), db.ForeignKey('itineraries.id', ondelete='CASCADE'), nullable=True, index=True)
+
+    method = db.Column(db.String(20), nullable=False)  # ai, fallback
+    waypoints = db.Column(db.JSON, nullable=False, default=list)  # [{day, location, description, lat?, lng?}, ...]
+    geocoded = db.Column(db.Boolean, default=False, nullable=False)  # Coordinates resolved into waypoints
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class GeocodeCache(db.Model):
+    """
+    Local geocoding results, keyed by the normalized place query
+
+    Misses are cached too (found=False) so unknown places are not re-sent to
+    the provider on every view; they are retried after a cool-down.
+    """
+
+    __tablename__ = 'geocode_cache'
+
+    query_key = db.Column(db.String(255), primary_key=True)
+    query_text = db.Column(db.String(255), nullable=False)
+
+    found = db.Column(db.Boolean, default=True, nullable=False)
+    lat = db.Column(db.Float, nullable=True)
+    lon = db.Column(db.Float, nullable=True)
+    place_name = db.Column(db.String(500), nullable=True)
+    provider = db.Column(db.String(30), nullable=False, default='mapbox')
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'query': self.query_text,
+            'found': self.found,
+            'lat': self.lat,
+            'lng': self.lon,
+            'place_name': self.place_name,
+        }
@@ -56,7 +56,7 @@ class Traveler(db.Model):
     # SBT Integration
     sbt_id = db.Column(db.String(256), unique=True, nullable=True, index=True)
     sbt_contract_address = db.Column(db.String(42), nullable=True)
-    sbt_status = db.Column(db.String(50), default='not_issued')  # not_issued, issued, verified, suspended, revoked
+    sbt_status = db.Column(db.String(50), default='not_issued')  # not_issued, minting, issued, verified, suspended, revoked
     sbt_verified_date = db.Column(db.DateTime, nullable=True)
     sbt_blockchain_hash = db.Column(db.String(66), nullable=True)  # Transaction hash
 
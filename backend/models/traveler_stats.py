@@ -0,0 +1,58 @@
+"""
+Traveler stats model (denormalized contribution counters)
+"""
+from datetime import datetime
+
+from extensions import db
+
+
+class TravelerStats(db.Model):
+    """
+    Denormalized contribution counters for each traveler (maintained via triggers)
+
+    Kept current by the triggers in migrations/add_traveler_stats.sql and
+    repaired nightly by workers/reconciliation_job.py. Read through
+    services/traveler_stats.py, which builds a missing row on first access.
+    """
+
+    __tablename__ = 'traveler_stats'
+
+    traveler_id = db.Column(db.String(36), db.ForeignKey('travelers.id', ondelete='CASCADE'), primary_key=True)
+
+    # Itinerary stats
+    itinerary_count = db.Column(db.Integer, default=0, nullable=False)  # is_deleted = FALSE
+    published_itinerary_count = db.Column(db.Integer, default=0, nullable=False)  # ...and is_published = TRUE
+    itinerary_upvotes = db.Column(db.Integer, default=0, nullable=False)  # Upvotes on published itineraries
+
+    # Contribution stats
+    snap_count = db.Column(db.Integer, default=0, nullable=False)  # is_deleted = FALSE
+    safety_rating_count = db.Column(db.Integer, default=0, nullable=False)
+    intel_count = db.Column(db.Integer, default=0, nullable=False)  # Travel intel posts (incl. answers)
+    comment_count = db.Column(db.Integer, default=0, nullable=False)  # Legacy comments
+    certification_count = db.Column(db.Integer, default=0, nullable=False)
+
+    # TRIP token (mirrors travelers.trip_earnings_total)
+    trip_earned = db.Column(db.Float, default=0.0, nullable=False)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('idx_traveler_stats_itineraries', 'itinerary_count'),
+        db.Index('idx_traveler_stats_snaps', 'snap_count'),
+        db.Index('idx_traveler_stats_ratings', 'safety_rating_count'),
+    )
+
+    COUNTERS = (
+        'itinerary_count', 'published_itinerary_count', 'itinerary_upvotes', 'snap_count',
+        'safety_rating_count', 'intel_count', 'comment_count', 'certification_count', 'trip_earned',
+    )
+
+    def to_dict(self):
+        data = {counter: getattr(self, counter) or 0 for counter in self.COUNTERS}
+        data['traveler_id'] = self.traveler_id
+        data['last_updated_at'] = self.last_updated_at.isoformat() if self.last_updated_at else None
+        return data
+
+    def __repr__(self):
+        return f'<TravelerStats {self.traveler_id}>'
@@ -0,0 +1,80 @@
+"""
+TRIP ledger models - append-only record of every TRIP balance change
+"""
+from datetime import datetime
+
+from extensions import db
+
+
+class TripLedgerEntry(db.Model):
+    """
+    One TRIP balance change (never updated or deleted)
+
+    amount is signed: earns are positive, spends negative. travelers'
+    trip_token_balance / trip_earnings_total / trip_spent_total are running
+    totals of this table, updated atomically in the same transaction.
+    """
+
+    __tablename__ = 'trip_ledger'
+
+    ENTRY_TYPES = ('earn', 'spend', 'adjustment')  # adjustment moves the balance only
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer(), 'sqlite'), primary_key=True, autoincrement=True)
+    traveler_id = db.Column(db.String(36), db.ForeignKey('travelers.id', ondelete='CASCADE'), nullable=False)
+
+    entry_type = db.Column(db.String(20), nullable=False)
+    transaction_type = db.Column(db.String(50), nullable=False)  # TripEconomy.TransactionType
+    amount = db.Column(db.Float, nullable=False)
+    balance_after = db.Column(db.Float, nullable=True)  # Not recorded for batched awards
+
+    reference_id = db.Column(db.String(100), nullable=True)
+    transfer_id = db.Column(db.String(36), nullable=True)  # Pairs the two sides of a transfer
+    idempotency_key = db.Column(db.String(200), nullable=True, unique=True)  # Awards are applied once per key
+    description = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('idx_trip_ledger_traveler', 'traveler_id', 'id'),
+    )
+
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'id': self.id,
+            'entry_type': self.entry_type,
+            'transaction_type': self.transaction_type,
+            'amount': self.amount,
+            'balance_after': self.balance_after,
+            'reference_id': self.reference_id,
+            'description': self.description,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
+
+
+class TripBalanceSnapshot(db.Model):
+    """
+    Periodic check of a traveler's stored totals against the ledger
+
+    Written for every traveler with ledger activity since the previous
+    snapshot; drift is stored balance minus ledger balance (0 when healthy).
+    """
+
+    __tablename__ = 'trip_balance_snapshots'
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer(), 'sqlite'), primary_key=True, autoincrement=True)
+    traveler_id = db.Column(db.String(36), db.ForeignKey('travelers.id', ondelete='CASCADE'), nullable=False)
+    ledger_entry_id = db.Column(db.BigInteger, nullable=False)  # Last ledger entry covered
+
+    balance = db.Column(db.Float, nullable=False)
+    earned = db.Column(db.Float, nullable=False)
+    spent = db.Column(db.Float, nullable=False)
+    ledger_balance = db.Column(db.Float, nullable=False)
+    drift = db.Column(db.Float, default=0.0, nullable=False)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('idx_trip_snapshots_traveler', 'traveler_id', 'id'),
+        db.Index('idx_trip_snapshots_created', 'created_at'),
+    )
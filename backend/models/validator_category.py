@@ -0,0 +1,25 @@
+"""
+Validator category model - category -> validator inverted index
+"""
+from extensions import db
+
+
+class ValidatorCategory(db.Model):
+    """
+    One (category, validator) pair from a validator's permissions
+
+    Mirrors ValidatorPermissions.allowed_categories of active validators so
+    auto-assignment finds a project's validators with one primary-key range
+    scan per category. Validators with can_validate_all are stored under
+    WILDCARD. Maintained by services/validator_index.py.
+    """
+
+    __tablename__ = 'validator_categories'
+
+    WILDCARD = '*'
+
+    category = db.Column(db.String(100), primary_key=True)
+    validator_id = db.Column(db.String(36), db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True, index=True)
+
+    def __repr__(self):
+        return f'<ValidatorCategory {self.category} -> {self.validator_id}>'
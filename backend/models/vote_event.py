@@ -0,0 +1,32 @@
+"""
+Vote event model - one row per vote request applied to the votes table
+"""
+from datetime import datetime
+from uuid import uuid4
+
+from extensions import db
+
+
+class VoteEvent(db.Model):
+    """
+    Applied vote request (audit log and idempotency record)
+
+    Inserted in the same transaction that applies the vote, so a unique
+    request_id means a redelivered or replayed stream entry is skipped.
+    """
+
+    __tablename__ = 'vote_events'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid4()))
+    request_id = db.Column(db.String(36), nullable=False, unique=True)  # VoteService fast-path request id
+    stream_id = db.Column(db.String(32), nullable=True)  # vote:events entry id (None when applied by the Celery fallback)
+    user_id = db.Column(db.String(36), nullable=False)
+    project_id = db.Column(db.String(36), nullable=False)  # projects.id or itineraries.id
+    vote_type = db.Column(db.String(10), nullable=False)
+    action = db.Column(db.String(10), nullable=False)  # created, removed, changed
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('idx_vote_events_project', 'project_id', 'created_at'),
+        db.Index('idx_vote_events_user', 'user_id', 'created_at'),
+    )
@@ -1,7 +1,7 @@
 """
 Admin Routes - Comprehensive admin panel
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from datetime import datetime, timedelta
 from extensions import db
 from models.user import User
@@ -15,6 +15,7 @@ from models.chain import Chain, ChainModerationLog
 from models.admin_scoring_config import AdminScoringConfig
 from utils.decorators import admin_required
 from utils.cache import CacheService
+from utils.principal import invalidate_principal
 from utils.user_utils import get_user_by_id, search_users
 from utils.content_utils import get_content_by_id
 from utils.notifications import (
@@ -151,6 +152,7 @@ def toggle_admin(admin_id, user_id):
         was_admin = user.is_admin
         user.is_admin = not user.is_admin
         db.session.commit()
+        invalidate_principal(user.id)
 
         # Send email notification
         try:
@@ -197,6 +199,7 @@ def toggle_user_active(admin_id, user_id):
         was_active = user.is_active
         user.is_active = not user.is_active
         db.session.commit()
+        invalidate_principal(user.id)
 
         # Invalidate search cache when user's active status changes
         CacheService.invalidate_search_results()
@@ -247,6 +250,7 @@ def delete_user(admin_id, user_id):
         username = user.username
         db.session.delete(user)
         db.session.commit()
+        invalidate_principal(user_id)
 
         return jsonify({
             'status': 'success',
@@ -415,6 +419,7 @@ def add_validator_by_email(user_id):
         )
         db.session.add(permissions)
         db.session.commit()
+        invalidate_principal(user.id)
 
         # Notify user in-app and via email
         try:
@@ -465,6 +470,7 @@ def remove_validator(user_id, validator_id):
             db.session.delete(permissions)
 
         db.session.commit()
+        invalidate_principal(validator.id)
 
         return jsonify({
             'status': 'success',
@@ -905,6 +911,49 @@ def get_platform_stats(user_id):
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 
+@admin_bp.route('/background-jobs', methods=['GET'])
+@admin_required
+def get_background_job_metrics(user_id):
+    """Get per-job duration/success metrics published by the leader scheduler"""
+    try:
+        from workers.job_runner import JobRunner
+
+        runner = request.args.get('runner', 'scheduler')
+        metrics = JobRunner.get_published_metrics(runner)
+
+        if not metrics:
+            return jsonify({
+                'status': 'success',
+                'data': None,
+                'message': f'No metrics published for runner "{runner}" - is scheduler.py running?'
+            }), 200
+
+        return jsonify({'status': 'success', 'data': metrics}), 200
+
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+@admin_bp.route('/cache-metrics', methods=['GET'])
+@admin_required
+def get_cache_metrics(user_id):
+    """Get cache hit rate and warm cost per key family (adaptive cache warming)"""
+    try:
+        from utils.cache_demand import CacheDemand
+
+        metrics = CacheDemand.get_metrics()
+        if request.args.get('include_due', '').lower() == 'true':
+            metrics['due'] = CacheDemand.due_keys(
+                min_reads=current_app.config.get('CACHE_WARM_MIN_READS', 5),
+                lead_seconds=current_app.config.get('CACHE_WARM_LEAD_SECONDS', 90)
+            )[:100]
+
+        return jsonify({'status': 'success', 'data': metrics}), 200
+
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
 # ============================================================================
 # VALIDATOR ASSIGNMENT MANAGEMENT
 # ============================================================================
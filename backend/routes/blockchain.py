@@ -36,8 +36,8 @@ def verify_cert(user_id):
         if not validate_ethereum_address(wallet_address):
             return error_response('Invalid address', 'Invalid Ethereum address format', 400)
 
-        # Check 0xCert ownership
-        result = BlockchainService.check_oxcert_ownership(wallet_address)
+        # Check 0xCert ownership (fresh read - the user is re-verifying)
+        result = BlockchainService.check_oxcert_ownership(wallet_address, use_cache=False)
 
         if result['error']:
             return error_response('Verification failed', result['error'], 500)
@@ -119,6 +119,43 @@ def get_cert_info(user_id, wallet_address):
         return error_response('Error', str(e), 500)
 
 
+class CertInfoBatchSchema(Schema):
+    """Schema for batch cert info"""
+    wallet_addresses = fields.List(fields.Str(), required=True)
+
+
+@blockchain_bp.route('/cert-info/batch', methods=['POST'])
+@optional_auth
+def get_cert_info_batch(user_id):
+    """Get cert info for a page of wallet addresses (one batched chain read)"""
+    try:
+        validated_data = CertInfoBatchSchema().load(request.get_json() or {})
+        wallet_addresses = validated_data['wallet_addresses']
+
+        if len(wallet_addresses) > 100:
+            return error_response('Too many addresses', 'At most 100 wallet addresses per request', 400)
+        invalid = [address for address in wallet_addresses if not validate_ethereum_address(address)]
+        if invalid:
+            return error_response('Invalid address', f'Invalid Ethereum address format: {invalid[0]}', 400)
+
+        results = BlockchainService.check_oxcert_ownership_many(wallet_addresses)
+
+        return success_response({
+            address: {
+                'wallet_address': address,
+                'has_cert': result['has_cert'],
+                'balance': result['balance'],
+                'error': result['error']
+            }
+            for address, result in results.items()
+        }, 'Cert info retrieved', 200)
+
+    except ValidationError as e:
+        return error_response('Validation error', str(e.messages), 400)
+    except Exception as e:
+        return error_response('Error', str(e), 500)
+
+
 @blockchain_bp.route('/health', methods=['GET'])
 def blockchain_health():
     """Check blockchain network health"""
@@ -5,7 +5,7 @@ from flask import Blueprint, request
 from marshmallow import ValidationError
 from datetime import datetime
 from uuid import uuid4
-from sqlalchemy import desc, and_, or_
+from sqlalchemy import desc, and_, or_, func
 from sqlalchemy.orm import joinedload
 
 from extensions import db
@@ -14,7 +14,9 @@ from models.chain_post import ChainPost, ChainPostReaction
 from models.user import User
 from utils.decorators import token_required, optional_auth
 from utils.helpers import success_response, error_response, get_pagination_params
+from utils.pagination import CursorError, SortKey, cursor_pagination, get_cursor_params, keyset_paginate, optional_total
 from utils.cache import CacheService
+from services.thread_loader import ThreadLoader
 
 chain_posts_bp = Blueprint('chain_posts', __name__)
 
@@ -74,6 +76,7 @@ def create_post(user_id, slug):
 
         # Invalidate chain posts cache
         CacheService.invalidate_chain_posts(slug)
+        CacheService.invalidate_threads('chain_posts', chain.id)
 
         return success_response(
             post.to_dict(include_author=True, include_chain=False, user_id=user_id),
@@ -89,6 +92,35 @@ def create_post(user_id, slug):
         return error_response('Error', str(e), 500)
 
 
+# Post orderings (hot: upvotes / recency); id makes each order total for cursors
+CHAIN_POST_SORT_KEYS = {
+    'hot': [
+        SortKey(ChainPost.is_pinned, default=False),
+        SortKey(ChainPost.upvote_count, default=0),
+        SortKey(ChainPost.created_at),
+        SortKey(ChainPost.id),
+    ],
+    'new': [
+        SortKey(ChainPost.is_pinned, default=False),
+        SortKey(ChainPost.created_at),
+        SortKey(ChainPost.id),
+    ],
+    'top': [
+        SortKey(ChainPost.is_pinned, default=False),
+        SortKey(ChainPost.upvote_count, default=0),
+        SortKey(ChainPost.comment_count, default=0),
+        SortKey(ChainPost.id),
+    ],
+    'active': [
+        SortKey(ChainPost.is_pinned, default=False),
+        SortKey(func.coalesce(ChainPost.last_activity_at, ChainPost.created_at),
+                value=lambda post: post.last_activity_at or post.created_at),
+        SortKey(ChainPost.id),
+    ],
+}
+CHAIN_POST_SORT_KEYS['trending'] = CHAIN_POST_SORT_KEYS['hot']
+
+
 @chain_posts_bp.route('/<slug>/posts', methods=['GET'])
 @optional_auth
 def list_posts(user_id, slug):
@@ -96,9 +128,12 @@ def list_posts(user_id, slug):
     try:
         page, per_page = get_pagination_params(request, default_per_page=20, max_per_page=100)
         sort = request.args.get('sort', 'hot')  # hot, new, top, pinned
+        if sort not in CHAIN_POST_SORT_KEYS:
+            sort = 'hot'
+        cursor_params = get_cursor_params(request, default_per_page=20, max_per_page=100)
 
-        # Check cache first (5 minutes TTL)
-        cached = CacheService.get_cached_chain_posts(slug, sort, page)
+        # Check cache first (5 minutes TTL) - page mode only
+        cached = CacheService.get_cached_chain_posts(slug, sort, page) if cursor_params is None else None
         if cached:
             return success_response(cached)
 
@@ -115,37 +150,19 @@ def list_posts(user_id, slug):
             is_hidden=False
         ).options(joinedload(ChainPost.author))
 
-        # Apply sorting
-        if sort == 'hot' or sort == 'trending':
-            # Hot algorithm: upvotes / time decay
-            query = query.order_by(
-                desc(ChainPost.is_pinned),
-                desc(ChainPost.upvote_count),
-                desc(ChainPost.created_at)
-            )
-        elif sort == 'new':
-            query = query.order_by(
-                desc(ChainPost.is_pinned),
-                desc(ChainPost.created_at)
-            )
-        elif sort == 'top':
-            query = query.order_by(
-                desc(ChainPost.is_pinned),
-                desc(ChainPost.upvote_count),
-                desc(ChainPost.comment_count)
-            )
-        elif sort == 'active':
-            query = query.order_by(
-                desc(ChainPost.is_pinned),
-                desc(ChainPost.last_activity_at)
-            )
-        else:
-            # Default to hot
-            query = query.order_by(
-                desc(ChainPost.is_pinned),
-                desc(ChainPost.upvote_count),
-                desc(ChainPost.created_at)
-            )
+        # Apply sorting: pinned first, then the sort's keys, id as tiebreaker
+        sort_keys = CHAIN_POST_SORT_KEYS[sort]
+
+        if cursor_params is not None:
+            cursor, per_page = cursor_params
+            posts, next_cursor = keyset_paginate(query, sort_keys, cursor, per_page, scope=f'chain_posts:{sort}')
+            total, estimated = optional_total(request, query)
+            return success_response({
+                'posts': [post.to_dict(include_author=True, user_id=user_id) for post in posts],
+                'pagination': cursor_pagination(next_cursor, per_page, total, estimated),
+            })
+
+        query = query.order_by(*[key.order_by() for key in sort_keys])
 
         # OPTIMIZED: Manual pagination to use count cache
         total = query.count()
@@ -164,6 +181,8 @@ def list_posts(user_id, slug):
 
         return success_response(response_data)
 
+    except CursorError as e:
+        return error_response('Validation error', str(e), 400)
     except Exception as e:
         print(f"Error listing posts: {str(e)}")
         return error_response('Error', str(e), 500)
@@ -262,6 +281,37 @@ def get_post_replies(user_id, slug, post_id):
         return error_response('Error', str(e), 500)
 
 
+@chain_posts_bp.route('/<slug>/posts/<post_id>/thread', methods=['GET'])
+@optional_auth
+def get_post_thread(user_id, slug, post_id):
+    """
+    Nested reply tree of a post in one request
+
+    Query: depth (levels below the direct replies, default 3), per_page (direct replies), cursor
+    """
+    try:
+        _, per_page = get_pagination_params(request, default_per_page=20, max_per_page=50)
+        depth = request.args.get('depth', ThreadLoader.DEFAULT_DEPTH, type=int)
+
+        chain = Chain.query.filter_by(slug=slug).first()
+        if not chain:
+            return error_response('Not Found', 'Chain not found', 404)
+
+        data = ThreadLoader.load(
+            'chain_posts', chain.id,
+            parent_id=post_id,
+            cursor=request.args.get('cursor', ''),
+            per_page=per_page, max_depth=depth, user_id=user_id
+        )
+        return success_response(data)
+
+    except CursorError as e:
+        return error_response('Validation error', str(e), 400)
+    except Exception as e:
+        print(f"Error getting post thread: {str(e)}")
+        return error_response('Error', str(e), 500)
+
+
 @chain_posts_bp.route('/<slug>/posts/<post_id>', methods=['PUT'])
 @token_required
 def update_post(user_id, slug, post_id):
@@ -305,6 +355,7 @@ def update_post(user_id, slug, post_id):
 
         post.updated_at = datetime.utcnow()
         db.session.commit()
+        CacheService.invalidate_threads('chain_posts', chain.id)
 
         return success_response(
             post.to_dict(include_author=True, user_id=user_id),
@@ -344,6 +395,7 @@ def delete_post(user_id, slug, post_id):
         post.updated_at = datetime.utcnow()
 
         db.session.commit()
+        CacheService.invalidate_threads('chain_posts', chain.id)
 
         return success_response(None, 'Post deleted successfully')
 
@@ -391,6 +443,7 @@ def react_to_post(user_id, slug, post_id):
                 # Same reaction, remove it (toggle off)
                 db.session.delete(existing_reaction)
                 db.session.commit()
+                CacheService.invalidate_threads('chain_posts', chain.id)
                 return success_response(
                     {'reaction_removed': True},
                     'Reaction removed'
@@ -410,6 +463,7 @@ def react_to_post(user_id, slug, post_id):
             db.session.add(reaction)
 
         db.session.commit()
+        CacheService.invalidate_threads('chain_posts', chain.id)
 
         # Get updated post with new counts (triggers will update counts automatically)
         db.session.refresh(post)
@@ -457,6 +511,7 @@ def pin_post(user_id, slug, post_id):
         post.updated_at = datetime.utcnow()
 
         db.session.commit()
+        CacheService.invalidate_threads('chain_posts', chain.id)
 
         return success_response(
             {'is_pinned': post.is_pinned},
@@ -493,6 +548,7 @@ def lock_post(user_id, slug, post_id):
         post.updated_at = datetime.utcnow()
 
         db.session.commit()
+        CacheService.invalidate_threads('chain_posts', chain.id)
 
         return success_response(
             {'is_locked': post.is_locked},
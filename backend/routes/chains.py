@@ -68,6 +68,9 @@ def create_chain(user_id):
         db.session.add(chain)
         db.session.commit()
 
+        from utils.cache import CacheService
+        CacheService.clear_pattern("chains:list:*")
+
         return success_response(
             chain.to_dict(include_creator=True, user_id=user_id),
             'Chain created successfully',
@@ -96,6 +99,15 @@ def list_chains(user_id=None):
         featured = request.args.get('featured', '').lower() == 'true'
         creator_id = request.args.get('creator_id', '').strip()
 
+        # Anonymous public listings are shared, so they're cached (and warmed on demand)
+        from utils.cache import CacheService
+        list_filters = None
+        if not user_id and visibility == 'public' and not search:
+            list_filters = f"{category}:{int(featured)}:{creator_id}:{per_page}"
+            cached = CacheService.get_cached_chain_list(page, sort, list_filters)
+            if cached:
+                return success_response(cached, 'Chains retrieved successfully', 200)
+
         # Build query
         query = Chain.query
 
@@ -161,7 +173,7 @@ def list_chains(user_id=None):
         chains_data = [chain.to_dict(include_creator=True, user_id=user_id) for chain in chains]
 
         # Return with both 'chains' and 'communities' keys for backwards compatibility
-        return success_response({
+        response_data = {
             'chains': chains_data,
             'communities': chains_data,  # Alias for frontend compatibility
             'pagination': {
@@ -170,7 +182,11 @@ def list_chains(user_id=None):
                 'total': total,
                 'pages': (total + per_page - 1) // per_page
             }
-        }, 'Chains retrieved successfully', 200)
+        }
+        if list_filters is not None:
+            CacheService.cache_chain_list(page, sort, list_filters, response_data, ttl=300)
+
+        return success_response(response_data, 'Chains retrieved successfully', 200)
 
     except Exception as e:
         return error_response('Error', str(e), 500)
@@ -284,6 +300,7 @@ def update_chain(user_id, slug):
         # Invalidate chain caches
         from utils.cache import CacheService
         CacheService.invalidate_chain_posts(slug)  # Chain posts may show chain details
+        CacheService.invalidate_chain(slug)
         if 'name' in validated_data and validated_data['name'] != chain.name:
             # If slug changed, invalidate old slug too
             CacheService.invalidate_chain_posts(chain.slug)
@@ -322,6 +339,7 @@ def delete_chain(user_id, slug):
         # Invalidate chain caches
         from utils.cache import CacheService
         CacheService.invalidate_chain_posts(slug)
+        CacheService.invalidate_chain(slug)
 
         return success_response(None, 'Chain deleted successfully', 200)
 
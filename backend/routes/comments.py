@@ -13,8 +13,10 @@ from models.itinerary import Itinerary
 from schemas.comment import CommentCreateSchema, CommentUpdateSchema
 from utils.decorators import token_required, optional_auth
 from utils.helpers import success_response, error_response, paginated_response, get_pagination_params
+from utils.pagination import CursorError, SortKey, cursor_response, get_cursor_params, keyset_paginate, optional_total
 from utils.content_utils import get_content_by_id
 from utils.user_utils import get_user_by_id
+from services.thread_loader import ThreadLoader
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -32,10 +34,11 @@ def get_comments(user_id):
             return error_response('Bad request', 'project_id required', 400)
 
         page, per_page = get_pagination_params(request)
+        cursor_params = get_cursor_params(request)
 
         # OPTIMIZED: Check cache first (10 min TTL)
         from utils.cache import CacheService
-        cached = CacheService.get_cached_comments(project_id, page)
+        cached = CacheService.get_cached_comments(project_id, page) if cursor_params is None else None
         if cached:
             from flask import jsonify
             return jsonify(cached), 200
@@ -50,6 +53,15 @@ def get_comments(user_id):
         query = Comment.query.filter_by(project_id=project_id, parent_id=None, is_deleted=False)
         query = query.options(joinedload(Comment.author))  # Eager load authors
 
+        if cursor_params is not None:
+            cursor, per_page = cursor_params
+            comments, next_cursor = keyset_paginate(
+                query, [SortKey(Comment.created_at), SortKey(Comment.id)], cursor, per_page, scope='comments'
+            )
+            total, estimated = optional_total(request, query)
+            data = [c.to_dict(include_author=True) for c in comments]
+            return cursor_response(data, next_cursor, per_page, total, estimated)
+
         total = query.count()
         comments = query.order_by(Comment.created_at.desc()).limit(per_page).offset((page - 1) * per_page).all()
 
@@ -63,12 +75,45 @@ def get_comments(user_id):
         CacheService.cache_comments(project_id, page, cache_data, ttl=600)
 
         return response
+    except CursorError as e:
+        return error_response('Validation error', str(e), 400)
     except Exception as e:
         logger.error(f"❌ GET /comments ERROR: {str(e)}")
         logger.error(f"Traceback: {traceback.format_exc()}")
         return error_response('Error', str(e), 500)
 
 
+@comments_bp.route('/thread', methods=['GET'])
+@optional_auth
+def get_comment_thread(user_id):
+    """
+    Comments with nested replies in one request
+
+    Query: project_id (required), parent_id (subtree), depth, per_page, cursor
+    """
+    try:
+        project_id = request.args.get('project_id')
+        if not project_id:
+            return error_response('Bad request', 'project_id required', 400)
+
+        _, per_page = get_pagination_params(request, default_per_page=20, max_per_page=50)
+        depth = request.args.get('depth', ThreadLoader.DEFAULT_DEPTH, type=int)
+
+        data = ThreadLoader.load(
+            'comments', project_id,
+            parent_id=request.args.get('parent_id') or None,
+            cursor=request.args.get('cursor', ''),
+            per_page=per_page, max_depth=depth, user_id=user_id
+        )
+        return success_response(data, 'Comment thread retrieved', 200)
+
+    except CursorError as e:
+        return error_response('Validation error', str(e), 400)
+    except Exception as e:
+        logger.error(f"❌ GET /comments/thread ERROR: {str(e)}")
+        return error_response('Error', str(e), 500)
+
+
 @comments_bp.route('', methods=['POST'])
 @token_required
 def create_comment(user_id):
@@ -109,6 +154,9 @@ def create_comment(user_id):
             # Set flag to skip double commit below
             content._skip_commit = True
 
+            from utils.trending_tags import TrendingTagsTracker
+            TrendingTagsTracker.record_event(content, 'comment')
+
         db.session.add(comment)
         if not hasattr(content, '_skip_commit'):
             db.session.commit()
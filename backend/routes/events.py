@@ -9,6 +9,7 @@ from models.project import Project
 from models.user import User
 from extensions import db
 from utils.decorators import token_required as require_auth, optional_auth
+from utils.cache import CacheService
 
 events_bp = Blueprint('events', __name__)
 
@@ -36,11 +37,21 @@ def list_events(user_id):
         limit = min(request.args.get('limit', 20, type=int), 50)
         offset = (page - 1) * limit
 
+        # Listings without free-text search are shared across users (cached, warmed on demand)
+        search = request.args.get('search')
+        list_filters = None
+        if not search:
+            list_filters = ':'.join(
+                request.args.get(name, '') for name in ('event_type', 'category', 'is_active', 'is_featured', 'upcoming')
+            ) + f":{limit}"
+            cached = CacheService.get_cached_event_list(page, request.args.get('sort', 'trending'), list_filters)
+            if cached:
+                return jsonify(cached), 200
+
         # Base query
         query = Event.query.filter_by(is_public=True)
 
         # Search
-        search = request.args.get('search')
         if search:
             search_filter = or_(
                 Event.name.ilike(f'%{search}%'),
@@ -90,7 +101,7 @@ def list_events(user_id):
         total = query.count()
         events = query.offset(offset).limit(limit).all()
 
-        return jsonify({
+        response_data = {
             'status': 'success',
             'data': {
                 'events': [event.to_dict(include_organizer=True) for event in events],
@@ -101,7 +112,11 @@ def list_events(user_id):
                     'pages': (total + limit - 1) // limit
                 }
             }
-        }), 200
+        }
+        if list_filters is not None:
+            CacheService.cache_event_list(page, sort, list_filters, response_data, ttl=300)
+
+        return jsonify(response_data), 200
 
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
@@ -264,6 +279,7 @@ def create_event(user_id):
 
         db.session.add(event)
         db.session.commit()
+        CacheService.clear_pattern("events:list:*")
 
         return jsonify({
             'status': 'success',
@@ -329,6 +345,7 @@ def update_event(user_id, event_slug):
                 pass
 
         db.session.commit()
+        CacheService.invalidate_event(event_slug)
 
         return jsonify({
             'status': 'success',
@@ -0,0 +1,171 @@
+"""
+Geo routes - radius, bounding-box and along-route lookups over the geo index
+"""
+from flask import Blueprint, request, jsonify
+
+from models.itinerary import Itinerary
+from models.safety_alert import SafetyAlert
+from models.hidden_gem import HiddenGem
+from models.travel_intel import TravelIntel
+from services.geo_index import GeoIndex
+from utils.decorators import optional_auth
+from utils.geo import parse_gps
+from utils.helpers import error_response
+
+geo_bp = Blueprint('geo', __name__)
+
+MAX_RADIUS_KM = 500.0
+MAX_ROUTE_RADIUS_KM = 100.0
+
+
+def _float_arg(name, default=None):
+    value = request.args.get(name)
+    if value is None or value == '':
+        if default is None:
+            raise ValueError(f'{name} is required')
+        return default
+    return float(value)
+
+
+def _types_arg():
+    """?types=safety_alert,hidden_gem -> validated tuple (None = all types)"""
+    raw = request.args.get('types')
+    if not raw:
+        return None
+    types = tuple(t.strip() for t in raw.split(',') if t.strip())
+    unknown = [t for t in types if t not in GeoIndex.ENTITY_TYPES]
+    if unknown:
+        raise ValueError(f"Unknown types: {', '.join(unknown)}")
+    return types
+
+
+def _hydrate(hits):
+    """Attach each entity's payload with one IN query per type"""
+    ids_by_type = {}
+    for hit in hits:
+        ids_by_type.setdefault(hit['entity_type'], set()).add(hit['entity_id'])
+
+    payloads = {}
+    if ids_by_type.get('itinerary'):
+        rows = Itinerary.query.with_entities(
+            Itinerary.id, Itinerary.title, Itinerary.destination, Itinerary.proof_score
+        ).filter(Itinerary.id.in_(ids_by_type['itinerary'])).all()
+        for row in rows:
+            payloads[('itinerary', row.id)] = {
+                'id': row.id,
+                'title': row.title,
+                'destination': row.destination,
+                'proof_score': row.proof_score,
+            }
+
+    for entity_type, model in (('safety_alert', SafetyAlert), ('hidden_gem', HiddenGem),
+                               ('travel_intel', TravelIntel)):
+        if ids_by_type.get(entity_type):
+            for row in model.query.filter(model.id.in_(ids_by_type[entity_type])).all():
+                payloads[(entity_type, row.id)] = row.to_dict()
+
+    results = []
+    for hit in hits:
+        payload = payloads.get((hit['entity_type'], hit['entity_id']))
+        if payload is not None:
+            results.append({**hit, 'item': payload})
+    return results
+
+
+@geo_bp.route('/nearby', methods=['GET'])
+@optional_auth
+def nearby(user_id):
+    """Entities within radius_km of a point: ?lat=&lon=&radius_km=&types="""
+    try:
+        lat, lon = _float_arg('lat'), _float_arg('lon')
+        radius_km = min(_float_arg('radius_km', 10.0), MAX_RADIUS_KM)
+        limit = min(request.args.get('limit', 50, type=int), 200)
+        types = _types_arg()
+    except ValueError as e:
+        return error_response('Validation error', str(e), 400)
+
+    if not parse_gps((lat, lon)) or radius_km <= 0:
+        return error_response('Validation error', 'Invalid coordinates or radius', 400)
+
+    try:
+        hits = GeoIndex.query_radius(lat, lon, radius_km, types, limit=limit)
+        return jsonify({
+            'status': 'success',
+            'message': 'Nearby results retrieved',
+            'data': {
+                'center': {'lat': lat, 'lon': lon},
+                'radius_km': radius_km,
+                'results': _hydrate(hits),
+            }
+        }), 200
+    except Exception as e:
+        return error_response('Error', str(e), 500)
+
+
+@geo_bp.route('/bbox', methods=['GET'])
+@optional_auth
+def bbox(user_id):
+    """Entities inside a bounding box: ?min_lat=&min_lon=&max_lat=&max_lon=&types="""
+    try:
+        min_lat, min_lon = _float_arg('min_lat'), _float_arg('min_lon')
+        max_lat, max_lon = _float_arg('max_lat'), _float_arg('max_lon')
+        limit = min(request.args.get('limit', 200, type=int), 500)
+        types = _types_arg()
+    except ValueError as e:
+        return error_response('Validation error', str(e), 400)
+
+    if not (parse_gps((min_lat, min_lon)) and parse_gps((max_lat, max_lon))) or min_lat > max_lat:
+        return error_response('Validation error', 'Invalid bounding box', 400)
+
+    # Map viewports crossing the antimeridian arrive with min_lon > max_lon
+    if min_lon > max_lon:
+        max_lon += 360.0
+
+    try:
+        hits = GeoIndex.query_bbox(min_lat, min_lon, max_lat, max_lon, types, limit=limit)
+        return jsonify({
+            'status': 'success',
+            'message': 'Bounding box results retrieved',
+            'data': {'results': _hydrate(hits)}
+        }), 200
+    except Exception as e:
+        return error_response('Error', str(e), 500)
+
+
+@geo_bp.route('/itineraries/<itinerary_id>/alerts', methods=['GET'])
+@optional_auth
+def alerts_near_route(user_id, itinerary_id):
+    """Active safety alerts within radius_km of an itinerary's route"""
+    try:
+        radius_km = min(_float_arg('radius_km', 5.0), MAX_ROUTE_RADIUS_KM)
+        include_own = request.args.get('include_own', 'true').lower() == 'true'
+    except ValueError as e:
+        return error_response('Validation error', str(e), 400)
+
+    try:
+        itinerary = Itinerary.query.get(itinerary_id)
+        if not itinerary or itinerary.is_deleted:
+            return error_response('Not found', 'Itinerary not found', 404)
+
+        route = GeoIndex.route_for_itinerary(itinerary)
+        if not route:
+            return error_response('Validation error', 'Itinerary has no GPS route', 400)
+
+        hits = GeoIndex.query_near_route(
+            route,
+            radius_km,
+            entity_types=('safety_alert',),
+            exclude_itinerary_id=None if include_own else itinerary_id
+        )
+        return jsonify({
+            'status': 'success',
+            'message': 'Route safety alerts retrieved',
+            'data': {
+                'itinerary_id': itinerary_id,
+                'radius_km': radius_km,
+                'route_points': len(route),
+                'alerts': _hydrate(hits),
+            }
+        }), 200
+    except Exception as e:
+        return error_response('Error', str(e), 500)
@@ -11,8 +11,6 @@ from utils.helpers import success_response, error_response
 from utils.identity import IdentityHasher, EmergencyContactHasher, MedicalInfoHasher
 from utils.sbt_service import SBTService
 from utils import qr_service
-from web3 import Web3
-from eth_account.messages import encode_defunct
 from datetime import datetime
 
 identity_bp = Blueprint('identity', __name__)
@@ -33,6 +31,10 @@ def bind_wallet(user_id):
         400: Invalid input or wallet already bound
         409: Wallet already bound to another account
     """
+    # Lazy import: web3 is heavy and only needed for wallet binding
+    from web3 import Web3
+    from eth_account.messages import encode_defunct
+
     data = request.get_json()
     wallet_address = data.get('wallet_address')
     signature = data.get('signature')
@@ -257,15 +259,16 @@ def mint_sbt(user_id):
     """
     Mint TravelSBT to user's wallet (backend-signed transaction)
     Also generates QR code for vendor verification and uploads to IPFS.
+    The mint is queued; sbt_status is 'minting' until the receipt confirms.
 
     Prerequisites:
         - wallet_address must be bound
         - profile_hash must be created
 
     Returns:
-        200: SBT minted successfully with QR code
+        202: SBT mint queued, QR code generated
         400: Missing prerequisites
-        409: SBT already issued
+        409: SBT already issued or mint in progress
         500: Blockchain or QR generation error
     """
     # Get traveler
@@ -286,6 +289,10 @@ def mint_sbt(user_id):
             status_code=400
         )
 
+    # Mint already queued / awaiting its receipt
+    if traveler.sbt_status == 'minting':
+        return error_response('SBT mint already in progress', status_code=409)
+
     # Check if SBT already issued
     if traveler.sbt_status in ['issued', 'verified']:
         # Check if user already has verification record with QR
@@ -317,104 +324,68 @@ def mint_sbt(user_id):
 
     current_app.logger.info(f"[MINT_SBT] QR uploaded to IPFS: {qr_result['qr_ipfs_url']}")
 
-    # Step 2: Mint SBT with QR IPFS URL as metadata_uri
-    try:
-        current_app.logger.info(f"[MINT_SBT] Starting SBT minting for user {user_id}")
-        current_app.logger.info(f"[MINT_SBT] Wallet: {traveler.wallet_address}")
-        current_app.logger.info(f"[MINT_SBT] Profile Hash: {traveler.profile_hash}")
-        current_app.logger.info(f"[MINT_SBT] Reputation: {reputation}")
-        current_app.logger.info(f"[MINT_SBT] Metadata URI (QR): {qr_result['qr_ipfs_url']}")
-
-        result = SBTService.mint_sbt(
-            traveler_wallet=traveler.wallet_address,
-            profile_hash=traveler.profile_hash,
-            reputation_score=reputation,
-            metadata_uri=qr_result['qr_ipfs_url']  # Use QR IPFS URL as tokenURI
+    # Step 2: Record the verification (pending until the mint confirms) and queue the mint.
+    # The receipt poller fills in the token id and marks both rows issued/verified.
+    existing_verification = UserVerification.query.filter_by(traveler_id=user_id).first()
+    if existing_verification:
+        verification = existing_verification
+        verification.wallet_address = traveler.wallet_address
+        verification.verification_token = qr_result['token']
+        verification.qr_ipfs_url = qr_result['qr_ipfs_url']
+        verification.qr_ipfs_hash = qr_result['qr_ipfs_hash']
+    else:
+        verification = UserVerification(
+            traveler_id=user_id,
+            wallet_address=traveler.wallet_address,
+            verification_token=qr_result['token'],
+            qr_ipfs_url=qr_result['qr_ipfs_url'],
+            qr_ipfs_hash=qr_result['qr_ipfs_hash'],
         )
+        db.session.add(verification)
+    verification.verification_status = 'pending'
+    verification.full_name = user_name
+    verification.emergency_contact_1_name = traveler.emergency_contact_1_name
+    verification.emergency_contact_1_phone = traveler.emergency_contact_1_phone
+    verification.emergency_contact_2_name = traveler.emergency_contact_2_name
+    verification.emergency_contact_2_phone = traveler.emergency_contact_2_phone
+    verification.blood_group = traveler.blood_group
+    traveler.sbt_status = 'minting'
+
+    current_app.logger.info(f"[MINT_SBT] Queueing SBT mint for user {user_id}")
+    current_app.logger.info(f"[MINT_SBT] Wallet: {traveler.wallet_address}")
+    current_app.logger.info(f"[MINT_SBT] Profile Hash: {traveler.profile_hash}")
+    current_app.logger.info(f"[MINT_SBT] Reputation: {reputation}")
+    current_app.logger.info(f"[MINT_SBT] Metadata URI (QR): {qr_result['qr_ipfs_url']}")
+
+    # Commits the verification record, the traveler status and the queued mint together
+    result = SBTService.mint_sbt(
+        traveler_wallet=traveler.wallet_address,
+        profile_hash=traveler.profile_hash,
+        reputation_score=reputation,
+        metadata_uri=qr_result['qr_ipfs_url'],  # Use QR IPFS URL as tokenURI
+        traveler_id=user_id
+    )
+    current_app.logger.info(f"[MINT_SBT] Result: {result}")
 
-        current_app.logger.info(f"[MINT_SBT] Result: {result}")
-    except Exception as e:
-        current_app.logger.error(f"[MINT_SBT] Exception: {str(e)}")
-        import traceback
-        current_app.logger.error(f"[MINT_SBT] Traceback: {traceback.format_exc()}")
-        return error_response(f'SBT minting failed: {str(e)}', status_code=500)
-
-    if result['success']:
-        # Step 3: Create UserVerification record
-        try:
-            # Check if verification record already exists (shouldn't, but handle edge case)
-            existing_verification = UserVerification.query.filter_by(traveler_id=user_id).first()
-
-            if existing_verification:
-                # Update existing record
-                existing_verification.sbt_token_id = result['sbt_id']
-                existing_verification.verification_token = qr_result['token']
-                existing_verification.qr_ipfs_url = qr_result['qr_ipfs_url']
-                existing_verification.qr_ipfs_hash = qr_result['qr_ipfs_hash']
-                existing_verification.verification_status = 'verified'
-                existing_verification.full_name = user_name
-                existing_verification.emergency_contact_1_name = traveler.emergency_contact_1_name
-                existing_verification.emergency_contact_1_phone = traveler.emergency_contact_1_phone
-                existing_verification.emergency_contact_2_name = traveler.emergency_contact_2_name
-                existing_verification.emergency_contact_2_phone = traveler.emergency_contact_2_phone
-                existing_verification.blood_group = traveler.blood_group
-                verification = existing_verification
-            else:
-                # Create new verification record
-                verification = UserVerification(
-                    traveler_id=user_id,
-                    wallet_address=traveler.wallet_address,
-                    sbt_token_id=result['sbt_id'],
-                    verification_token=qr_result['token'],
-                    qr_ipfs_url=qr_result['qr_ipfs_url'],
-                    qr_ipfs_hash=qr_result['qr_ipfs_hash'],
-                    verification_status='verified',
-                    full_name=user_name,
-                    emergency_contact_1_name=traveler.emergency_contact_1_name,
-                    emergency_contact_1_phone=traveler.emergency_contact_1_phone,
-                    emergency_contact_2_name=traveler.emergency_contact_2_name,
-                    emergency_contact_2_phone=traveler.emergency_contact_2_phone,
-                    blood_group=traveler.blood_group
-                )
-                db.session.add(verification)
-
-            # Update traveler SBT status
-            traveler.sbt_id = result['sbt_id']
-            traveler.sbt_blockchain_hash = result['tx_hash']
-            traveler.sbt_status = 'issued'
-            traveler.sbt_verified_date = datetime.utcnow()
-
-            db.session.commit()
-            current_app.logger.info(f"[MINT_SBT] UserVerification record created for user {user_id}")
-
-        except Exception as e:
-            db.session.rollback()
-            current_app.logger.error(f"[MINT_SBT] Failed to create verification record: {str(e)}")
-            # SBT was minted but verification record failed - log but don't fail the request
-            # The SBT is on-chain, so we return success but note the issue
-
-        # Determine network
-        network = current_app.config.get('BLOCKCHAIN_NETWORK', 'base_sepolia')
-        explorer_base = 'https://sepolia.basescan.org' if network == 'base_sepolia' else 'https://basescan.org'
-
-        return success_response(
-            {
-                'sbt_id': result['sbt_id'],
-                'tx_hash': result['tx_hash'],
-                'gas_used': result['gas_used'],
-                'explorer_url': f"{explorer_base}/tx/{result['tx_hash']}",
-                'token_url': f"{explorer_base}/nft/{current_app.config['SBT_CONTRACT_ADDRESS']}/{result['sbt_id']}",
-                'qr_ipfs_url': qr_result['qr_ipfs_url'],
-                'verification_token': qr_result['token']
-            },
-            message='SBT minted successfully with verification QR code!'
-        )
-    else:
+    if not result['success']:
+        db.session.rollback()
         return error_response(
             f"SBT minting failed: {result.get('error', 'Unknown error')}",
             status_code=500
         )
 
+    return success_response(
+        {
+            'sbt_status': 'minting',
+            'transaction_id': result['transaction_id'],
+            'transaction_status': result['status'],
+            'qr_ipfs_url': qr_result['qr_ipfs_url'],
+            'verification_token': qr_result['token']
+        },
+        message='SBT mint submitted. Your token will appear once the transaction confirms.',
+        status_code=202
+    )
+
 
 @identity_bp.route('/profile', methods=['GET'])
 @token_required
@@ -520,11 +491,14 @@ def update_emergency_contacts(user_id):
 
         # Update on-chain profile hash if SBT exists
         if traveler.sbt_id:
+            # Queued; commits the contact and hash changes above along with it
             sbt_result = SBTService.update_profile_hash(
                 int(traveler.sbt_id),
-                result['hash']
+                result['hash'],
+                traveler_id=user_id
             )
             if not sbt_result['success']:
+                db.session.rollback()
                 return error_response(
                     f"Failed to update on-chain profile hash: {sbt_result.get('error')}",
                     status_code=500
@@ -2,7 +2,7 @@
 Itinerary routes - Travel-focused endpoints (TripIt migration)
 Replaces Project endpoints with Itinerary concepts
 """
-from flask import Blueprint, request, current_app, jsonify
+from flask import Blueprint, request, current_app, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import ValidationError
 from datetime import datetime, timedelta
@@ -11,19 +11,49 @@ from sqlalchemy.orm import joinedload, load_only
 
 from extensions import db
 from models.itinerary import Itinerary
+from models.itinerary_route import ItineraryRoute
 from models.traveler import Traveler
 from models.safety_rating import SafetyRating
 from models.traveler_certification import TravelerCertification
 from schemas.itinerary import ItinerarySchema, ItineraryCreateSchema, ItineraryUpdateSchema
 from utils.decorators import token_required, admin_required, optional_auth
 from utils.helpers import success_response, error_response, paginated_response, get_pagination_params
+from utils.pagination import CursorError, SortKey, cursor_response, get_cursor_params, keyset_paginate, optional_total
 from tasks.scoring_tasks import score_itinerary_task, check_rate_limit
 from utils.cache import CacheService
+from services.feed_engine import FeedEngine
 from utils.trip_economy import TripEconomy
+from utils.route_geometry import RouteGeometryError, decode_values, iter_polyline, RESOLUTIONS
 
 itineraries_bp = Blueprint('itineraries', __name__)
 
 
+# Feed orderings; NULL scores sort as 0 (matching idx_itineraries_feed_* expressions)
+ITINERARY_SORT_KEYS = {
+    'trending': [
+        SortKey(Itinerary.proof_score, default=0.0),
+        SortKey(Itinerary.created_at),
+        SortKey(Itinerary.id),
+    ],
+    'newest': [
+        SortKey(Itinerary.created_at),
+        SortKey(Itinerary.id),
+    ],
+    'top-rated': [
+        SortKey(Itinerary.safety_score, default=0.0),
+        SortKey(Itinerary.proof_score, default=0.0),
+        SortKey(Itinerary.id),
+    ],
+    'most-helpful': [
+        SortKey(Itinerary.helpful_votes, default=0),
+        SortKey(Itinerary.id),
+    ],
+}
+ITINERARY_SORT_KEYS['hot'] = ITINERARY_SORT_KEYS['trending']
+ITINERARY_SORT_KEYS['new'] = ITINERARY_SORT_KEYS['newest']
+ITINERARY_SORT_KEYS['top'] = ITINERARY_SORT_KEYS['top-rated']
+
+
 @itineraries_bp.route('', methods=['GET'])
 @optional_auth
 def list_itineraries(user_id):
@@ -111,26 +141,49 @@ def list_itineraries(user_id):
         if featured_only:
             query = query.filter(Itinerary.is_featured == True)
 
-        # Sorting
-        if sort == 'trending' or sort == 'hot':
-            query = query.order_by(
-                Itinerary.proof_score.desc(),
-                Itinerary.created_at.desc()
+        # Sorting (id is the unique tiebreaker that makes the order total for cursors)
+        sort_keys = ITINERARY_SORT_KEYS.get(sort, ITINERARY_SORT_KEYS['trending'])
+
+        # Cursor mode: constant-cost pages at any depth, totals only on request
+        cursor_params = get_cursor_params(request)
+        if cursor_params is not None:
+            cursor, per_page = cursor_params
+            itineraries, next_cursor = keyset_paginate(
+                query.options(joinedload(Itinerary.itinerary_creator)),
+                sort_keys, cursor, per_page, scope=f'itineraries:{sort}'
             )
-        elif sort == 'newest' or sort == 'new':
-            query = query.order_by(Itinerary.created_at.desc())
-        elif sort == 'top-rated' or sort == 'top':
-            query = query.order_by(Itinerary.safety_score.desc(), Itinerary.proof_score.desc())
-        elif sort == 'most-helpful':
-            query = query.order_by(Itinerary.helpful_votes.desc())
-        else:
-            query = query.order_by(Itinerary.proof_score.desc(), Itinerary.created_at.desc())
+            total, estimated = optional_total(request, query)
+            data = [i.to_dict(include_creator=True, user_id=user_id) for i in itineraries]
+            FeedEngine.apply_user_fields(data, user_id)
+            return cursor_response(data, next_cursor, per_page, total, estimated)
+
+        query = query.order_by(*[key.order_by() for key in sort_keys])
+
+        # Shared pages: cached id list per (sort, filters) + card per itinerary + per-user overlay
+        page_data = None
+        if not search:
+            filters = {
+                'activity': activity_tags,
+                'destination': destination.lower(),
+                'min_score': min_score,
+                'min_safety_score': min_safety_score,
+                'has_gps': has_gps,
+                'women_safe': True if women_safe_only else None,
+                'featured': True if featured_only else None,
+                'difficulty': difficulty.lower(),
+            }
+            canonical_sort = sort if sort in ITINERARY_SORT_KEYS else 'trending'
+            page_data = FeedEngine.get_page(canonical_sort, filters, query, page, per_page, user_id)
 
-        # Count and paginate
-        total = query.count()
-        itineraries = query.options(joinedload(Itinerary.itinerary_creator)).limit(per_page).offset((page - 1) * per_page).all()
+        if page_data is not None:
+            data, total = page_data
+        else:
+            # Search and pages beyond the cached id list
+            total = query.count()
+            itineraries = query.options(joinedload(Itinerary.itinerary_creator)).limit(per_page).offset((page - 1) * per_page).all()
 
-        data = [i.to_dict(include_creator=True, user_id=user_id) for i in itineraries]
+            data = [i.to_dict(include_creator=True, user_id=user_id) for i in itineraries]
+            FeedEngine.apply_user_fields(data, user_id)
 
         # Build response
         total_pages = (total + per_page - 1) // per_page
@@ -148,6 +201,8 @@ def list_itineraries(user_id):
 
         return jsonify(response_data), 200
 
+    except CursorError as e:
+        return error_response('Validation error', str(e), 400)
     except Exception as e:
         return error_response('Error', str(e), 500)
 
@@ -190,6 +245,82 @@ def get_itinerary(user_id, itinerary_id):
         return error_response('Error', str(e), 500)
 
 
+@itineraries_bp.route('/<itinerary_id>/route', methods=['GET'])
+@optional_auth
+def get_itinerary_route(user_id, itinerary_id):
+    """
+    Route geometry on demand: ?resolution=preview|medium|full&format=polyline|geojson|gpx
+
+    polyline returns the encoded line as JSON; geojson and gpx stream the
+    track so full-resolution multi-day treks never sit in memory as one blob.
+    """
+    resolution = request.args.get('resolution', 'medium')
+    fmt = request.args.get('format', 'polyline')
+    if resolution not in RESOLUTIONS:
+        return error_response('Validation error', f"resolution must be one of {', '.join(RESOLUTIONS)}", 400)
+    if fmt not in ('polyline', 'geojson', 'gpx'):
+        return error_response('Validation error', 'format must be polyline, geojson or gpx', 400)
+
+    try:
+        itinerary = Itinerary.query.get(itinerary_id)
+        if not itinerary or itinerary.is_deleted:
+            return error_response('Not found', 'Itinerary not found', 404)
+
+        route = itinerary.route_geometry
+        if not route:
+            return error_response('Not found', 'Itinerary has no route', 404)
+
+        # Geometry only changes with the source, so its hash is a strong validator
+        etag = f'{route.source_hash}-{resolution}-{fmt}'
+        if request.if_none_match.contains(etag):
+            return Response(status=304, headers={'ETag': f'"{etag}"'})
+        headers = {'ETag': f'"{etag}"', 'Cache-Control': 'public, max-age=300'}
+
+        if fmt == 'gpx':
+            if route.source != 'gpx':
+                return error_response('Not found', 'Route was not uploaded as GPX', 404)
+            gpx = itinerary.route_gpx
+
+            def generate_gpx(chunk_size=64 * 1024):
+                for start in range(0, len(gpx), chunk_size):
+                    yield gpx[start:start + chunk_size]
+
+            return Response(stream_with_context(generate_gpx()), mimetype='application/gpx+xml', headers=headers)
+
+        polyline = route.polyline_for(resolution)
+        elevations = decode_values(route.full_elevations) if resolution == 'full' and route.full_elevations else None
+
+        if fmt == 'polyline':
+            data = {
+                **route.to_summary_dict(),
+                'itinerary_id': itinerary_id,
+                'resolution': resolution,
+                'polyline': polyline,
+                'resolution_point_count': getattr(route, f'{resolution}_point_count'),
+                'elevations': elevations,
+            }
+            response = jsonify({'status': 'success', 'message': 'Route retrieved', 'data': data})
+            response.headers.update(headers)
+            return response, 200
+
+        def generate_geojson():
+            yield '{"type":"Feature","properties":{"itinerary_id":"%s","resolution":"%s","distance_km":%s},' % (
+                itinerary_id, resolution, route.distance_km)
+            yield '"geometry":{"type":"LineString","coordinates":['
+            for i, (lat, lon) in enumerate(iter_polyline(polyline)):
+                prefix = ',' if i else ''
+                if elevations is not None:
+                    yield f'{prefix}[{lon},{lat},{elevations[i]}]'
+                else:
+                    yield f'{prefix}[{lon},{lat}]'
+            yield ']}}'
+
+        return Response(stream_with_context(generate_geojson()), mimetype='application/geo+json', headers=headers)
+
+    except Exception as e:
+        return error_response('Error', str(e), 500)
+
+
 @itineraries_bp.route('', methods=['POST'])
 @token_required
 def create_itinerary(user_id):
@@ -238,6 +369,9 @@ def create_itinerary(user_id):
             remixed_from_ids=validated_data.get('remixed_from_ids', []),
         )
 
+        # Parse the GPX once here; responses only ever carry the compact geometry
+        ItineraryRoute.sync_from_itinerary(itinerary)
+
         # Add to database
         db.session.add(itinerary)
         db.session.flush()
@@ -289,6 +423,10 @@ def create_itinerary(user_id):
         CacheService.invalidate_leaderboard()
         CacheService.invalidate_user_itineraries(user_id)
 
+        # Count its activity tags in the shared trending window
+        from utils.trending_tags import TrendingTagsTracker
+        TrendingTagsTracker.record_published(itinerary)
+
         # Emit Socket.IO event
         itinerary_data = itinerary.to_dict(include_creator=True)
         try:
@@ -301,6 +439,9 @@ def create_itinerary(user_id):
 
     except ValidationError as e:
         return error_response('Validation error', str(e.messages), 400)
+    except RouteGeometryError as e:
+        db.session.rollback()
+        return error_response('Validation error', str(e), 400)
     except Exception as e:
         db.session.rollback()
         return error_response('Error', str(e), 500)
@@ -335,6 +476,9 @@ def update_itinerary(user_id, itinerary_id):
             if value is not None:
                 setattr(itinerary, key, value)
 
+        if 'route_gpx' in validated_data or 'route_waypoints' in validated_data:
+            ItineraryRoute.sync_from_itinerary(itinerary)
+
         itinerary.updated_at = datetime.utcnow()
 
         # Log categories for debugging
@@ -368,6 +512,9 @@ def update_itinerary(user_id, itinerary_id):
 
     except ValidationError as e:
         return error_response('Validation error', str(e.messages), 400)
+    except RouteGeometryError as e:
+        db.session.rollback()
+        return error_response('Validation error', str(e), 400)
     except Exception as e:
         db.session.rollback()
         return error_response('Error', str(e), 500)
@@ -573,6 +720,11 @@ def track_itinerary_view(user_id, itinerary_id):
                 itinerary.view_count += 1
                 db.session.commit()
 
+                # First view per viewer, so reloads can't inflate its tags
+                if itinerary.is_published:
+                    from utils.trending_tags import TrendingTagsTracker
+                    TrendingTagsTracker.record_event(itinerary, 'view')
+
                 return success_response({
                     'view_count': itinerary.view_count,
                     'is_new_view': True
@@ -8,8 +8,6 @@ from models.post import Post
 from models.traveler import Traveler
 from utils.decorators import token_required, optional_auth
 from utils.helpers import success_response, error_response, paginated_response
-from web3 import Web3
-from eth_account.messages import encode_defunct
 from datetime import datetime
 from uuid import uuid4
 
@@ -75,6 +73,10 @@ def create_post(user_id):
     # Verify signature using the same timestamp that was signed
     message = f"TripIt Post\nContent: {content_url}\nCaption: {caption}\nTimestamp: {timestamp}"
 
+    # Lazy import: web3 is heavy and only needed when verifying a signed post
+    from web3 import Web3
+    from eth_account.messages import encode_defunct
+
     w3 = Web3()
     message_hash = encode_defunct(text=message)
 
@@ -32,50 +32,37 @@ def fetch_user_stats(user_id):
         from models.badge import ValidationBadge
         from models.intro import Intro
 
-        # Check if user is a traveler or old user
-        user = Traveler.query.get(user_id)
-        is_traveler = user is not None
-
-        if not user:
-            user = User.query.get(user_id)
+        # Check if user is a traveler or old user (cached principal, no table probe)
+        from utils.principal import get_principal
+        user = get_principal(user_id)
 
         if not user:
             print(f"User {user_id} not found in either table")
             return None
+        is_traveler = user.kind == 'traveler'
 
         # Count content from both tables
         project_count = count_user_content(user_id)
 
-        # Comments: count both Comment AND TravelIntel (new system for travelers)
-        from models.travel_intel import TravelIntel
-        old_comments = Comment.query.filter_by(user_id=user_id).count()
-
-        # If traveler, also count travel intel entries
-        travel_intel_comments = 0
         if is_traveler:
-            travel_intel_comments = TravelIntel.query.filter_by(traveler_id=user_id).count()
-
-        comment_count = old_comments + travel_intel_comments
-
-        # Calculate total upvotes - check both tables
-        # Projects table (user_id references users.id)
-        project_upvotes = db.session.query(
-            func.coalesce(func.sum(Project.upvotes), 0)
-        ).filter(
-            Project.user_id == user_id,
-            Project.is_deleted == False
-        ).scalar() or 0
-
-        # Itineraries table (created_by_traveler_id references travelers.id)
-        itinerary_upvotes = db.session.query(
-            func.coalesce(func.sum(Itinerary.upvotes), 0)
-        ).filter(
-            Itinerary.created_by_traveler_id == user_id,
-            Itinerary.is_deleted == False
-        ).scalar() or 0
-
-        # Total upvotes across both content types
-        total_upvotes = int(project_upvotes) + int(itinerary_upvotes)
+            # One row of trigger-maintained counters (traveler_stats)
+            from services.traveler_stats import TravelerStatsService
+            counters = TravelerStatsService.get(user_id).to_dict()
+
+            # Comments: count both Comment AND TravelIntel (new system for travelers)
+            comment_count = counters['comment_count'] + counters['intel_count']
+            total_upvotes = counters['itinerary_upvotes']
+        else:
+            comment_count = Comment.query.filter_by(user_id=user_id).count()
+
+            # Projects table (user_id references users.id)
+            project_upvotes = db.session.query(
+                func.coalesce(func.sum(Project.upvotes), 0)
+            ).filter(
+                Project.user_id == user_id,
+                Project.is_deleted == False
+            ).scalar() or 0
+            total_upvotes = int(project_upvotes)
 
         # Badges: validator_id can reference either table
         badges_awarded = ValidationBadge.query.filter_by(validator_id=user_id).count()
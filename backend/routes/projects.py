@@ -1,6 +1,8 @@
 """
 Project routes
 """
+import logging
+
 from flask import Blueprint, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import ValidationError
@@ -22,6 +24,8 @@ from tasks.scoring_tasks import score_project_task, check_rate_limit
 from utils.cache import CacheService
 from services.investor_matching import InvestorMatchingService
 
+logger = logging.getLogger(__name__)
+
 projects_bp = Blueprint('projects', __name__)
 
 
@@ -71,50 +75,18 @@ def list_projects(user_id):
         )
 
         if not has_filters:
-            print(f"\n[API] GET /projects: No filters, checking cache... user_id={user_id}, sort={sort}, page={page}")
             cached = CacheService.get_cached_feed(page, sort)
-            print(f"[CACHE] Cache hit: {cached is not None}")
             if cached:
-                # Make a shallow copy to avoid modifying cached data
+                # Shallow copies so the per-user overlay never leaks into the shared page
                 response_data = dict(cached)
-
-                # Even though data is cached, we need to add user-specific data (votes)
-                if user_id and 'data' in response_data and response_data['data']:
-                    from models.vote import Vote
-                    # Create a copy of the data list to avoid modifying cached projects
+                if user_id and response_data.get('data'):
+                    from services.redis_cache_service import RedisUserCache
                     response_data['data'] = [dict(p) for p in response_data['data']]
-
                     project_ids = [p.get('id') for p in response_data['data'] if p.get('id')]
+                    overlay = RedisUserCache.get_feed_overlay(user_id, project_ids)
+                    for project in response_data['data']:
+                        project.update(overlay.get(project.get('id'), {'user_vote': None, 'user_has_saved': False}))
 
-                    print(f"[VOTE INJECTION] User: {user_id}, Projects in cache: {len(project_ids)}")
-                    print(f"[VOTE INJECTION] First few project IDs: {project_ids[:3]}")
-
-                    # Fetch user's votes for these projects
-                    if project_ids:
-                        votes = Vote.query.filter(
-                            Vote.user_id == user_id,
-                            Vote.project_id.in_(project_ids)
-                        ).all()
-                        votes_dict = {vote.project_id: vote.vote_type for vote in votes}
-                        print(f"[VOTE INJECTION] Found {len(votes_dict)} votes for user {user_id}")
-                        if votes_dict:
-                            print(f"[VOTE INJECTION] Votes dictionary: {votes_dict}")
-
-                        # Add user votes to each project in response data (copy, not cached)
-                        for i, project in enumerate(response_data['data'][:3]):  # Log first 3
-                            old_vote = project.get('user_vote')
-                            project['user_vote'] = votes_dict.get(project.get('id'))
-                            new_vote = project['user_vote']
-                            if old_vote != new_vote:
-                                print(f"[VOTE INJECTION] Project {i} ({project.get('id')}): {old_vote} → {new_vote}")
-
-                        # Do it for all without extra logging
-                        for project in response_data['data']:
-                            project['user_vote'] = votes_dict.get(project.get('id'))
-                else:
-                    print(f"[VOTE INJECTION] SKIPPED: user_id={user_id}, has_data={'data' in response_data}, data_len={len(response_data.get('data', []))}")
-
-                print(f"[API RESPONSE] Returning {len(response_data.get('data', []))} projects from cache")
                 from flask import jsonify
                 return jsonify(response_data), 200
 
@@ -145,7 +117,7 @@ def list_projects(user_id):
                 raw_projects = [dict(row._mapping) for row in result.fetchall()]
             except Exception as e:
                 # If materialized view query fails, fall back to regular query
-                print(f"[ERROR] Materialized view query failed: {e}")
+                logger.warning("Materialized view query failed: %s", e)
                 db.session.rollback()
                 raw_projects = []
             
@@ -347,8 +319,7 @@ def list_projects(user_id):
                     projects_data.append(project_data)
                 except Exception as e:
                     # Log error but continue processing other projects
-                    print(f"[ERROR] Failed to transform project row: {e}")
-                    print(f"[ERROR] Row data: {row}")
+                    logger.error("Failed to transform project row %s: %s", row, e)
                     continue
 
             # Get total count from materialized view
@@ -567,12 +538,8 @@ def get_investor_matches(user_id):
         return jsonify(response_data), 200
 
     except Exception as e:
-        import traceback
         error_msg = str(e)
-        error_tb = traceback.format_exc()
-        print(f"\n[ERROR] get_investor_matches() failed:")
-        print(f"Error message: {error_msg}")
-        print(f"Full traceback:\n{error_tb}\n")
+        logger.exception("get_investor_matches() failed")
         return error_response('Error', f'Failed to fetch matched projects: {error_msg}', 500)
 
 
@@ -681,18 +648,11 @@ def create_project(user_id):
     """Create new project"""
     try:
         data = request.get_json()
-        print("=== RECEIVED PROJECT DATA ===")
-        print(f"github_url in request: {data.get('github_url')}")
-        print(f"Full request data: {data}")
-        print("============================")
+        logger.debug("Create project request: %s", data)
 
         schema = ProjectCreateSchema()
         validated_data = schema.load(data)
 
-        print("=== VALIDATED DATA ===")
-        print(f"github_url after validation: {validated_data.get('github_url')}")
-        print("======================")
-
         # Create project
         project = Project(
             user_id=user_id,
@@ -737,7 +697,7 @@ def create_project(user_id):
             score_project_task.delay(project.id)
         except Exception as e:
             # Log error but don't fail project creation
-            print(f"Failed to queue scoring task: {e}")
+            logger.warning("Failed to queue scoring task: %s", e)
 
         # Add to chains if chain_ids provided
         chain_ids = validated_data.get('chain_ids', [])
@@ -835,7 +795,7 @@ def create_project(user_id):
                     project=project
                 )
         except Exception as email_err:
-            print(f"[Projects] Warning: failed to send project created email: {email_err}")
+            logger.warning("Failed to send project created email: %s", email_err)
 
         return success_response(project_data, 'Project created', 201)
     except ValidationError as e:
@@ -888,7 +848,7 @@ def update_project(user_id, project_id):
                 score_project_task.delay(project.id)
                 CacheService.invalidate_leaderboard()  # Scores affect leaderboard
             except Exception as e:
-                print(f"Failed to queue project rescore after update: {e}")
+                logger.warning("Failed to queue project rescore after update: %s", e)
 
         # Emit Socket.IO event for real-time updates
         from services.socket_service import SocketService
@@ -9,10 +9,12 @@ from datetime import datetime
 from extensions import db
 from models.safety_rating import SafetyRating
 from models.itinerary import Itinerary
+from models.itinerary_safety_stats import ItinerarySafetyStats
 from models.traveler import Traveler
 from schemas.itinerary import SafetyRatingSchema
 from utils.decorators import token_required, optional_auth
 from utils.helpers import success_response, error_response, get_pagination_params
+from services.feed_engine import FeedEngine
 from utils.cache import CacheService
 from utils.trip_economy import TripEconomy
 from marshmallow import ValidationError
@@ -20,6 +22,59 @@ from flask import current_app
 
 safety_ratings_bp = Blueprint('safety_ratings', __name__)
 
+RESCORE_DEBOUNCE_SECONDS = 60  # A burst of ratings on one itinerary queues one full rescore
+KEY_RESCORE_PENDING = "itinerary_rescore_pending:{itinerary_id}"
+
+
+def _apply_rating_change(itinerary_id, old_values=None, new_values=None):
+    """
+    Fold a rating change into itinerary_safety_stats and refresh the itinerary
+
+    Runs in the caller's transaction: the rating write, the aggregate update
+    and the itinerary's safety score commit (or roll back) together. The
+    safety component is recomputed in place instead of queueing a full rescore.
+    """
+    stats = ItinerarySafetyStats.apply_rating_delta(itinerary_id, old_values, new_values)
+
+    itinerary = Itinerary.query.get(itinerary_id)
+    if not itinerary:
+        return None
+
+    itinerary.safety_score, itinerary.safety_ratings_count = ItinerarySafetyStats.safety_score_from(stats)
+
+    from tasks.scoring_tasks import compute_safety_component
+    itinerary.safety_score_component = compute_safety_component(itinerary)
+    itinerary.calculate_proof_score()
+    itinerary.proof_score = round(itinerary.proof_score, 2)
+    # Same mirror as score_itinerary_task
+    itinerary.travel_credibility_score = itinerary.proof_score
+
+    return itinerary
+
+
+def _after_rating_commit(itinerary):
+    """
+    Refresh caches and queue a debounced full rescore once a rating write commits
+
+    The in-place update covers the scores; the rescore catches up
+    score_explanations. Feed id lists ordered or filtered by proof / safety
+    score are dropped only when the itinerary is listed in the feed.
+    """
+    if itinerary is None:
+        return
+    CacheService.invalidate_itinerary(itinerary.id)
+    if itinerary.is_published and not itinerary.is_deleted:
+        FeedEngine.invalidate_scored()
+
+    try:
+        client = CacheService.get_redis_client()
+        key = KEY_RESCORE_PENDING.format(itinerary_id=itinerary.id)
+        if client is None or client.set(key, '1', ex=RESCORE_DEBOUNCE_SECONDS, nx=True):
+            from tasks.scoring_tasks import score_itinerary_task
+            score_itinerary_task.apply_async(args=[itinerary.id], countdown=RESCORE_DEBOUNCE_SECONDS)
+    except Exception as e:
+        current_app.logger.warning(f"Could not queue rescore for itinerary {itinerary.id}: {e}")
+
 
 @safety_ratings_bp.route('', methods=['POST'])
 @token_required
@@ -77,6 +132,8 @@ def add_safety_rating(user_id):
         photo_ipfs_hashes = data.get('photo_ipfs_hashes', [])
 
         if existing_rating:
+            old_values = ItinerarySafetyStats.rating_values(existing_rating)
+
             # Update existing rating
             for key, value in rating_data.items():
                 if value is not None:
@@ -88,6 +145,7 @@ def add_safety_rating(user_id):
                 existing_rating.photo_ipfs_hashes = photo_ipfs_hashes
 
             existing_rating.updated_at = datetime.utcnow()
+            itinerary = _apply_rating_change(itinerary_id, old_values, ItinerarySafetyStats.rating_values(existing_rating))
             db.session.commit()
             rating = existing_rating
         else:
@@ -101,6 +159,8 @@ def add_safety_rating(user_id):
                 **rating_data
             )
             db.session.add(rating)
+            db.session.flush()
+            itinerary = _apply_rating_change(itinerary_id, None, ItinerarySafetyStats.rating_values(rating))
             db.session.commit()
 
             # Award TRIP tokens for new safety rating (5 TRIP)
@@ -116,35 +176,8 @@ def add_safety_rating(user_id):
             except Exception as e:
                 current_app.logger.error(f"Failed to award TRIP tokens: {e}")
 
-        # Recalculate itinerary's average safety score (verified users only)
-        verified_ratings = SafetyRating.query.filter_by(
-            itinerary_id=itinerary_id,
-            verified_traveler=True
-        ).all()
-
-        if verified_ratings:
-            avg_safety = sum(r.overall_safety_score for r in verified_ratings) / len(verified_ratings)
-            itinerary.safety_score = round(avg_safety, 2)
-            itinerary.safety_ratings_count = len(verified_ratings)
-        else:
-            # If no verified ratings, use all ratings as fallback
-            all_ratings = SafetyRating.query.filter_by(itinerary_id=itinerary_id).all()
-            if all_ratings:
-                avg_safety = sum(r.overall_safety_score for r in all_ratings) / len(all_ratings)
-                itinerary.safety_score = round(avg_safety, 2)
-                itinerary.safety_ratings_count = len(all_ratings)
-            else:
-                itinerary.safety_score = 0
-                itinerary.safety_ratings_count = 0
-
-        db.session.commit()
-
-        CacheService.invalidate_itinerary(itinerary_id)
-        CacheService.invalidate_itinerary_feed()
-
-        # Trigger full scoring recalculation
-        from tasks.scoring_tasks import score_itinerary_task
-        score_itinerary_task.delay(itinerary_id)
+        # Aggregates already updated with the rating; targeted invalidation
+        _after_rating_commit(itinerary)
 
         # Emit Socket.IO event
         try:
@@ -204,6 +237,30 @@ def get_itinerary_safety_ratings(user_id, itinerary_id):
         return error_response('Error', str(e), 500)
 
 
+@safety_ratings_bp.route('/<itinerary_id>/stats', methods=['GET'])
+@optional_auth
+def get_itinerary_safety_stats(user_id, itinerary_id):
+    """Get aggregated safety stats for an itinerary (O(1) - no rating scan)"""
+    try:
+        stats = ItinerarySafetyStats.query.get(itinerary_id)
+        if not stats:
+            itinerary = Itinerary.query.get(itinerary_id)
+            if not itinerary or itinerary.is_deleted:
+                return error_response('Not found', 'Itinerary not found', 404)
+            stats = ItinerarySafetyStats(itinerary_id=itinerary_id)
+
+        response_data = {
+            'status': 'success',
+            'message': 'Safety stats retrieved',
+            'data': stats.to_dict()
+        }
+
+        return jsonify(response_data), 200
+
+    except Exception as e:
+        return error_response('Error', str(e), 500)
+
+
 @safety_ratings_bp.route('/<rating_id>', methods=['GET'])
 @optional_auth
 def get_safety_rating(user_id, rating_id):
@@ -238,6 +295,7 @@ def update_safety_rating(user_id, rating_id):
             return error_response('Forbidden', 'You can only edit your own ratings', 403)
 
         data = request.get_json()
+        old_values = ItinerarySafetyStats.rating_values(rating)
 
         # Update fields
         if 'overall_safety_score' in data:
@@ -258,39 +316,10 @@ def update_safety_rating(user_id, rating_id):
             rating.photo_ipfs_hashes = data['photo_ipfs_hashes']
 
         rating.updated_at = datetime.utcnow()
+        itinerary = _apply_rating_change(rating.itinerary_id, old_values, ItinerarySafetyStats.rating_values(rating))
         db.session.commit()
 
-        # Recalculate itinerary's average safety score (verified users only)
-        itinerary = Itinerary.query.get(rating.itinerary_id)
-        if itinerary:
-            verified_ratings = SafetyRating.query.filter_by(
-                itinerary_id=rating.itinerary_id,
-                verified_traveler=True
-            ).all()
-
-            if verified_ratings:
-                avg_safety = sum(r.overall_safety_score for r in verified_ratings) / len(verified_ratings)
-                itinerary.safety_score = round(avg_safety, 2)
-                itinerary.safety_ratings_count = len(verified_ratings)
-            else:
-                # If no verified ratings, use all ratings as fallback
-                all_ratings = SafetyRating.query.filter_by(itinerary_id=rating.itinerary_id).all()
-                if all_ratings:
-                    avg_safety = sum(r.overall_safety_score for r in all_ratings) / len(all_ratings)
-                    itinerary.safety_score = round(avg_safety, 2)
-                    itinerary.safety_ratings_count = len(all_ratings)
-                else:
-                    itinerary.safety_score = 0
-                    itinerary.safety_ratings_count = 0
-
-            db.session.commit()
-
-        CacheService.invalidate_itinerary(rating.itinerary_id)
-        CacheService.invalidate_itinerary_feed()
-
-        # Trigger full scoring recalculation
-        from tasks.scoring_tasks import score_itinerary_task
-        score_itinerary_task.delay(rating.itinerary_id)
+        _after_rating_commit(itinerary)
 
         return success_response(
             rating.to_dict(),
@@ -316,40 +345,12 @@ def delete_safety_rating(user_id, rating_id):
             return error_response('Forbidden', 'You can only delete your own ratings', 403)
 
         itinerary_id = rating.itinerary_id
+        old_values = ItinerarySafetyStats.rating_values(rating)
         db.session.delete(rating)
+        itinerary = _apply_rating_change(itinerary_id, old_values, None)
         db.session.commit()
 
-        # Recalculate itinerary's average safety score (verified users only)
-        itinerary = Itinerary.query.get(itinerary_id)
-        if itinerary:
-            verified_ratings = SafetyRating.query.filter_by(
-                itinerary_id=itinerary_id,
-                verified_traveler=True
-            ).all()
-
-            if verified_ratings:
-                avg_safety = sum(r.overall_safety_score for r in verified_ratings) / len(verified_ratings)
-                itinerary.safety_score = round(avg_safety, 2)
-                itinerary.safety_ratings_count = len(verified_ratings)
-            else:
-                # If no verified ratings, use all ratings as fallback
-                all_ratings = SafetyRating.query.filter_by(itinerary_id=itinerary_id).all()
-                if all_ratings:
-                    avg_safety = sum(r.overall_safety_score for r in all_ratings) / len(all_ratings)
-                    itinerary.safety_score = round(avg_safety, 2)
-                    itinerary.safety_ratings_count = len(all_ratings)
-                else:
-                    itinerary.safety_score = 0
-                    itinerary.safety_ratings_count = 0
-
-            db.session.commit()
-
-        CacheService.invalidate_itinerary(itinerary_id)
-        CacheService.invalidate_itinerary_feed()
-
-        # Trigger full scoring recalculation
-        from tasks.scoring_tasks import score_itinerary_task
-        score_itinerary_task.delay(itinerary_id)
+        _after_rating_commit(itinerary)
 
         return success_response(None, 'Safety rating deleted', 200)
 
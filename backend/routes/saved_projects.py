@@ -9,6 +9,7 @@ from models.itinerary import Itinerary
 from utils.decorators import token_required
 from utils.helpers import success_response, error_response, paginated_response, get_pagination_params
 from utils.cache import CacheService
+from services.redis_cache_service import RedisUserCache
 
 saved_projects_bp = Blueprint('saved_projects', __name__, url_prefix='/api/saved')
 
@@ -47,6 +48,7 @@ def save_project(user_id, project_id):
 
         # Invalidate cache
         CacheService.invalidate_user(user_id)
+        RedisUserCache.add_bookmark(user_id, project_id)
 
         # Emit Socket.IO event (optional)
         from services.socket_service import SocketService
@@ -89,6 +91,7 @@ def unsave_project(user_id, project_id):
 
         # Invalidate cache
         CacheService.invalidate_user(user_id)
+        RedisUserCache.remove_bookmark(user_id, project_id)
 
         # Emit Socket.IO event (optional)
         if project:
@@ -13,6 +13,7 @@ from models.traveler import Traveler
 from models.itinerary import Itinerary
 from utils.decorators import token_required, optional_auth
 from utils.helpers import success_response, error_response, get_pagination_params
+from utils.pagination import CursorError, SortKey, cursor_pagination, get_cursor_params, keyset_paginate, optional_total
 from utils.cache import CacheService
 
 travel_groups_bp = Blueprint('travel_groups', __name__)
@@ -508,9 +509,21 @@ def get_matching_groups(user_id):
             TravelGroup.current_members_count < TravelGroup.max_members
         )
 
+        sort_keys = [SortKey(TravelGroup.created_at), SortKey(TravelGroup.id)]
+
+        cursor_params = get_cursor_params(request, default_per_page=15)
+        if cursor_params is not None:
+            cursor, per_page = cursor_params
+            groups, next_cursor = keyset_paginate(query, sort_keys, cursor, per_page, scope='matched_groups')
+            total, estimated = optional_total(request, query)
+            return success_response({
+                'matched_groups': [g.to_dict(include_members=False) for g in groups],
+                'pagination': cursor_pagination(next_cursor, per_page, total, estimated),
+            }, 'Matched groups retrieved', 200)
+
         # Sort by relevance (number of matched interests)
         total = query.count()
-        groups = query.order_by(TravelGroup.created_at.desc()).limit(per_page).offset((page - 1) * per_page).all()
+        groups = query.order_by(*[key.order_by() for key in sort_keys]).limit(per_page).offset((page - 1) * per_page).all()
 
         data = [g.to_dict(include_members=False) for g in groups]
 
@@ -524,5 +537,7 @@ def get_matching_groups(user_id):
             }
         }, 'Matched groups retrieved', 200)
 
+    except CursorError as e:
+        return error_response('Validation error', str(e), 400)
     except Exception as e:
         return error_response('Error', str(e), 500)
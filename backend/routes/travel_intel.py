@@ -14,13 +14,21 @@ from models.itinerary import Itinerary
 from schemas.itinerary import TravelIntelSchema
 from utils.decorators import token_required, optional_auth
 from utils.helpers import success_response, error_response, paginated_response, get_pagination_params
+from utils.pagination import CursorError, SortKey, cursor_pagination, get_cursor_params, keyset_paginate, optional_total
 from utils.cache import CacheService
 from utils.trip_economy import TripEconomy
+from services.thread_loader import ThreadLoader
 
 logger = logging.getLogger(__name__)
 
 travel_intel_bp = Blueprint('travel_intel', __name__)
 
+# Intel orderings; id makes each order total for cursors
+INTEL_SORT_KEYS = {
+    'helpful': [SortKey(TravelIntel.helpful_votes, default=0), SortKey(TravelIntel.id)],
+    'newest': [SortKey(TravelIntel.created_at), SortKey(TravelIntel.id)],
+}
+
 
 @travel_intel_bp.route('', methods=['GET'])
 @optional_auth
@@ -52,14 +60,25 @@ def get_travel_intel(user_id):
             query = query.filter(TravelIntel.intel_type == intel_type.lower())
 
         # Sorting
-        if sort == 'helpful':
-            query = query.order_by(TravelIntel.helpful_votes.desc())
-        elif sort == 'critical':
-            query = query.filter(TravelIntel.severity_level == 'critical').order_by(
-                TravelIntel.created_at.desc()
+        if sort == 'critical':
+            query = query.filter(TravelIntel.severity_level == 'critical')
+        sort_keys = INTEL_SORT_KEYS['helpful' if sort == 'helpful' else 'newest']
+
+        cursor_params = get_cursor_params(request)
+        if cursor_params is not None:
+            cursor, per_page = cursor_params
+            intel_items, next_cursor = keyset_paginate(
+                query, sort_keys, cursor, per_page, scope=f'travel_intel:{itinerary_id}:{sort}'
             )
-        else:  # newest (default)
-            query = query.order_by(TravelIntel.created_at.desc())
+            total, estimated = optional_total(request, query)
+            return jsonify({
+                'status': 'success',
+                'message': 'Travel intel retrieved',
+                'data': [i.to_dict() for i in intel_items],
+                'pagination': cursor_pagination(next_cursor, per_page, total, estimated),
+            }), 200
+
+        query = query.order_by(*[key.order_by() for key in sort_keys])
 
         total = query.count()
         intel_items = query.limit(per_page).offset((page - 1) * per_page).all()
@@ -80,6 +99,8 @@ def get_travel_intel(user_id):
 
         return jsonify(response_data), 200
 
+    except CursorError as e:
+        return error_response('Validation error', str(e), 400)
     except Exception as e:
         logger.error(f"GET /travel_intel ERROR: {str(e)}")
         return error_response('Error', str(e), 500)
@@ -184,6 +205,37 @@ def create_travel_intel(user_id):
         return error_response('Error', str(e), 500)
 
 
+@travel_intel_bp.route('/thread', methods=['GET'])
+@optional_auth
+def get_travel_intel_thread(user_id):
+    """
+    Intel threads with nested replies in one request
+
+    Query: itinerary_id (required), parent_id (subtree), depth, per_page, cursor
+    """
+    try:
+        itinerary_id = request.args.get('itinerary_id')
+        if not itinerary_id:
+            return error_response('Bad request', 'itinerary_id required', 400)
+
+        _, per_page = get_pagination_params(request, default_per_page=20, max_per_page=50)
+        depth = request.args.get('depth', ThreadLoader.DEFAULT_DEPTH, type=int)
+
+        data = ThreadLoader.load(
+            'travel_intel', itinerary_id,
+            parent_id=request.args.get('parent_id') or None,
+            cursor=request.args.get('cursor', ''),
+            per_page=per_page, max_depth=depth, user_id=user_id
+        )
+        return success_response(data, 'Travel intel thread retrieved', 200)
+
+    except CursorError as e:
+        return error_response('Validation error', str(e), 400)
+    except Exception as e:
+        logger.error(f"GET /travel_intel/thread ERROR: {str(e)}")
+        return error_response('Error', str(e), 500)
+
+
 @travel_intel_bp.route('/<intel_id>', methods=['GET'])
 @optional_auth
 def get_travel_intel_detail(user_id, intel_id):
@@ -320,6 +372,7 @@ def mark_intel_helpful(user_id, intel_id):
         db.session.commit()
 
         CacheService.invalidate_itinerary(intel.itinerary_id)
+        CacheService.invalidate_threads('travel_intel', intel.itinerary_id)
 
         return success_response(
             {
@@ -348,6 +401,7 @@ def mark_intel_unhelpful(user_id, intel_id):
         db.session.commit()
 
         CacheService.invalidate_itinerary(intel.itinerary_id)
+        CacheService.invalidate_threads('travel_intel', intel.itinerary_id)
 
         return success_response(
             {
@@ -419,6 +473,7 @@ def respond_to_intel(user_id, intel_id):
 
         # Invalidate cache
         CacheService.invalidate_itinerary(intel.itinerary_id)
+        CacheService.invalidate_threads('travel_intel', intel.itinerary_id)
 
         # Emit Socket.IO event
         try:
@@ -14,7 +14,7 @@ def get_trending_tags():
         return jsonify({
             'success': True,
             'data': tags,
-            'last_updated': TrendingTagsTracker._last_refresh.isoformat() if TrendingTagsTracker._last_refresh else None
+            'last_updated': TrendingTagsTracker.get_last_updated()
         })
     except Exception as e:
         return jsonify({
@@ -14,6 +14,7 @@ from schemas.user import UserProfileUpdateSchema
 from utils.decorators import token_required, optional_auth
 from utils.helpers import success_response, error_response, paginated_response, get_pagination_params
 from utils.cache import CacheService
+from utils.principal import invalidate_principal
 
 users_bp = Blueprint('users', __name__)
 
@@ -187,6 +188,7 @@ def update_profile(user_id):
         # Invalidate user cache
         CacheService.delete(f"user_profile:{user.username}")
         CacheService.invalidate_user(user_id)
+        invalidate_principal(user_id)
 
         # Emit Socket.IO event for real-time profile updates
         from services.socket_service import SocketService
@@ -214,51 +216,28 @@ def update_profile(user_id):
 def get_user_stats(user_id):
     """Get user statistics - works for both User and Traveler tables"""
     try:
-        # Check both tables for user
-        from models.traveler import Traveler
-        from models.comment import Comment
-        user = Traveler.query.get(user_id)
-        is_traveler = user is not None
-
-        if not user:
-            user = User.query.get(user_id)
+        # Cached principal says which table the account lives in
+        from utils.principal import get_principal
+        user = get_principal(user_id)
         if not user:
             return error_response('Not found', 'User not found', 404)
+        is_traveler = user.kind == 'traveler'
 
-        # If traveler, calculate stats dynamically (no denormalized table for travelers)
+        # Travelers: one row of trigger-maintained counters (traveler_stats)
         if is_traveler:
-            # Count itineraries created by this traveler
-            itinerary_count = Itinerary.query.filter_by(
-                created_by_traveler_id=user_id,
-                is_deleted=False,
-                is_published=True
-            ).count()
-
-            # Calculate total upvotes on itineraries
-            itinerary_upvotes = db.session.query(
-                func.coalesce(func.sum(Itinerary.upvotes), 0)
-            ).filter(
-                Itinerary.created_by_traveler_id == user_id,
-                Itinerary.is_deleted == False,
-                Itinerary.is_published == True
-            ).scalar() or 0
-
-            # Count comments by this traveler
-            # For travelers: count both old comments AND travel intel (new comment system)
-            from models.travel_intel import TravelIntel
-            old_comments = Comment.query.filter_by(user_id=user_id).count()
-            travel_intel_comments = TravelIntel.query.filter_by(traveler_id=user_id).count()
-            comment_count = old_comments + travel_intel_comments
+            from services.traveler_stats import TravelerStatsService
+            counters = TravelerStatsService.get(user_id).to_dict()
 
             # Travelers don't use intros system (that's for old users table)
             stats = {
                 'user_id': user_id,
                 'username': user.username,
-                'project_count': itinerary_count,  # Total itineraries
-                'active_projects': itinerary_count,
+                'project_count': counters['published_itinerary_count'],  # Published itineraries
+                'active_projects': counters['published_itinerary_count'],
                 'total_proof_score': 0,
-                'comment_count': comment_count,
-                'total_upvotes': int(itinerary_upvotes),
+                # Comments: old comments AND travel intel (new comment system)
+                'comment_count': counters['comment_count'] + counters['intel_count'],
+                'total_upvotes': counters['itinerary_upvotes'],
                 'badges_given': 0,
                 'badges_awarded': 0,
                 'badges_received': 0,
@@ -268,6 +247,10 @@ def get_user_stats(user_id):
                 'karma_score': 0,
                 'unread_messages': 0,
                 'unread_notifications': 0,
+                'snap_count': counters['snap_count'],
+                'safety_rating_count': counters['safety_rating_count'],
+                'certification_count': counters['certification_count'],
+                'trip_earned': counters['trip_earned'],
             }
             return success_response(stats, 'Traveler stats retrieved', 200)
 
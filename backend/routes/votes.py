@@ -1,6 +1,8 @@
 """
 Vote routes
 """
+import logging
+
 from flask import Blueprint, request
 from sqlalchemy.orm import joinedload
 
@@ -15,6 +17,8 @@ from utils.content_utils import get_content_by_id
 from utils.cache import CacheService
 from marshmallow import ValidationError
 
+logger = logging.getLogger(__name__)
+
 votes_bp = Blueprint('votes', __name__)
 
 
@@ -25,58 +29,58 @@ def cast_vote(user_id):
     Cast or remove vote (ASYNC - sub-50ms response)
 
     New async architecture:
-    1. Fast path: Validate + update Redis + enqueue Celery task (<50ms)
-    2. Slow path: Celery worker does durable DB write + reconciliation
+    1. Fast path: Validate + update Redis + append to vote:events (<50ms)
+    2. Slow path: VoteStreamWorker does durable DB write (Celery if the append failed)
     """
     try:
-        print(f"\n[VOTE_DEBUG] ========== NEW VOTE REQUEST ==========")
-        print(f"[VOTE_DEBUG] User ID: {user_id}")
-
         # 1. Validate input
         data = request.get_json()
-        print(f"[VOTE_DEBUG] Request data: {data}")
 
         schema = VoteCreateSchema()
         validated_data = schema.load(data)
 
         project_id = validated_data['project_id']
         vote_type = validated_data['vote_type']
-        print(f"[VOTE_DEBUG] Project ID: {project_id}, Vote Type: {vote_type}")
 
         # 2. Redis rate limiting (5 votes per user per post per 10 seconds)
         from services.vote_service import VoteService
         vote_service = VoteService()
 
         if not vote_service.check_rate_limit(user_id, project_id):
-            print(f"[VOTE_DEBUG] ❌ RATE LIMITED")
+            logger.info("Vote rate limited: user %s on %s", user_id, project_id)
             return error_response('Rate limit', 'Too many vote attempts. Please wait a moment.', 429)
 
         # 3. Verify content exists - check both Project and Itinerary tables (lightweight check - no locking)
         content = get_content_by_id(project_id)
         if not content:
-            print(f"[VOTE_DEBUG] ❌ CONTENT NOT FOUND for ID: {project_id}")
             return error_response('Not found', 'Content not found', 404)
 
-        print(f"[VOTE_DEBUG] ✅ Content found: {type(content).__name__}")
-
         # 4. Fast-path vote processing via Redis
-        print(f"[VOTE_DEBUG] Calling fast_vote...")
         result = vote_service.fast_vote(user_id, project_id, vote_type)
-        print(f"[VOTE_DEBUG] fast_vote result: {result}")
-
-        # 4. Enqueue Celery task for durable processing
-        from tasks.vote_tasks import process_vote_event
-
-        print(f"[VOTE_DEBUG] Enqueuing Celery task...")
-        task = process_vote_event.delay(
-            request_id=result['request_id'],
-            user_id=user_id,
-            project_id=project_id,
-            vote_type=vote_type,
-            prior_vote=result['prior_vote'] or '',
-            action=result['action']
-        )
-        print(f"[VOTE_DEBUG] ✅ Celery task enqueued: {task.id}")
+        logger.debug("fast_vote %s", result)
+
+        # 4. Durable write: VoteStreamWorker applies the stream entry; Celery only if the append failed
+        if not result['streamed']:
+            from tasks.vote_tasks import process_vote_event
+
+            task = process_vote_event.delay(
+                request_id=result['request_id'],
+                user_id=user_id,
+                project_id=project_id,
+                vote_type=vote_type,
+                prior_vote=result['prior_vote'] or '',
+                action=result['action']
+            )
+            logger.warning("Vote %s not streamed, queued Celery task %s", result['request_id'], task.id)
+
+        # Upvotes on itineraries feed the trending tags window; only the net change
+        # counts, so toggling a vote on and off leaves the tags where they were
+        up_delta = (result['user_vote'] == 'up') - (result['prior_vote'] == 'up')
+        if up_delta:
+            from models.itinerary import Itinerary
+            if isinstance(content, Itinerary):
+                from utils.trending_tags import TrendingTagsTracker
+                TrendingTagsTracker.record_event(content, 'vote', count=up_delta)
 
         # 5. Return optimistic response immediately
         response_data = {
@@ -89,18 +93,12 @@ def cast_vote(user_id):
             'action': result['action']  # 'created'|'removed'|'changed'
         }
 
-        print(f"[VOTE_DEBUG] ✅ SUCCESS - Returning response: {response_data}")
-        print(f"[VOTE_DEBUG] ==========================================\n")
-
         return success_response(response_data, 'Vote recorded', 200)
 
     except ValidationError as e:
-        print(f"[VOTE_DEBUG] ❌ VALIDATION ERROR: {e.messages}")
         return error_response('Validation error', str(e.messages), 400)
     except Exception as e:
-        print(f"[VOTE_DEBUG] ❌ EXCEPTION: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Casting vote failed")
         return error_response('Error', str(e), 500)
 
 
@@ -14,10 +14,18 @@ from models.women_safety_resource import WomenSafetyResource
 from models.traveler import Traveler
 from utils.decorators import token_required, optional_auth
 from utils.helpers import success_response, error_response, get_pagination_params
+from utils.pagination import CursorError, SortKey, cursor_pagination, get_cursor_params, keyset_paginate, optional_total
 from utils.cache import CacheService
 
 women_safety_bp = Blueprint('women_safety', __name__)
 
+# Guide listing order (rating, then popularity); id makes it total for cursors
+GUIDE_SORT_KEYS = [
+    SortKey(WomenGuide.average_rating, default=0.0),
+    SortKey(WomenGuide.total_reviews, default=0),
+    SortKey(WomenGuide.id),
+]
+
 
 # ============================================================================
 # WOMEN GUIDES ENDPOINTS
@@ -78,8 +86,18 @@ def list_women_guides(user_id):
         if language:
             query = query.filter(WomenGuide.languages_spoken.contains([language]))
 
+        cursor_params = get_cursor_params(request, default_per_page=20)
+        if cursor_params is not None:
+            cursor, per_page = cursor_params
+            guides, next_cursor = keyset_paginate(query, GUIDE_SORT_KEYS, cursor, per_page, scope='women_guides')
+            total, estimated = optional_total(request, query)
+            return success_response({
+                'guides': [g.to_dict() for g in guides],
+                'pagination': cursor_pagination(next_cursor, per_page, total, estimated),
+            }, 'Women guides retrieved', 200)
+
         # Sort by rating/popularity
-        query = query.order_by(WomenGuide.average_rating.desc(), WomenGuide.total_reviews.desc())
+        query = query.order_by(*[key.order_by() for key in GUIDE_SORT_KEYS])
 
         total = query.count()
         guides = query.limit(per_page).offset((page - 1) * per_page).all()
@@ -96,6 +114,8 @@ def list_women_guides(user_id):
             }
         }, 'Women guides retrieved', 200)
 
+    except CursorError as e:
+        return error_response('Validation error', str(e), 400)
     except Exception as e:
         return error_response('Error', str(e), 500)
 
@@ -0,0 +1,118 @@
+"""
+Scheduler Entry Point
+=====================
+Runs the time- and queue-driven background jobs exactly once cluster-wide.
+
+Any number of scheduler processes may be started; they elect a leader through
+workers/job_runner.JobRunner (Postgres advisory lock / Redis lease) and only the
+leader runs jobs and Celery beat. Standbys take over if the leader dies.
+
+Jobs:
+- cache_warmer        every 60s, at most 10s per cycle (re-warms hot keys near expiry, see utils/cache_demand.py)
+- cache_warm_prune    daily at 4 AM
+- mv_refresh          on NOTIFY mv_refresh and when the debounce expires, 30s polling fallback
+- mv_queue_cleanup    every 5 minutes
+- reconciliation      daily at RECONCILIATION_HOUR (default 3 AM)
+- trip_ledger_snapshot hourly (checks TRIP balances against the ledger)
+- vote_stream         every 2s (applies vote:events to the votes table, see workers/vote_stream_worker.py)
+- Celery beat in the foreground (sync_votes_to_db every 60s, email outbox, score retries)
+
+Usage:
+    python scheduler.py
+
+    Skip individual jobs with the existing toggles:
+    DISABLE_CACHE_WARMER=true DISABLE_MV_WORKER=true DISABLE_RECONCILIATION=true python scheduler.py
+
+    DISABLE_VOTE_STREAM=true only when another process runs
+    workers/vote_stream_worker.py - votes are not written to the DB otherwise.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, 'false').lower() in ('true', '1', 'yes')
+
+
+def register_jobs(runner, app):
+    """Register every periodic job on the runner"""
+    if not _env_flag('DISABLE_CACHE_WARMER'):
+        from utils.cache_warmer import CacheWarmer
+        # Development mode toggle: skip startup warming for faster dev startup
+        runner.add_interval_job('cache_warmer', CacheWarmer.warm_all, interval=60,
+                                run_on_start=not _env_flag('IN_DEV'))
+        runner.add_daily_job('cache_warm_prune', CacheWarmer.prune, hour=4)
+
+    if not _env_flag('DISABLE_MV_WORKER'):
+        from workers.mv_refresh_worker import MVRefreshWorker
+        mv_worker = MVRefreshWorker(app, max_workers=3)
+        runner.add_notify_job('mv_refresh', mv_worker.process_queue, channel='mv_refresh',
+                              fallback_interval=30)
+        runner.add_interval_job('mv_queue_cleanup', mv_worker.cleanup_completed_queue, interval=300)
+
+    if not _env_flag('DISABLE_RECONCILIATION'):
+        def run_reconciliation():
+            from workers.reconciliation_job import ReconciliationJob
+            ReconciliationJob(app, auto_fix=True).run()
+
+        reconciliation_hour = int(os.environ.get('RECONCILIATION_HOUR', '3'))
+        runner.add_daily_job('reconciliation', run_reconciliation, hour=reconciliation_hour)
+
+        from utils.trip_economy import TripEconomy
+        runner.add_interval_job('trip_ledger_snapshot', TripEconomy.snapshot_balances, interval=3600)
+
+    if not _env_flag('DISABLE_VOTE_STREAM'):
+        from workers.vote_stream_worker import VoteStreamWorker
+        vote_stream_worker = VoteStreamWorker()
+        runner.add_interval_job('vote_stream', vote_stream_worker.run_once, interval=2)
+
+
+def run_celery_beat():
+    """Run Celery beat in the foreground (blocks)"""
+    from celery_app import celery
+    from tasks.retry_failed_scores import setup_periodic_tasks
+
+    setup_periodic_tasks(celery)
+    beat = celery.Beat(loglevel='info')
+    beat.run()
+
+
+def main():
+    from app import create_app
+    from workers.job_runner import JobRunner
+
+    app = create_app()
+    run_beat = not _env_flag('DISABLE_CELERY')
+
+    def on_leadership_lost():
+        # Beat can't be paused from another thread - exit and let the
+        # process supervisor restart us as a standby
+        if run_beat:
+            print("[SCHEDULER] Leadership lost while running beat - exiting")
+            os._exit(1)
+
+    runner = JobRunner(app, name='scheduler', on_leadership_lost=on_leadership_lost)
+    register_jobs(runner, app)
+
+    # Standbys block here until the current leader goes away
+    runner.wait_for_leadership()
+    runner.start_background()
+
+    if run_beat:
+        print("[SCHEDULER] Starting Celery beat")
+        run_celery_beat()
+        return
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print("[SCHEDULER] Received shutdown signal")
+        runner.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Startup Benchmark
+=================
+Measures cold import + boot time of the web process so regressions show up early.
+
+Each run happens in a fresh interpreter (no warm module cache) and reports:
+- import time of the heavy third-party SDKs (should NOT be loaded by the web app)
+- time to import app.py (which builds the gunicorn `app` instance)
+
+Usage:
+    python scripts/benchmark_startup.py
+    python scripts/benchmark_startup.py --runs 5 --max-seconds 3.0   # fail CI if slower
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Modules the web process should only import on demand
+HEAVY_MODULES = ['web3', 'openai', 'github', 'boto3', 'qrcode', 'PIL']
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import app
+boot = time.perf_counter() - t0
+heavy = [m for m in %r if m in sys.modules]
+print(json.dumps({'boot_seconds': boot, 'modules': len(sys.modules), 'heavy_loaded': heavy}))
+""" % (HEAVY_MODULES,)
+
+
+def run_once(env: dict) -> dict:
+    """Boot the app in a fresh interpreter and return its measurements"""
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=300
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"App failed to boot:\n{result.stderr}")
+
+    # The app prints startup logs - the measurement is the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark web process startup time')
+    parser.add_argument('--runs', type=int, default=3, help='Number of cold boots to average')
+    parser.add_argument('--max-seconds', type=float, default=None,
+                        help='Exit non-zero if the median boot time exceeds this')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault('FLASK_ENV', 'testing')
+
+    samples = [run_once(env) for _ in range(args.runs)]
+    boot_times = [s['boot_seconds'] for s in samples]
+    median = statistics.median(boot_times)
+
+    print("=" * 60)
+    print("WEB PROCESS STARTUP BENCHMARK")
+    print("=" * 60)
+    print(f"  Runs:            {args.runs}")
+    print(f"  Median boot:     {median:.3f}s")
+    print(f"  Min / Max:       {min(boot_times):.3f}s / {max(boot_times):.3f}s")
+    print(f"  Modules loaded:  {samples[-1]['modules']}")
+    print(f"  Heavy SDKs:      {', '.join(samples[-1]['heavy_loaded']) or 'none'}")
+    print("=" * 60)
+
+    if samples[-1]['heavy_loaded']:
+        print("[WARN] Heavy SDKs imported at startup - move them behind a lazy import")
+
+    if args.max_seconds is not None and median > args.max_seconds:
+        print(f"[FAIL] Median boot {median:.3f}s exceeds budget of {args.max_seconds:.3f}s")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
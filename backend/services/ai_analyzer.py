@@ -5,7 +5,6 @@ Uses OpenAI to generate safety alerts, insights, recommendations, and warnings
 import json
 import os
 from typing import Dict, List, Optional
-from openai import OpenAI
 from flask import current_app
 
 
@@ -33,6 +32,8 @@ class AIAnalyzer:
         try:
             api_key = current_app.config.get('OPENAI_API_KEY')
             if api_key:
+                # Lazy import: the openai SDK is heavy and not needed until a client is built
+                from openai import OpenAI
                 self.client = OpenAI(api_key=api_key)
                 self.model = current_app.config.get('OPENAI_MODEL', 'gpt-4o-mini')
                 self.max_tokens = current_app.config.get('OPENAI_MAX_TOKENS', 2000)
@@ -0,0 +1,221 @@
+"""
+Alert Audience - who should hear about an AI alert
+
+alert_subscriptions maps topics (destination, travel interest, ~20x40km
+geohash area) to travelers. It is derived from each traveler's profile and
+the itineraries they have published, kept in step by mapper events, so an
+alert's audience is one indexed lookup over the topics the alert touches
+instead of every active traveler.
+"""
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import event, inspect, or_, select
+
+from extensions import db
+from models.alert_subscription import AlertSubscription
+from utils.geo import bbox_around, encode_geohash, parse_gps
+
+
+class AlertAudience:
+    """Maintain alert_subscriptions and resolve alert audiences"""
+
+    AREA_PRECISION = 4      # Geohash length of area topics (~20x40km cells)
+    AREA_RADIUS_KM = 25     # Alerts reach areas within this distance of their location
+    TOPIC_MAX_LENGTH = 150
+
+    # Source columns whose change requires re-deriving a traveler's topics
+    WATCHED_COLUMNS = {
+        'traveler': ('destinations_visited', 'travel_interests'),
+        'itinerary': ('created_by_traveler_id', 'destination', 'starting_point_gps', 'ending_point_gps',
+                      'is_published', 'is_deleted'),
+    }
+
+    _listeners_registered = False
+
+    # ------------------------------------------------------------------
+    # Topics
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def topic(cls, kind: str, value) -> Optional[str]:
+        """Normalized topic key, None for blank values"""
+        if not isinstance(value, str):
+            return None
+        value = ' '.join(value.lower().split())
+        if not value:
+            return None
+        return f'{kind}:{value}'[:cls.TOPIC_MAX_LENGTH]
+
+    @classmethod
+    def area_topics(cls, lat: float, lon: float, radius_km: float = 0) -> Set[str]:
+        """Area cells containing the point (and, with a radius, every cell the circle's box touches)"""
+        if not radius_km:
+            return {f'area:{encode_geohash(lat, lon, cls.AREA_PRECISION)}'}
+
+        # Sample the box at half-cell steps so no cell between its corners is skipped
+        bits = cls.AREA_PRECISION * 5
+        step_lat = 180.0 / 2 ** (bits // 2) / 2
+        step_lon = 360.0 / 2 ** (bits - bits // 2) / 2
+        min_lat, min_lon, max_lat, max_lon = bbox_around(lat, lon, radius_km)
+
+        topics = set()
+        for i in range(int((max_lat - min_lat) / step_lat) + 2):
+            sample_lat = min(max_lat, min_lat + i * step_lat)
+            for j in range(int((max_lon - min_lon) / step_lon) + 2):
+                sample_lon = min(max_lon, min_lon + j * step_lon)
+                topics.add(f'area:{encode_geohash(sample_lat, sample_lon, cls.AREA_PRECISION)}')
+        return topics
+
+    @classmethod
+    def itinerary_topics(cls, itinerary) -> Set[str]:
+        """Topics an alert about this itinerary is routed on"""
+        topics = {cls.topic('destination', itinerary.destination)}
+        for value in [itinerary.travel_style, *(itinerary.categories or []), *(itinerary.activity_tags or [])]:
+            topics.add(cls.topic('interest', value))
+        for gps in (itinerary.starting_point_gps, itinerary.ending_point_gps):
+            point = parse_gps(gps)
+            if point:
+                topics |= cls.area_topics(*point, radius_km=cls.AREA_RADIUS_KM)
+        topics.discard(None)
+        return topics
+
+    @classmethod
+    def snap_topics(cls, snap) -> Set[str]:
+        """Topics an alert about this snap is routed on"""
+        topics = {cls.topic('destination', snap.city), cls.topic('destination', snap.location_name)}
+        if snap.latitude is not None and snap.longitude is not None:
+            topics |= cls.area_topics(snap.latitude, snap.longitude, radius_km=cls.AREA_RADIUS_KM)
+        topics.discard(None)
+        return topics
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def sync_traveler(cls, connection, traveler_id: str):
+        """Re-derive one traveler's subscriptions from their profile and itineraries"""
+        from models.itinerary import Itinerary
+        from models.traveler import Traveler
+
+        if not traveler_id:
+            return
+
+        travelers = Traveler.__table__
+        itineraries = Itinerary.__table__
+        table = AlertSubscription.__table__
+
+        profile = connection.execute(
+            select(travelers.c.destinations_visited, travelers.c.travel_interests)
+            .where(travelers.c.id == traveler_id)
+        ).first()
+
+        topics = set()
+        if profile is not None:
+            for value in profile.destinations_visited or []:
+                topics.add(cls.topic('destination', value))
+            for value in profile.travel_interests or []:
+                topics.add(cls.topic('interest', value))
+
+            authored = connection.execute(
+                select(itineraries.c.destination, itineraries.c.starting_point_gps, itineraries.c.ending_point_gps)
+                .where(
+                    itineraries.c.created_by_traveler_id == traveler_id,
+                    itineraries.c.is_published == True,
+                    itineraries.c.is_deleted == False,
+                )
+            ).all()
+            for row in authored:
+                topics.add(cls.topic('destination', row.destination))
+                for gps in (row.starting_point_gps, row.ending_point_gps):
+                    point = parse_gps(gps)
+                    if point:
+                        topics |= cls.area_topics(*point)
+        topics.discard(None)
+
+        connection.execute(table.delete().where(table.c.traveler_id == traveler_id))
+        if topics:
+            connection.execute(table.insert(), [
+                {'topic': topic, 'traveler_id': traveler_id} for topic in sorted(topics)
+            ])
+
+    @classmethod
+    def register_listeners(cls):
+        """Mirror profile / itinerary writes into alert_subscriptions (idempotent)"""
+        if cls._listeners_registered:
+            return
+
+        from models.itinerary import Itinerary
+        from models.traveler import Traveler
+
+        def changed(target, columns):
+            state = inspect(target)
+            return any(state.attrs[column].history.has_changes() for column in columns)
+
+        def traveler_written(mapper, connection, target):
+            if changed(target, cls.WATCHED_COLUMNS['traveler']):
+                cls.sync_traveler(connection, target.id)
+
+        def itinerary_written(mapper, connection, target):
+            if changed(target, cls.WATCHED_COLUMNS['itinerary']):
+                # A reassigned itinerary also changes its previous creator's topics
+                previous = inspect(target).attrs.created_by_traveler_id.history.deleted or []
+                for traveler_id in {target.created_by_traveler_id, *previous}:
+                    cls.sync_traveler(connection, traveler_id)
+
+        def itinerary_deleted(mapper, connection, target):
+            cls.sync_traveler(connection, target.created_by_traveler_id)
+
+        event.listen(Traveler, 'after_insert', traveler_written)
+        event.listen(Traveler, 'after_update', traveler_written)
+        event.listen(Itinerary, 'after_insert', itinerary_written)
+        event.listen(Itinerary, 'after_update', itinerary_written)
+        event.listen(Itinerary, 'after_delete', itinerary_deleted)
+
+        cls._listeners_registered = True
+
+    @classmethod
+    def rebuild(cls, batch_size: int = 500) -> int:
+        """Re-derive every traveler's subscriptions (backfill / repair)"""
+        from models.traveler import Traveler
+
+        traveler_ids = [traveler_id for (traveler_id,) in db.session.query(Traveler.id).order_by(Traveler.id)]
+        for offset in range(0, len(traveler_ids), batch_size):
+            connection = db.session.connection()
+            for traveler_id in traveler_ids[offset:offset + batch_size]:
+                cls.sync_traveler(connection, traveler_id)
+            db.session.commit()
+        return db.session.query(AlertSubscription).count()
+
+    # ------------------------------------------------------------------
+    # Audience
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def resolve(topics: Iterable[str], include_ids: Iterable[str] = ()) -> List[Dict]:
+        """
+        Active travelers subscribed to any of the topics, plus `include_ids`
+        (e.g. the content's creator), in one indexed query
+
+        Returns:
+            [{'id', 'email', 'email_verified', 'display_name', 'username'}, ...]
+        """
+        from models.traveler import Traveler
+
+        topics = sorted(set(topics))
+        include_ids = [traveler_id for traveler_id in include_ids if traveler_id]
+        if not topics and not include_ids:
+            return []
+
+        audience = []
+        if topics:
+            audience.append(Traveler.id.in_(
+                select(AlertSubscription.traveler_id).where(AlertSubscription.topic.in_(topics)).distinct()
+            ))
+        if include_ids:
+            audience.append(Traveler.id.in_(include_ids))
+
+        rows = db.session.query(
+            Traveler.id, Traveler.email, Traveler.email_verified, Traveler.display_name, Traveler.username
+        ).filter(or_(*audience), Traveler.is_active == True).order_by(Traveler.id).all()
+        return [dict(row._mapping) for row in rows]
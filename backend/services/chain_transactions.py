@@ -0,0 +1,520 @@
+"""
+Chain Transactions - durable, nonce-managed queue for backend-signed SBT calls
+
+Requests enqueue a ChainTransaction and return immediately. The
+submit_chain_transactions task claims queued rows and:
+
+- assigns nonces from a locked signer row (one chain nonce query per run,
+  not per transaction), so concurrent workers never reuse a nonce; the next
+  nonce is the lowest one above the mined count that no in-flight row holds,
+  so an abandoned nonce is filled instead of stalling every later transaction
+- signs every transaction and persists the signed bytes and hash *before*
+  broadcasting, so a crash never loses track of a sent transaction
+- folds queued reputation updates into one multicall transaction when the
+  contract exposes multicall(bytes[]); otherwise each goes out back to back
+
+The poll_chain_receipts task reads receipts, re-broadcasts transactions the
+node dropped, and applies confirmed results to travelers, SBTVerification
+and UserVerification rows. A transaction that is never mined is failed after
+MAX_ATTEMPTS and its nonce is taken over by a 0-value self-transfer ('cancel'
+row) at a higher gas price.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models.chain_transaction import ChainTransaction, SignerNonce
+
+
+class NonceSequencer:
+    """Hands out consecutive nonces for one signer while holding its row lock"""
+
+    def __init__(self, w3, address: str, chain_id: int):
+        self.w3 = w3
+        self.address = address
+        self.chain_id = chain_id
+        self.row = None
+
+    def acquire(self) -> 'NonceSequencer':
+        """Lock the signer row and sync it with the chain and the in-flight queue"""
+        row = SignerNonce.query.filter_by(address=self.address).with_for_update().first()
+        if row is None:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(SignerNonce(address=self.address, chain_id=self.chain_id, next_nonce=0))
+            except IntegrityError:
+                pass  # Created concurrently
+            row = SignerNonce.query.filter_by(address=self.address).with_for_update().first()
+
+        # Everything below the mined count is used. Above it, every signed
+        # transaction is persisted before broadcast, so in-flight rows hold the
+        # rest; the first nonce none of them holds is the next one (a gap left
+        # by an abandoned transaction is filled before moving past it)
+        mined = self.w3.eth.get_transaction_count(self.address, 'latest')
+        held = {
+            nonce for (nonce,) in db.session.query(ChainTransaction.nonce).filter(
+                ChainTransaction.signer_address == self.address,
+                ChainTransaction.status == 'submitted',
+                ChainTransaction.nonce >= mined,
+            )
+        }
+        next_nonce = mined
+        while next_nonce in held:
+            next_nonce += 1
+        row.next_nonce = next_nonce
+        row.chain_id = self.chain_id
+        row.updated_at = datetime.utcnow()
+        self.row = row
+        return self
+
+    def take(self) -> int:
+        nonce = self.row.next_nonce
+        self.row.next_nonce = nonce + 1
+        return nonce
+
+
+class ChainTxQueue:
+    """Enqueue, submit and confirm SBT transactions"""
+
+    GAS_LIMITS = {'mint': 500000, 'reputation': 200000, 'profile_hash': 200000}
+    MULTICALL_GAS_PER_CALL = 80000
+    MAX_ATTEMPTS = 5
+    REBROADCAST_AFTER = timedelta(seconds=60)
+    CANCEL_GAS = 21000
+    REPLACEMENT_GAS_BUMP = 1.125  # Nodes only replace a pending transaction for >= 10% more gas
+
+    # ------------------------------------------------------------------
+    # Enqueue
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def enqueue(cls, kind: str, args: Dict, traveler_id: Optional[str] = None,
+                sbt_id: Optional[str] = None) -> ChainTransaction:
+        """
+        Queue a contract call (commits the session)
+
+        Updates to a token that are still queued are coalesced into the queued
+        row (latest value wins); a mint already in flight for the traveler is
+        returned instead of queueing another (uq_chain_tx_active_mint backs
+        this up when two requests race).
+        """
+        if kind == 'mint':
+            existing = cls._active_mint(traveler_id)
+            if existing:
+                return existing
+            row = ChainTransaction(kind=kind, args=args, traveler_id=traveler_id)
+            try:
+                with db.session.begin_nested():
+                    db.session.add(row)
+            except IntegrityError:
+                # Queued concurrently for the same traveler
+                return cls._active_mint(traveler_id)
+            db.session.commit()
+            cls._kick()
+            return row
+
+        existing = ChainTransaction.query.filter_by(kind=kind, sbt_id=str(sbt_id), status='queued')\
+            .with_for_update().first()
+        if existing:
+            existing.args = args
+            row = existing
+        else:
+            row = ChainTransaction(kind=kind, args=args, traveler_id=traveler_id,
+                                   sbt_id=str(sbt_id) if sbt_id is not None else None)
+            db.session.add(row)
+
+        cls._mark_unsynced(row)
+        db.session.commit()
+        cls._kick()
+        return row
+
+    @staticmethod
+    def _active_mint(traveler_id: Optional[str]) -> Optional[ChainTransaction]:
+        if not traveler_id:
+            return None
+        return ChainTransaction.query.filter(
+            ChainTransaction.kind == 'mint',
+            ChainTransaction.traveler_id == traveler_id,
+            ChainTransaction.status.in_(('queued', 'submitted')),
+        ).first()
+
+    @staticmethod
+    def _kick():
+        """Ask a worker to submit now (the beat schedule is the fallback)"""
+        try:
+            from tasks.chain_tasks import submit_chain_transactions
+            submit_chain_transactions.delay()
+        except Exception as e:
+            current_app.logger.warning("[ChainTx] Could not queue submit task: %s", e)
+
+    @staticmethod
+    def _mark_unsynced(row: ChainTransaction):
+        from models.sbt_verification import SBTVerification
+        verification = SBTVerification.query.filter_by(sbt_id=row.sbt_id).first()
+        if verification:
+            verification.is_blockchain_synced = False
+
+    # ------------------------------------------------------------------
+    # Submission
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _call(contract, row: ChainTransaction):
+        args = row.args
+        if row.kind == 'mint':
+            return contract.functions.mintSBT(
+                args['wallet'], args['profile_hash'], args['reputation'], args.get('metadata_uri') or ''
+            )
+        if row.kind == 'reputation':
+            return contract.functions.updateReputationScore(int(row.sbt_id), args['reputation'])
+        return contract.functions.updateProfileHash(int(row.sbt_id), args['profile_hash'])
+
+    @staticmethod
+    def supports_multicall(contract) -> bool:
+        return any(item.get('type') == 'function' and item.get('name') == 'multicall' for item in contract.abi)
+
+    @classmethod
+    def _multicall(cls, contract, rows: List[ChainTransaction]):
+        encode = getattr(contract, 'encode_abi', None) or contract.encodeABI
+        calls = [
+            encode(fn_name='updateReputationScore', args=[int(row.sbt_id), row.args['reputation']])
+            for row in rows
+        ]
+        return contract.functions.multicall(calls)
+
+    @classmethod
+    def _groups(cls, contract, rows: List[ChainTransaction]) -> List[List[ChainTransaction]]:
+        """One transaction per group: all reputation updates together if the contract can batch them"""
+        reputation = [row for row in rows if row.kind == 'reputation']
+        if len(reputation) > 1 and cls.supports_multicall(contract):
+            return [[row] for row in rows if row.kind != 'reputation'] + [reputation]
+        return [[row] for row in rows]
+
+    @classmethod
+    def submit(cls, limit: int = 50) -> Dict[str, int]:
+        """
+        Sign and broadcast queued transactions
+
+        Returns:
+            {'submitted': transactions, 'calls': rows, 'failed': rows}
+        """
+        from utils.sbt_service import SBTService
+
+        stats = {'submitted': 0, 'calls': 0, 'failed': 0}
+        rows = ChainTransaction.query.filter_by(status='queued')\
+            .order_by(ChainTransaction.created_at, ChainTransaction.id)\
+            .limit(limit).with_for_update(skip_locked=True).all()
+        if not rows:
+            return stats
+
+        w3 = SBTService.get_web3_instance()
+        contract = SBTService.get_sbt_contract()
+        address, key = SBTService.get_backend_signer()
+        chain_id = SBTService.get_chain_id()
+        gas_price = int(w3.eth.gas_price * current_app.config.get('BLOCKCHAIN_GAS_PRICE_MULTIPLIER', 1.0))
+
+        sequencer = NonceSequencer(w3, address, chain_id).acquire()
+        now = datetime.utcnow()
+        signed = []
+        for group in cls._groups(contract, rows):
+            try:
+                if len(group) > 1:
+                    call = cls._multicall(contract, group)
+                    gas = cls.MULTICALL_GAS_PER_CALL * len(group) + 50000
+                else:
+                    call = cls._call(contract, group[0])
+                    gas = cls.GAS_LIMITS[group[0].kind]
+                nonce = sequencer.row.next_nonce
+                tx = call.build_transaction({
+                    'from': address,
+                    'nonce': nonce,
+                    'gas': gas,
+                    'gasPrice': gas_price,
+                    'chainId': chain_id,
+                })
+                signed_tx = w3.eth.account.sign_transaction(tx, key)
+            except Exception as e:
+                cls._fail(group, f'Could not build transaction: {e}', stats)
+                continue
+
+            sequencer.take()
+            raw_tx = signed_tx.raw_transaction if hasattr(signed_tx, 'raw_transaction') else signed_tx.rawTransaction
+            for row in group:
+                row.status = 'submitted'
+                row.signer_address = address
+                row.nonce = nonce
+                row.tx_hash = signed_tx.hash.hex()
+                row.raw_tx = raw_tx.hex()
+                row.attempts += 1
+                row.submitted_at = now
+                row.last_error = None
+            signed.append(group)
+            stats['submitted'] += 1
+            stats['calls'] += len(group)
+
+        # Persist signed transactions (and release the nonce lock) before broadcasting
+        db.session.commit()
+
+        for group in signed:
+            cls._broadcast(w3, group)
+        db.session.commit()
+
+        current_app.logger.info("[ChainTx] Submit run: %s", stats)
+        return stats
+
+    @classmethod
+    def _broadcast(cls, w3, group: List[ChainTransaction]):
+        """Send a persisted signed transaction; re-queue it if its nonce was taken"""
+        row = group[0]
+        try:
+            w3.eth.send_raw_transaction(row.raw_tx)
+        except Exception as e:
+            message = str(e).lower()
+            if 'already known' in message or 'known transaction' in message:
+                return
+            if 'nonce too low' in message or 'nonce has already been used' in message:
+                if row.kind == 'cancel':
+                    # The nonce it was meant to fill got used after all
+                    row.status = 'failed'
+                    row.last_error = str(e)
+                    return
+                # Someone else used the nonce - sign again with a fresh one
+                for item in group:
+                    item.status = 'queued'
+                    item.nonce = None
+                    item.tx_hash = None
+                    item.raw_tx = None
+                    item.last_error = str(e)
+                return
+            # Left as submitted: the receipt poller re-broadcasts it
+            for item in group:
+                item.last_error = str(e)
+            current_app.logger.warning("[ChainTx] Broadcast of %s failed: %s", row.tx_hash, e)
+
+    # ------------------------------------------------------------------
+    # Receipts
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def poll_receipts(cls, limit: int = 200) -> Dict[str, int]:
+        """
+        Check submitted transactions and apply confirmed results
+
+        Returns:
+            {'confirmed': rows, 'failed': rows, 'pending': rows, 'rebroadcast': transactions,
+             'cancelled': abandoned nonces replaced}
+        """
+        from utils.sbt_service import SBTService
+        from web3.exceptions import TransactionNotFound
+
+        stats = {'confirmed': 0, 'failed': 0, 'pending': 0, 'rebroadcast': 0, 'cancelled': 0}
+        rows = ChainTransaction.query.filter_by(status='submitted')\
+            .order_by(ChainTransaction.nonce).limit(limit).all()
+        if not rows:
+            return stats
+
+        w3 = SBTService.get_web3_instance()
+        contract = SBTService.get_sbt_contract()
+        latest_block = w3.eth.block_number
+        confirmations = max(current_app.config.get('BLOCKCHAIN_CONFIRMATIONS', 1), 1)
+
+        by_hash: Dict[str, List[ChainTransaction]] = {}
+        for row in rows:
+            by_hash.setdefault(row.tx_hash, []).append(row)
+
+        now = datetime.utcnow()
+        for tx_hash, group in by_hash.items():
+            try:
+                receipt = w3.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                receipt = None
+
+            if receipt is None:
+                if group[0].submitted_at and group[0].submitted_at < now - cls.REBROADCAST_AFTER:
+                    if group[0].attempts >= cls.MAX_ATTEMPTS:
+                        cls._fail(group, group[0].last_error or 'Transaction was never mined', stats)
+                        cls._cancel(w3, group[0], stats)
+                        continue
+                    cls._broadcast(w3, group)
+                    for row in group:
+                        row.attempts += 1
+                        row.submitted_at = now
+                    stats['rebroadcast'] += 1
+                stats['pending'] += len(group)
+                continue
+
+            if latest_block - receipt['blockNumber'] + 1 < confirmations:
+                stats['pending'] += len(group)
+                continue
+
+            for row in group:
+                row.block_number = receipt['blockNumber']
+                row.gas_used = receipt['gasUsed']
+            if receipt['status'] == 1:
+                cls._confirm(contract, group, receipt, stats)
+            else:
+                cls._fail(group, 'Transaction reverted', stats)
+
+        db.session.commit()
+        if stats['confirmed'] or stats['failed']:
+            current_app.logger.info("[ChainTx] Receipt poll: %s", stats)
+        return stats
+
+    @classmethod
+    def _cancel(cls, w3, row: ChainTransaction, stats: Dict):
+        """
+        Take over an abandoned nonce with a 0-value self-transfer
+
+        Without it the signer's later transactions wait on the gap forever. The
+        replacement is priced above the original so the node swaps it in if it
+        still holds the original. A cancel that is itself never mined is not
+        replaced again; NonceSequencer fills the gap on the next submit.
+        """
+        from utils.sbt_service import SBTService
+        from web3.exceptions import TransactionNotFound
+
+        if row.kind == 'cancel' or row.nonce is None:
+            return
+        try:
+            address, key = SBTService.get_backend_signer()
+            if w3.eth.get_transaction_count(address, 'latest') > row.nonce:
+                return  # Already used by another transaction
+            try:
+                original_price = w3.eth.get_transaction(row.tx_hash)['gasPrice']
+            except TransactionNotFound:
+                original_price = 0
+            gas_price = max(
+                int(w3.eth.gas_price * current_app.config.get('BLOCKCHAIN_GAS_PRICE_MULTIPLIER', 1.0)),
+                int(original_price * cls.REPLACEMENT_GAS_BUMP) + 1,
+            )
+            signed_tx = w3.eth.account.sign_transaction({
+                'from': address,
+                'to': address,
+                'value': 0,
+                'nonce': row.nonce,
+                'gas': cls.CANCEL_GAS,
+                'gasPrice': gas_price,
+                'chainId': SBTService.get_chain_id(),
+            }, key)
+        except Exception as e:
+            current_app.logger.warning("[ChainTx] Could not sign cancel for nonce %s: %s", row.nonce, e)
+            return
+
+        raw_tx = signed_tx.raw_transaction if hasattr(signed_tx, 'raw_transaction') else signed_tx.rawTransaction
+        cancel = ChainTransaction(
+            kind='cancel',
+            args={'replaces': row.tx_hash},
+            status='submitted',
+            signer_address=address,
+            nonce=row.nonce,
+            tx_hash=signed_tx.hash.hex(),
+            raw_tx=raw_tx.hex(),
+            attempts=1,
+            submitted_at=datetime.utcnow(),
+        )
+        db.session.add(cancel)
+        # Persist before broadcasting, like submit()
+        db.session.commit()
+        cls._broadcast(w3, [cancel])
+        stats['cancelled'] += 1
+        current_app.logger.warning("[ChainTx] Nonce %s abandoned by %s, replaced by %s",
+                                   row.nonce, row.tx_hash, cancel.tx_hash)
+
+    @classmethod
+    def _confirm(cls, contract, group: List[ChainTransaction], receipt, stats: Dict):
+        from models.traveler import Traveler
+
+        from utils.chain_reader import ChainReader
+
+        now = datetime.utcnow()
+        contract_address = current_app.config.get('SBT_CONTRACT_ADDRESS')
+        for row in group:
+            if row.kind == 'mint':
+                transfers = contract.events.Transfer().process_receipt(receipt)
+                if not transfers:
+                    # Mined but nothing minted: fail it so the traveler is not left in 'minting'
+                    cls._fail([row], 'Mint confirmed without a Transfer event', stats)
+                    continue
+                row.sbt_id = str(transfers[0]['args']['tokenId'])
+
+            row.status = 'confirmed'
+            row.confirmed_at = now
+            stats['confirmed'] += 1
+
+            traveler = Traveler.query.get(row.traveler_id) if row.traveler_id else None
+            wallet = row.args.get('wallet') or (traveler.wallet_address if traveler else None)
+            if wallet and contract_address:
+                ChainReader.invalidate_ownership('sbt', contract_address, wallet)
+
+            if row.kind == 'mint':
+                if traveler:
+                    cls._apply_mint(traveler, row)
+            elif row.kind != 'cancel':
+                cls._apply_sync(row, error=None)
+
+    @staticmethod
+    def _apply_mint(traveler, row: ChainTransaction):
+        """Record a confirmed mint on the traveler, SBTVerification and UserVerification rows"""
+        from models.sbt_verification import SBTVerification
+        from models.user_verification import UserVerification
+
+        config = current_app.config
+        now = datetime.utcnow()
+        traveler.sbt_id = row.sbt_id
+        traveler.sbt_blockchain_hash = row.tx_hash
+        traveler.sbt_contract_address = config.get('SBT_CONTRACT_ADDRESS')
+        traveler.sbt_status = 'issued'
+        traveler.sbt_verified_date = now
+
+        verification = SBTVerification.query.filter_by(traveler_id=traveler.id).first()
+        if not verification:
+            verification = SBTVerification(traveler_id=traveler.id)
+            db.session.add(verification)
+        verification.sbt_id = row.sbt_id
+        verification.sbt_contract_address = config.get('SBT_CONTRACT_ADDRESS')
+        verification.blockchain_network = config.get('BLOCKCHAIN_NETWORK', 'hardhat')
+        verification.issuance_tx_hash = row.tx_hash
+        verification.is_blockchain_synced = True
+        verification.last_blockchain_sync = now
+        verification.sync_error_message = None
+
+        user_verification = UserVerification.query.filter_by(traveler_id=traveler.id).first()
+        if user_verification:
+            user_verification.sbt_token_id = row.sbt_id
+            user_verification.verification_status = 'verified'
+
+    @staticmethod
+    def _apply_sync(row: ChainTransaction, error: Optional[str]):
+        """Record the outcome of a reputation / profile hash update on SBTVerification"""
+        from models.sbt_verification import SBTVerification
+
+        verification = SBTVerification.query.filter_by(sbt_id=row.sbt_id).first()
+        if not verification:
+            return
+        verification.is_blockchain_synced = error is None
+        verification.sync_error_message = error
+        if error is None:
+            verification.last_blockchain_sync = datetime.utcnow()
+            verification.verification_tx_hash = row.tx_hash
+
+    @classmethod
+    def _fail(cls, group: List[ChainTransaction], error: str, stats: Dict):
+        from models.traveler import Traveler
+
+        for row in group:
+            row.status = 'failed'
+            row.last_error = error
+            stats['failed'] += 1
+            current_app.logger.error("[ChainTx] %s %s failed: %s", row.kind, row.id, error)
+
+            if row.kind == 'mint':
+                # Let the traveler retry the mint
+                traveler = Traveler.query.get(row.traveler_id) if row.traveler_id else None
+                if traveler and traveler.sbt_status == 'minting':
+                    traveler.sbt_status = 'not_issued'
+            elif row.kind != 'cancel':
+                cls._apply_sync(row, error)
+
@@ -0,0 +1,249 @@
+"""
+Content Index - keep content_index in step with projects and itineraries
+
+Mapper events mirror every insert/update/delete of a Project or Itinerary
+into content_index in the same transaction as the source write. Raw-SQL
+counter updates (vote sync) call update_counts() themselves. Until the
+backfill (migrations/add_content_index.py) has run, is_populated() is False
+and listings read the source tables instead.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import event, inspect
+
+from extensions import db
+from models.content_index import ContentIndex
+
+
+class ContentIndexService:
+    """Maintain and query the content_index table"""
+
+    # Source columns that feed the index row
+    WATCHED_COLUMNS = {
+        'project': ('user_id', 'title', 'tagline', 'description', 'hackathon_name', 'categories',
+                    'is_deleted', 'is_featured', 'proof_score', 'upvotes', 'downvotes', 'comment_count'),
+        'itinerary': ('created_by_traveler_id', 'title', 'tagline', 'description', 'destination',
+                      'travel_style', 'duration_days', 'difficulty_level', 'screenshots',
+                      'is_deleted', 'is_published', 'is_featured', 'proof_score', 'upvotes',
+                      'downvotes', 'comment_count'),
+    }
+
+    SEARCH_DESCRIPTION_CHARS = 1000
+    TYPE_CACHE_SIZE = 50000  # id -> content type; ids never change type
+    POPULATED_RECHECK_SECONDS = 30  # How often an empty index is looked at again
+
+    _listeners_registered = False
+    _populated = False
+    _populated_checked_at = None
+    _types = OrderedDict()
+    _types_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def entry_for(cls, content_type: str, obj) -> Dict:
+        """content_index row for a Project or Itinerary"""
+        if content_type == 'itinerary':
+            owner_id = obj.created_by_traveler_id
+            is_published = bool(obj.is_published)
+            subtitle = obj.destination
+            searchable = [obj.title, obj.tagline, obj.destination, obj.travel_style]
+            screenshots = obj.screenshots or []
+            card = {
+                'title': obj.title,
+                'tagline': obj.tagline,
+                'destination': obj.destination,
+                'duration_days': obj.duration_days,
+                'difficulty_level': obj.difficulty_level,
+                'image': screenshots[0] if screenshots else None,
+            }
+        else:
+            owner_id = obj.user_id
+            is_published = True
+            subtitle = obj.hackathon_name
+            searchable = [obj.title, obj.tagline, obj.hackathon_name]
+            card = {
+                'title': obj.title,
+                'tagline': obj.tagline,
+                'hackathon_name': obj.hackathon_name,
+                'categories': obj.categories or [],
+            }
+        card['subtitle'] = subtitle
+
+        searchable.append((obj.description or '')[:cls.SEARCH_DESCRIPTION_CHARS])
+        search_text = ' '.join(text for text in searchable if text).lower()
+
+        return {
+            'id': obj.id,
+            'content_type': content_type,
+            'owner_id': owner_id,
+            'is_deleted': bool(obj.is_deleted),
+            'is_published': is_published,
+            'is_featured': bool(obj.is_featured),
+            'created_at': obj.created_at,
+            'proof_score': obj.proof_score or 0.0,
+            'upvotes': obj.upvotes or 0,
+            'downvotes': obj.downvotes or 0,
+            'comment_count': obj.comment_count or 0,
+            'title': obj.title,
+            'search_text': search_text,
+            'card': card,
+            'updated_at': datetime.utcnow(),
+        }
+
+    @classmethod
+    def sync_entity(cls, connection, content_type: str, obj):
+        """Replace the index row of one source row"""
+        table = ContentIndex.__table__
+        connection.execute(table.delete().where(table.c.id == obj.id))
+        connection.execute(table.insert(), [cls.entry_for(content_type, obj)])
+
+    @classmethod
+    def remove_entity(cls, connection, content_id: str):
+        """Drop the index row of a deleted source row"""
+        table = ContentIndex.__table__
+        connection.execute(table.delete().where(table.c.id == content_id))
+
+    @staticmethod
+    def update_counts(content_id: str, **counts):
+        """Mirror counter columns written with raw SQL (which skips mapper events)"""
+        if counts:
+            ContentIndex.query.filter_by(id=content_id).update(
+                {**counts, 'updated_at': datetime.utcnow()}, synchronize_session=False
+            )
+
+    @classmethod
+    def register_listeners(cls):
+        """Mirror source writes into content_index (idempotent)"""
+        if cls._listeners_registered:
+            return
+
+        from models.project import Project
+        from models.itinerary import Itinerary
+
+        cls._register_model('project', Project)
+        cls._register_model('itinerary', Itinerary)
+        cls._listeners_registered = True
+
+    @classmethod
+    def _register_model(cls, content_type, model):
+        watched = cls.WATCHED_COLUMNS[content_type]
+
+        def after_insert(mapper, connection, target):
+            cls.sync_entity(connection, content_type, target)
+
+        def after_update(mapper, connection, target):
+            state = inspect(target)
+            if any(state.attrs[column].history.has_changes() for column in watched):
+                cls.sync_entity(connection, content_type, target)
+
+        def after_delete(mapper, connection, target):
+            cls.remove_entity(connection, target.id)
+
+        event.listen(model, 'after_insert', after_insert)
+        event.listen(model, 'after_update', after_update)
+        event.listen(model, 'after_delete', after_delete)
+
+    @classmethod
+    def rebuild(cls, batch_size: int = 500) -> Dict[str, int]:
+        """Re-index every project and itinerary (backfill / repair)"""
+        from models.project import Project
+        from models.itinerary import Itinerary
+
+        counts = {}
+        for content_type, model in (('project', Project), ('itinerary', Itinerary)):
+            count = 0
+            query = model.query.order_by(model.id)
+            for offset in range(0, query.count(), batch_size):
+                connection = db.session.connection()
+                for obj in query.offset(offset).limit(batch_size).all():
+                    cls.sync_entity(connection, content_type, obj)
+                    count += 1
+                db.session.commit()
+            counts[content_type] = count
+        cls._populated = True
+        return counts
+
+    @classmethod
+    def is_populated(cls) -> bool:
+        """Whether content_index holds rows (an empty index is re-checked every POPULATED_RECHECK_SECONDS)"""
+        if cls._populated:
+            return True
+        now = time.monotonic()
+        if cls._populated_checked_at is not None and now - cls._populated_checked_at < cls.POPULATED_RECHECK_SECONDS:
+            return False
+        cls._populated_checked_at = now
+        cls._populated = db.session.query(ContentIndex.id).limit(1).first() is not None
+        return cls._populated
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def content_type_of(cls, content_id: str) -> Optional[str]:
+        """'project' / 'itinerary' for an id (cached in-process), None if unknown"""
+        with cls._types_lock:
+            content_type = cls._types.get(content_id)
+        if content_type:
+            return content_type
+
+        content_type = db.session.query(ContentIndex.content_type).filter(ContentIndex.id == content_id).scalar()
+        if content_type:
+            with cls._types_lock:
+                cls._types[content_id] = content_type
+                while len(cls._types) > cls.TYPE_CACHE_SIZE:
+                    cls._types.popitem(last=False)
+        return content_type
+
+    @staticmethod
+    def query(include_deleted: bool = False, published_only: bool = False, owner_id: Optional[str] = None,
+              featured_only: bool = False, search: Optional[str] = None, content_type: Optional[str] = None):
+        """Filtered ContentIndex query"""
+        query = ContentIndex.query
+        if not include_deleted:
+            query = query.filter(ContentIndex.is_deleted == False)
+        if published_only:
+            query = query.filter(ContentIndex.is_published == True)
+        if owner_id:
+            query = query.filter(ContentIndex.owner_id == owner_id)
+        if featured_only:
+            query = query.filter(ContentIndex.is_featured == True)
+        if content_type:
+            query = query.filter(ContentIndex.content_type == content_type)
+        if search:
+            query = query.filter(ContentIndex.search_text.like(f'%{search.lower()}%'))
+        return query
+
+    @staticmethod
+    def order(query, sort_by: str = 'created_at'):
+        if sort_by == 'score':
+            return query.order_by(ContentIndex.proof_score.desc(), ContentIndex.id.desc())
+        if sort_by == 'votes':
+            return query.order_by(ContentIndex.upvotes.desc(), ContentIndex.id.desc())
+        return query.order_by(ContentIndex.created_at.desc(), ContentIndex.id.desc())
+
+    @staticmethod
+    def hydrate(entries: List[ContentIndex]) -> List:
+        """Project/Itinerary rows for index entries, in entry order (one IN query per type)"""
+        from models.project import Project
+        from models.itinerary import Itinerary
+
+        models = {'project': Project, 'itinerary': Itinerary}
+        ids_by_type: Dict[str, List[str]] = {}
+        for entry in entries:
+            ids_by_type.setdefault(entry.content_type, []).append(entry.id)
+
+        loaded = {}
+        for content_type, ids in ids_by_type.items():
+            model = models[content_type]
+            for obj in model.query.filter(model.id.in_(ids)).all():
+                loaded[obj.id] = obj
+
+        return [loaded[entry.id] for entry in entries if entry.id in loaded]
@@ -0,0 +1,436 @@
+"""
+Email Outbox - durable, batched delivery of outgoing email
+
+EmailService builds the provider payload and enqueues it into email_outbox
+(one row per recipient, deduplicated on an idempotency key). Enqueueing joins
+the caller's transaction; delivery is kicked after that transaction commits.
+The deliver_email_outbox task drains due rows:
+
+- one pooled, retrying HTTP session per worker process
+- rows with identical content go out as one ZeptoMail batch call
+- per-recipient-domain rate limits (rows over the limit are deferred)
+- failures retry with exponential backoff up to EMAIL_OUTBOX_MAX_ATTEMPTS
+
+EMAIL_TRANSPORT=sink writes messages to a JSON-lines file instead of calling
+the provider, for local development and tests.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from uuid import uuid4
+
+import requests
+from flask import current_app
+from requests.adapters import HTTPAdapter
+from sqlalchemy import and_, event, or_
+from sqlalchemy.exc import IntegrityError
+from urllib3.util.retry import Retry
+
+from extensions import db
+from models.email_outbox import OutboxEmail
+
+
+class ZeptoTransport:
+    """ZeptoMail over one pooled, retrying session per process"""
+
+    _session = None
+    _session_lock = threading.Lock()
+
+    @classmethod
+    def session(cls) -> requests.Session:
+        with cls._session_lock:
+            if cls._session is None:
+                retry = Retry(
+                    total=3,
+                    read=3,
+                    connect=3,
+                    backoff_factor=1.0,
+                    status_forcelist=(500, 502, 503, 504),
+                    allowed_methods=["POST"],
+                )
+                adapter = HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=16)
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                cls._session = session
+            return cls._session
+
+    @staticmethod
+    def _headers(config) -> Dict[str, str]:
+        return {
+            "authorization": f"Zoho-enczapikey {config['ZEPTO_SEND_MAIL_TOKEN']}",
+            "content-type": "application/json",
+        }
+
+    def send(self, payload: Dict):
+        config = current_app.config
+        response = self.session().post(config["ZEPTO_ENDPOINT"], json=payload, headers=self._headers(config), timeout=30)
+        response.raise_for_status()
+
+    def send_batch(self, payload: Dict) -> bool:
+        """One call for many recipients of identical content; False if batching is unavailable"""
+        config = current_app.config
+        endpoint = config.get("ZEPTO_BATCH_ENDPOINT")
+        if not endpoint:
+            return False
+        response = self.session().post(endpoint, json=payload, headers=self._headers(config), timeout=60)
+        response.raise_for_status()
+        return True
+
+
+class SinkTransport:
+    """Appends each message to a JSON-lines file (stand-in for the provider)"""
+
+    _lock = threading.Lock()
+
+    def _write(self, payload: Dict):
+        path = current_app.config.get('EMAIL_SINK_PATH') or 'email_sink.jsonl'
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock, open(path, 'a', encoding='utf-8') as sink:
+            sink.write(json.dumps(payload, default=str) + '\n')
+
+    def send(self, payload: Dict):
+        self._write(payload)
+
+    def send_batch(self, payload: Dict) -> bool:
+        self._write(payload)
+        return True
+
+
+class DomainRateLimiter:
+    """Sliding one-minute window of sends per recipient domain (per worker process)"""
+
+    def __init__(self):
+        self._sent = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def limit_for(domain: str) -> int:
+        config = current_app.config
+        return config.get('EMAIL_DOMAIN_RATE_LIMITS', {}).get(domain, config.get('EMAIL_DOMAIN_RATE_LIMIT', 600))
+
+    def acquire(self, domain: str) -> float:
+        """0 if a send to the domain is allowed now (and records it), else seconds to wait"""
+        now = time.monotonic()
+        with self._lock:
+            window = self._sent[domain]
+            while window and window[0] <= now - 60:
+                window.popleft()
+            if len(window) >= self.limit_for(domain):
+                return 60 - (now - window[0])
+            window.append(now)
+            return 0.0
+
+
+class EmailOutbox:
+    """Enqueue and deliver outbox emails"""
+
+    BATCH_MAX_RECIPIENTS = 500  # ZeptoMail batch API limit
+    CLAIM_TIMEOUT = timedelta(minutes=10)  # 'sending' rows from a crashed worker are retried after this
+    BASE_BACKOFF_SECONDS = 60
+    MAX_BACKOFF_SECONDS = 6 * 3600
+
+    _limiter = DomainRateLimiter()
+    _listeners_registered = False
+    _PENDING_KEY = 'email_outbox_pending'  # session.info: delivery to start once the caller commits
+
+    # ------------------------------------------------------------------
+    # Enqueue
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def content_hash(payload: Dict) -> str:
+        """Hash of everything except the recipients (identical content batches together)"""
+        content = {key: value for key, value in payload.items() if key != 'to'}
+        return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def default_key(kind: str, payload: Dict, to_address: str) -> str:
+        """Same message to the same address within EMAIL_DEDUPE_WINDOW_SECONDS is sent once"""
+        window = max(current_app.config.get('EMAIL_DEDUPE_WINDOW_SECONDS', 600), 1)
+        bucket = int(time.time() // window)
+        raw = f"{kind}|{to_address}|{EmailOutbox.content_hash(payload)}|{bucket}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def _row(cls, payload: Dict, kind: str, idempotency_key: Optional[str]) -> Dict:
+        to_address = payload['to'][0]['email_address']['address'].strip()
+        return {
+            'id': None,
+            'idempotency_key': (idempotency_key or cls.default_key(kind, payload, to_address))[:128],
+            'kind': kind,
+            'to_address': to_address,
+            'recipient_domain': to_address.rsplit('@', 1)[-1].lower(),
+            'payload': payload,
+            'content_hash': cls.content_hash(payload),
+        }
+
+    @classmethod
+    def enqueue(cls, payload: Dict, kind: str, idempotency_key: Optional[str] = None,
+                deliver_now: bool = False) -> bool:
+        """
+        Queue one single-recipient payload
+
+        Args:
+            payload: ZeptoMail payload with exactly one `to` entry
+            kind: Email kind (for logs and ops queries)
+            idempotency_key: Dedupe key; defaults to a hash of kind, recipient and content
+            deliver_now: Also try delivering it in-process (someone is waiting, e.g. OTP)
+
+        The row is added inside a savepoint; the caller owns the commit, and
+        delivery starts only once it commits.
+
+        Returns:
+            True if queued (or already queued under the same key)
+        """
+        row = cls._row(payload, kind, idempotency_key)
+        existing = OutboxEmail.query.filter_by(idempotency_key=row['idempotency_key']).first()
+        if existing:
+            current_app.logger.info("[EmailOutbox] Duplicate %s email to %s skipped", kind, row['to_address'])
+            return True
+
+        row.pop('id')
+        email = OutboxEmail(**row)
+        try:
+            with db.session.begin_nested():
+                db.session.add(email)
+        except IntegrityError:
+            # Enqueued concurrently under the same key (only the savepoint is rolled back)
+            return True
+
+        cls._after_commit(deliver_ids=[email.id] if deliver_now else None)
+        return True
+
+    @classmethod
+    def enqueue_many(cls, payloads: Iterable[Dict], kind: str, idempotency_keys: Optional[List[str]] = None) -> int:
+        """Queue many single-recipient payloads with one multi-row INSERT (caller commits); returns rows added"""
+        payloads = list(payloads)
+        keys = idempotency_keys or [None] * len(payloads)
+        rows = {}
+        for payload, key in zip(payloads, keys):
+            row = cls._row(payload, kind, key)
+            rows.setdefault(row['idempotency_key'], row)
+        if not rows:
+            return 0
+
+        existing = {
+            key for (key,) in db.session.query(OutboxEmail.idempotency_key)
+            .filter(OutboxEmail.idempotency_key.in_(list(rows)))
+        }
+        now = datetime.utcnow()
+        new_rows = []
+        for key, row in rows.items():
+            if key in existing:
+                continue
+            row.update(id=str(uuid4()), status='pending', attempts=0,
+                       next_attempt_at=now, created_at=now)
+            new_rows.append(row)
+
+        if new_rows:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(OutboxEmail.__table__.insert(), new_rows)
+            except IntegrityError:
+                # A concurrent enqueue took some keys - fall back to one row at a time
+                for row in new_rows:
+                    cls.enqueue(row['payload'], kind, row['idempotency_key'])
+            cls._after_commit()
+        return len(new_rows)
+
+    @classmethod
+    def _after_commit(cls, deliver_ids: Optional[List[str]] = None):
+        """Kick delivery (or deliver `deliver_ids` in-process) once the caller commits the new rows"""
+        cls.register_listeners()
+        pending = db.session.info.setdefault(cls._PENDING_KEY, {'kick': False, 'deliver': []})
+        if deliver_ids:
+            pending['deliver'].extend(deliver_ids)
+        else:
+            pending['kick'] = True
+
+    @classmethod
+    def register_listeners(cls):
+        """Start delivery after commit and forget it after rollback (idempotent)"""
+        if cls._listeners_registered:
+            return
+
+        def session_committed(session):
+            pending = session.info.pop(cls._PENDING_KEY, None)
+            if not pending:
+                return
+            if pending['kick']:
+                cls._kick()
+            if pending['deliver']:
+                # The committed session cannot run SQL here; deliver on a thread with its own session
+                app = current_app._get_current_object()
+                threading.Thread(target=cls._deliver_in_background, args=(app, pending['deliver']),
+                                 name='email-outbox-deliver', daemon=True).start()
+
+        def session_rolled_back(session):
+            session.info.pop(cls._PENDING_KEY, None)
+
+        event.listen(db.session, 'after_commit', session_committed)
+        event.listen(db.session, 'after_rollback', session_rolled_back)
+        cls._listeners_registered = True
+
+    @classmethod
+    def _deliver_in_background(cls, app, ids: List[str]):
+        with app.app_context():
+            try:
+                cls.deliver(ids)
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.warning("[EmailOutbox] In-process delivery failed, leaving it to the worker: %s", e)
+                cls._kick()
+            finally:
+                db.session.remove()
+
+    @staticmethod
+    def _kick():
+        """Ask a worker to drain now (the beat schedule is the fallback)"""
+        try:
+            from tasks.email_tasks import deliver_email_outbox
+            deliver_email_outbox.delay()
+        except Exception as e:
+            current_app.logger.warning("[EmailOutbox] Could not queue delivery task: %s", e)
+
+    # ------------------------------------------------------------------
+    # Delivery
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def transport():
+        if current_app.config.get('EMAIL_TRANSPORT', 'zepto') == 'sink':
+            return SinkTransport()
+        return ZeptoTransport()
+
+    @classmethod
+    def _claim(cls, limit: int, ids: Optional[List[str]] = None) -> List[OutboxEmail]:
+        """Mark due rows as 'sending' (SKIP LOCKED so concurrent workers split the queue)"""
+        now = datetime.utcnow()
+        due = or_(
+            and_(OutboxEmail.status == 'pending', OutboxEmail.next_attempt_at <= now),
+            and_(OutboxEmail.status == 'sending', OutboxEmail.claimed_at < now - cls.CLAIM_TIMEOUT),
+        )
+        query = OutboxEmail.query.filter(due)
+        if ids:
+            query = query.filter(OutboxEmail.id.in_(ids))
+        rows = query.order_by(OutboxEmail.next_attempt_at, OutboxEmail.id)\
+            .limit(limit).with_for_update(skip_locked=True).all()
+        for row in rows:
+            row.status = 'sending'
+            row.claimed_at = now
+        db.session.commit()
+        return rows
+
+    @classmethod
+    def deliver(cls, ids: Optional[List[str]] = None, limit: int = 500) -> Dict[str, int]:
+        """
+        Send due emails (or just `ids`)
+
+        Returns:
+            {'sent': n, 'deferred': n, 'retrying': n, 'failed': n}
+        """
+        stats = {'sent': 0, 'deferred': 0, 'retrying': 0, 'failed': 0}
+        rows = cls._claim(limit, ids)
+        if not rows:
+            return stats
+
+        transport = cls.transport()
+        now = datetime.utcnow()
+
+        # Per-domain rate limits: rows over the limit wait for the window to free up
+        allowed = []
+        for row in rows:
+            wait = cls._limiter.acquire(row.recipient_domain)
+            if wait:
+                row.status = 'pending'
+                row.next_attempt_at = now + timedelta(seconds=wait)
+                stats['deferred'] += 1
+            else:
+                allowed.append(row)
+
+        groups = defaultdict(list)
+        for row in allowed:
+            groups[row.content_hash].append(row)
+
+        for group in groups.values():
+            for start in range(0, len(group), cls.BATCH_MAX_RECIPIENTS):
+                chunk = group[start:start + cls.BATCH_MAX_RECIPIENTS]
+                if len(chunk) > 1 and cls._send_batch(transport, chunk, stats):
+                    continue
+                for row in chunk:
+                    cls._send_one(transport, row, stats)
+
+        db.session.commit()
+        if any(stats.values()):
+            current_app.logger.info("[EmailOutbox] Delivery run: %s", stats)
+        return stats
+
+    @classmethod
+    def _send_batch(cls, transport, rows: List[OutboxEmail], stats: Dict) -> bool:
+        payload = dict(rows[0].payload)
+        payload['to'] = [recipient for row in rows for recipient in row.payload['to']]
+        try:
+            if not transport.send_batch(payload):
+                return False
+        except requests.RequestException as exc:
+            # Retry individually - one bad address shouldn't hold back the rest
+            current_app.logger.warning("[EmailOutbox] Batch send of %s emails failed (%s), sending individually",
+                                       len(rows), exc)
+            return False
+        for row in rows:
+            cls._mark_sent(row, stats)
+        return True
+
+    @classmethod
+    def _send_one(cls, transport, row: OutboxEmail, stats: Dict):
+        try:
+            transport.send(row.payload)
+        except requests.RequestException as exc:
+            response = getattr(exc, 'response', None)
+            body = getattr(response, 'text', '') or ''
+            status = getattr(response, 'status_code', None)
+            permanent = status is not None and 400 <= status < 500 and status != 429
+            cls._mark_failed(row, f"{exc} | response={body[:500]}", permanent, stats)
+            return
+        cls._mark_sent(row, stats)
+
+    @staticmethod
+    def _mark_sent(row: OutboxEmail, stats: Dict):
+        row.status = 'sent'
+        row.attempts += 1
+        row.sent_at = datetime.utcnow()
+        row.last_error = None
+        stats['sent'] += 1
+
+    @classmethod
+    def _mark_failed(cls, row: OutboxEmail, error: str, permanent: bool, stats: Dict):
+        row.attempts += 1
+        row.last_error = error
+        max_attempts = current_app.config.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 6)
+        if permanent or row.attempts >= max_attempts:
+            row.status = 'failed'
+            stats['failed'] += 1
+            current_app.logger.error("[EmailOutbox] Giving up on %s email to %s: %s",
+                                     row.kind, row.to_address, error)
+            return
+        delay = min(cls.BASE_BACKOFF_SECONDS * 2 ** (row.attempts - 1), cls.MAX_BACKOFF_SECONDS)
+        row.status = 'pending'
+        row.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+        stats['retrying'] += 1
+
+    @staticmethod
+    def purge(days: int = 14) -> int:
+        """Delete sent emails older than `days`"""
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        deleted = OutboxEmail.query.filter(OutboxEmail.status == 'sent', OutboxEmail.sent_at < cutoff)\
+            .delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
@@ -7,11 +7,11 @@ import logging
 from textwrap import shorten
 from typing import Optional
 
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 from flask import current_app
 
+from extensions import db
+from services.email_outbox import EmailOutbox, ZeptoTransport
+
 
 class EmailService:
     """Wrapper for sending transactional emails via ZeptoMail."""
@@ -23,26 +23,28 @@ class EmailService:
     ACCENT_TEXT = "#FDE68A"
 
     @staticmethod
-    def _get_retry_session(retries=3, backoff_factor=1.0):
-        """Create a requests session with retry logic for handling DNS and network issues."""
-        session = requests.Session()
-        retry = Retry(
-            total=retries,
-            read=retries,
-            connect=retries,
-            backoff_factor=backoff_factor,
-            status_forcelist=(500, 502, 503, 504),
-            allowed_methods=["POST"],
-        )
-        adapter = HTTPAdapter(max_retries=retry)
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
-        return session
+    def _get_retry_session():
+        """Shared pooled session with retry logic for handling DNS and network issues."""
+        return ZeptoTransport.session()
+
+    @classmethod
+    def _send(cls, payload: dict, *, kind: str, deliver_now: bool = False) -> bool:
+        """Queue a single-recipient payload in the email outbox and commit it (callers send after their own commit)."""
+        try:
+            queued = EmailOutbox.enqueue(payload, kind=kind, deliver_now=deliver_now)
+            db.session.commit()
+            return queued
+        except Exception as exc:
+            db.session.rollback()
+            logging.exception("[EmailService] Failed to queue %s email: %s", kind, exc)
+            return False
 
     @staticmethod
     def is_enabled() -> bool:
-        """Check if ZeptoMail config is available."""
+        """Check if ZeptoMail config is available (or the local sink transport is in use)."""
         config = current_app.config
+        if config.get("EMAIL_TRANSPORT") == "sink":
+            return True
         return bool(
             config.get("ZEPTO_ENDPOINT")
             and config.get("ZEPTO_SEND_MAIL_TOKEN")
@@ -111,32 +113,13 @@ class EmailService:
         }
 
         current_app.logger.info(
-            "[EmailService] Sending intro email via Zepto - builder=%s (%s)",
+            "[EmailService] Queueing intro email - builder=%s (%s)",
             builder.display_name or builder.username,
             builder_email,
         )
-        current_app.logger.debug("[EmailService] Payload sent to Zepto: %s", payload)
+        current_app.logger.debug("[EmailService] Outbox payload: %s", payload)
 
-        headers = {
-            "authorization": f"Zoho-enczapikey {config['ZEPTO_SEND_MAIL_TOKEN']}",
-            "content-type": "application/json",
-        }
-
-        try:
-            session = cls._get_retry_session()
-            response = session.post(
-                config["ZEPTO_ENDPOINT"], json=payload, headers=headers, timeout=30
-            )
-            response.raise_for_status()
-            return True
-        except requests.RequestException as exc:
-            body = getattr(exc.response, "text", "") if hasattr(exc, "response") else ""
-            logging.exception(
-                "[EmailService] Failed to send intro request email: %s | response=%s",
-                exc,
-                body[:500],
-            )
-            return False
+        return cls._send(payload, kind="intro_request")
 
     @classmethod
     def send_validator_added_email(cls, *, validator: "User") -> bool:
@@ -184,32 +167,13 @@ class EmailService:
         }
 
         current_app.logger.info(
-            "[EmailService] Sending validator added email via Zepto - validator=%s (%s)",
+            "[EmailService] Queueing validator added email - validator=%s (%s)",
             validator.display_name or validator.username,
             validator_email,
         )
-        current_app.logger.debug("[EmailService] Payload sent to Zepto: %s", payload)
+        current_app.logger.debug("[EmailService] Outbox payload: %s", payload)
 
-        headers = {
-            "authorization": f"Zoho-enczapikey {config['ZEPTO_SEND_MAIL_TOKEN']}",
-            "content-type": "application/json",
-        }
-
-        try:
-            session = cls._get_retry_session()
-            response = session.post(
-                config["ZEPTO_ENDPOINT"], json=payload, headers=headers, timeout=30
-            )
-            response.raise_for_status()
-            return True
-        except requests.RequestException as exc:
-            body = getattr(exc.response, "text", "") if hasattr(exc, "response") else ""
-            logging.exception(
-                "[EmailService] Failed to send validator added email: %s | response=%s",
-                exc,
-                body[:500],
-            )
-            return False
+        return cls._send(payload, kind="validator_added")
 
     @classmethod
     def send_validator_assignment_email(
@@ -266,34 +230,15 @@ class EmailService:
         }
 
         current_app.logger.info(
-            "[EmailService] Sending assignment email via Zepto - validator=%s (%s) project=%s priority=%s",
+            "[EmailService] Queueing assignment email - validator=%s (%s) project=%s priority=%s",
             validator.display_name or validator.username,
             validator_email,
             project.id,
             priority,
         )
-        current_app.logger.debug("[EmailService] Payload sent to Zepto: %s", payload)
+        current_app.logger.debug("[EmailService] Outbox payload: %s", payload)
 
-        headers = {
-            "authorization": f"Zoho-enczapikey {config['ZEPTO_SEND_MAIL_TOKEN']}",
-            "content-type": "application/json",
-        }
-
-        try:
-            session = cls._get_retry_session()
-            response = session.post(
-                config["ZEPTO_ENDPOINT"], json=payload, headers=headers, timeout=30
-            )
-            response.raise_for_status()
-            return True
-        except requests.RequestException as exc:
-            body = getattr(exc.response, "text", "") if hasattr(exc, "response") else ""
-            logging.exception(
-                "[EmailService] Failed to send validator assignment email: %s | response=%s",
-                exc,
-                body[:500],
-            )
-            return False
+        return cls._send(payload, kind="validator_assignment")
 
     @classmethod
     def _build_intro_html(
@@ -621,32 +566,13 @@ class EmailService:
         }
 
         current_app.logger.info(
-            "[EmailService] Sending investor approval email via Zepto - investor=%s (%s)",
+            "[EmailService] Queueing investor approval email - investor=%s (%s)",
             display_name,
             investor_email,
         )
-        current_app.logger.debug("[EmailService] Payload sent to Zepto: %s", payload)
+        current_app.logger.debug("[EmailService] Outbox payload: %s", payload)
 
-        headers = {
-            "authorization": f"Zoho-enczapikey {config['ZEPTO_SEND_MAIL_TOKEN']}",
-            "content-type": "application/json",
-        }
-
-        try:
-            session = cls._get_retry_session()
-            response = session.post(
-                config["ZEPTO_ENDPOINT"], json=payload, headers=headers, timeout=30
-            )
-            response.raise_for_status()
-            return True
-        except requests.RequestException as exc:
-            body = getattr(exc.response, "text", "") if hasattr(exc, "response") else ""
-            logging.exception(
-                "[EmailService] Failed to send investor approval email: %s | response=%s",
-                exc,
-                body[:500],
-            )
-            return False
+        return cls._send(payload, kind="investor_approval")
 
     @classmethod
     def send_intro_accepted_email(
@@ -702,31 +628,12 @@ class EmailService:
         }
 
         current_app.logger.info(
-            "[EmailService] Sending intro accepted email via Zepto - investor=%s (%s)",
+            "[EmailService] Queueing intro accepted email - investor=%s (%s)",
             investor_name,
             investor_email,
         )
 
-        headers = {
-            "authorization": f"Zoho-enczapikey {config['ZEPTO_SEND_MAIL_TOKEN']}",
-            "content-type": "application/json",
-        }
-
-        try:
-            session = cls._get_retry_session()
-            response = session.post(
-                config["ZEPTO_ENDPOINT"], json=payload, headers=headers, timeout=30
-            )
-            response.raise_for_status()
-            return True
-        except requests.RequestException as exc:
-            body = getattr(exc.response, "text", "") if hasattr(exc, "response") else ""
-            logging.exception(
-                "[EmailService] Failed to send intro accepted email: %s | response=%s",
-                exc,
-                body[:500],
-            )
-            return False
+        return cls._send(payload, kind="intro_accepted")
 
     @classmethod
     def send_intro_declined_email(
@@ -782,31 +689,12 @@ class EmailService:
         }
 
         current_app.logger.info(
-            "[EmailService] Sending intro declined email via Zepto - investor=%s (%s)",
+            "[EmailService] Queueing intro declined email - investor=%s (%s)",
             investor_name,
             investor_email,
         )
 
-        headers = {
-            "authorization": f"Zoho-enczapikey {config['ZEPTO_SEND_MAIL_TOKEN']}",
-            "content-type": "application/json",
-        }
-
-        try:
-            session = cls._get_retry_session()
-            response = session.post(
-                config["ZEPTO_ENDPOINT"], json=payload, headers=headers, timeout=30
-            )
-            response.raise_for_status()
-            return True
-        except requests.RequestException as exc:
-            body = getattr(exc.response, "text", "") if hasattr(exc, "response") else ""
-            logging.exception(
-                "[EmailService] Failed to send intro declined email: %s | response=%s",
-                exc,
-                body[:500],
-            )
-            return False
+        return cls._send(payload, kind="intro_declined")
 
     @classmethod
     def send_investor_rejected_email(
@@ -858,31 +746,12 @@ class EmailService:
         }
 
         current_app.logger.info(
-            "[EmailService] Sending investor rejection email via Zepto - investor=%s (%s)",
+            "[EmailService] Queueing investor rejection email - investor=%s (%s)",
             display_name,
             investor_email,
         )
 
-        headers = {
-            "authorization": f"Zoho-enczapikey {config['ZEPTO_SEND_MAIL_TOKEN']}",
-            "content-type": "application/json",
-        }
-
-        try:
-            session = cls._get_retry_session()
-            response = session.post(
-                config["ZEPTO_ENDPOINT"], json=payload, headers=headers, timeout=30
-            )
-            response.raise_for_status()
-            return True
-        except requests.RequestException as exc:
-            body = getattr(exc.response, "text", "") if hasattr(exc, "response") else ""
-            logging.exception(
-                "[EmailService] Failed to send investor rejection email: %s | response=%s",
-                exc,
-                body[:500],
-            )
-            return False
+        return cls._send(payload, kind="investor_rejection")
 
     @classmethod
     def send_badge_awarded_email(
@@ -939,32 +808,13 @@ class EmailService:
         }
 
         current_app.logger.info(
-            "[EmailService] Sending badge awarded email via Zepto - owner=%s (%s) badge=%s",
+            "[EmailService] Queueing badge awarded email - owner=%s (%s) badge=%s",
             owner_name,
             owner_email,
             badge_type,
         )
 
-        headers = {
-            "authorization": f"Zoho-enczapikey {config['ZEPTO_SEND_MAIL_TOKEN']}",
-            "content-type": "application/json",
-        }
-
-        try:
-            session = cls._get_retry_session()
-            response = session.post(
-                config["ZEPTO_ENDPOINT"], json=payload, headers=headers, timeout=30
-            )
-            response.raise_for_status()
-            return True
-        except requests.RequestException as exc:
-            body = getattr(exc.response, "text", "") if hasattr(exc, "response") else ""
-            logging.exception(
-                "[EmailService] Failed to send badge awarded email: %s | response=%s",
-                exc,
-                body[:500],
-            )
-            return False
+        return cls._send(payload, kind="badge_awarded")
 
     @classmethod
     def send_project_created_email(cls, *, project_owner: "User", project: "Project") -> bool:
@@ -1015,32 +865,13 @@ class EmailService:
         }
 
         current_app.logger.info(
-            "[EmailService] Sending project created email via Zepto - owner=%s (%s) project=%s",
+            "[EmailService] Queueing project created email - owner=%s (%s) project=%s",
             owner_name,
             owner_email,
             project.title,
         )
 
-        headers = {
-            "authorization": f"Zoho-enczapikey {config['ZEPTO_SEND_MAIL_TOKEN']}",
-            "content-type": "application/json",
-        }
-
-        try:
-            session = cls._get_retry_session()
-            response = session.post(
-                config["ZEPTO_ENDPOINT"], json=payload, headers=headers, timeout=30
-            )
-            response.raise_for_status()
-            return True
-        except requests.RequestException as exc:
-            body = getattr(exc.response, "text", "") if hasattr(exc, "response") else ""
-            logging.exception(
-                "[EmailService] Failed to send project created email: %s | response=%s",
-                exc,
-                body[:500],
-            )
-            return False
+        return cls._send(payload, kind="project_created")
 
     @classmethod
     def send_welcome_email(cls, *, user: "User") -> bool:
@@ -1083,31 +914,12 @@ class EmailService:
         }
 
         current_app.logger.info(
-            "[EmailService] Sending welcome email via Zepto - user=%s (%s)",
+            "[EmailService] Queueing welcome email - user=%s (%s)",
             user_name,
             user_email,
         )
 
-        headers = {
-            "authorization": f"Zoho-enczapikey {config['ZEPTO_SEND_MAIL_TOKEN']}",
-            "content-type": "application/json",
-        }
-
-        try:
-            session = cls._get_retry_session()
-            response = session.post(
-                config["ZEPTO_ENDPOINT"], json=payload, headers=headers, timeout=30
-            )
-            response.raise_for_status()
-            return True
-        except requests.RequestException as exc:
-            body = getattr(exc.response, "text", "") if hasattr(exc, "response") else ""
-            logging.exception(
-                "[EmailService] Failed to send welcome email: %s | response=%s",
-                exc,
-                body[:500],
-            )
-            return False
+        return cls._send(payload, kind="welcome")
 
     @classmethod
     def send_user_banned_email(cls, *, user: "User", reason: Optional[str] = None) -> bool:
@@ -1149,31 +961,12 @@ class EmailService:
         }
 
         current_app.logger.info(
-            "[EmailService] Sending user banned email via Zepto - user=%s (%s)",
+            "[EmailService] Queueing user banned email - user=%s (%s)",
             user_name,
             user_email,
         )
 
-        headers = {
-            "authorization": f"Zoho-enczapikey {config['ZEPTO_SEND_MAIL_TOKEN']}",
-            "content-type": "application/json",
-        }
-
-        try:
-            session = cls._get_retry_session()
-            response = session.post(
-                config["ZEPTO_ENDPOINT"], json=payload, headers=headers, timeout=30
-            )
-            response.raise_for_status()
-            return True
-        except requests.RequestException as exc:
-            body = getattr(exc.response, "text", "") if hasattr(exc, "response") else ""
-            logging.exception(
-                "[EmailService] Failed to send user banned email: %s | response=%s",
-                exc,
-                body[:500],
-            )
-            return False
+        return cls._send(payload, kind="user_banned")
 
     @classmethod
     def send_user_unbanned_email(cls, *, user: "User") -> bool:
@@ -1216,31 +1009,12 @@ class EmailService:
         }
 
         current_app.logger.info(
-            "[EmailService] Sending user unbanned email via Zepto - user=%s (%s)",
+            "[EmailService] Queueing user unbanned email - user=%s (%s)",
             user_name,
             user_email,
         )
 
-        headers = {
-            "authorization": f"Zoho-enczapikey {config['ZEPTO_SEND_MAIL_TOKEN']}",
-            "content-type": "application/json",
-        }
-
-        try:
-            session = cls._get_retry_session()
-            response = session.post(
-                config["ZEPTO_ENDPOINT"], json=payload, headers=headers, timeout=30
-            )
-            response.raise_for_status()
-            return True
-        except requests.RequestException as exc:
-            body = getattr(exc.response, "text", "") if hasattr(exc, "response") else ""
-            logging.exception(
-                "[EmailService] Failed to send user unbanned email: %s | response=%s",
-                exc,
-                body[:500],
-            )
-            return False
+        return cls._send(payload, kind="user_unbanned")
 
     @classmethod
     def send_project_featured_email(cls, *, project_owner: "User", project: "Project") -> bool:
@@ -1291,32 +1065,13 @@ class EmailService:
         }
 
         current_app.logger.info(
-            "[EmailService] Sending project featured email via Zepto - owner=%s (%s) project=%s",
+            "[EmailService] Queueing project featured email - owner=%s (%s) project=%s",
             owner_name,
             owner_email,
             project.title,
         )
 
-        headers = {
-            "authorization": f"Zoho-enczapikey {config['ZEPTO_SEND_MAIL_TOKEN']}",
-            "content-type": "application/json",
-        }
-
-        try:
-            session = cls._get_retry_session()
-            response = session.post(
-                config["ZEPTO_ENDPOINT"], json=payload, headers=headers, timeout=30
-            )
-            response.raise_for_status()
-            return True
-        except requests.RequestException as exc:
-            body = getattr(exc.response, "text", "") if hasattr(exc, "response") else ""
-            logging.exception(
-                "[EmailService] Failed to send project featured email: %s | response=%s",
-                exc,
-                body[:500],
-            )
-            return False
+        return cls._send(payload, kind="project_featured")
 
     @classmethod
     def send_admin_role_changed_email(cls, *, user: "User", is_admin: bool) -> bool:
@@ -1367,32 +1122,13 @@ class EmailService:
         }
 
         current_app.logger.info(
-            "[EmailService] Sending admin role changed email via Zepto - user=%s (%s) is_admin=%s",
+            "[EmailService] Queueing admin role changed email - user=%s (%s) is_admin=%s",
             user_name,
             user_email,
             is_admin,
         )
 
-        headers = {
-            "authorization": f"Zoho-enczapikey {config['ZEPTO_SEND_MAIL_TOKEN']}",
-            "content-type": "application/json",
-        }
-
-        try:
-            session = cls._get_retry_session()
-            response = session.post(
-                config["ZEPTO_ENDPOINT"], json=payload, headers=headers, timeout=30
-            )
-            response.raise_for_status()
-            return True
-        except requests.RequestException as exc:
-            body = getattr(exc.response, "text", "") if hasattr(exc, "response") else ""
-            logging.exception(
-                "[EmailService] Failed to send admin role changed email: %s | response=%s",
-                exc,
-                body[:500],
-            )
-            return False
+        return cls._send(payload, kind="admin_role_changed")
 
     @classmethod
     def send_admin_otp_email(cls, *, email: str, otp_code: str) -> bool:
@@ -1432,30 +1168,11 @@ class EmailService:
         }
 
         current_app.logger.info(
-            "[EmailService] Sending admin OTP email via Zepto - email=%s",
+            "[EmailService] Queueing admin OTP email - email=%s",
             email,
         )
 
-        headers = {
-            "authorization": f"Zoho-enczapikey {config['ZEPTO_SEND_MAIL_TOKEN']}",
-            "content-type": "application/json",
-        }
-
-        try:
-            session = cls._get_retry_session()
-            response = session.post(
-                config["ZEPTO_ENDPOINT"], json=payload, headers=headers, timeout=30
-            )
-            response.raise_for_status()
-            return True
-        except requests.RequestException as exc:
-            body = getattr(exc.response, "text", "") if hasattr(exc, "response") else ""
-            logging.exception(
-                "[EmailService] Failed to send admin OTP email: %s | response=%s",
-                exc,
-                body[:500],
-            )
-            return False
+        return cls._send(payload, kind="admin_otp", deliver_now=True)
 
     @classmethod
     def _build_admin_otp_html(cls, *, email: str, otp_code: str) -> str:
@@ -0,0 +1,225 @@
+"""
+Feed Engine - shared itinerary feed pages with a per-user overlay
+
+A page is assembled from independently cached parts instead of caching
+rendered pages per user:
+- itinerary_feed:ids:{sort}:{signature}  Redis list of the first MAX_IDS matching ids
+                                         for a sort + filter signature (shared by everyone)
+- itinerary_feed:total:{sort}:{signature} full match count, written after the list
+- itinerary_card:{id}                    one itinerary's to_dict(include_creator=True)
+- vote:state:{id}, user vote bitmap      live counts from VoteService and user_vote /
+  and bookmark set                       user_has_saved from RedisUserCache.get_feed_overlay
+
+A page is one LRANGE of the id list plus one MGET of cards. Editing an itinerary
+deletes its card key only (CacheService.invalidate_itinerary); a vote updates
+VoteService state and touches neither id lists nor cards.
+An in-place rescore (safety ratings) drops only the id lists ordered or
+filtered by score (invalidate_scored).
+"""
+import hashlib
+import json
+import logging
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import joinedload
+
+from models.itinerary import Itinerary
+from services.redis_cache_service import RedisUserCache
+from services.vote_service import VoteService
+from utils.cache import CacheService
+from utils.cache_demand import CacheDemand
+
+logger = logging.getLogger(__name__)
+
+
+class FeedEngine:
+    """Id lists + card cache + overlay for GET /api/itineraries"""
+
+    KEY_IDS = "itinerary_feed:ids:{sort}:{signature}"
+    KEY_TOTAL = "itinerary_feed:total:{sort}:{signature}"
+    KEY_CARD = "itinerary_card:{itinerary_id}"
+
+    IDS_TTL = 300     # Ordering refreshes within 5 minutes (membership changes clear it at once)
+    CARD_TTL = 3600   # Cards are deleted on edit, so they can live long
+    MAX_IDS = 1000    # Deeper pages are read from the database directly
+
+    # Lists a rescore in place can reorder or refilter (see invalidate_scored)
+    SCORE_SORTS = ('trending', 'hot', 'top-rated', 'top')
+    SCORE_FILTERS = ('min_score', 'min_safety_score')
+
+    # ------------------------------------------------------------------
+    # Id lists
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def signature(cls, filters: dict) -> str:
+        """Stable name for a set of filters ('all' when none are active, 'scored-' prefix for score filters)"""
+        active = {
+            name: sorted(value) if isinstance(value, list) else value
+            for name, value in filters.items()
+            if value is not None and value != '' and value != []
+        }
+        if not active:
+            return 'all'
+        digest = hashlib.sha1(json.dumps(active, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+        return f"scored-{digest}" if any(name in active for name in cls.SCORE_FILTERS) else digest
+
+    @classmethod
+    def invalidate_scored(cls):
+        """Drop the id lists ordered or filtered by proof / safety score (after an in-place rescore)"""
+        # Matches both the id list and its total
+        patterns = [f"itinerary_feed:*:{sort}:*" for sort in cls.SCORE_SORTS] + ["itinerary_feed:*:*:scored-*"]
+        for pattern in patterns:
+            CacheService.clear_pattern(pattern)
+
+    @classmethod
+    def get_ids(cls, sort: str, signature: str, query, start: int = 0,
+                count: Optional[int] = None) -> Tuple[List[str], int]:
+        """
+        (ids[start:start + count], total) for an ordered, filtered itinerary query
+
+        The first MAX_IDS ids are stored as a Redis list and a page reads only
+        its own slice (LRANGE); total is the full match count.
+        """
+        stop = (start + count if count is not None else cls.MAX_IDS) - 1
+        key = cls.KEY_IDS.format(sort=sort, signature=signature)
+        total_key = cls.KEY_TOTAL.format(sort=sort, signature=signature)
+        client = CacheService.get_redis_client()
+
+        if client:
+            cached = cls._read_ids(client, key, total_key, start, stop)
+            if cached is not None:
+                return cached
+
+        total = query.count()
+        ids = [itinerary_id for (itinerary_id,) in query.with_entities(Itinerary.id).limit(cls.MAX_IDS)]
+        if client:
+            cls._store_ids(client, key, total_key, ids, total)
+        return ids[start:stop + 1], total
+
+    @classmethod
+    def _read_ids(cls, client, key: str, total_key: str, start: int, stop: int) -> Optional[Tuple[List[str], int]]:
+        """(ids, total) from Redis, or None on a miss (a warm replay of this key always misses)"""
+        warming = CacheDemand.warming_key()
+        if warming == key:
+            return None
+        try:
+            pipe = client.pipeline()
+            pipe.get(total_key)
+            pipe.lrange(key, start, stop)
+            total, ids = pipe.exec()
+        except Exception as e:
+            logger.warning("Feed id list read error: %s", e)
+            return None
+
+        # The total is written last; a slice that should exist but is empty means the list expired first
+        hit = total is not None and (bool(ids) or start >= min(int(total), cls.MAX_IDS))
+        if warming is None:
+            CacheDemand.record_read(key, hit=hit)
+        return (ids, int(total)) if hit else None
+
+    @classmethod
+    def _store_ids(cls, client, key: str, total_key: str, ids: List[str], total: int):
+        try:
+            pipe = client.pipeline()
+            pipe.delete(key)
+            if ids:
+                pipe.rpush(key, *ids)
+                pipe.expire(key, cls.IDS_TTL)
+            pipe.setex(total_key, cls.IDS_TTL, total)
+            pipe.exec()
+            CacheDemand.record_fill(key, cls.IDS_TTL)
+        except Exception as e:
+            logger.warning("Feed id list write error: %s", e)
+
+    # ------------------------------------------------------------------
+    # Cards
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def get_cards(cls, ids: List[str]) -> List[dict]:
+        """
+        Cards for ids in order, one MGET plus one query for any misses
+
+        Ids whose itinerary was deleted since the list was built are dropped.
+        """
+        if not ids:
+            return []
+
+        keys = [cls.KEY_CARD.format(itinerary_id=itinerary_id) for itinerary_id in ids]
+        cached = CacheService.get_many(keys)
+        cards = {itinerary_id: cached[key] for itinerary_id, key in zip(ids, keys) if key in cached}
+
+        missing = [itinerary_id for itinerary_id in ids if itinerary_id not in cards]
+        if missing:
+            itineraries = Itinerary.query.options(joinedload(Itinerary.itinerary_creator)).filter(
+                Itinerary.id.in_(missing),
+                Itinerary.is_deleted == False,
+                Itinerary.is_published == True
+            ).all()
+            built = {itinerary.id: itinerary.to_dict(include_creator=True) for itinerary in itineraries}
+            CacheService.set_many(
+                {cls.KEY_CARD.format(itinerary_id=itinerary_id): card for itinerary_id, card in built.items()},
+                cls.CARD_TTL
+            )
+            cards.update(built)
+
+        return [cards[itinerary_id] for itinerary_id in ids if itinerary_id in cards]
+
+    # ------------------------------------------------------------------
+    # Overlay
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def apply_vote_counts(cards: List[dict]):
+        """Replace build-time vote counts with VoteService's live ones (one pipeline)"""
+        client = CacheService.get_redis_client()
+        if not client or not cards:
+            return
+        counts = VoteService(redis_client=client).get_vote_counts_many([card['id'] for card in cards])
+        for card in cards:
+            card.update(counts.get(card['id'], {}))
+
+    @staticmethod
+    def apply_user_fields(cards: List[dict], user_id: Optional[str]):
+        """Set user_vote / user_has_saved for the viewer (no-op for anonymous reads)"""
+        if not user_id or not cards:
+            return
+        overlay = RedisUserCache.get_feed_overlay(user_id, [card['id'] for card in cards])
+        for card in cards:
+            card.update(overlay.get(card['id'], {'user_vote': None, 'user_has_saved': False}))
+
+    # ------------------------------------------------------------------
+    # Pages
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def get_page(
+        cls,
+        sort: str,
+        filters: dict,
+        query,
+        page: int,
+        per_page: int,
+        user_id: Optional[str] = None
+    ) -> Optional[Tuple[List[dict], int]]:
+        """
+        (cards, total) for one page of the feed
+
+        Args:
+            sort: Canonical sort name (part of the id-list key)
+            filters: Normalized filters that shaped query (hashed into the key)
+            query: Filtered, ordered Itinerary query used to build the id list
+
+        Returns:
+            None when the page lies beyond MAX_IDS; the caller pages the query itself
+        """
+        start = (page - 1) * per_page
+        if start + per_page > cls.MAX_IDS:
+            return None
+
+        ids, total = cls.get_ids(sort, cls.signature(filters), query, start, per_page)
+        cards = cls.get_cards(ids)
+        cls.apply_vote_counts(cards)
+        cls.apply_user_fields(cards, user_id)
+        return cards, total
@@ -0,0 +1,320 @@
+"""
+Geo Index - geohash-backed spatial lookups over every stored GPS coordinate
+
+Itineraries (start/end/route waypoints), safety alerts, hidden gems and travel
+intel are mirrored into the geo_points table by mapper events, in the same
+transaction as the source write. Queries cover the search area with geohash
+prefixes (one index range scan each), clip to the bounding box in SQL and do
+the exact great-circle / distance-to-route filtering on the few candidates
+left. The same SQL runs on Postgres and SQLite.
+"""
+import logging
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, event, inspect, or_, select
+
+from extensions import db
+from models.geo_point import GeoPoint
+from utils.geo import (
+    bbox_around,
+    distance_to_route_km,
+    encode_geohash,
+    geohash_cells,
+    haversine_km,
+    parse_gps,
+    split_bbox,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class GeoIndex:
+    """Maintain and query the geo_points index"""
+
+    ENTITY_TYPES = ('itinerary', 'safety_alert', 'hidden_gem', 'travel_intel')
+
+    # Source columns whose change requires re-indexing the row
+    WATCHED_COLUMNS = {
+        'itinerary': ('starting_point_gps', 'ending_point_gps', 'route_waypoints', 'is_published', 'is_deleted'),
+        'safety_alert': ('location_gps', 'status', 'itinerary_id'),
+        'hidden_gem': ('location_gps', 'itinerary_id'),
+        'travel_intel': ('location_gps', 'itinerary_id'),
+    }
+
+    MAX_CANDIDATES = 5000  # Rows pulled from SQL before exact filtering
+    MAX_CELLS = 64         # Geohash prefixes per query
+    MAX_ROUTE_BOXES = 32   # Bounding boxes a route query is split into
+
+    _listeners_registered = False
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def points_for(entity_type: str, obj) -> Tuple[Optional[str], bool, List[Tuple[str, int, float, float]]]:
+        """(itinerary_id, is_active, [(kind, seq, lat, lon), ...]) for a source row"""
+        points = []
+
+        if entity_type == 'itinerary':
+            start = parse_gps(obj.starting_point_gps)
+            if start:
+                points.append(('start', 0, *start))
+            for seq, waypoint in enumerate(obj.route_waypoints or [], start=1):
+                coords = parse_gps(waypoint)
+                if coords:
+                    points.append(('waypoint', seq, *coords))
+            end = parse_gps(obj.ending_point_gps)
+            if end:
+                points.append(('end', len(points) + 1, *end))
+            is_active = bool(obj.is_published) and not obj.is_deleted
+            return obj.id, is_active, points
+
+        kind = {'safety_alert': 'alert', 'hidden_gem': 'gem', 'travel_intel': 'intel'}[entity_type]
+        coords = parse_gps(obj.location_gps)
+        if coords:
+            points.append((kind, 0, *coords))
+        is_active = (obj.status or 'active') == 'active' if entity_type == 'safety_alert' else True
+        return obj.itinerary_id, is_active, points
+
+    @classmethod
+    def sync_entity(cls, connection, entity_type: str, obj):
+        """Replace the indexed points of one source row"""
+        table = GeoPoint.__table__
+        connection.execute(table.delete().where(and_(
+            table.c.entity_type == entity_type,
+            table.c.entity_id == obj.id
+        )))
+
+        itinerary_id, is_active, points = cls.points_for(entity_type, obj)
+        if points:
+            connection.execute(table.insert(), [
+                {
+                    'entity_type': entity_type,
+                    'entity_id': obj.id,
+                    'itinerary_id': itinerary_id,
+                    'kind': kind,
+                    'seq': seq,
+                    'lat': lat,
+                    'lon': lon,
+                    'geohash': encode_geohash(lat, lon),
+                    'is_active': is_active,
+                }
+                for kind, seq, lat, lon in points
+            ])
+
+    @classmethod
+    def remove_entity(cls, connection, entity_type: str, entity_id: str):
+        """Drop the indexed points of a deleted source row"""
+        table = GeoPoint.__table__
+        connection.execute(table.delete().where(and_(
+            table.c.entity_type == entity_type,
+            table.c.entity_id == entity_id
+        )))
+
+    @classmethod
+    def register_listeners(cls):
+        """Mirror source writes into geo_points (idempotent)"""
+        if cls._listeners_registered:
+            return
+
+        from models.itinerary import Itinerary
+        from models.safety_alert import SafetyAlert
+        from models.hidden_gem import HiddenGem
+        from models.travel_intel import TravelIntel
+
+        models = {
+            'itinerary': Itinerary,
+            'safety_alert': SafetyAlert,
+            'hidden_gem': HiddenGem,
+            'travel_intel': TravelIntel,
+        }
+
+        for entity_type, model in models.items():
+            cls._register_model(entity_type, model)
+
+        cls._listeners_registered = True
+
+    @classmethod
+    def _register_model(cls, entity_type, model):
+        watched = cls.WATCHED_COLUMNS[entity_type]
+
+        def after_insert(mapper, connection, target):
+            cls.sync_entity(connection, entity_type, target)
+
+        def after_update(mapper, connection, target):
+            state = inspect(target)
+            if any(state.attrs[column].history.has_changes() for column in watched):
+                cls.sync_entity(connection, entity_type, target)
+
+        def after_delete(mapper, connection, target):
+            cls.remove_entity(connection, entity_type, target.id)
+
+        event.listen(model, 'after_insert', after_insert)
+        event.listen(model, 'after_update', after_update)
+        event.listen(model, 'after_delete', after_delete)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _candidates(cls, boxes, entity_types: Optional[Iterable[str]] = None,
+                    active_only: bool = True, exclude_itinerary_id: Optional[str] = None,
+                    nearest_to: Optional[Tuple[float, float]] = None):
+        """
+        Index rows inside the boxes (prefix scans + bbox clip)
+
+        With nearest_to, rows are ordered by approximate (equirectangular)
+        distance to that point before MAX_CANDIDATES applies, so a truncated
+        result keeps the closest rows. Truncation is logged either way.
+        """
+        table = GeoPoint.__table__
+        cells = geohash_cells(boxes, max_cells=cls.MAX_CELLS)
+
+        conditions = [
+            or_(*[
+                and_(table.c.lat.between(min_lat, max_lat), table.c.lon.between(min_lon, max_lon))
+                for min_lat, min_lon, max_lat, max_lon in boxes
+            ])
+        ]
+        if cells and cells != {''}:
+            conditions.append(or_(*[table.c.geohash.like(f'{cell}%') for cell in sorted(cells)]))
+        if entity_types:
+            conditions.append(table.c.entity_type.in_(list(entity_types)))
+        if active_only:
+            conditions.append(table.c.is_active == True)
+        if exclude_itinerary_id:
+            conditions.append(or_(table.c.itinerary_id.is_(None), table.c.itinerary_id != exclude_itinerary_id))
+
+        query = select(table).where(and_(*conditions))
+        if nearest_to:
+            lat, lon = nearest_to
+            lon_scale = math.cos(math.radians(lat))
+            query = query.order_by(
+                (table.c.lat - lat) * (table.c.lat - lat)
+                + (table.c.lon - lon) * (table.c.lon - lon) * (lon_scale * lon_scale)
+            )
+
+        rows = db.session.execute(query.limit(cls.MAX_CANDIDATES)).mappings().all()
+        if len(rows) == cls.MAX_CANDIDATES:
+            logger.warning("Geo query hit MAX_CANDIDATES (%d) over %d boxes; %s",
+                           cls.MAX_CANDIDATES, len(boxes),
+                           'kept the nearest rows' if nearest_to else 'results may be incomplete')
+        return rows
+
+    @staticmethod
+    def _closest_per_entity(hits: List[Dict], limit: int) -> List[Dict]:
+        """Keep each entity's closest point, nearest first"""
+        best = {}
+        for hit in hits:
+            key = (hit['entity_type'], hit['entity_id'])
+            if key not in best or hit['distance_km'] < best[key]['distance_km']:
+                best[key] = hit
+        return sorted(best.values(), key=lambda h: h['distance_km'])[:limit]
+
+    @staticmethod
+    def _hit(row, distance_km: float) -> Dict:
+        return {
+            'entity_type': row['entity_type'],
+            'entity_id': row['entity_id'],
+            'itinerary_id': row['itinerary_id'],
+            'kind': row['kind'],
+            'lat': row['lat'],
+            'lon': row['lon'],
+            'distance_km': round(distance_km, 3),
+        }
+
+    @classmethod
+    def query_radius(cls, lat: float, lon: float, radius_km: float,
+                     entity_types: Optional[Iterable[str]] = None,
+                     active_only: bool = True, limit: int = 50) -> List[Dict]:
+        """Entities with a point within radius_km of (lat, lon), nearest first"""
+        center = (lat, lon)
+        boxes = split_bbox(*bbox_around(lat, lon, radius_km))
+
+        hits = []
+        for row in cls._candidates(boxes, entity_types, active_only, nearest_to=center):
+            distance = haversine_km(center, (row['lat'], row['lon']))
+            if distance <= radius_km:
+                hits.append(cls._hit(row, distance))
+
+        return cls._closest_per_entity(hits, limit)
+
+    @classmethod
+    def query_bbox(cls, min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+                   entity_types: Optional[Iterable[str]] = None,
+                   active_only: bool = True, limit: int = 200) -> List[Dict]:
+        """Entities with a point inside the box (distance measured from its center)"""
+        center = ((min_lat + max_lat) / 2, (min_lon + max_lon) / 2)
+        boxes = split_bbox(min_lat, min_lon, max_lat, max_lon)
+
+        hits = [
+            cls._hit(row, haversine_km(center, (row['lat'], row['lon'])))
+            for row in cls._candidates(boxes, entity_types, active_only, nearest_to=center)
+        ]
+        return cls._closest_per_entity(hits, limit)
+
+    @staticmethod
+    def route_for_itinerary(itinerary) -> List[Tuple[float, float]]:
+        """Ordered route polyline: the parsed GPX track if any, else start, waypoints, end"""
+        if getattr(itinerary, 'route_geometry', None) is not None:
+            from utils.route_geometry import decode_polyline
+            return decode_polyline(itinerary.route_geometry.medium_polyline)
+
+        _, _, points = GeoIndex.points_for('itinerary', itinerary)
+        return [(lat, lon) for _, _, lat, lon in sorted(points, key=lambda p: p[1])]
+
+    @classmethod
+    def query_near_route(cls, route: List[Tuple[float, float]], radius_km: float,
+                         entity_types: Iterable[str] = ('safety_alert',),
+                         exclude_itinerary_id: Optional[str] = None,
+                         limit: int = 100) -> List[Dict]:
+        """Entities within radius_km of any segment of the route"""
+        if not route:
+            return []
+
+        # One expanded box per run of consecutive points keeps long routes from
+        # scanning a continent while bounding the size of the SQL predicate
+        boxes = []
+        step = max(1, -(-(len(route) - 1) // cls.MAX_ROUTE_BOXES))
+        for start in range(0, max(1, len(route) - 1), step):
+            run = route[start:start + step + 1]
+            min_lat, min_lon, _, _ = bbox_around(min(p[0] for p in run), min(p[1] for p in run), radius_km)
+            _, _, max_lat, max_lon = bbox_around(max(p[0] for p in run), max(p[1] for p in run), radius_km)
+            boxes.extend(split_bbox(min_lat, min_lon, max_lat, max_lon))
+
+        hits = []
+        for row in cls._candidates(boxes, entity_types, True, exclude_itinerary_id):
+            distance = distance_to_route_km((row['lat'], row['lon']), route)
+            if distance <= radius_km:
+                hits.append(cls._hit(row, distance))
+
+        return cls._closest_per_entity(hits, limit)
+
+    @classmethod
+    def rebuild(cls, batch_size: int = 1000) -> Dict[str, int]:
+        """Re-index every source row (backfill / repair)"""
+        from models.itinerary import Itinerary
+        from models.safety_alert import SafetyAlert
+        from models.hidden_gem import HiddenGem
+        from models.travel_intel import TravelIntel
+
+        counts = {}
+        for entity_type, model in (('itinerary', Itinerary), ('safety_alert', SafetyAlert),
+                                   ('hidden_gem', HiddenGem), ('travel_intel', TravelIntel)):
+            counts[entity_type] = 0
+            last_id = ''
+            while True:
+                rows = model.query.filter(model.id > last_id).order_by(model.id).limit(batch_size).all()
+                if not rows:
+                    break
+                connection = db.session.connection()
+                for row in rows:
+                    cls.sync_entity(connection, entity_type, row)
+                db.session.commit()
+                counts[entity_type] += len(rows)
+                last_id = rows[-1].id
+
+        return counts
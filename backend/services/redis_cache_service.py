@@ -24,11 +24,15 @@ Usage:
 
 from upstash_redis import Redis
 import json
+import logging
 from typing import Set, List, Optional, Dict
 from datetime import timedelta
 from extensions import db
 from models.vote import Vote
 from models.chain import ChainFollower
+from services.vote_bitmaps import VoteBitmaps
+
+logger = logging.getLogger(__name__)
 
 
 class RedisUserCache:
@@ -38,10 +42,10 @@ class RedisUserCache:
     """
 
     # Redis client (initialized in app.py)
-    redis_client: redis.Redis = None
+    redis_client: Redis = None
 
     # Cache key prefixes
-    PREFIX_UPVOTES = "user:upvotes:"        # user:upvotes:{user_id} -> Set[project_id]
+    # Votes live in VoteBitmaps.keys(user_id) (sparse hash or bitmap), shared with VoteService
     PREFIX_FOLLOWS = "user:follows:"        # user:follows:{user_id} -> Set[chain_id]
     PREFIX_BOOKMARKS = "user:bookmarks:"    # user:bookmarks:{user_id} -> Set[project_id]
 
@@ -52,7 +56,7 @@ class RedisUserCache:
     def initialize(cls, upstash_url: str, upstash_token: str):
         """Initialize Upstash Redis connection"""
         cls.redis_client = Redis(url=upstash_url, token=upstash_token)
-        print(f"[RedisUserCache] Connected to Upstash Redis: {upstash_url}")
+        logger.info("Connected to Upstash Redis: %s", upstash_url)
 
     @classmethod
     def _get_key(cls, prefix: str, user_id: str) -> str:
@@ -77,22 +81,19 @@ class RedisUserCache:
             bool: True if upvote was added, False if already existed
         """
         try:
-            key = cls._get_key(cls.PREFIX_UPVOTES, user_id)
-
-            # Add to Redis set
-            added = cls.redis_client.sadd(key, project_id)
-
-            # Set TTL
-            cls.redis_client.expire(key, cls.DEFAULT_TTL)
+            bitmaps = VoteBitmaps(cls.redis_client)
+            added = bitmaps.get_vote(user_id, project_id) != 'up'
+            if added:
+                bitmaps.set_vote(user_id, project_id, 'up')
 
             # Sync to database if requested
             if sync_db and added:
                 cls._sync_upvote_to_db(user_id, project_id, is_upvote=True)
 
-            return bool(added)
+            return added
 
         except Exception as e:
-            print(f"[RedisUserCache] Error adding upvote: {e}")
+            logger.warning("Error adding upvote: %s", e)
             # Fallback to database
             if sync_db:
                 cls._sync_upvote_to_db(user_id, project_id, is_upvote=True)
@@ -102,19 +103,19 @@ class RedisUserCache:
     def remove_upvote(cls, user_id: str, project_id: str, sync_db: bool = True) -> bool:
         """Remove upvote from cache (instant UI update)"""
         try:
-            key = cls._get_key(cls.PREFIX_UPVOTES, user_id)
-
-            # Remove from Redis set
-            removed = cls.redis_client.srem(key, project_id)
+            bitmaps = VoteBitmaps(cls.redis_client)
+            removed = bitmaps.get_vote(user_id, project_id) == 'up'
+            if removed:
+                bitmaps.set_vote(user_id, project_id, None)
 
             # Sync to database if requested
             if sync_db and removed:
                 cls._sync_upvote_to_db(user_id, project_id, is_upvote=False)
 
-            return bool(removed)
+            return removed
 
         except Exception as e:
-            print(f"[RedisUserCache] Error removing upvote: {e}")
+            logger.warning("Error removing upvote: %s", e)
             # Fallback to database
             if sync_db:
                 cls._sync_upvote_to_db(user_id, project_id, is_upvote=False)
@@ -126,25 +127,17 @@ class RedisUserCache:
         Check if user has upvoted project (fast lookup)
 
         Read path:
-        1. Check Redis cache (instant)
-        2. If cache miss, load from DB and populate cache
+        1. Check the user's cached votes (instant)
+        2. If it is missing, build it from DB first
 
         Returns:
             bool: True if upvoted, False otherwise
         """
         try:
-            key = cls._get_key(cls.PREFIX_UPVOTES, user_id)
-
-            # Check if key exists
-            if not cls.redis_client.exists(key):
-                # Cache miss - load from database
-                cls._load_upvotes_from_db(user_id)
-
-            # Check membership
-            return cls.redis_client.sismember(key, project_id)
+            return VoteBitmaps(cls.redis_client).get_vote(user_id, project_id) == 'up'
 
         except Exception as e:
-            print(f"[RedisUserCache] Error checking upvote: {e}")
+            logger.warning("Error checking upvote: %s", e)
             # Fallback to database
             return cls._check_upvote_in_db(user_id, project_id)
 
@@ -155,50 +148,23 @@ class RedisUserCache:
 
         Args:
             user_id: User ID
-            project_ids: Optional list to filter (if None, returns all)
+            project_ids: Optional list to filter (if None, returns all - read from DB)
 
         Returns:
             Set of upvoted project IDs
         """
-        try:
-            key = cls._get_key(cls.PREFIX_UPVOTES, user_id)
+        if not project_ids:
+            return cls._get_upvotes_from_db(user_id)
 
-            # Load from DB if not in cache
-            if not cls.redis_client.exists(key):
-                cls._load_upvotes_from_db(user_id)
-
-            # Get all members
-            if project_ids:
-                # Filter by provided IDs (intersection)
-                return set(cls.redis_client.sinter(key, *project_ids))
-            else:
-                # Return all
-                return cls.redis_client.smembers(key)
+        try:
+            votes = VoteBitmaps(cls.redis_client).get_votes(user_id, project_ids)
+            return {project_id for project_id, vote_type in votes.items() if vote_type == 'up'}
 
         except Exception as e:
-            print(f"[RedisUserCache] Error getting upvotes: {e}")
+            logger.warning("Error getting upvotes: %s", e)
             # Fallback to database
             return cls._get_upvotes_from_db(user_id, project_ids)
 
-    @classmethod
-    def _load_upvotes_from_db(cls, user_id: str):
-        """Load user's upvotes from database into Redis cache"""
-        try:
-            upvotes = Vote.query.filter_by(user_id=user_id, vote_type='up').all()
-
-            if upvotes:
-                key = cls._get_key(cls.PREFIX_UPVOTES, user_id)
-                project_ids = [str(u.project_id) for u in upvotes]
-
-                # Batch add to Redis
-                cls.redis_client.sadd(key, *project_ids)
-                cls.redis_client.expire(key, cls.DEFAULT_TTL)
-
-                print(f"[RedisUserCache] Loaded {len(project_ids)} upvotes from DB for user {user_id}")
-
-        except Exception as e:
-            print(f"[RedisUserCache] Error loading upvotes from DB: {e}")
-
     @classmethod
     def _sync_upvote_to_db(cls, user_id: str, project_id: str, is_upvote: bool):
         """Sync upvote to database (background operation)"""
@@ -221,7 +187,7 @@ class RedisUserCache:
 
         except Exception as e:
             db.session.rollback()
-            print(f"[RedisUserCache] Error syncing upvote to DB: {e}")
+            logger.warning("Error syncing upvote to DB: %s", e)
 
     @classmethod
     def _check_upvote_in_db(cls, user_id: str, project_id: str) -> bool:
@@ -269,7 +235,7 @@ class RedisUserCache:
             return bool(added)
 
         except Exception as e:
-            print(f"[RedisUserCache] Error adding follow: {e}")
+            logger.warning("Error adding follow: %s", e)
             if sync_db:
                 cls._sync_follow_to_db(user_id, chain_id, is_following=True)
             return False
@@ -290,7 +256,7 @@ class RedisUserCache:
             return bool(removed)
 
         except Exception as e:
-            print(f"[RedisUserCache] Error removing follow: {e}")
+            logger.warning("Error removing follow: %s", e)
             if sync_db:
                 cls._sync_follow_to_db(user_id, chain_id, is_following=False)
             return False
@@ -310,7 +276,7 @@ class RedisUserCache:
             return cls.redis_client.sismember(key, chain_id)
 
         except Exception as e:
-            print(f"[RedisUserCache] Error checking follow: {e}")
+            logger.warning("Error checking follow: %s", e)
             # Fallback to database
             return cls._check_follow_in_db(user_id, chain_id)
 
@@ -328,7 +294,7 @@ class RedisUserCache:
             return cls.redis_client.smembers(key)
 
         except Exception as e:
-            print(f"[RedisUserCache] Error getting follows: {e}")
+            logger.warning("Error getting follows: %s", e)
             # Fallback to database
             return cls._get_follows_from_db(user_id)
 
@@ -346,10 +312,10 @@ class RedisUserCache:
                 cls.redis_client.sadd(key, *chain_ids)
                 cls.redis_client.expire(key, cls.DEFAULT_TTL)
 
-                print(f"[RedisUserCache] Loaded {len(chain_ids)} follows from DB for user {user_id}")
+                logger.debug("Loaded %d follows from DB for user %s", len(chain_ids), user_id)
 
         except Exception as e:
-            print(f"[RedisUserCache] Error loading follows from DB: {e}")
+            logger.warning("Error loading follows from DB: %s", e)
 
     @classmethod
     def _sync_follow_to_db(cls, user_id: str, chain_id: str, is_following: bool):
@@ -371,7 +337,7 @@ class RedisUserCache:
 
         except Exception as e:
             db.session.rollback()
-            print(f"[RedisUserCache] Error syncing follow to DB: {e}")
+            logger.warning("Error syncing follow to DB: %s", e)
 
     @classmethod
     def _check_follow_in_db(cls, user_id: str, chain_id: str) -> bool:
@@ -393,6 +359,110 @@ class RedisUserCache:
         except:
             return set()
 
+    # ========================================================================
+    # BOOKMARKS
+    # ========================================================================
+
+    @classmethod
+    def add_bookmark(cls, user_id: str, project_id: str):
+        """Record a save in the bookmarks set (call after the DB commit)"""
+        try:
+            key = cls._get_key(cls.PREFIX_BOOKMARKS, user_id)
+            cls.redis_client.sadd(key, project_id)
+            cls.redis_client.expire(key, cls.DEFAULT_TTL)
+        except Exception as e:
+            logger.warning("Error adding bookmark: %s", e)
+
+    @classmethod
+    def remove_bookmark(cls, user_id: str, project_id: str):
+        """Drop an unsaved item from the bookmarks set (call after the DB commit)"""
+        try:
+            cls.redis_client.srem(cls._get_key(cls.PREFIX_BOOKMARKS, user_id), project_id)
+        except Exception as e:
+            logger.warning("Error removing bookmark: %s", e)
+
+    # ========================================================================
+    # FEED OVERLAY (per-user fields on shared feed cards)
+    # ========================================================================
+
+    PREFIX_BOOKMARKS_LOADED = "user:bookmarks:loaded:"  # Marker: bookmarks set holds every save
+
+    @classmethod
+    def get_feed_overlay(cls, user_id: str, item_ids: List[str]) -> Dict[str, Dict]:
+        """
+        user_vote / user_has_saved for a page of shared feed cards
+
+        Votes come from the user's cached votes (one HMGET or BITFIELD_RO for
+        the page, kept current by the vote fast path); saves from the bookmarks set.
+        The bookmarks set only caches what has been touched, so it has a
+        loaded marker - without it the user's saves are loaded from the DB
+        once before the SMISMEMBER.
+
+        Returns:
+            Dict of item id -> {'user_vote': 'up'|'down'|None, 'user_has_saved': bool}
+        """
+        if not user_id or not item_ids:
+            return {}
+
+        bookmarks_key = cls._get_key(cls.PREFIX_BOOKMARKS, user_id)
+
+        try:
+            votes = VoteBitmaps(cls.redis_client).get_votes(user_id, item_ids)
+
+            pipe = cls.redis_client.pipeline()
+            pipe.exists(cls._get_key(cls.PREFIX_BOOKMARKS_LOADED, user_id))
+            pipe.smismember(bookmarks_key, *item_ids)
+            bookmarks_loaded, saved = pipe.exec()
+            if not bookmarks_loaded:
+                cls._load_bookmarks_from_db(user_id)
+                saved = cls.redis_client.smismember(bookmarks_key, *item_ids)
+
+        except Exception as e:
+            logger.warning("Error reading feed overlay: %s", e)
+            return cls._get_feed_overlay_from_db(user_id, item_ids)
+
+        return {
+            item_id: {'user_vote': votes.get(item_id), 'user_has_saved': bool(is_saved)}
+            for item_id, is_saved in zip(item_ids, saved)
+        }
+
+    @classmethod
+    def _load_bookmarks_from_db(cls, user_id: str):
+        """Fill the bookmarks set with all of a user's saves and mark it loaded"""
+        from models.saved_project import SavedProject
+
+        saved_ids = [
+            project_id for (project_id,) in
+            db.session.query(SavedProject.project_id).filter(SavedProject.user_id == user_id)
+        ]
+        key = cls._get_key(cls.PREFIX_BOOKMARKS, user_id)
+
+        pipe = cls.redis_client.pipeline()
+        if saved_ids:
+            pipe.sadd(key, *saved_ids)
+        pipe.expire(key, cls.DEFAULT_TTL)
+        pipe.set(cls._get_key(cls.PREFIX_BOOKMARKS_LOADED, user_id), 1, ex=cls.DEFAULT_TTL)
+        pipe.exec()
+
+    @classmethod
+    def _get_feed_overlay_from_db(cls, user_id: str, item_ids: List[str]) -> Dict[str, Dict]:
+        """Database fallback for get_feed_overlay (two IN queries)"""
+        from models.saved_project import SavedProject
+
+        votes = dict(
+            db.session.query(Vote.project_id, Vote.vote_type)
+            .filter(Vote.user_id == user_id, Vote.project_id.in_(item_ids))
+        )
+        saved = {
+            project_id for (project_id,) in
+            db.session.query(SavedProject.project_id)
+            .filter(SavedProject.user_id == user_id, SavedProject.project_id.in_(item_ids))
+        }
+        return {
+            item_id: {'user_vote': votes.get(item_id), 'user_has_saved': item_id in saved}
+            for item_id in item_ids
+        }
+
     # ========================================================================
     # BULK OPERATIONS (for feed rendering)
     # ========================================================================
@@ -427,7 +497,7 @@ class RedisUserCache:
             return items
 
         except Exception as e:
-            print(f"[RedisUserCache] Error filling user data: {e}")
+            logger.warning("Error filling user data: %s", e)
             return items
 
     # ========================================================================
@@ -439,15 +509,16 @@ class RedisUserCache:
         """Invalidate all cache entries for a user"""
         try:
             keys = [
-                cls._get_key(cls.PREFIX_UPVOTES, user_id),
+                *VoteBitmaps.keys(user_id),
                 cls._get_key(cls.PREFIX_FOLLOWS, user_id),
                 cls._get_key(cls.PREFIX_BOOKMARKS, user_id),
+                cls._get_key(cls.PREFIX_BOOKMARKS_LOADED, user_id),
             ]
             cls.redis_client.delete(*keys)
-            print(f"[RedisUserCache] Invalidated cache for user {user_id}")
+            logger.debug("Invalidated cache for user %s", user_id)
 
         except Exception as e:
-            print(f"[RedisUserCache] Error invalidating cache: {e}")
+            logger.warning("Error invalidating cache: %s", e)
 
     @classmethod
     def clear_all(cls):
@@ -457,10 +528,10 @@ class RedisUserCache:
             keys = cls.redis_client.keys("user:*")
             if keys:
                 cls.redis_client.delete(*keys)
-                print(f"[RedisUserCache] Cleared {len(keys)} cache entries")
+                logger.info("Cleared %d cache entries", len(keys))
 
         except Exception as e:
-            print(f"[RedisUserCache] Error clearing cache: {e}")
+            logger.warning("Error clearing cache: %s", e)
 
     # ========================================================================
     # HEALTH CHECK
@@ -478,7 +549,7 @@ class RedisUserCache:
             memory_info = cls.redis_client.info('memory')
 
             # Count cache keys
-            upvote_keys = len(cls.redis_client.keys(f"{cls.PREFIX_UPVOTES}*"))
+            upvote_keys = sum(len(cls.redis_client.keys(key)) for key in VoteBitmaps.keys('*'))
             follow_keys = len(cls.redis_client.keys(f"{cls.PREFIX_FOLLOWS}*"))
 
             return {
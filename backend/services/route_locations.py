@@ -0,0 +1,425 @@
+"""
+Route Locations Service - cached location extraction + geocoding for route maps
+
+An itinerary's day-by-day plan is extracted (OpenAI, else regex/gazetteer)
+once per content hash and persisted in location_extractions; place names are
+geocoded once into geocode_cache and folded back into the extraction row, so
+after the first view a route map is a single primary-key lookup.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models.location_cache import GeocodeCache, LocationExtraction
+from utils.gazetteer import get_gazetteer
+
+logger = logging.getLogger(__name__)
+
+# Bump when extraction logic changes so old cached results are recomputed
+EXTRACTOR_VERSION = 2
+
+# Unknown places are retried with the provider after this long
+GEOCODE_MISS_RETRY = timedelta(days=7)
+
+MAPBOX_GEOCODE_URL = 'https://api.mapbox.com/geocoding/v5/mapbox.places/{query}.json'
+
+# ----------------------------------------------------------------------
+# Precompiled fallback matchers
+# ----------------------------------------------------------------------
+
+_DAY_SPLIT_RE = re.compile(r'(?=Day\s+\d+)', re.IGNORECASE)
+_DAY_HEADER_RE = re.compile(r'^Day\s+(\d+)[:\s]+(.+)', re.IGNORECASE | re.DOTALL)
+_NEXT_DAY_RE = re.compile(r'Day\s+\d+', re.IGNORECASE)
+_TRAVEL_VERB_RE = re.compile(
+    r'(?:arrive|transfer|travel|reach|depart|head)\s+(?:in|at|to|for)\s+'
+    r'([A-Z][a-zA-Z\s]+?)(?:\.|,|;|:|\s+and|\s+to|\s+for|\s+in\s+the)',
+    re.IGNORECASE
+)
+_PREPOSITION_RE = re.compile(
+    r'(?:in|at|to|explore|visit)\s+([A-Z][a-zA-Z\s]+?)(?:\.|,|;|:|\s+and|\s+via|\s+for|\s+in\s+the)',
+    re.IGNORECASE
+)
+_CAPITALIZED_RE = re.compile(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\b')
+_TRAILING_WORDS_RE = re.compile(
+    r'\s+(and|with|for|including|check|enjoy|explore|settle|morning|evening|the).*$', re.IGNORECASE
+)
+_LEADING_ARTICLE_RE = re.compile(r'^(the|a|an)\s+', re.IGNORECASE)
+_DESTINATION_SPLIT_RE = re.compile(r'\s+and\s+|,\s*|\s*&\s*')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+_NON_LOCATION_WORDS = frozenset([
+    'day', 'morning', 'evening', 'afternoon', 'night', 'full', 'enjoy', 'explore',
+    'visit', 'check', 'dinner', 'lunch', 'breakfast'
+])
+
+
+# ----------------------------------------------------------------------
+# Extraction
+# ----------------------------------------------------------------------
+
+_openai_client = None
+_ai_available = None
+
+
+def get_openai_client():
+    """Get or create the OpenAI client (None when no key is configured)"""
+    global _openai_client, _ai_available
+    if _ai_available is not None:
+        return _openai_client, _ai_available
+
+    try:
+        from openai import OpenAI
+        api_key = os.getenv('OPENAI_API_KEY') or current_app.config.get('OPENAI_API_KEY')
+
+        if api_key:
+            _openai_client = OpenAI(api_key=api_key)
+            _ai_available = True
+            logger.info("OpenAI client initialized for route extraction")
+        else:
+            logger.info("No OpenAI API key found, route extraction uses the fallback")
+            _ai_available = False
+    except Exception as e:
+        logger.warning("OpenAI not available: %s", e)
+        _ai_available = False
+
+    return _openai_client, _ai_available
+
+
+def ai_extract_locations(openai_client, day_by_day_plan: str, destination: str) -> Optional[list]:
+    """Use OpenAI to extract clean location names from day-by-day plan (None on failure)"""
+
+    prompt = f"""Extract ALL the specific locations/cities/places visited on EACH DAY from this travel itinerary.
+
+DESTINATION CONTEXT: {destination}
+
+DAY-BY-DAY PLAN:
+{day_by_day_plan}
+
+CRITICAL INSTRUCTIONS:
+1. Extract EVERY day mentioned (Day 1, Day 2, Day 3, etc.) as a SEPARATE entry
+2. For each day, identify the main location/city/town being visited
+3. Return ONLY the place name (city, town, landmark) - NOT activities or descriptions
+4. Add country or state for clarity (e.g., "Leh, Ladakh, India" not just "Leh")
+5. If multiple locations in one day, pick the PRIMARY location for that day
+6. MUST return one entry per day - if there are 5 days, return 5 entries
+7. Look for patterns like "Day 1:", "Day 2:", etc. to identify each day
+
+EXAMPLE INPUT:
+"Day 1: Arrive in Leh. Day 2: Visit Nubra Valley. Day 3: Explore Pangong Lake."
+
+EXAMPLE OUTPUT:
+[
+  {{"day": 1, "location": "Leh, Ladakh, India", "brief": "Arrival and acclimatization"}},
+  {{"day": 2, "location": "Nubra Valley, Ladakh, India", "brief": "Sand dunes exploration"}},
+  {{"day": 3, "location": "Pangong Lake, Ladakh, India", "brief": "Lake visit"}}
+]
+
+Return ONLY a valid JSON array with ONE ENTRY PER DAY. No other text."""
+
+    try:
+        response = openai_client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": "You are a travel location extractor. Extract specific place names from itineraries. Always return valid JSON."},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=1000,
+            temperature=0.3
+        )
+
+        content = response.choices[0].message.content.strip()
+
+        # Clean up the response - remove markdown code blocks if present
+        if content.startswith('```'):
+            content = content.split('```')[1]
+            if content.startswith('json'):
+                content = content[4:]
+        content = content.strip()
+
+        waypoints = json.loads(content)
+        logger.debug("AI extracted %d locations", len(waypoints))
+
+        return [
+            {
+                'day': wp.get('day', 0),
+                'location': wp.get('location', ''),
+                'description': wp.get('brief', '')
+            }
+            for wp in waypoints
+        ]
+
+    except Exception as e:
+        logger.warning("AI extraction failed: %s", e)
+        return None
+
+
+def _clean_location(location: str) -> str:
+    location = _TRAILING_WORDS_RE.sub('', location).strip()
+    return _LEADING_ARTICLE_RE.sub('', location).strip()
+
+
+def _with_country(location: str, is_india_trip: bool) -> str:
+    if is_india_trip and ',' not in location and 'india' not in location.lower():
+        return f"{location}, India"
+    return location
+
+
+def fallback_extract_locations(day_by_day_plan: str, destination: str) -> list:
+    """Regex + gazetteer extraction used when AI is not available"""
+    gazetteer = get_gazetteer()
+    results = []
+
+    # Detect if this is an India trip (one automaton pass per text)
+    is_india_trip = 'india' in destination.lower() or \
+        gazetteer.contains_any(destination) or \
+        gazetteer.contains_any(day_by_day_plan)
+
+    for segment in _DAY_SPLIT_RE.split(day_by_day_plan):
+        segment = segment.strip()
+        if not segment:
+            continue
+
+        match = _DAY_HEADER_RE.match(segment)
+        if not match:
+            continue
+
+        day_num = int(match.group(1))
+        content = match.group(2).strip()
+
+        # Take only text until next "Day" mention
+        next_day = _NEXT_DAY_RE.search(content)
+        if next_day:
+            content = content[:next_day.start()].strip()
+
+        location = None
+
+        # Pattern 1: "Arrive in/at Location"
+        loc_match = _TRAVEL_VERB_RE.search(content)
+        if loc_match:
+            location = _clean_location(loc_match.group(1).strip())
+
+        # Pattern 2: "in/at/to Location" (more generic)
+        if not location:
+            loc_match = _PREPOSITION_RE.search(content)
+            if loc_match:
+                location = _clean_location(loc_match.group(1).strip())
+
+        # Pattern 3: Known places, already canonical ("Leh, Ladakh, India")
+        if not location and is_india_trip:
+            location = gazetteer.first(content)
+
+        # Pattern 4: First capitalized place-like words
+        if not location:
+            loc_match = _CAPITALIZED_RE.search(content)
+            if loc_match and loc_match.group(1).strip().lower() not in _NON_LOCATION_WORDS:
+                location = _clean_location(loc_match.group(1).strip())
+
+        if location:
+            # Known places get their canonical, geocodable name
+            location = gazetteer.places.get(location.lower(), location)
+            results.append({
+                'day': day_num,
+                'location': _with_country(location, is_india_trip),
+                'description': content[:150]
+            })
+
+    # If no results, try to split destination and use each part
+    if not results and destination:
+        for i, part in enumerate(p.strip() for p in _DESTINATION_SPLIT_RE.split(destination)):
+            if part:
+                part = _with_country(part, is_india_trip)
+                results.append({
+                    'day': i + 1,
+                    'location': part,
+                    'description': f'Visit to {part}'
+                })
+
+    logger.debug("Fallback extracted %d locations", len(results))
+    return results
+
+
+# ----------------------------------------------------------------------
+# Geocoding
+# ----------------------------------------------------------------------
+
+class GeocodeService:
+    """Geocode place names through the local geocode_cache table"""
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return _WHITESPACE_RE.sub(' ', (query or '').strip().lower())[:255]
+
+    @staticmethod
+    def _provider_lookup(query: str) -> Optional[Dict]:
+        """Mapbox forward geocode; None on a miss, raises on transport errors"""
+        token = current_app.config.get('MAPBOX_ACCESS_TOKEN')
+        response = requests.get(
+            MAPBOX_GEOCODE_URL.format(query=requests.utils.quote(query, safe='')),
+            params={'access_token': token, 'limit': 1},
+            timeout=5
+        )
+        response.raise_for_status()
+        features = response.json().get('features') or []
+        if not features:
+            return None
+        lon, lat = features[0]['center']
+        return {'lat': lat, 'lon': lon, 'place_name': features[0].get('place_name')}
+
+    @staticmethod
+    def lookups_enabled() -> bool:
+        """Whether cache misses can be sent to the provider"""
+        return bool(current_app.config.get('MAPBOX_ACCESS_TOKEN'))
+
+    @classmethod
+    def geocode_many(cls, queries: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        {normalized query: {lat, lng, place_name, found} | None}, one cache query for all names
+
+        Only cache misses (and misses past their retry window) reach the
+        provider; without MAPBOX_ACCESS_TOKEN only cached results are returned.
+        Returns None for names that could not be resolved *yet* (provider
+        unavailable) so callers can tell them apart from known misses.
+        """
+        keys = {cls.normalize(q): q for q in queries if q and q.strip()}
+        if not keys:
+            return {}
+
+        cached = {row.query_key: row for row in GeocodeCache.query.filter(GeocodeCache.query_key.in_(list(keys))).all()}
+        can_lookup = cls.lookups_enabled()
+        now = datetime.utcnow()
+
+        results = {}
+        written = False
+        for key, query in keys.items():
+            row = cached.get(key)
+            stale_miss = row is not None and not row.found and now - row.updated_at > GEOCODE_MISS_RETRY
+
+            if row is not None and (not stale_miss or not can_lookup):
+                results[key] = row.to_dict()
+                continue
+            if not can_lookup:
+                results[key] = None
+                continue
+
+            try:
+                hit = cls._provider_lookup(query)
+            except Exception as e:
+                logger.warning("Geocoding failed for %r: %s", query, e)
+                results[key] = None
+                continue
+
+            if row is None:
+                row = GeocodeCache(query_key=key, query_text=query, created_at=now)
+                db.session.add(row)
+            row.found = hit is not None
+            row.lat = hit['lat'] if hit else None
+            row.lon = hit['lon'] if hit else None
+            row.place_name = hit['place_name'] if hit else None
+            row.updated_at = now
+            results[key] = row.to_dict()
+            written = True
+
+        if written:
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # Another worker cached the same place first - its row is as good as ours
+                db.session.rollback()
+
+        return results
+
+
+# ----------------------------------------------------------------------
+# Cached pipeline
+# ----------------------------------------------------------------------
+
+class RouteLocationService:
+    """Extraction + geocoding, persisted per plan content hash"""
+
+    @staticmethod
+    def content_hash(day_by_day_plan: str, destination: str) -> str:
+        payload = json.dumps([EXTRACTOR_VERSION, (destination or '').strip(), (day_by_day_plan or '').strip()])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _extract(day_by_day_plan: str, destination: str) -> Tuple[list, str]:
+        openai_client, ai_available = get_openai_client()
+        if ai_available:
+            waypoints = ai_extract_locations(openai_client, day_by_day_plan, destination)
+            if waypoints is not None:
+                return waypoints, 'ai'
+        return fallback_extract_locations(day_by_day_plan, destination), 'fallback'
+
+    @classmethod
+    def get_waypoints(cls, day_by_day_plan: str, destination: str,
+                      itinerary_id: Optional[str] = None, geocode: bool = True) -> Tuple[list, bool]:
+        """
+        (waypoints, cached) for a plan
+
+        Fallback results are upgraded to AI extraction once AI is available;
+        everything else is served straight from location_extractions.
+        """
+        content_hash = cls.content_hash(day_by_day_plan, destination)
+        row = LocationExtraction.query.get(content_hash)
+
+        cached = row is not None
+        if row is not None and row.method == 'fallback' and get_openai_client()[1]:
+            cached = False
+
+        if not cached:
+            waypoints, method = cls._extract(day_by_day_plan, destination)
+            if row is None:
+                row = LocationExtraction(content_hash=content_hash)
+                db.session.add(row)
+            row.itinerary_id = itinerary_id or row.itinerary_id
+            row.method = method
+            row.waypoints = waypoints
+            row.geocoded = False
+            row.created_at = datetime.utcnow()
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # Usually a concurrent view cached the same plan first
+                db.session.rollback()
+                row = LocationExtraction.query.get(content_hash)
+                if row is None:
+                    logger.warning("Could not cache route extraction %s", content_hash)
+                    return waypoints, False
+
+        # Without a provider only the cache can fill coordinates - that is
+        # tried once per extraction, not on every view
+        if geocode and not row.geocoded and (not cached or GeocodeService.lookups_enabled()):
+            cls._geocode_into(row)
+
+        return list(row.waypoints or []), cached
+
+    @staticmethod
+    def _geocode_into(row: LocationExtraction):
+        """Resolve coordinates and store them on the extraction row (only written when something changed)"""
+        waypoints = [dict(wp) for wp in row.waypoints or []]
+        coords = GeocodeService.geocode_many([wp.get('location') for wp in waypoints])
+
+        complete = True
+        for wp in waypoints:
+            result = coords.get(GeocodeService.normalize(wp.get('location')))
+            if result is None:
+                complete = False  # Not resolvable yet - try again on a later view
+                continue
+            if result['found']:
+                wp['lat'], wp['lng'] = result['lat'], result['lng']
+
+        if waypoints == list(row.waypoints or []) and complete == bool(row.geocoded):
+            return
+
+        row.waypoints = waypoints
+        row.geocoded = complete
+        db.session.commit()
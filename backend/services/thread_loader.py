@@ -0,0 +1,242 @@
+"""
+Thread Loader - whole discussion trees in one query
+
+Comments, chain-post replies and travel-intel Q&A are all adjacency lists
+(a parent id column). A page of thread roots is fetched with keyset
+pagination, then every descendant down to `max_depth` comes back from one
+recursive CTE. Reply counts and the viewer's reactions are batched into one
+query each, and the assembled tree (minus per-viewer fields) is cached as a
+unit per discussion (CacheService.invalidate_threads).
+"""
+import hashlib
+import json
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, literal, select
+from sqlalchemy.orm import aliased, joinedload
+
+from extensions import db
+from models.chain_post import ChainPost, ChainPostReaction
+from models.comment import Comment
+from models.travel_intel import TravelIntel
+from utils.cache import CacheService
+from utils.pagination import SortKey, cursor_pagination, keyset_paginate
+
+
+class ThreadSpec:
+    """
+    How one kind of threaded content is stored
+
+    Args:
+        model: Model with an `id` primary key
+        parent: Parent id column
+        scope: Column the whole discussion hangs off (itinerary, chain)
+        visible: entity -> filters a node must pass to be shown
+        root_keys: Keyset ordering of thread roots (last key unique)
+        child_order: Sort key (applied in Python) for siblings below the roots
+        eager: Relationships loaded with each node
+        serialize: node -> dict (without replies)
+    """
+
+    def __init__(self, model, parent, scope, visible, root_keys, child_order, eager, serialize):
+        self.model = model
+        self.parent = parent
+        self.scope = scope
+        self.visible = visible
+        self.root_keys = root_keys
+        self.child_order = child_order
+        self.eager = eager
+        self.serialize = serialize
+
+
+def _chain_post_dict(post):
+    # user_id=None: the viewer's reaction is overlaid after caching
+    return post.to_dict(include_author=True)
+
+
+def _intel_dict(intel):
+    data = intel.to_dict()
+    data['parent_intel_id'] = intel.parent_intel_id
+    data['traveler_id'] = intel.traveler_id
+    return data
+
+
+THREAD_SPECS = {
+    'comments': ThreadSpec(
+        model=Comment,
+        parent=Comment.parent_id,
+        scope=Comment.project_id,
+        visible=lambda m: [m.is_deleted == False],
+        root_keys=[SortKey(Comment.created_at), SortKey(Comment.id)],
+        child_order=lambda c: (c.created_at, c.id),
+        eager=[Comment.author],
+        serialize=lambda c: c.to_dict(include_author=True, reply_count=0),
+    ),
+    'chain_posts': ThreadSpec(
+        model=ChainPost,
+        parent=ChainPost.parent_id,
+        scope=ChainPost.chain_id,
+        visible=lambda m: [m.is_deleted == False, m.is_hidden == False],
+        root_keys=[SortKey(ChainPost.upvote_count, default=0), SortKey(ChainPost.created_at), SortKey(ChainPost.id)],
+        child_order=lambda p: (-(p.upvote_count or 0), -p.created_at.timestamp(), p.id),
+        eager=[ChainPost.author],
+        serialize=_chain_post_dict,
+    ),
+    'travel_intel': ThreadSpec(
+        model=TravelIntel,
+        parent=TravelIntel.parent_intel_id,
+        scope=TravelIntel.itinerary_id,
+        visible=lambda m: [],
+        root_keys=[SortKey(TravelIntel.created_at), SortKey(TravelIntel.id)],
+        child_order=lambda i: (i.created_at, i.id),
+        eager=[],
+        serialize=_intel_dict,
+    ),
+}
+
+
+class ThreadLoader:
+    """Load depth-bounded, root-paginated discussion trees"""
+
+    DEFAULT_DEPTH = 3
+    MAX_DEPTH = 10
+    MAX_NODES = 500   # Descendants per page of roots; the rest is reported via has_more_replies
+    CACHE_TTL = 300
+
+    @staticmethod
+    def load(kind: str, scope_id: str, parent_id: Optional[str] = None, cursor: str = '',
+             per_page: int = 20, max_depth: int = DEFAULT_DEPTH, user_id: Optional[str] = None) -> dict:
+        """
+        One page of a discussion as a tree
+
+        Args:
+            kind: 'comments', 'chain_posts' or 'travel_intel'
+            scope_id: Itinerary id (comments, intel) or chain id (chain posts)
+            parent_id: Load the replies under this node instead of top-level threads
+            cursor: Keyset cursor over the roots ('' for the first page)
+            per_page: Roots per page
+            max_depth: Reply levels below the roots (0 = roots only)
+            user_id: Viewer, for per-user fields (never cached)
+
+        Returns:
+            {'threads': [node, ...], 'pagination': {...}} where each node has
+            depth, reply_count, has_more_replies and nested replies
+        """
+        spec = THREAD_SPECS[kind]
+        max_depth = max(0, min(max_depth, ThreadLoader.MAX_DEPTH))
+
+        params_key = hashlib.sha1(json.dumps([parent_id, cursor, per_page, max_depth]).encode('utf-8')).hexdigest()[:16]
+        result = CacheService.get_cached_thread(kind, scope_id, params_key)
+        if not result:
+            result = ThreadLoader._build(spec, kind, scope_id, parent_id, cursor, per_page, max_depth)
+            CacheService.cache_thread(kind, scope_id, params_key, result, ttl=ThreadLoader.CACHE_TTL)
+
+        if kind == 'chain_posts':
+            ThreadLoader._overlay_reactions(result['threads'], user_id)
+
+        return result
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _build(spec: ThreadSpec, kind: str, scope_id: str, parent_id: Optional[str],
+               cursor: str, per_page: int, max_depth: int) -> dict:
+        model = spec.model
+
+        roots_query = model.query.filter(spec.scope == scope_id, spec.parent == parent_id, *spec.visible(model))
+        for relationship in spec.eager:
+            roots_query = roots_query.options(joinedload(relationship))
+        roots, next_cursor = keyset_paginate(
+            roots_query, spec.root_keys, cursor, per_page, scope=f'thread:{kind}:{scope_id}:{parent_id}'
+        )
+
+        nodes = {root.id: (root, 0) for root in roots}
+        if roots and max_depth > 0:
+            for node, depth in ThreadLoader._descendants(spec, [r.id for r in roots], max_depth):
+                nodes[node.id] = (node, depth)
+
+        reply_counts = ThreadLoader._reply_counts(spec, list(nodes))
+
+        children: Dict[str, List] = {}
+        for node, depth in nodes.values():
+            if depth > 0:
+                children.setdefault(getattr(node, spec.parent.key), []).append(node)
+
+        def build(node, depth):
+            data = spec.serialize(node)
+            loaded = sorted(children.get(node.id, []), key=spec.child_order)
+            data['depth'] = depth
+            data['reply_count'] = reply_counts.get(node.id, 0)
+            data['has_more_replies'] = data['reply_count'] > len(loaded)
+            data['replies'] = [build(child, depth + 1) for child in loaded]
+            return data
+
+        return {
+            'threads': [build(root, 0) for root in roots],
+            'pagination': cursor_pagination(next_cursor, per_page),
+        }
+
+    @staticmethod
+    def _descendants(spec: ThreadSpec, root_ids: List[str], max_depth: int):
+        """(node, depth) for every visible descendant of the roots, in one recursive CTE"""
+        model = spec.model
+        parent_col = spec.parent.key
+
+        tree = (
+            select(model.id.label('id'), literal(1).label('depth'))
+            .where(spec.parent.in_(root_ids), *spec.visible(model))
+            .cte('thread_tree', recursive=True)
+        )
+        child = aliased(model)
+        tree = tree.union_all(
+            select(child.id, (tree.c.depth + 1).label('depth'))
+            .join(tree, getattr(child, parent_col) == tree.c.id)
+            .where(tree.c.depth < max_depth, *spec.visible(child))
+        )
+
+        query = (
+            db.session.query(model, tree.c.depth)
+            .join(tree, model.id == tree.c.id)
+            .order_by(tree.c.depth, model.created_at)
+            .limit(ThreadLoader.MAX_NODES)
+        )
+        for relationship in spec.eager:
+            query = query.options(joinedload(relationship))
+        return query.all()
+
+    @staticmethod
+    def _reply_counts(spec: ThreadSpec, node_ids: List[str]) -> Dict[str, int]:
+        """Visible direct replies per node, one GROUP BY for the whole tree"""
+        if not node_ids:
+            return {}
+        rows = (
+            db.session.query(spec.parent, func.count(spec.model.id))
+            .filter(spec.parent.in_(node_ids), *spec.visible(spec.model))
+            .group_by(spec.parent)
+            .all()
+        )
+        return {parent_id: count for parent_id, count in rows}
+
+    @staticmethod
+    def _overlay_reactions(threads: List[dict], user_id: Optional[str]):
+        """Viewer's reaction + authorship on every chain post node, one query"""
+        flat = []
+        stack = list(threads)
+        while stack:
+            node = stack.pop()
+            flat.append(node)
+            stack.extend(node['replies'])
+
+        reactions = {}
+        if user_id and flat:
+            rows = ChainPostReaction.query.with_entities(ChainPostReaction.post_id, ChainPostReaction.reaction_type).filter(
+                ChainPostReaction.user_id == user_id,
+                ChainPostReaction.post_id.in_([node['id'] for node in flat])
+            ).all()
+            reactions = dict(rows)
+
+        for node in flat:
+            node['user_reaction'] = reactions.get(node['id'])
+            node['is_author'] = bool(user_id) and node.get('author_id') == user_id
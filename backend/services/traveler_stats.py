@@ -0,0 +1,125 @@
+"""
+Traveler Stats - one-row reads of a traveler's contribution counters
+
+traveler_stats is maintained by database triggers (migrations/add_traveler_stats.sql)
+and repaired nightly by the reconciliation job. Profile, bootstrap and scoring
+code read it here instead of counting itineraries, snaps, ratings and intel
+on every call.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models.traveler_stats import TravelerStats
+
+
+class TravelerStatsService:
+    """Read and rebuild traveler_stats rows"""
+
+    @staticmethod
+    def get(traveler_id: str) -> Optional[TravelerStats]:
+        """Stats row for a traveler, built from the source tables if missing"""
+        if not traveler_id:
+            return None
+        stats = TravelerStats.query.get(traveler_id)
+        if stats is None:
+            try:
+                stats = TravelerStatsService.refresh([traveler_id]).get(traveler_id)
+            except IntegrityError:
+                # Another request (or the travelers trigger) created it first
+                db.session.rollback()
+                stats = TravelerStats.query.get(traveler_id)
+        return stats
+
+    @staticmethod
+    def max_counts() -> Dict[str, int]:
+        """Platform-wide maxima used to normalize travel-history scores (one query)"""
+        row = db.session.query(
+            func.max(TravelerStats.itinerary_count),
+            func.max(TravelerStats.snap_count),
+            func.max(TravelerStats.safety_rating_count),
+        ).one()
+        return {
+            'itinerary_count': row[0] or 0,
+            'snap_count': row[1] or 0,
+            'safety_rating_count': row[2] or 0,
+        }
+
+    @staticmethod
+    def aggregate(traveler_ids: Iterable[str]) -> Dict[str, Dict]:
+        """True counter values from the source tables, one GROUP BY per table"""
+        from models.comment import Comment
+        from models.itinerary import Itinerary
+        from models.safety_rating import SafetyRating
+        from models.snap import Snap
+        from models.travel_intel import TravelIntel
+        from models.traveler import Traveler
+        from models.traveler_certification import TravelerCertification
+
+        traveler_ids = list(traveler_ids)
+        if not traveler_ids:
+            return {}
+
+        totals = {
+            traveler_id: {counter: 0 for counter in TravelerStats.COUNTERS}
+            for (traveler_id,) in db.session.query(Traveler.id).filter(Traveler.id.in_(traveler_ids))
+        }
+        if not totals:
+            return {}
+
+        published = (Itinerary.is_published == True)
+        rows = db.session.query(
+            Itinerary.created_by_traveler_id,
+            func.count(Itinerary.id),
+            func.sum(db.case((published, 1), else_=0)),
+            func.sum(db.case((published, func.coalesce(Itinerary.upvotes, 0)), else_=0)),
+        ).filter(
+            Itinerary.created_by_traveler_id.in_(traveler_ids),
+            Itinerary.is_deleted == False
+        ).group_by(Itinerary.created_by_traveler_id).all()
+        for traveler_id, count, published_count, upvotes in rows:
+            if traveler_id in totals:
+                totals[traveler_id].update(
+                    itinerary_count=count,
+                    published_itinerary_count=int(published_count or 0),
+                    itinerary_upvotes=int(upvotes or 0),
+                )
+
+        simple_counts = (
+            ('snap_count', Snap.user_id, [Snap.is_deleted == False]),
+            ('safety_rating_count', SafetyRating.traveler_id, []),
+            ('intel_count', TravelIntel.traveler_id, []),
+            ('comment_count', Comment.user_id, []),
+            ('certification_count', TravelerCertification.traveler_id, []),
+        )
+        for counter, column, filters in simple_counts:
+            rows = db.session.query(column, func.count()).filter(column.in_(traveler_ids), *filters)\
+                .group_by(column).all()
+            for traveler_id, count in rows:
+                if traveler_id in totals:
+                    totals[traveler_id][counter] = count
+
+        for traveler_id, earned in db.session.query(Traveler.id, Traveler.trip_earnings_total)\
+                .filter(Traveler.id.in_(list(totals))):
+            totals[traveler_id]['trip_earned'] = earned or 0.0
+
+        return totals
+
+    @staticmethod
+    def refresh(traveler_ids: Iterable[str]) -> Dict[str, TravelerStats]:
+        """Recompute and store stats rows (missing rows, manual repair)"""
+        totals = TravelerStatsService.aggregate(traveler_ids)
+        refreshed = {}
+        for traveler_id, counters in totals.items():
+            stats = TravelerStats.query.get(traveler_id) or TravelerStats(traveler_id=traveler_id)
+            for counter, value in counters.items():
+                setattr(stats, counter, value)
+            stats.last_updated_at = datetime.utcnow()
+            db.session.add(stats)
+            refreshed[traveler_id] = stats
+        if refreshed:
+            db.session.commit()
+        return refreshed
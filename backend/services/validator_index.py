@@ -0,0 +1,198 @@
+"""
+Validator Index - category -> validator lookups for auto-assignment
+
+validator_categories is kept in step with ValidatorPermissions and
+User.is_validator by mapper events (same transaction as the admin write),
+and each category's validator ids are mirrored in Redis (dropped once the
+write commits, so a reader never re-caches the old rows). Picking validators
+for a new project is a cache hit (or one indexed query) plus one GROUP BY
+over open assignments for load-aware ordering.
+"""
+from typing import Dict, Iterable, List
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import object_session
+
+from extensions import db
+from models.validator_category import ValidatorCategory
+from utils.cache import CacheService
+
+
+class ValidatorIndex:
+    """Maintain and query the validator_categories inverted index"""
+
+    OPEN_STATUSES = ('pending', 'in_review')
+    CACHE_TTL = 600
+
+    _listeners_registered = False
+    _STALE_KEY = 'validator_index_stale'  # session.info: categories to drop from the cache on commit
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def categories_for(is_validator: bool, can_validate_all: bool, allowed_categories) -> List[str]:
+        """Index keys for one validator"""
+        if not is_validator:
+            return []
+        if can_validate_all:
+            return [ValidatorCategory.WILDCARD]
+        return sorted({category for category in (allowed_categories or []) if category})
+
+    @classmethod
+    def sync_validator(cls, connection, validator_id: str) -> set:
+        """Rebuild one validator's index rows from users + validator_permissions, returning touched categories"""
+        from models.user import User
+        from models.validator_permissions import ValidatorPermissions
+
+        users = User.__table__
+        permissions = ValidatorPermissions.__table__
+        table = ValidatorCategory.__table__
+
+        is_validator = connection.execute(
+            select(users.c.is_validator).where(users.c.id == validator_id)
+        ).scalar()
+        row = connection.execute(
+            select(permissions.c.can_validate_all, permissions.c.allowed_categories)
+            .where(permissions.c.validator_id == validator_id)
+        ).first()
+
+        previous = connection.execute(
+            select(table.c.category).where(table.c.validator_id == validator_id)
+        ).scalars().all()
+        categories = cls.categories_for(bool(is_validator) and row is not None,
+                                        bool(row and row.can_validate_all),
+                                        row.allowed_categories if row else [])
+
+        connection.execute(table.delete().where(table.c.validator_id == validator_id))
+        if categories:
+            connection.execute(table.insert(), [
+                {'category': category, 'validator_id': validator_id} for category in categories
+            ])
+
+        return set(previous) | set(categories)
+
+    @classmethod
+    def invalidate(cls, categories: Iterable[str]):
+        """Drop cached validator ids for the categories"""
+        for category in categories:
+            CacheService.delete(cls._cache_key(category))
+
+    @classmethod
+    def _mark_stale(cls, target, categories: set):
+        """Queue categories for invalidation when the target's session commits"""
+        session = object_session(target)
+        if session is None:
+            cls.invalidate(categories)
+        else:
+            session.info.setdefault(cls._STALE_KEY, set()).update(categories)
+
+    @classmethod
+    def register_listeners(cls):
+        """Mirror permission / validator-flag writes into the index (idempotent)"""
+        if cls._listeners_registered:
+            return
+
+        from models.user import User
+        from models.validator_permissions import ValidatorPermissions
+
+        def permissions_changed(mapper, connection, target):
+            cls._mark_stale(target, cls.sync_validator(connection, target.validator_id))
+
+        def user_updated(mapper, connection, target):
+            if inspect(target).attrs.is_validator.history.has_changes():
+                cls._mark_stale(target, cls.sync_validator(connection, target.id))
+
+        def session_committed(session):
+            cls.invalidate(session.info.pop(cls._STALE_KEY, ()))
+
+        def session_rolled_back(session):
+            session.info.pop(cls._STALE_KEY, None)
+
+        for event_name in ('after_insert', 'after_update', 'after_delete'):
+            event.listen(ValidatorPermissions, event_name, permissions_changed)
+        event.listen(User, 'after_update', user_updated)
+        event.listen(db.session, 'after_commit', session_committed)
+        event.listen(db.session, 'after_rollback', session_rolled_back)
+
+        cls._listeners_registered = True
+
+    @classmethod
+    def rebuild(cls) -> int:
+        """Re-index every validator (backfill / repair)"""
+        from models.user import User
+        from models.validator_permissions import ValidatorPermissions
+
+        validator_ids = {
+            user_id for (user_id,) in db.session.query(User.id).filter(User.is_validator == True)
+        } | {
+            validator_id for (validator_id,) in db.session.query(ValidatorPermissions.validator_id)
+        }
+        connection = db.session.connection()
+        stale = set()
+        for validator_id in validator_ids:
+            stale |= cls.sync_validator(connection, validator_id)
+        db.session.commit()
+        cls.invalidate(stale)
+        return db.session.query(ValidatorCategory).count()
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def validators_for(cls, categories: Iterable[str]) -> List[str]:
+        """Ids of validators allowed to review any of the categories"""
+        keys = sorted({c for c in categories if c} | {ValidatorCategory.WILDCARD})
+
+        by_category: Dict[str, List[str]] = {}
+        misses = []
+        for category in keys:
+            cached = CacheService.get(cls._cache_key(category))
+            if cached is None:
+                misses.append(category)
+            else:
+                by_category[category] = cached
+
+        if misses:
+            for category in misses:
+                by_category[category] = []
+            rows = db.session.query(ValidatorCategory.category, ValidatorCategory.validator_id)\
+                .filter(ValidatorCategory.category.in_(misses)).all()
+            for category, validator_id in rows:
+                by_category[category].append(validator_id)
+            for category in misses:
+                # Stored as {'ids': [...]} so an empty category is still a cache hit
+                CacheService.set(cls._cache_key(category), {'ids': by_category[category]}, ttl=cls.CACHE_TTL)
+
+        validator_ids = set()
+        for value in by_category.values():
+            validator_ids.update(value['ids'] if isinstance(value, dict) else value)
+        return sorted(validator_ids)
+
+    @classmethod
+    def open_assignment_counts(cls, validator_ids: List[str]) -> Dict[str, int]:
+        """Open (pending / in review) assignments per validator, one GROUP BY"""
+        from models.validator_assignment import ValidatorAssignment
+
+        if not validator_ids:
+            return {}
+        rows = db.session.query(ValidatorAssignment.validator_id, func.count(ValidatorAssignment.id))\
+            .filter(
+                ValidatorAssignment.validator_id.in_(validator_ids),
+                ValidatorAssignment.status.in_(cls.OPEN_STATUSES)
+            ).group_by(ValidatorAssignment.validator_id).all()
+        return {validator_id: count for validator_id, count in rows}
+
+    @classmethod
+    def select_validators(cls, categories: Iterable[str], max_validators: int = 0) -> List[str]:
+        """Matching validators, least-loaded first (all of them when max_validators is 0)"""
+        validator_ids = cls.validators_for(categories)
+        load = cls.open_assignment_counts(validator_ids)
+        validator_ids.sort(key=lambda validator_id: (load.get(validator_id, 0), validator_id))
+        return validator_ids[:max_validators] if max_validators else validator_ids
+
+    @staticmethod
+    def _cache_key(category: str) -> str:
+        return f"validators:category:{category}"
@@ -0,0 +1,276 @@
+"""
+Vote Bitmaps - per-user vote state as a Redis hash or a bitmap of 2-bit fields
+
+Users with few votes keep them in a hash, user:{user_id}:votes:sparse
+(content id -> 'up' / 'down'), which costs a few dozen bytes per vote.
+
+Heavy voters get one bitmap, user:{user_id}:votes:bits. Content ids
+(project / itinerary UUIDs) are mapped to dense integers
+(models/content_dense_id.py), and field #n (u2 at bit 2n) is the vote on
+content n: 0 none, 1 up, 2 down. The bitmap costs (highest dense id / 4)
+bytes however many votes it holds, so a user only moves to it once their
+votes are dense enough to make it the smaller of the two.
+
+Either form is a cache of the votes table. It is built from the DB in one
+query when missing (so its existence means "fully loaded"), kept current by
+the vote fast path, and expired a day after the last write. Checking a page
+of 50 items is one HMGET or one BITFIELD_RO.
+"""
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import select, text
+
+from extensions import db
+from models.content_dense_id import ContentDenseId
+from models.vote import Vote
+
+
+class VoteBitmaps:
+    """Dense content ids and per-user vote hashes / bitmaps"""
+
+    KEY_BITS = "user:{user_id}:votes:bits"   # Bitmap: u2 vote per dense id
+    KEY_SPARSE = "user:{user_id}:votes:sparse"  # Hash: content id -> 'up' / 'down' (+ SPARSE_LOADED)
+    KEY_DENSE_IDS = "content:dense_ids"      # Hash: content id -> dense id (mirrors content_dense_ids)
+
+    ENCODING = 'u2'
+    FIELD_VALUES = {None: 0, 'up': 1, 'down': 2}
+    VOTE_TYPES = {0: None, 1: 'up', 2: 'down'}
+
+    TTL = 86400              # Same lifetime as VoteService.STATE_TTL
+    LOAD_CHUNK = 500         # BITFIELD SET subcommands per command when loading
+    LOCAL_CACHE_MAX = 100000 # Mappings never change, so each process keeps them in memory
+
+    SPARSE_LOADED = '_loaded'    # Hash field marking a loaded (possibly empty) sparse state
+    SPARSE_ENTRY_BYTES = 64      # Approximate hash cost of one vote (UUID field + value + overhead)
+    BITMAP_MIN_VOTES = 32        # Below this a hash is always smaller; no dense ids needed
+    DENSITY_CHECK_EVERY = 32     # Sparse users are re-checked each time they add this many votes
+
+    _local: Dict[str, int] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+
+    # ------------------------------------------------------------------
+    # Dense ids
+    # ------------------------------------------------------------------
+
+    def dense_ids(self, content_ids: Iterable[str]) -> Dict[str, int]:
+        """
+        Existing dense id for each content id (read-only; unmapped ids are left out)
+
+        Lookup order: process memory, then the Redis hash, then the
+        content_dense_ids table. Content without a mapping has never been
+        voted on, so readers treat a missing id as "no vote".
+        """
+        content_ids = list(dict.fromkeys(content_id for content_id in content_ids if content_id))
+        found = {content_id: self._local[content_id] for content_id in content_ids if content_id in self._local}
+
+        missing = [content_id for content_id in content_ids if content_id not in found]
+        if missing:
+            for content_id, dense_id in zip(missing, self.redis.hmget(self.KEY_DENSE_IDS, *missing)):
+                if dense_id is not None:
+                    found[content_id] = int(dense_id)
+            missing = [content_id for content_id in missing if content_id not in found]
+
+        if missing:
+            stored = dict(
+                db.session.query(ContentDenseId.content_id, ContentDenseId.id)
+                .filter(ContentDenseId.content_id.in_(missing))
+            )
+            if stored:
+                self.redis.hset(self.KEY_DENSE_IDS, values=stored)
+                found.update(stored)
+
+        self._remember(found)
+        return found
+
+    def assign_dense_ids(self, content_ids: Iterable[str]) -> Dict[str, int]:
+        """Dense id for each content id, creating mappings for new ones (vote writes only)"""
+        content_ids = list(dict.fromkeys(content_id for content_id in content_ids if content_id))
+        found = self.dense_ids(content_ids)
+
+        missing = [content_id for content_id in content_ids if content_id not in found]
+        if missing:
+            assigned = self._assign(missing)
+            self.redis.hset(self.KEY_DENSE_IDS, values=assigned)
+            found.update(assigned)
+            self._remember(assigned)
+        return found
+
+    @classmethod
+    def _remember(cls, mappings: Dict[str, int]):
+        if not mappings:
+            return
+        with cls._lock:
+            if len(cls._local) + len(mappings) > cls.LOCAL_CACHE_MAX:
+                cls._local.clear()
+            cls._local.update(mappings)
+
+    @staticmethod
+    def _assign(content_ids: list) -> Dict[str, int]:
+        """
+        Create content_dense_ids rows (concurrent creators are ignored)
+
+        Runs in its own transaction so the caller's session is never
+        committed from here.
+        """
+        table = ContentDenseId.__table__
+        now = datetime.utcnow()
+        with db.engine.begin() as connection:
+            connection.execute(
+                text("""
+                    INSERT INTO content_dense_ids (content_id, created_at)
+                    VALUES (:content_id, :created_at)
+                    ON CONFLICT (content_id) DO NOTHING
+                """),
+                [{'content_id': content_id, 'created_at': now} for content_id in content_ids]
+            )
+            return dict(connection.execute(
+                select(table.c.content_id, table.c.id).where(table.c.content_id.in_(content_ids))
+            ).all())
+
+    # ------------------------------------------------------------------
+    # Bitmaps
+    # ------------------------------------------------------------------
+
+    def get_votes(self, user_id: str, content_ids: list) -> Dict[str, Optional[str]]:
+        """
+        The user's vote on each content id ('up', 'down' or None)
+
+        One round trip reads the sparse hash (HMGET) and, for dense ids
+        already in process memory, the bitmap (BITFIELD_RO). Ids first seen
+        for a bitmap user cost one more BITFIELD_RO. A user with neither is
+        loaded from the votes table first. Content without a dense id reads
+        as None.
+        """
+        if not content_ids:
+            return {}
+
+        votes = dict.fromkeys(content_ids)
+        ids = list(votes)
+        bits_key, sparse_key = self.keys(user_id)
+
+        for attempt in range(2):
+            known = {content_id: self._local[content_id] for content_id in ids if content_id in self._local}
+
+            pipe = self.redis.pipeline()
+            pipe.exists(bits_key)
+            pipe.hmget(sparse_key, self.SPARSE_LOADED, *ids)
+            if known:
+                self._read_fields(pipe, bits_key, known.values())
+            results = pipe.exec()
+            is_bitmap, sparse = results[0], results[1]
+
+            if sparse[0] is not None:
+                votes.update((content_id, value) for content_id, value in zip(ids, sparse[1:]) if value)
+                return votes
+
+            if is_bitmap:
+                bits = dict(zip(known, results[2])) if known else {}
+                dense = self.dense_ids([content_id for content_id in ids if content_id not in known])
+                if dense:
+                    pipe = self.redis.pipeline()
+                    self._read_fields(pipe, bits_key, dense.values())
+                    bits.update(zip(dense, pipe.exec()[0]))
+                votes.update((content_id, self.VOTE_TYPES.get(value)) for content_id, value in bits.items())
+                return votes
+
+            self._load(user_id)
+
+        return votes
+
+    def get_vote(self, user_id: str, content_id: str) -> Optional[str]:
+        """The user's vote on one content id"""
+        return self.get_votes(user_id, [content_id]).get(content_id)
+
+    def set_vote(self, user_id: str, content_id: str, vote_type: Optional[str]):
+        """Record the user's current vote (None clears it)"""
+        bits_key, sparse_key = self.keys(user_id)
+
+        pipe = self.redis.pipeline()
+        pipe.exists(bits_key)
+        pipe.exists(sparse_key)
+        is_bitmap, is_sparse = pipe.exec()
+
+        if not is_bitmap and not is_sparse:
+            # Build the cached state from the DB first, then apply this write to it
+            is_bitmap = self._load(user_id) == 'bitmap'
+
+        if is_bitmap:
+            dense_id = self.assign_dense_ids([content_id])[content_id]
+            pipe = self.redis.pipeline()
+            pipe.bitfield(bits_key).set(self.ENCODING, f"#{dense_id}", self.FIELD_VALUES[vote_type]).execute()
+            pipe.expire(bits_key, self.TTL)
+            pipe.exec()
+            return
+
+        pipe = self.redis.pipeline()
+        if vote_type:
+            pipe.hset(sparse_key, content_id, vote_type)
+        else:
+            pipe.hdel(sparse_key, content_id)
+        pipe.expire(sparse_key, self.TTL)
+        pipe.hlen(sparse_key)
+        added, _, fields = pipe.exec()
+
+        # Growing users are re-checked against the density threshold now and then
+        if vote_type and added and (fields - 1) % self.DENSITY_CHECK_EVERY == 0:
+            current = self.redis.hgetall(sparse_key) or {}
+            current.pop(self.SPARSE_LOADED, None)
+            self._store(user_id, current)
+
+    def invalidate(self, user_id: str):
+        """Drop the user's cached votes (rebuilt from the DB on next read)"""
+        self.redis.delete(*self.keys(user_id))
+
+    @classmethod
+    def keys(cls, user_id: str) -> Tuple[str, str]:
+        """(bitmap key, sparse hash key) of a user - at most one is in use"""
+        return cls.KEY_BITS.format(user_id=user_id), cls.KEY_SPARSE.format(user_id=user_id)
+
+    def _read_fields(self, pipe, key: str, dense_ids: Iterable[int]):
+        fields = pipe.bitfield_ro(key)
+        for dense_id in dense_ids:
+            fields.get(self.ENCODING, f"#{dense_id}")
+        fields.execute()
+
+    def _load(self, user_id: str) -> str:
+        """Build the user's cached votes from the votes table (one query); returns the form used"""
+        rows = db.session.query(Vote.project_id, Vote.vote_type).filter(Vote.user_id == user_id).all()
+        return self._store(user_id, {project_id: vote_type for project_id, vote_type in rows if vote_type})
+
+    def _store(self, user_id: str, votes: Dict[str, str]) -> str:
+        """
+        Replace the user's cached votes with `votes`, as a hash or a bitmap
+
+        A bitmap costs (highest dense id / 4) bytes whatever the vote count,
+        a hash about SPARSE_ENTRY_BYTES per vote - the smaller one is written.
+        """
+        bits_key, sparse_key = self.keys(user_id)
+        dense = {}
+        if len(votes) >= self.BITMAP_MIN_VOTES:
+            dense = self.assign_dense_ids(votes)
+        use_bitmap = bool(dense) and (max(dense.values()) + 1) / 4 < len(votes) * self.SPARSE_ENTRY_BYTES
+
+        pipe = self.redis.pipeline()
+        if use_bitmap:
+            fields = [(dense[content_id], self.FIELD_VALUES.get(vote_type, 0)) for content_id, vote_type in votes.items()]
+            pipe.delete(bits_key)
+            pipe.bitfield(bits_key).set(self.ENCODING, '#0', 0).execute()  # Dense id 0 is never assigned; creates the key
+            for start in range(0, len(fields), self.LOAD_CHUNK):
+                command = pipe.bitfield(bits_key)
+                for dense_id, value in fields[start:start + self.LOAD_CHUNK]:
+                    command.set(self.ENCODING, f"#{dense_id}", value)
+                command.execute()
+            pipe.expire(bits_key, self.TTL)
+            pipe.delete(sparse_key)
+        else:
+            pipe.delete(sparse_key)
+            pipe.hset(sparse_key, values={self.SPARSE_LOADED: '1', **votes})
+            pipe.expire(sparse_key, self.TTL)
+            pipe.delete(bits_key)
+        pipe.exec()
+        return 'bitmap' if use_bitmap else 'sparse'
@@ -11,6 +11,7 @@ from typing import Dict, Optional, Tuple
 from extensions import db
 from models.vote import Vote
 from models.project import Project
+from services.vote_bitmaps import VoteBitmaps
 
 
 class VoteService:
@@ -18,23 +19,24 @@ class VoteService:
     High-performance voting service using Redis for instant updates
 
     Architecture:
-    1. Fast path: Validate + update Redis + enqueue Celery task (<50ms)
-    2. Slow path: Celery worker does durable DB write + reconciliation
+    1. Fast path: Validate + update Redis + append to vote:events (<50ms)
+    2. Slow path: VoteStreamWorker applies the stream to the DB in micro-batches
+       (Celery task when the stream append fails)
     """
 
     # Redis key patterns
     KEY_VOTE_STATE = "vote:state:{project_id}"          # Hash: {upvotes, downvotes}
     KEY_VOTE_REQUEST = "vote:request:{request_id}"      # Hash: request metadata
-    KEY_VOTE_EVENTS = "vote:events"                     # Stream: audit log
+    KEY_VOTE_EVENTS = "vote:events"                     # Stream: votes pending DB write (workers/vote_stream_worker.py)
     KEY_VOTE_METRICS = "vote:metrics"                   # Hash: observability
-    KEY_USER_UPVOTES = "user:{user_id}:upvotes"         # Set: project IDs user upvoted
-    KEY_USER_DOWNVOTES = "user:{user_id}:downvotes"     # Set: project IDs user downvoted
+    # Per-user votes: VoteBitmaps.keys(user_id) (services/vote_bitmaps.py)
     KEY_RATE_LIMIT = "rate:{user_id}:{project_id}"      # String: rate limit counter
     KEY_CHANGED_POSTS = "changed_posts"                 # Set: project IDs with pending DB updates
 
     # Request TTLs
     REQUEST_TTL = 3600  # 1 hour - keep request metadata for debugging
     STATE_TTL = 86400   # 24 hours - cache vote counts for fast reads
+    STREAM_MAXLEN = 100000  # Trim horizon for vote:events (replay window)
     RATE_LIMIT_WINDOW = 10  # 10 seconds rate limit window
     RATE_LIMIT_MAX = 5      # Max 5 votes per window
 
@@ -49,6 +51,7 @@ class VoteService:
             redis_client = Redis(url=upstash_url, token=upstash_token)
 
         self.redis = redis_client
+        self.bitmaps = VoteBitmaps(redis_client)
 
     def check_rate_limit(self, user_id: str, project_id: str) -> bool:
         """
@@ -108,7 +111,8 @@ class VoteService:
                 'upvotes': int,
                 'downvotes': int,
                 'user_vote': str|None,
-                'prior_vote': str|None
+                'prior_vote': str|None,
+                'streamed': bool (False: caller must enqueue process_vote_event)
             }
         """
         start_time = time.time()
@@ -133,8 +137,8 @@ class VoteService:
                 project_id, upvote_delta, downvote_delta
             )
 
-            # 5. Update user's vote set
-            self._update_user_vote_set(user_id, project_id, vote_type, action)
+            # 5. Update user's vote bitmap
+            self._update_user_vote_bitmap(user_id, project_id, vote_type, action)
 
             # 6. Store request metadata for worker reconciliation
             self._store_request_metadata(
@@ -142,8 +146,8 @@ class VoteService:
                 prior_vote, action, upvotes, downvotes
             )
 
-            # 7. Add event to audit stream
-            self._add_to_event_stream(
+            # 7. Add event to stream (applied to the DB by VoteStreamWorker)
+            streamed = self._add_to_event_stream(
                 request_id, user_id, project_id, vote_type, action
             )
 
@@ -161,6 +165,7 @@ class VoteService:
                 'downvotes': downvotes,
                 'user_vote': new_user_vote,
                 'prior_vote': prior_vote,
+                'streamed': streamed,
                 'latency_ms': round(latency_ms, 2)
             }
 
@@ -170,37 +175,9 @@ class VoteService:
             raise
 
     def _get_user_vote(self, user_id: str, project_id: str) -> Optional[str]:
-        """Get user's current vote from Redis (fast) or DB (fallback)"""
+        """Get user's current vote from the vote bitmap (fast) or DB (fallback)"""
         try:
-            # Check Redis sets for both upvote and downvote
-            upvote_key = self.KEY_USER_UPVOTES.format(user_id=user_id)
-            downvote_key = self.KEY_USER_DOWNVOTES.format(user_id=user_id)
-
-            has_upvote = self.redis.sismember(upvote_key, project_id)
-            has_downvote = self.redis.sismember(downvote_key, project_id)
-
-            if has_upvote:
-                return 'up'
-            if has_downvote:
-                return 'down'
-
-            # If not in Redis, check DB and populate cache
-            vote = Vote.query.filter_by(
-                user_id=user_id,
-                project_id=project_id
-            ).first()
-
-            if vote:
-                # Populate Redis cache
-                if vote.vote_type == 'up':
-                    self.redis.sadd(upvote_key, project_id)
-                    self.redis.expire(upvote_key, self.STATE_TTL)
-                else:
-                    self.redis.sadd(downvote_key, project_id)
-                    self.redis.expire(downvote_key, self.STATE_TTL)
-                return vote.vote_type
-
-            return None
+            return self.bitmaps.get_vote(user_id, project_id)
 
         except Exception as e:
             # Fallback to DB on error
@@ -327,43 +304,15 @@ class VoteService:
 
         return (upvotes, downvotes)
 
-    def _update_user_vote_set(
+    def _update_user_vote_bitmap(
         self,
         user_id: str,
         project_id: str,
         vote_type: str,
         action: str
     ):
-        """Update user's vote sets in Redis"""
-        upvote_key = self.KEY_USER_UPVOTES.format(user_id=user_id)
-        downvote_key = self.KEY_USER_DOWNVOTES.format(user_id=user_id)
-
-        if action == 'created':
-            # Add new vote
-            if vote_type == 'up':
-                self.redis.sadd(upvote_key, project_id)
-                self.redis.expire(upvote_key, self.STATE_TTL)
-            else:
-                self.redis.sadd(downvote_key, project_id)
-                self.redis.expire(downvote_key, self.STATE_TTL)
-
-        elif action == 'removed':
-            # Remove vote
-            if vote_type == 'up':
-                self.redis.srem(upvote_key, project_id)
-            else:
-                self.redis.srem(downvote_key, project_id)
-
-        elif action == 'changed':
-            # Change vote type - remove from old, add to new
-            if vote_type == 'up':
-                self.redis.srem(downvote_key, project_id)
-                self.redis.sadd(upvote_key, project_id)
-                self.redis.expire(upvote_key, self.STATE_TTL)
-            else:
-                self.redis.srem(upvote_key, project_id)
-                self.redis.sadd(downvote_key, project_id)
-                self.redis.expire(downvote_key, self.STATE_TTL)
+        """Record the user's new vote state in their vote bitmap"""
+        self.bitmaps.set_vote(user_id, project_id, None if action == 'removed' else vote_type)
 
     def _store_request_metadata(
         self,
@@ -404,8 +353,8 @@ class VoteService:
         project_id: str,
         vote_type: str,
         action: str
-    ):
-        """Add vote event to Redis stream for audit/replay"""
+    ) -> bool:
+        """Add vote event to Redis stream for the DB writer (False if the append failed)"""
         try:
             event = {
                 'request_id': request_id,
@@ -416,16 +365,18 @@ class VoteService:
                 'timestamp': datetime.utcnow().isoformat()
             }
 
-            # Add to stream (keep last 10,000 events)
             self.redis.xadd(
                 self.KEY_VOTE_EVENTS,
+                '*',
                 event,
-                maxlen=10000,
-                approximate=True
+                maxlen=self.STREAM_MAXLEN,
+                approximate_trim=True
             )
+            return True
         except Exception as e:
-            # Non-critical - don't fail the vote
-            pass
+            # Caller falls back to the Celery task - don't fail the vote
+            print(f"[VoteService] Stream append failed for {request_id}: {e}")
+            return False
 
     def _update_metrics(self, metric_name: str, value: float = 1):
         """Update vote metrics for observability"""
@@ -516,11 +467,8 @@ class VoteService:
         self.redis.delete(key)
 
     def invalidate_user_vote_cache(self, user_id: str):
-        """Invalidate user's vote cache (both upvotes and downvotes)"""
-        upvote_key = self.KEY_USER_UPVOTES.format(user_id=user_id)
-        downvote_key = self.KEY_USER_DOWNVOTES.format(user_id=user_id)
-        self.redis.delete(upvote_key)
-        self.redis.delete(downvote_key)
+        """Invalidate user's vote bitmap (rebuilt from the DB on next read)"""
+        self.bitmaps.invalidate(user_id)
 
     def _mark_post_changed(self, project_id: str):
         """Mark project as having pending DB updates"""
@@ -582,6 +530,57 @@ class VoteService:
             print(f"[VoteService] Error getting vote counts: {e}")
             return None
 
+    def get_vote_counts_many(self, project_ids: list) -> Dict[str, Dict]:
+        """
+        Vote counts for a page of projects/itineraries in one pipeline
+
+        Ids without Redis state are counted with a single GROUP BY and cached
+        the same way get_vote_counts does.
+
+        Returns:
+            Dict of id -> {upvotes, downvotes, voteCount} (empty on Redis errors)
+        """
+        if not project_ids:
+            return {}
+        try:
+            pipe = self.redis.pipeline()
+            for project_id in project_ids:
+                pipe.hgetall(self.KEY_VOTE_STATE.format(project_id=project_id))
+            states = pipe.exec()
+
+            counts = {}
+            missing = []
+            for project_id, state in zip(project_ids, states):
+                if state:
+                    counts[project_id] = (int(state.get('upvotes', 0)), int(state.get('downvotes', 0)))
+                else:
+                    missing.append(project_id)
+
+            if missing:
+                from sqlalchemy import func
+                loaded = {project_id: [0, 0] for project_id in missing}
+                rows = db.session.query(Vote.project_id, Vote.vote_type, func.count(Vote.id))\
+                    .filter(Vote.project_id.in_(missing))\
+                    .group_by(Vote.project_id, Vote.vote_type).all()
+                for project_id, vote_type, count in rows:
+                    loaded[project_id][0 if vote_type == 'up' else 1] = count
+
+                pipe = self.redis.pipeline()
+                for project_id, (upvotes, downvotes) in loaded.items():
+                    key = self.KEY_VOTE_STATE.format(project_id=project_id)
+                    pipe.hset(key, values={'upvotes': upvotes, 'downvotes': downvotes})
+                    pipe.expire(key, self.STATE_TTL)
+                    counts[project_id] = (upvotes, downvotes)
+                pipe.exec()
+
+            return {
+                project_id: {'upvotes': up, 'downvotes': down, 'voteCount': up - down}
+                for project_id, (up, down) in counts.items()
+            }
+        except Exception as e:
+            print(f"[VoteService] Error getting vote counts: {e}")
+            return {}
+
     def clear_changed_posts(self, project_ids: list):
         """Clear projects from changed set after DB sync"""
         try:
@@ -5,11 +5,28 @@ Generates real-time alerts, insights, and recommendations for itineraries and sn
 from celery_app import celery
 from extensions import db
 from services.ai_analyzer import AIAnalyzer
-from utils.notifications import create_notification
+from utils.notifications import create_notifications_bulk
 from services.socket_service import SocketService
 from flask import current_app
+from jinja2 import Environment
 import traceback
 
+# Alert type -> notification type / title emoji
+NOTIFICATION_TYPES = {
+    'safety': 'ai_safety_alert',
+    'insight': 'ai_insight',
+    'recommendation': 'ai_recommendation',
+    'warning': 'ai_warning',
+    'suggestion': 'ai_suggestion'
+}
+ALERT_EMOJI = {
+    'safety': '🚨',
+    'insight': '💡',
+    'recommendation': '🎯',
+    'warning': '⚠️',
+    'suggestion': '✨'
+}
+
 
 @celery.task(name='analyze_itinerary_ai', bind=True, max_retries=3)
 def analyze_itinerary_ai(self, itinerary_id: str):
@@ -80,13 +97,14 @@ def analyze_itinerary_ai(self, itinerary_id: str):
         creator = Traveler.query.get(itinerary.created_by_traveler_id)
         creator_name = creator.display_name or creator.username if creator else "A traveler"
 
-        # MVP: Broadcast to all travelers (location-based filtering will be on frontend)
-        # NOTE: Using Traveler table because that's what the app uses for auth
-        travelers = Traveler.query.filter_by(is_active=True).all()
-        print(f"[AI Analysis Task] 📢 Broadcasting to {len(travelers)} travelers (MVP mode)")
-
-        # Convert travelers to user format for notifications
-        users = travelers
+        # Targeted audience: travelers subscribed to the itinerary's destination,
+        # interests or area (alert_subscriptions), plus the creator
+        from services.alert_audience import AlertAudience
+        recipients = AlertAudience.resolve(
+            AlertAudience.itinerary_topics(itinerary),
+            include_ids=[itinerary.created_by_traveler_id]
+        )
+        print(f"[AI Analysis Task] 📢 Routing alerts to {len(recipients)} subscribed travelers")
 
         # Process each alert
         notification_count = 0
@@ -94,81 +112,37 @@ def analyze_itinerary_ai(self, itinerary_id: str):
 
         for alert in alerts:
             alert_type = alert.get('type', 'insight')
-            priority = alert.get('priority', 'medium')
             title = alert.get('title', 'Travel Alert')
             message = alert.get('message', '')
             send_email = alert.get('send_email', True)  # MVP: Send all emails
 
-            # Determine notification type mapping
-            notification_type_map = {
-                'safety': 'ai_safety_alert',
-                'insight': 'ai_insight',
-                'recommendation': 'ai_recommendation',
-                'warning': 'ai_warning',
-                'suggestion': 'ai_suggestion'
-            }
-            notification_type = notification_type_map.get(alert_type, 'ai_alert')
-
-            # Create emoji prefix based on alert type
-            emoji_map = {
-                'safety': '🚨',
-                'insight': '💡',
-                'recommendation': '🎯',
-                'warning': '⚠️',
-                'suggestion': '✨'
-            }
-            emoji = emoji_map.get(alert_type, '📢')
-
             # Enhanced title with emoji and context
-            full_title = f"{emoji} {title}"
+            full_title = f"{ALERT_EMOJI.get(alert_type, '📢')} {title}"
             full_message = f"New itinerary: '{itinerary.title}' ({itinerary.destination})\n\n{message}"
 
-            # Create in-app notifications for all users
-            for user in users:
-                try:
-                    notification = create_notification(
-                        user_id=user.id,
-                        notification_type=notification_type,
-                        title=full_title,
-                        message=full_message,
-                        project_id=itinerary_id,
-                        actor_id=itinerary.created_by_traveler_id,
-                        redirect_url=f"/itinerary/{itinerary_id}"
-                    )
-                    notification_count += 1
-                except Exception as e:
-                    print(f"[AI Analysis Task] ❌ Failed to create notification for user {user.id}: {e}")
-
-            # Send emails (MVP: Send for all alerts)
+            # One bulk insert for the whole audience
+            try:
+                notification_count += create_notifications_bulk(
+                    [recipient['id'] for recipient in recipients],
+                    notification_type=NOTIFICATION_TYPES.get(alert_type, 'ai_alert'),
+                    title=full_title,
+                    message=full_message,
+                    project_id=itinerary_id,
+                    actor_id=itinerary.created_by_traveler_id,
+                    redirect_url=f"/itinerary/{itinerary_id}"
+                )
+            except Exception as e:
+                db.session.rollback()
+                print(f"[AI Analysis Task] ❌ Failed to create notifications: {e}")
+
+            # Rendered once, delivered through the email outbox
             if send_email:
-                try:
-                    from services.email_service import EmailService
-
-                    for user in users:
-                        if user.email and user.email_verified:
-                            try:
-                                # Use existing email service (we'll create a new method)
-                                sent = send_ai_alert_email(
-                                    user=user,
-                                    alert_type=alert_type,
-                                    title=title,
-                                    message=message,
-                                    itinerary=itinerary,
-                                    creator_name=creator_name,
-                                    priority=priority
-                                )
-                                if sent:
-                                    email_count += 1
-                            except Exception as e:
-                                print(f"[AI Analysis Task] ⚠️ Failed to send email to {user.email}: {e}")
-
-                except Exception as e:
-                    print(f"[AI Analysis Task] ❌ Email service error: {e}")
+                email_count += queue_alert_emails('itinerary', itinerary, alert, creator_name, recipients)
 
         print(f"\n[AI Analysis Task] 📊 Results:")
         print(f"  - Alerts generated: {len(alerts)}")
         print(f"  - Notifications created: {notification_count}")
-        print(f"  - Emails sent: {email_count}")
+        print(f"  - Emails queued: {email_count}")
         print(f"{'='*80}\n")
 
         return {
@@ -224,7 +198,7 @@ def analyze_snap_ai(self, snap_id: str, local_filename: str = None):
                 'error': 'Snap not found'
             }
 
-        location_text = snap.location_name or f"{snap.city}, {snap.country}" if snap.city else "Unknown location"
+        location_text = snap_location_text(snap)
         print(f"[AI Analysis Task] 📍 Analyzing snap at: {location_text}")
 
         # Initialize AI analyzer
@@ -292,13 +266,14 @@ def analyze_snap_ai(self, snap_id: str, local_filename: str = None):
         creator = Traveler.query.get(snap.user_id)
         creator_name = creator.display_name or creator.username if creator else "A traveler"
 
-        # MVP: Broadcast to all travelers (location-based filtering will be on frontend)
-        # NOTE: Using Traveler table because that's what the app uses for auth
-        travelers = Traveler.query.filter_by(is_active=True).all()
-        print(f"[AI Analysis Task] 📢 Broadcasting to {len(travelers)} travelers (MVP mode)")
-
-        # Convert travelers to user format for notifications
-        users = travelers
+        # Targeted audience: travelers subscribed to the snap's destination or
+        # area (alert_subscriptions), plus the creator
+        from services.alert_audience import AlertAudience
+        recipients = AlertAudience.resolve(
+            AlertAudience.snap_topics(snap),
+            include_ids=[snap.user_id]
+        )
+        print(f"[AI Analysis Task] 📢 Routing alerts to {len(recipients)} subscribed travelers")
 
         # Process each alert
         notification_count = 0
@@ -306,81 +281,36 @@ def analyze_snap_ai(self, snap_id: str, local_filename: str = None):
 
         for alert in alerts:
             alert_type = alert.get('type', 'insight')
-            priority = alert.get('priority', 'medium')
             title = alert.get('title', 'Travel Alert')
             message = alert.get('message', '')
             send_email = alert.get('send_email', True)  # MVP: Send all emails
 
-            # Determine notification type mapping
-            notification_type_map = {
-                'safety': 'ai_safety_alert',
-                'insight': 'ai_insight',
-                'recommendation': 'ai_recommendation',
-                'warning': 'ai_warning',
-                'suggestion': 'ai_suggestion'
-            }
-            notification_type = notification_type_map.get(alert_type, 'ai_alert')
-
-            # Create emoji prefix based on alert type
-            emoji_map = {
-                'safety': '🚨',
-                'insight': '💡',
-                'recommendation': '🎯',
-                'warning': '⚠️',
-                'suggestion': '✨'
-            }
-            emoji = emoji_map.get(alert_type, '📢')
-
             # Enhanced title with emoji and context
-            full_title = f"{emoji} {title}"
+            full_title = f"{ALERT_EMOJI.get(alert_type, '📢')} {title}"
             full_message = f"New snap at {location_text}\n\n{message}"
 
-            # Create in-app notifications for all users
-            for user in users:
-                try:
-                    notification = create_notification(
-                        user_id=user.id,
-                        notification_type=notification_type,
-                        title=full_title,
-                        message=full_message,
-                        actor_id=snap.user_id,
-                        redirect_url=f"/snaps/{snap_id}"
-                    )
-                    notification_count += 1
-                except Exception as e:
-                    print(f"[AI Analysis Task] ❌ Failed to create notification for user {user.id}: {e}")
-
-            # Send emails (MVP: Send for all alerts)
+            # One bulk insert for the whole audience
+            try:
+                notification_count += create_notifications_bulk(
+                    [recipient['id'] for recipient in recipients],
+                    notification_type=NOTIFICATION_TYPES.get(alert_type, 'ai_alert'),
+                    title=full_title,
+                    message=full_message,
+                    actor_id=snap.user_id,
+                    redirect_url=f"/snaps/{snap_id}"
+                )
+            except Exception as e:
+                db.session.rollback()
+                print(f"[AI Analysis Task] ❌ Failed to create notifications: {e}")
+
+            # Rendered once, delivered through the email outbox
             if send_email:
-                try:
-                    from services.email_service import EmailService
-
-                    for user in users:
-                        if user.email and user.email_verified:
-                            try:
-                                # Use existing email service (we'll create a new method)
-                                sent = send_ai_snap_alert_email(
-                                    user=user,
-                                    alert_type=alert_type,
-                                    title=title,
-                                    message=message,
-                                    snap=snap,
-                                    location_text=location_text,
-                                    creator_name=creator_name,
-                                    priority=priority
-                                )
-                                if sent:
-                                    email_count += 1
-                            except Exception as e:
-                                print(f"[AI Analysis Task] ⚠️ Failed to send email to {user.email}: {e}")
-
-                except Exception as e:
-                    print(f"[AI Analysis Task] ❌ Email service error: {e}")
+                email_count += queue_alert_emails('snap', snap, alert, creator_name, recipients)
 
         print(f"\n[AI Analysis Task] 📊 Results:")
         print(f"  - Alerts generated: {len(alerts)}")
         print(f"  - Notifications created: {notification_count}")
-        print(f"  - Emails sent: {email_count}")
+        print(f"  - Emails queued: {email_count}")
         print(f"{'='*80}\n")
 
         return {
@@ -407,302 +337,196 @@ def analyze_snap_ai(self, snap_id: str, local_filename: str = None):
         }
 
 
-def send_ai_alert_email(user, alert_type, title, message, itinerary, creator_name, priority):
-    """
-    Send AI alert email for itinerary
+def snap_location_text(snap):
+    """Human-readable location of a snap"""
+    return snap.location_name or f"{snap.city}, {snap.country}" if snap.city else "Unknown location"
 
-    Args:
-        user: User object to send email to
-        alert_type: Type of alert (safety, insight, etc.)
-        title: Alert title
-        message: Alert message
-        itinerary: Itinerary object
-        creator_name: Name of itinerary creator
-        priority: Alert priority level
-
-    Returns:
-        bool: True if email sent successfully
-    """
-    try:
-        from services.email_service import EmailService
-        from flask import current_app
-
-        config = current_app.config
-
-        # Check if email service is enabled
-        if not EmailService.is_enabled():
-            print("[AI Email] ZeptoMail not configured, skipping email")
-            return False
-
-        # Priority emoji and label
-        priority_map = {
-            'critical': '🔴 CRITICAL',
-            'high': '🟠 HIGH',
-            'medium': '🟡 MEDIUM',
-            'low': '🟢 LOW'
-        }
-        priority_label = priority_map.get(priority, '🟡 MEDIUM')
-
-        # Alert type emoji
-        type_emoji = {
-            'safety': '🚨',
-            'insight': '💡',
-            'recommendation': '🎯',
-            'warning': '⚠️',
-            'suggestion': '✨'
-        }
-        emoji = type_emoji.get(alert_type, '📢')
 
-        # Email subject
-        subject = f"{emoji} AI Alert: {title}"
+# Compiled once per process; each alert is rendered once and the same body goes to every recipient
+PRIORITY_LABELS = {
+    'critical': '🔴 CRITICAL',
+    'high': '🟠 HIGH',
+    'medium': '🟡 MEDIUM',
+    'low': '🟢 LOW'
+}
 
-        # HTML email body
-        html_body = f"""
+_HTML_TEMPLATE = """
         <html>
         <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
             <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
                 <div style="background: linear-gradient(135deg, #FACC15 0%, #F59E0B 100%); padding: 30px; text-align: center; border-radius: 10px 10px 0 0;">
-                    <h1 style="color: #0B0B0B; margin: 0; font-size: 24px;">{emoji} AI Travel Alert</h1>
-                    <p style="color: #0B0B0B; margin: 10px 0 0 0;">Priority: {priority_label}</p>
+                    <h1 style="color: #0B0B0B; margin: 0; font-size: 24px;">{{ emoji }} {{ heading }}</h1>
+                    <p style="color: #0B0B0B; margin: 10px 0 0 0;">Priority: {{ priority_label }}</p>
                 </div>
 
                 <div style="background: #f9f9f9; padding: 30px; border-radius: 0 0 10px 10px;">
-                    <h2 style="color: #0B0B0B; margin-top: 0;">{title}</h2>
+                    <h2 style="color: #0B0B0B; margin-top: 0;">{{ title }}</h2>
 
                     <div style="background: white; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #FACC15;">
-                        <p style="margin: 0;">{message}</p>
+                        <p style="margin: 0;">{{ message }}</p>
                     </div>
 
-                    <h3 style="color: #666; font-size: 14px; margin: 20px 0 10px 0;">RELATED ITINERARY</h3>
+                    <h3 style="color: #666; font-size: 14px; margin: 20px 0 10px 0;">{{ related_heading }}</h3>
                     <div style="background: white; padding: 15px; border-radius: 8px;">
-                        <h4 style="margin: 0 0 10px 0; color: #0B0B0B;">{itinerary.title}</h4>
-                        <p style="margin: 0; color: #666;"><strong>Destination:</strong> {itinerary.destination}</p>
-                        <p style="margin: 5px 0 0 0; color: #666;"><strong>By:</strong> {creator_name}</p>
+                        {% if kind == 'itinerary' %}
+                        <h4 style="margin: 0 0 10px 0; color: #0B0B0B;">{{ entity.title }}</h4>
+                        <p style="margin: 0; color: #666;"><strong>Destination:</strong> {{ entity.destination }}</p>
+                        {% else %}
+                        <p style="margin: 0; color: #666;"><strong>📍 Location:</strong> {{ location_text }}</p>
+                        {% endif %}
+                        <p style="margin: 5px 0 0 0; color: #666;"><strong>By:</strong> {{ creator_name }}</p>
+                        {% if kind == 'snap' and entity.caption %}
+                        <p style="margin: 5px 0 0 0; color: #666;"><strong>Caption:</strong> {{ entity.caption }}</p>
+                        {% endif %}
                     </div>
 
                     <div style="text-align: center; margin-top: 30px;">
-                        <a href="{config.get('FRONTEND_APP_URL', 'http://localhost:8080')}/itineraries/{itinerary.id}"
+                        <a href="{{ url }}"
                            style="background: #FACC15; color: #0B0B0B; padding: 12px 30px; text-decoration: none; border-radius: 6px; font-weight: bold; display: inline-block;">
-                            View Itinerary
+                            {{ button_label }}
                         </a>
                     </div>
                 </div>
 
                 <div style="text-align: center; margin-top: 20px; color: #999; font-size: 12px;">
-                    <p>This is an AI-generated alert based on real-time travel data analysis</p>
+                    <p>This is an AI-generated alert based on real-time {{ data_label }} analysis</p>
                     <p>© TripIt - Powered by AI Travel Intelligence</p>
                 </div>
             </div>
         </body>
         </html>
-        """
-
-        # Text email body (fallback)
-        text_body = f"""
-{emoji} AI TRAVEL ALERT
-Priority: {priority_label}
+"""
 
-{title}
+_TEXT_TEMPLATE = """
+{{ emoji }} {{ heading | upper }}
+Priority: {{ priority_label }}
 
-{message}
+{{ title }}
 
-RELATED ITINERARY:
-- {itinerary.title}
-- Destination: {itinerary.destination}
-- By: {creator_name}
+{{ message }}
 
-View full details: {config.get('FRONTEND_APP_URL')}/itineraries/{itinerary.id}
+{{ related_heading }}:
+{% if kind == 'itinerary' -%}
+- {{ entity.title }}
+- Destination: {{ entity.destination }}
+{% else -%}
+- Location: {{ location_text }}
+{% endif -%}
+- By: {{ creator_name }}
+{% if kind == 'snap' and entity.caption %}- Caption: {{ entity.caption }}
+{% endif %}
+View full details: {{ url }}
 
 ---
-This is an AI-generated alert based on real-time travel data analysis.
+This is an AI-generated alert based on real-time {{ data_label }} analysis.
 © TripIt - Powered by AI Travel Intelligence
-        """
-
-        # Prepare email payload
-        payload = {
-            "from": {
-                "address": config['ZEPTO_SENDER_ADDRESS'],
-                "name": config.get('ZEPTO_SENDER_NAME', 'TripIt AI Alerts'),
-            },
-            "to": [
-                {
-                    "email_address": {
-                        "address": user.email,
-                        "name": user.display_name or user.username,
-                    }
-                }
-            ],
-            "subject": subject,
-            "htmlbody": html_body,
-            "textbody": text_body,
-        }
-
-        headers = {
-            "authorization": f"Zoho-enczapikey {config['ZEPTO_SEND_MAIL_TOKEN']}",
-            "content-type": "application/json",
-        }
-
-        import requests
-        session = EmailService._get_retry_session()
-        response = session.post(
-            config["ZEPTO_ENDPOINT"], json=payload, headers=headers, timeout=30
-        )
-        response.raise_for_status()
-
-        print(f"[AI Email] ✅ Sent AI alert email to {user.email}")
-        return True
+"""
 
-    except Exception as e:
-        print(f"[AI Email] ❌ Failed to send email: {e}")
-        return False
+ALERT_HTML = Environment(autoescape=True).from_string(_HTML_TEMPLATE)
+ALERT_TEXT = Environment(autoescape=False).from_string(_TEXT_TEMPLATE)
 
 
-def send_ai_snap_alert_email(user, alert_type, title, message, snap, location_text, creator_name, priority):
+def render_alert_email(kind, entity, alert, creator_name):
     """
-    Send AI alert email for snap
+    Render the subject, HTML and text body of an AI alert email
 
     Args:
-        user: User object to send email to
-        alert_type: Type of alert (safety, insight, etc.)
-        title: Alert title
-        message: Alert message
-        snap: Snap object
-        location_text: Human-readable location text
-        creator_name: Name of snap creator
-        priority: Alert priority level
+        kind: 'itinerary' or 'snap'
+        entity: Itinerary or Snap the alert is about
+        alert: Alert dict (type, priority, title, message)
+        creator_name: Name of the content creator
 
     Returns:
-        bool: True if email sent successfully
+        tuple: (subject, html_body, text_body)
     """
-    try:
-        from services.email_service import EmailService
-        from flask import current_app
-
-        config = current_app.config
-
-        # Check if email service is enabled
-        if not EmailService.is_enabled():
-            print("[AI Email] ZeptoMail not configured, skipping email")
-            return False
-
-        # Priority emoji and label
-        priority_map = {
-            'critical': '🔴 CRITICAL',
-            'high': '🟠 HIGH',
-            'medium': '🟡 MEDIUM',
-            'low': '🟢 LOW'
-        }
-        priority_label = priority_map.get(priority, '🟡 MEDIUM')
-
-        # Alert type emoji
-        type_emoji = {
-            'safety': '🚨',
-            'insight': '💡',
-            'recommendation': '🎯',
-            'warning': '⚠️',
-            'suggestion': '✨'
-        }
-        emoji = type_emoji.get(alert_type, '📢')
-
-        # Email subject
-        subject = f"{emoji} AI Alert: {title}"
-
-        # HTML email body
-        html_body = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-                <div style="background: linear-gradient(135deg, #FACC15 0%, #F59E0B 100%); padding: 30px; text-align: center; border-radius: 10px 10px 0 0;">
-                    <h1 style="color: #0B0B0B; margin: 0; font-size: 24px;">{emoji} AI Location Alert</h1>
-                    <p style="color: #0B0B0B; margin: 10px 0 0 0;">Priority: {priority_label}</p>
-                </div>
-
-                <div style="background: #f9f9f9; padding: 30px; border-radius: 0 0 10px 10px;">
-                    <h2 style="color: #0B0B0B; margin-top: 0;">{title}</h2>
-
-                    <div style="background: white; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #FACC15;">
-                        <p style="margin: 0;">{message}</p>
-                    </div>
-
-                    <h3 style="color: #666; font-size: 14px; margin: 20px 0 10px 0;">RELATED SNAP</h3>
-                    <div style="background: white; padding: 15px; border-radius: 8px;">
-                        <p style="margin: 0; color: #666;"><strong>📍 Location:</strong> {location_text}</p>
-                        <p style="margin: 5px 0 0 0; color: #666;"><strong>By:</strong> {creator_name}</p>
-                        {f'<p style="margin: 5px 0 0 0; color: #666;"><strong>Caption:</strong> {snap.caption}</p>' if snap.caption else ''}
-                    </div>
-
-                    <div style="text-align: center; margin-top: 30px;">
-                        <a href="{config.get('FRONTEND_APP_URL', 'http://localhost:8080')}/snaps/{snap.id}"
-                           style="background: #FACC15; color: #0B0B0B; padding: 12px 30px; text-decoration: none; border-radius: 6px; font-weight: bold; display: inline-block;">
-                            View Snap
-                        </a>
-                    </div>
-                </div>
-
-                <div style="text-align: center; margin-top: 20px; color: #999; font-size: 12px;">
-                    <p>This is an AI-generated alert based on real-time location data analysis</p>
-                    <p>© TripIt - Powered by AI Travel Intelligence</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-
-        # Text email body (fallback)
-        text_body = f"""
-{emoji} AI LOCATION ALERT
-Priority: {priority_label}
-
-{title}
-
-{message}
-
-RELATED SNAP:
-- Location: {location_text}
-- By: {creator_name}
-{f'- Caption: {snap.caption}' if snap.caption else ''}
-
-View full details: {config.get('FRONTEND_APP_URL')}/snaps/{snap.id}
-
----
-This is an AI-generated alert based on real-time location data analysis.
-© TripIt - Powered by AI Travel Intelligence
-        """
-
-        # Prepare email payload
-        payload = {
-            "from": {
-                "address": config['ZEPTO_SENDER_ADDRESS'],
-                "name": config.get('ZEPTO_SENDER_NAME', 'TripIt AI Alerts'),
-            },
-            "to": [
-                {
-                    "email_address": {
-                        "address": user.email,
-                        "name": user.display_name or user.username,
-                    }
+    frontend_url = current_app.config.get('FRONTEND_APP_URL', 'http://localhost:8080')
+    emoji = ALERT_EMOJI.get(alert.get('type', 'insight'), '📢')
+    title = alert.get('title', 'Travel Alert')
+    context = {
+        'kind': kind,
+        'entity': entity,
+        'emoji': emoji,
+        'title': title,
+        'message': alert.get('message', ''),
+        'priority_label': PRIORITY_LABELS.get(alert.get('priority', 'medium'), PRIORITY_LABELS['medium']),
+        'creator_name': creator_name,
+    }
+    if kind == 'itinerary':
+        context.update(heading='AI Travel Alert', related_heading='RELATED ITINERARY', data_label='travel data',
+                       button_label='View Itinerary', url=f"{frontend_url}/itineraries/{entity.id}")
+    else:
+        context.update(heading='AI Location Alert', related_heading='RELATED SNAP', data_label='location data',
+                       button_label='View Snap', url=f"{frontend_url}/snaps/{entity.id}",
+                       location_text=snap_location_text(entity))
+
+    return f"{emoji} AI Alert: {title}", ALERT_HTML.render(**context), ALERT_TEXT.render(**context)
+
+
+def alert_email_payload(recipient, subject, html_body, text_body):
+    """ZeptoMail payload for one recipient"""
+    config = current_app.config
+    return {
+        "from": {
+            "address": config['ZEPTO_SENDER_ADDRESS'],
+            "name": config.get('ZEPTO_SENDER_NAME', 'TripIt AI Alerts'),
+        },
+        "to": [
+            {
+                "email_address": {
+                    "address": recipient['email'],
+                    "name": recipient.get('display_name') or recipient.get('username'),
                 }
-            ],
-            "subject": subject,
-            "htmlbody": html_body,
-            "textbody": text_body,
-        }
+            }
+        ],
+        "subject": subject,
+        "htmlbody": html_body,
+        "textbody": text_body,
+    }
 
-        headers = {
-            "authorization": f"Zoho-enczapikey {config['ZEPTO_SEND_MAIL_TOKEN']}",
-            "content-type": "application/json",
-        }
 
-        import requests
-        session = EmailService._get_retry_session()
-        response = session.post(
-            config["ZEPTO_ENDPOINT"], json=payload, headers=headers, timeout=30
-        )
-        response.raise_for_status()
+def queue_alert_emails(kind, entity, alert, creator_name, recipients):
+    """
+    Render an alert email once and enqueue it for the verified recipients
 
-        print(f"[AI Email] ✅ Sent AI snap alert email to {user.email}")
-        return True
+    Rows land in the email outbox with one multi-row insert per batch;
+    identical bodies are delivered through the provider's batch API.
 
-    except Exception as e:
-        print(f"[AI Email] ❌ Failed to send email: {e}")
-        return False
+    Args:
+        kind: 'itinerary' or 'snap'
+        entity: Itinerary or Snap the alert is about
+        alert: Alert dict (type, priority, title, message)
+        creator_name: Name of the content creator
+        recipients: Audience rows from AlertAudience.resolve
+
+    Returns:
+        int: Number of emails queued
+    """
+    from services.email_service import EmailService
+    from services.email_outbox import EmailOutbox
+
+    recipients = [r for r in recipients if r.get('email') and r.get('email_verified')]
+    if not recipients:
+        return 0
+    if not EmailService.is_enabled():
+        print("[AI Email] ZeptoMail not configured, skipping email")
+        return 0
+
+    subject, html_body, text_body = render_alert_email(kind, entity, alert, creator_name)
+    alert_hash = EmailOutbox.content_hash({'subject': subject, 'text': text_body})[:16]
+
+    queued = 0
+    batch_size = current_app.config.get('AI_ALERT_EMAIL_BATCH_SIZE', 50)
+    for start in range(0, len(recipients), batch_size):
+        batch = recipients[start:start + batch_size]
+        try:
+            queued += EmailOutbox.enqueue_many(
+                [alert_email_payload(r, subject, html_body, text_body) for r in batch],
+                kind='ai_alert',
+                idempotency_keys=[f"ai_alert:{kind}:{entity.id}:{alert_hash}:{r['id']}" for r in batch]
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"[AI Analysis Task] ❌ Failed to queue alert emails: {e}")
+            break
+    return queued
@@ -0,0 +1,36 @@
+"""
+Chain Transaction Tasks
+Submit queued SBT transactions and apply their receipts
+"""
+from celery import shared_task
+import logging
+
+from services.chain_transactions import ChainTxQueue
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name='submit_chain_transactions')
+def submit_chain_transactions(limit=50):
+    """
+    Sign and broadcast queued SBT transactions
+    Runs every 15 seconds and whenever a transaction is enqueued
+    """
+    try:
+        return ChainTxQueue.submit(limit=limit)
+    except Exception as e:
+        logger.error(f"Error submitting chain transactions: {str(e)}")
+        return {'error': str(e)}
+
+
+@shared_task(name='poll_chain_receipts')
+def poll_chain_receipts(limit=200):
+    """
+    Apply receipts of submitted SBT transactions
+    Runs every 10 seconds
+    """
+    try:
+        return ChainTxQueue.poll_receipts(limit=limit)
+    except Exception as e:
+        logger.error(f"Error polling chain receipts: {str(e)}")
+        return {'error': str(e)}
@@ -0,0 +1,38 @@
+"""
+Email Outbox Tasks
+Drain and prune the email_outbox table
+"""
+from celery import shared_task
+import logging
+
+from services.email_outbox import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name='deliver_email_outbox')
+def deliver_email_outbox(limit=500):
+    """
+    Send due outbox emails
+    Runs every 30 seconds and whenever an email is enqueued
+    """
+    try:
+        return EmailOutbox.deliver(limit=limit)
+    except Exception as e:
+        logger.error(f"Error delivering email outbox: {str(e)}")
+        return {'error': str(e)}
+
+
+@shared_task(name='purge_email_outbox')
+def purge_email_outbox(days=14):
+    """
+    Delete sent outbox emails older than `days`
+    Runs every 24 hours
+    """
+    try:
+        deleted = EmailOutbox.purge(days)
+        logger.info(f"Purged {deleted} sent outbox emails")
+        return {'deleted': deleted}
+    except Exception as e:
+        logger.error(f"Error purging email outbox: {str(e)}")
+        return {'error': str(e)}
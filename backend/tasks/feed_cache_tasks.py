@@ -1,6 +1,8 @@
 """
 Feed Cache Refresh Tasks
-Periodic tasks to refresh feed data caches
+Full rebuilds of the shared feed caches (daily via refresh_all_feed_caches).
+Hourly refreshes are handled on demand by utils/cache_warmer.py, which only
+re-warms the keys that are actually being read.
 """
 from celery import shared_task
 from sqlalchemy.orm import joinedload
@@ -18,7 +20,7 @@ logger = logging.getLogger(__name__)
 def refresh_most_requested_projects_cache():
     """
     Refresh cache for most requested projects (projects with most intro requests)
-    Runs every 1 hour
+    Part of the daily refresh_all_feed_caches
     """
     try:
         logger.info("Starting most requested projects cache refresh")
@@ -90,7 +92,7 @@ def refresh_most_requested_projects_cache():
 def refresh_recent_connections_cache():
     """
     Refresh cache for recent connections (accepted intro requests)
-    Runs every 1 hour
+    Part of the daily refresh_all_feed_caches
     """
     try:
         logger.info("Starting recent connections cache refresh")
@@ -129,7 +131,7 @@ def refresh_recent_connections_cache():
 def refresh_featured_projects_cache():
     """
     Refresh cache for featured projects
-    Runs every 1 hour
+    Part of the daily refresh_all_feed_caches
     """
     try:
         logger.info("Starting featured projects cache refresh")
@@ -167,7 +169,7 @@ def refresh_featured_projects_cache():
 def refresh_category_caches():
     """
     Refresh caches for all major categories
-    Runs every 1 hour
+    Part of the daily refresh_all_feed_caches
     """
     try:
         logger.info("Starting category caches refresh")
@@ -223,7 +225,7 @@ def refresh_category_caches():
 def refresh_rising_stars_cache():
     """
     Refresh cache for rising star projects
-    Runs every 1 hour
+    Part of the daily refresh_all_feed_caches
     """
     try:
         logger.info("Starting rising stars cache refresh")
@@ -15,8 +15,9 @@ def setup_periodic_tasks(celery_app):
         celery_app: Celery application instance
     """
 
-    # Retry failed scores every 30 minutes
+    # Retry failed scores every 30 minutes (added to celery_app's schedule, not replacing it)
     celery_app.conf.beat_schedule = {
+        **(celery_app.conf.beat_schedule or {}),
         'retry-failed-scores': {
             'task': 'tasks.scoring_tasks.retry_failed_scores',
             'schedule': crontab(minute='*/30'),  # Every 30 minutes
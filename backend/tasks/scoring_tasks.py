@@ -6,7 +6,6 @@ from extensions import db
 from models.project import Project
 from models.user import User
 from models.traveler import Traveler
-from services.scoring.score_engine import ScoringEngine
 from models.itinerary import Itinerary
 from datetime import datetime, timedelta
 from flask import current_app
@@ -43,6 +42,7 @@ def score_project_task(self, project_id):
         openai_key = current_app.config.get('OPENAI_API_KEY')
 
         # Initialize scoring engine
+        from services.scoring.score_engine import ScoringEngine
         engine = ScoringEngine(github_token=github_token, openai_api_key=openai_key)
 
         # Score the project
@@ -146,6 +146,27 @@ def score_project_task(self, project_id):
         raise self.retry(exc=e, countdown=retry_delay)
 
 
+def compute_safety_component(itinerary):
+    """
+    Safety component (0-20) from the itinerary's aggregated safety rating
+
+    safety_score / safety_ratings_count are maintained from
+    itinerary_safety_stats on every rating write, so this never loads ratings.
+    """
+    # From community safety ratings (0-5 scale)
+    if itinerary.safety_score and itinerary.safety_score > 0:
+        # Convert 0-5 scale to 0-20 scale (5.0 rating = 20 points)
+        safety_component = round((itinerary.safety_score / 5.0) * 20.0, 2)
+    else:
+        safety_component = 0.0
+
+    # Bonus for verified safety ratings
+    if itinerary.safety_ratings_count and itinerary.safety_ratings_count >= 3:
+        safety_component = min(20.0, safety_component + 2.0)
+
+    return safety_component
+
+
 @celery.task(bind=True, max_retries=3, default_retry_delay=300)
 def score_itinerary_task(self, itinerary_id):
     """
@@ -211,95 +232,27 @@ def score_itinerary_task(self, itinerary_id):
         try:
             creator = itinerary.itinerary_creator
             if creator:
-                from models.snap import Snap
-                from models.safety_rating import SafetyRating
-
-                # STEP 1: Count user's contributions FIRST
-                try:
-                    user_itineraries = Itinerary.query.filter_by(
-                        created_by_traveler_id=creator.id, is_deleted=False
-                    ).count()
-                except Exception:
-                    user_itineraries = 0
-
-                try:
-                    user_snaps = Snap.query.filter_by(
-                        user_id=creator.id, is_deleted=False
-                    ).count()
-                except Exception:
-                    user_snaps = 0
-
-                try:
-                    user_safety_ratings = creator.safety_ratings.count()
-                except Exception:
-                    user_safety_ratings = 0
+                from services.traveler_stats import TravelerStatsService
 
+                # STEP 1: User's contributions (one traveler_stats row)
+                stats = TravelerStatsService.get(creator.id)
+                user_itineraries = stats.itinerary_count if stats else 0
+                user_snaps = stats.snap_count if stats else 0
+                user_safety_ratings = stats.safety_rating_count if stats else 0
                 user_contributions = getattr(creator, 'contributions_verified', 0) or 0
 
-                # STEP 2: Get maximum values for normalization
+                # STEP 2: Maximum values for normalization (one MAX() query over traveler_stats)
                 try:
-                    # Count itineraries per user, get the maximum
-                    itinerary_counts = db.session.query(
-                        Itinerary.created_by_traveler_id,
-                        func.count(Itinerary.id).label('count')
-                    ).filter(
-                        Itinerary.created_by_traveler_id != None,
-                        Itinerary.is_deleted == False
-                    ).group_by(
-                        Itinerary.created_by_traveler_id
-                    ).all()
-
-                    if itinerary_counts:
-                        max_itineraries = max([count for _, count in itinerary_counts])
-                    else:
-                        max_itineraries = user_itineraries if user_itineraries > 0 else 1
+                    maxima = TravelerStatsService.max_counts()
+                    max_itineraries = maxima['itinerary_count'] or user_itineraries or 1
+                    max_snaps = maxima['snap_count'] or user_snaps or 1
+                    max_safety_ratings = maxima['safety_rating_count'] or user_safety_ratings or 1
                 except Exception as e:
-                    print(f"Max itineraries query error: {e}")
+                    print(f"Max contribution counts query error: {e}")
                     import traceback
                     traceback.print_exc()
                     max_itineraries = user_itineraries if user_itineraries > 0 else 1
-
-                try:
-                    # Count snaps per user, get the maximum
-                    snap_counts = db.session.query(
-                        Snap.user_id,
-                        func.count(Snap.id).label('count')
-                    ).filter(
-                        Snap.user_id != None,
-                        Snap.is_deleted == False
-                    ).group_by(
-                        Snap.user_id
-                    ).all()
-
-                    if snap_counts:
-                        max_snaps = max([count for _, count in snap_counts])
-                    else:
-                        max_snaps = user_snaps if user_snaps > 0 else 1
-                except Exception as e:
-                    print(f"Max snaps query error: {e}")
-                    import traceback
-                    traceback.print_exc()
                     max_snaps = user_snaps if user_snaps > 0 else 1
-
-                try:
-                    # Count safety ratings per user, get the maximum
-                    rating_counts = db.session.query(
-                        SafetyRating.traveler_id,
-                        func.count(SafetyRating.id).label('count')
-                    ).filter(
-                        SafetyRating.traveler_id != None
-                    ).group_by(
-                        SafetyRating.traveler_id
-                    ).all()
-
-                    if rating_counts:
-                        max_safety_ratings = max([count for _, count in rating_counts])
-                    else:
-                        max_safety_ratings = user_safety_ratings if user_safety_ratings > 0 else 1
-                except Exception as e:
-                    print(f"Max safety ratings query error: {e}")
-                    import traceback
-                    traceback.print_exc()
                     max_safety_ratings = user_safety_ratings if user_safety_ratings > 0 else 1
 
                 try:
@@ -375,16 +328,8 @@ def score_itinerary_task(self, itinerary_id):
         community_score = round(upvote_score + view_score + comment_score + helpful_score, 2)
 
         # === 4. SAFETY SCORE COMPONENT (0-20) ===
-        # From community safety ratings (0-5 scale)
-        if itinerary.safety_score and itinerary.safety_score > 0:
-            # Convert 0-5 scale to 0-20 scale (5.0 rating = 20 points)
-            safety_component = round((itinerary.safety_score / 5.0) * 20.0, 2)
-        else:
-            safety_component = 0.0
-
-        # Bonus for verified safety ratings
-        if itinerary.safety_ratings_count and itinerary.safety_ratings_count >= 3:
-            safety_component = min(20.0, safety_component + 2.0)
+        # From the itinerary_safety_stats aggregates (kept on the itinerary)
+        safety_component = compute_safety_component(itinerary)
 
         # === 5. QUALITY SCORE (0-20) - More Lenient ===
         quality_score = 0.0
@@ -482,15 +427,12 @@ def score_itinerary_task(self, itinerary_id):
         if hasattr(itinerary, 'itinerary_creator') and itinerary.itinerary_creator:
             creator = itinerary.itinerary_creator
             try:
-                from models.snap import Snap
-
-                user_itineraries = Itinerary.query.filter_by(
-                    created_by_traveler_id=creator.id, is_deleted=False
-                ).count()
-                user_snaps = Snap.query.filter_by(
-                    user_id=creator.id, is_deleted=False
-                ).count()
-                user_safety_ratings = creator.safety_ratings.count()
+                from services.traveler_stats import TravelerStatsService
+
+                stats = TravelerStatsService.get(creator.id)
+                user_itineraries = stats.itinerary_count if stats else 0
+                user_snaps = stats.snap_count if stats else 0
+                user_safety_ratings = stats.safety_rating_count if stats else 0
                 user_contributions = getattr(creator, 'contributions_verified', 0) or 0
 
                 itineraries_score = (user_itineraries / (max_itineraries or 1)) * 8.0
@@ -1,14 +1,13 @@
 """
 Celery Tasks for Async Vote Processing
-Handles durable database writes and reconciliation
+Handles the fallback durable write, score refresh and reconciliation
+(the primary DB write is workers/vote_stream_worker.py)
 """
 from celery_app import celery
 from extensions import db
 from models.vote import Vote
 from models.project import Project
-from models.user import User
 from services.vote_service import VoteService
-from datetime import datetime
 import traceback
 import time
 
@@ -24,13 +23,11 @@ def process_vote_event(
     action: str
 ):
     """
-    Lightweight vote processing task - logs events only
+    Fallback durable write for a vote whose stream append failed
 
-    NEW ARCHITECTURE:
-    1. Update votes table (user vote state)
-    2. Log event to vote_events table
-    3. Mark post as changed in Redis
-    4. DO NOT update projects table (done by Beat sync task)
+    Applies the event through the same idempotent path as VoteStreamWorker:
+    votes row, vote_events row (unique request_id) and the stored
+    upvotes/downvotes delta in one transaction.
 
     Args:
         request_id: Unique request ID from fast path
@@ -43,109 +40,40 @@ def process_vote_event(
     Returns:
         Dict with processing results
     """
+    from workers.vote_stream_worker import VoteStreamWorker
+
     start_time = time.time()
     vote_service = VoteService()
 
     try:
-        # Reduced logging for cleaner output
-
-        # 1. Load existing vote from database
-        existing_vote = Vote.query.filter_by(
-            user_id=user_id,
-            project_id=project_id
-        ).first()
-
+        # 1. Reconcile: Check if DB state matches the fast path's view
+        existing_vote = Vote.query.filter_by(user_id=user_id, project_id=project_id).first()
         db_vote_type = existing_vote.vote_type if existing_vote else None
+        reconciliation_needed = db_vote_type != (prior_vote or None)
 
-        # 2. Reconcile: Check if DB state matches our intent
-        reconciliation_needed = False
-        prior_vote_normalized = None if prior_vote == '' else prior_vote
-
-        if db_vote_type != prior_vote_normalized:
-            reconciliation_needed = True
-
-        # 3. Apply vote logic to votes table ONLY
-        vote_created = False
-
-        if action == 'created':
-            if existing_vote:
-                # Already exists - change type if different
-                if existing_vote.vote_type != vote_type:
-                    existing_vote.vote_type = vote_type
-            else:
-                # Create new vote
-                vote = Vote(user_id=user_id, project_id=project_id, vote_type=vote_type)
-                db.session.add(vote)
-                vote_created = True
-
-        elif action == 'removed':
-            # Remove vote
-            if existing_vote:
-                db.session.delete(existing_vote)
-
-        elif action == 'changed':
-            # Change vote type
-            if existing_vote:
-                existing_vote.vote_type = vote_type
-            else:
-                # Vote doesn't exist - create it
-                vote = Vote(user_id=user_id, project_id=project_id, vote_type=vote_type)
-                db.session.add(vote)
-                vote_created = True
-
-        # 4. Log event to vote_events table
-        try:
-            from sqlalchemy import text
-            db.session.execute(text("""
-                INSERT INTO vote_events (request_id, user_id, project_id, vote_type, action)
-                VALUES (:request_id, :user_id, :project_id, :vote_type, :action)
-            """), {
-                'request_id': request_id,
-                'user_id': user_id,
-                'project_id': project_id,
-                'vote_type': vote_type,
-                'action': action
-            })
-        except Exception as e:
-            print(f"[VoteTask] Warning: Failed to log event: {e}")
-            # Non-critical
-
-        # 5. Commit votes table changes
-        db.session.commit()
-
-        # 6. Update request status in Redis
-        vote_service.update_request_status(
-            request_id,
-            status='completed',
-            reconciled=reconciliation_needed
-        )
-
-        # 7. Send notification to project/itinerary owner (only on new vote creation)
-        if vote_created and action == 'created':
-            try:
-                from utils.notifications import notify_project_vote
-                from utils.content_utils import get_content_by_id
-                from models.traveler import Traveler
+        # 2. Apply vote + event + counters (commits; skipped if already applied)
+        result = VoteStreamWorker.apply_events([{
+            'request_id': request_id,
+            'user_id': user_id,
+            'project_id': project_id,
+            'vote_type': vote_type,
+            'action': action
+        }])
 
-                voter = User.query.get(user_id) or Traveler.query.get(user_id)
-                content = get_content_by_id(project_id)
+        reconciliation_needed = reconciliation_needed and not result['skipped']
 
-                if voter and content:
-                    # Get owner ID - works for both Project (user_id) and Itinerary (created_by_traveler_id)
-                    owner_id = getattr(content, 'user_id', None) or getattr(content, 'created_by_traveler_id', None)
-                    if owner_id and owner_id != user_id:
-                        notify_project_vote(owner_id, content, voter, vote_type)
-            except Exception as e:
-                print(f"[VoteTask] Warning: Notification failed: {e}")
-                # Non-critical
+        # 3. Update request status in Redis + notify owner on new votes
+        VoteStreamWorker(vote_service).after_commit(result)
+        if reconciliation_needed:
+            vote_service.update_request_status(request_id, status='completed', reconciled=True)
 
-        # 8. Update task metrics
         latency_ms = (time.time() - start_time) * 1000
 
         return {
             'success': True,
             'request_id': request_id,
             'project_id': project_id,
+            'already_applied': bool(result['skipped']),
             'reconciliation_needed': reconciliation_needed,
             'latency_ms': round(latency_ms, 2)
         }
@@ -178,12 +106,17 @@ def process_vote_event(
 @celery.task(bind=True, name='sync_votes_to_db')
 def sync_votes_to_db(self):
     """
-    Periodic task to sync Redis vote counts to PostgreSQL
+    Periodic task to refresh scores and Redis counts for voted content
 
-    FIXED: Now recalculates from votes table (source of truth) instead of
-    blindly copying Redis counts. This ensures eventual consistency even if
-    Redis data becomes stale or incorrect.
+    Stored upvotes/downvotes are kept current by VoteStreamWorker (incremental
+    deltas per micro-batch), so this no longer recounts the votes table. It
+    recalculates scores for changed content and, once the stream is fully
+    applied, overwrites the Redis counts with the stored ones.
     """
+    from sqlalchemy import text
+    from services.content_index import ContentIndexService
+    from workers.vote_stream_worker import VoteStreamWorker
+
     start_time = time.time()
     vote_service = VoteService()
 
@@ -194,73 +127,54 @@ def sync_votes_to_db(self):
         if not changed_posts:
             return {'success': True, 'synced': 0}
 
-        # 2. For each changed project, recalculate from votes table
+        # Redis counts include votes still in the stream; don't overwrite them with lagging DB counts
+        stream_drained = VoteStreamWorker(vote_service).backlog() == 0
+
         synced_count = 0
         failed_projects = []
 
         for project_id in changed_posts:
             try:
-                # FIXED: Count from votes table (source of truth)
-                from sqlalchemy import func, text
-                upvotes_count = db.session.query(func.count(Vote.id))\
-                    .filter(Vote.project_id == project_id, Vote.vote_type == 'up').scalar() or 0
-                downvotes_count = db.session.query(func.count(Vote.id))\
-                    .filter(Vote.project_id == project_id, Vote.vote_type == 'down').scalar() or 0
-
-                # 3. Update project/itinerary in DB with raw SQL - try both tables
-                result_projects = db.session.execute(text("""
-                    UPDATE projects
-                    SET upvotes = :upvotes,
-                        downvotes = :downvotes
-                    WHERE id = :project_id
-                """), {
-                    'upvotes': upvotes_count,
-                    'downvotes': downvotes_count,
-                    'project_id': project_id
-                })
-
-                result_itineraries = db.session.execute(text("""
-                    UPDATE itineraries
-                    SET upvotes = :upvotes,
-                        downvotes = :downvotes
-                    WHERE id = :project_id
-                """), {
-                    'upvotes': upvotes_count,
-                    'downvotes': downvotes_count,
-                    'project_id': project_id
-                })
+                # 2. Read stored counts - table resolved via content_index
+                content_type = ContentIndexService.content_type_of(project_id)
+                tables = {'project': ['projects'], 'itinerary': ['itineraries']}.get(
+                    content_type, ['itineraries', 'projects']
+                )
+
+                row = None
+                for table in tables:
+                    row = db.session.execute(text(f"""
+                        SELECT upvotes, downvotes FROM {table} WHERE id = :project_id
+                    """), {'project_id': project_id}).first()
+                    if row:
+                        break
+
+                if not row:
+                    continue
 
-                result = result_projects if result_projects.rowcount > 0 else result_itineraries
+                # 3. Recalculate community score + total score
+                # Counter updates are raw SQL, which bypasses event listeners
+                from utils.content_utils import get_content_by_id
+                content = get_content_by_id(project_id)
 
-                # 3.5. CRITICAL: Recalculate community score + total score after raw SQL update
-                # Raw SQL bypasses event listeners, so we must manually update scores
-                if result.rowcount > 0:
-                    # Expire session to fetch fresh data after raw SQL
-                    db.session.expire_all()
-
-                    # Try to find as Project first, then as Itinerary
-                    from utils.content_utils import get_content_by_id
-                    content = get_content_by_id(project_id)
-
-                    if content and isinstance(content, Project):
-                        from models.event_listeners import update_project_community_score
-                        update_project_community_score(content)
-                        db.session.add(content)
-                    elif content:
-                        # It's an Itinerary - trigger full scoring calculation
-                        from models.itinerary import Itinerary
-                        if isinstance(content, Itinerary):
-                            # Queue full scoring task to recalculate all components
-                            from tasks.scoring_tasks import score_itinerary_task
-                            score_itinerary_task.delay(project_id)
-
-                # 4. Update Redis to match votes table truth
-                if result.rowcount > 0:
+                if content and isinstance(content, Project):
+                    from models.event_listeners import update_project_community_score
+                    update_project_community_score(content)
+                    db.session.add(content)
+                elif content:
+                    # It's an Itinerary - trigger full scoring calculation
+                    from models.itinerary import Itinerary
+                    if isinstance(content, Itinerary):
+                        # Queue full scoring task to recalculate all components
+                        from tasks.scoring_tasks import score_itinerary_task
+                        score_itinerary_task.delay(project_id)
+
+                # 4. Update Redis to match the stored counts
+                if stream_drained:
                     key = vote_service.KEY_VOTE_STATE.format(project_id=project_id)
-                    vote_service.redis.hset(key, 'upvotes', upvotes_count)
-                    vote_service.redis.hset(key, 'downvotes', downvotes_count)
+                    vote_service.redis.hset(key, values={'upvotes': row[0] or 0, 'downvotes': row[1] or 0})
                     vote_service.redis.expire(key, vote_service.STATE_TTL)
-                    synced_count += 1
+                synced_count += 1
 
             except Exception as e:
                 print(f"[VoteSync] Error syncing {project_id}: {e}")
@@ -284,6 +198,7 @@ def sync_votes_to_db(self):
             'success': True,
             'synced': synced_count,
             'failed': len(failed_projects),
+            'redis_overwritten': stream_drained,
             'latency_ms': round(latency_ms, 2)
         }
 
@@ -427,6 +342,8 @@ def reconcile_all_vote_counts(self, batch_size=100):
                     'downvotes': downvotes_count,
                     'project_id': project_id
                 })
+                from services.content_index import ContentIndexService
+                ContentIndexService.update_counts(project_id, upvotes=upvotes_count, downvotes=downvotes_count)
 
                 # CRITICAL: Recalculate community score + total score after raw SQL update
                 # Raw SQL bypasses event listeners, so we must manually update scores
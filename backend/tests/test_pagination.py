@@ -0,0 +1,149 @@
+"""
+Tests for keyset cursor pagination (utils.pagination)
+"""
+from datetime import date, datetime, timedelta
+
+import pytest
+from flask import Flask
+from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy.orm import declarative_base
+
+from config import config
+from extensions import db
+from utils.pagination import CursorError, SortKey, decode_cursor, encode_cursor, keyset_paginate
+
+Base = declarative_base()
+
+
+class Row(Base):
+    """Throwaway table with a sort key full of ties"""
+    __tablename__ = 'pagination_rows'
+
+    id = Column(String(8), primary_key=True)
+    score = Column(Integer, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+
+
+BASE_TIME = datetime(2024, 1, 1, 12, 0, 0)
+
+# Scores repeat so pages have to break ties on created_at / id
+ROWS = [
+    ('a', 10, 0), ('b', 10, 0), ('c', 10, 1), ('d', 7, 2), ('e', 7, 2),
+    ('f', 7, 2), ('g', None, 3), ('h', 3, 3), ('i', None, 4), ('j', 3, 5),
+]
+
+
+@pytest.fixture(scope='module')
+def app():
+    """Test app with only the pagination_rows table"""
+    app = Flask(__name__)
+    app.config.from_object(config['testing'])
+    db.init_app(app)
+
+    with app.app_context():
+        Base.metadata.create_all(db.engine)
+        db.session.add_all([
+            Row(id=row_id, score=score, created_at=BASE_TIME + timedelta(minutes=minutes))
+            for row_id, score, minutes in ROWS
+        ])
+        db.session.commit()
+        yield app
+        db.session.remove()
+        Base.metadata.drop_all(db.engine)
+
+
+@pytest.fixture(autouse=True)
+def clean_db(app):
+    """Rows are read-only here; just reset the session between tests"""
+    with app.app_context():
+        yield
+        db.session.rollback()
+
+
+def walk(keys, per_page, scope='rows'):
+    """Follow next_cursor to the end and return every id in page order"""
+    seen, cursor = [], ''
+    while True:
+        items, cursor = keyset_paginate(db.session.query(Row), keys, cursor, per_page, scope)
+        seen.extend(item.id for item in items)
+        if cursor is None:
+            return seen
+
+
+def expected(sort):
+    with_defaults = [(row_id, -1 if score is None else score, minutes) for row_id, score, minutes in ROWS]
+    return [row_id for row_id, _, _ in sorted(with_defaults, key=sort)]
+
+
+class TestCursorEncoding:
+    """Test cursor encode / decode"""
+
+    def test_round_trip(self):
+        """Test datetimes, dates, numbers and strings survive a round trip"""
+        values = [datetime(2024, 5, 6, 7, 8, 9, 123456), date(2024, 5, 6), 42, 1.5, 'abc', None]
+
+        cursor = encode_cursor(values, 'feed:new')
+
+        assert '=' not in cursor
+        assert decode_cursor(cursor, len(values), 'feed:new') == values
+
+    def test_cursor_from_another_scope_rejected(self):
+        """Test a cursor only decodes for the listing that issued it"""
+        cursor = encode_cursor([10, 'a'], 'projects:top')
+
+        with pytest.raises(CursorError):
+            decode_cursor(cursor, 2, 'projects:new')
+        with pytest.raises(CursorError):
+            decode_cursor(cursor, 2)
+
+    def test_wrong_key_count_rejected(self):
+        """Test a cursor with a different number of key values is rejected"""
+        cursor = encode_cursor([10, 'a'], 'rows')
+
+        with pytest.raises(CursorError):
+            decode_cursor(cursor, 3, 'rows')
+
+    @pytest.mark.parametrize('cursor', ['not-base64!', 'e30', encode_cursor([{'$x': 1}], 'rows')])
+    def test_malformed_cursor_rejected(self, cursor):
+        """Test garbage, missing values and unknown tagged values raise CursorError"""
+        with pytest.raises(CursorError):
+            decode_cursor(cursor, 1, 'rows')
+
+
+class TestKeysetPaginate:
+    """Test page walks over a sort key with ties"""
+
+    @pytest.mark.parametrize('per_page', [1, 2, 3, 4, 10])
+    def test_descending_with_ties(self, app, per_page):
+        """Test (score DESC, id DESC) visits every row once in order"""
+        keys = [SortKey(Row.score, default=-1), SortKey(Row.id)]
+
+        assert walk(keys, per_page) == expected(lambda r: (-r[1], [-ord(c) for c in r[0]]))
+
+    @pytest.mark.parametrize('per_page', [1, 2, 3, 4])
+    def test_mixed_directions_with_ties(self, app, per_page):
+        """Test (score DESC, created_at ASC, id ASC) visits every row once in order"""
+        keys = [
+            SortKey(Row.score, default=-1),
+            SortKey(Row.created_at, descending=False),
+            SortKey(Row.id, descending=False),
+        ]
+
+        assert walk(keys, per_page) == expected(lambda r: (-r[1], r[2], r[0]))
+
+    def test_last_page_has_no_cursor(self, app):
+        """Test next_cursor is None once the rows run out"""
+        keys = [SortKey(Row.score, default=-1), SortKey(Row.id)]
+
+        items, cursor = keyset_paginate(db.session.query(Row), keys, '', len(ROWS), 'rows')
+
+        assert len(items) == len(ROWS)
+        assert cursor is None
+
+    def test_cursor_from_another_listing_rejected(self, app):
+        """Test keyset_paginate refuses a cursor issued under another scope"""
+        keys = [SortKey(Row.score, default=-1), SortKey(Row.id)]
+        _, cursor = keyset_paginate(db.session.query(Row), keys, '', 2, 'rows')
+
+        with pytest.raises(CursorError):
+            keyset_paginate(db.session.query(Row), keys, cursor, 2, 'other')
@@ -0,0 +1,178 @@
+"""
+Tests for TripEconomy (ledger-backed TRIP balances)
+"""
+import pytest
+from flask import Flask
+from sqlalchemy import text
+
+from config import config
+from extensions import db
+from models.trip_ledger import TripBalanceSnapshot, TripLedgerEntry
+from utils.trip_economy import TripEconomy
+
+TABLES = [TripLedgerEntry.__table__, TripBalanceSnapshot.__table__]
+
+
+@pytest.fixture(scope='module')
+def app():
+    """Test app with the ledger tables and a travelers table holding only the TRIP totals"""
+    app = Flask(__name__)
+    app.config.from_object(config['testing'])
+    db.init_app(app)
+
+    with app.app_context():
+        db.session.execute(text(
+            "CREATE TABLE travelers (id VARCHAR(36) PRIMARY KEY, trip_token_balance FLOAT, "
+            "trip_earnings_total FLOAT, trip_spent_total FLOAT, updated_at DATETIME)"
+        ))
+        db.metadata.create_all(db.engine, tables=TABLES)
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.metadata.drop_all(db.engine, tables=TABLES)
+        db.session.execute(text("DROP TABLE travelers"))
+        db.session.commit()
+
+
+@pytest.fixture(autouse=True)
+def clean_db(app):
+    """Empty ledger and two travelers (t1, t2) with no TRIP"""
+    with app.app_context():
+        db.session.execute(text("DELETE FROM trip_balance_snapshots"))
+        db.session.execute(text("DELETE FROM trip_ledger"))
+        db.session.execute(text("DELETE FROM travelers"))
+        db.session.execute(text(
+            "INSERT INTO travelers (id, trip_token_balance, trip_earnings_total, trip_spent_total) "
+            "VALUES ('t1', 0, 0, 0), ('t2', 0, 0, 0)"
+        ))
+        db.session.commit()
+        yield
+        db.session.rollback()
+
+
+def ledger_rows(traveler_id=None):
+    query = TripLedgerEntry.query.order_by(TripLedgerEntry.id)
+    if traveler_id:
+        query = query.filter(TripLedgerEntry.traveler_id == traveler_id)
+    return query.all()
+
+
+class TestSpend:
+    """Test the conditional debit"""
+
+    def test_overdraft_rejected(self, app):
+        """Test a spend larger than the balance changes nothing"""
+        TripEconomy.award_trip('t1', TripEconomy.TransactionType.SNAP_POST, reference_id='snap-1')
+
+        result = TripEconomy.spend_trip('t1', TripEconomy.TransactionType.PREMIUM_INTRO)
+
+        assert result['success'] is False
+        assert 'Insufficient' in result['error']
+        assert result['new_balance'] == 2
+        assert TripEconomy.get_balance('t1') == {'balance': 2, 'total_earned': 2, 'total_spent': 0, 'net_earnings': 2}
+        assert [row.entry_type for row in ledger_rows('t1')] == ['earn']
+
+    def test_spend_within_balance(self, app):
+        """Test a covered spend deducts and appends a negative entry"""
+        TripEconomy.award_trip('t1', TripEconomy.TransactionType.VERIFIED_ITINERARY, reference_id='it-1')
+
+        result = TripEconomy.spend_trip('t1', TripEconomy.TransactionType.BOOST_VISIBILITY, reference_id='it-1')
+
+        assert result['success'] is True
+        assert result['new_balance'] == 40
+        spend = ledger_rows('t1')[-1]
+        assert (spend.entry_type, spend.amount, spend.balance_after) == ('spend', -10, 40)
+
+
+class TestAwardIdempotency:
+    """Test awards are applied once per idempotency key"""
+
+    def test_duplicate_award_rejected(self, app):
+        """Test awarding the same contribution twice credits it once"""
+        first = TripEconomy.award_trip('t1', TripEconomy.TransactionType.SAFETY_RATING, reference_id='rating-1')
+        second = TripEconomy.award_trip('t1', TripEconomy.TransactionType.SAFETY_RATING, reference_id='rating-1')
+
+        assert first['success'] is True
+        assert second['success'] is False
+        assert second['duplicate'] is True
+        assert second['new_balance'] == 5
+        assert TripEconomy.get_balance('t1')['balance'] == 5
+        assert len(ledger_rows('t1')) == 1
+
+    def test_batch_skips_applied_keys(self, app):
+        """Test award_trip_many skips keys already in the ledger and repeated in the batch"""
+        TripEconomy.award_trip('t1', TripEconomy.TransactionType.TRAVEL_INTEL, reference_id='intel-1')
+
+        result = TripEconomy.award_trip_many([
+            {'traveler_id': 't1', 'transaction_type': TripEconomy.TransactionType.TRAVEL_INTEL, 'reference_id': 'intel-1'},
+            {'traveler_id': 't1', 'transaction_type': TripEconomy.TransactionType.TRAVEL_INTEL, 'reference_id': 'intel-2'},
+            {'traveler_id': 't1', 'transaction_type': TripEconomy.TransactionType.TRAVEL_INTEL, 'reference_id': 'intel-2'},
+            {'traveler_id': 't2', 'transaction_type': TripEconomy.TransactionType.TRAVEL_INTEL, 'reference_id': 'intel-2'},
+        ])
+
+        assert result['success'] is True
+        assert (result['awarded'], result['skipped']) == (2, 2)
+        assert TripEconomy.get_balance('t1')['balance'] == 20
+        assert TripEconomy.get_balance('t2')['balance'] == 10
+
+
+class TestTransfer:
+    """Test transfers move TRIP as one paired change"""
+
+    def test_debit_and_credit_paired(self, app):
+        """Test both sides share a transfer_id and net to zero"""
+        TripEconomy.award_trip('t2', TripEconomy.TransactionType.VERIFIED_ITINERARY, reference_id='it-1')
+
+        result = TripEconomy.transfer_trip('t2', 't1', 15, reference_id='it-9')
+
+        assert result['success'] is True
+        assert (result['sender_balance'], result['recipient_balance']) == (35, 15)
+
+        sides = TripLedgerEntry.query.filter(TripLedgerEntry.transfer_id.isnot(None)).all()
+        assert len(sides) == 2
+        assert sides[0].transfer_id == sides[1].transfer_id
+        assert {(row.traveler_id, row.entry_type, row.amount) for row in sides} == {
+            ('t2', 'spend', -15), ('t1', 'earn', 15)
+        }
+        assert sum(row.amount for row in sides) == 0
+
+    def test_overdrawn_transfer_leaves_both_sides_untouched(self, app):
+        """Test a transfer the sender can't cover credits nobody"""
+        result = TripEconomy.transfer_trip('t2', 't1', 15)
+
+        assert result['success'] is False
+        assert TripEconomy.get_balance('t1')['balance'] == 0
+        assert TripEconomy.get_balance('t2')['balance'] == 0
+        assert ledger_rows() == []
+
+
+class TestSnapshotBalances:
+    """Test snapshot_balances compares stored totals with the ledger"""
+
+    def test_consistent_balances_have_no_drift(self, app):
+        """Test ledger-backed changes snapshot with zero drift"""
+        TripEconomy.award_trip('t1', TripEconomy.TransactionType.VERIFIED_ITINERARY, reference_id='it-1')
+        TripEconomy.transfer_trip('t1', 't2', 20)
+
+        assert TripEconomy.snapshot_balances() == {'checked': 2, 'drifted': 0}
+        assert {row.drift for row in TripBalanceSnapshot.query.all()} == {0}
+
+    def test_drift_detected(self, app):
+        """Test a balance changed outside the ledger is reported as drift"""
+        TripEconomy.award_trip('t1', TripEconomy.TransactionType.VERIFIED_ITINERARY, reference_id='it-1')
+        TripEconomy.award_trip('t2', TripEconomy.TransactionType.SNAP_POST, reference_id='snap-1')
+        db.session.execute(text("UPDATE travelers SET trip_token_balance = trip_token_balance + 7 WHERE id = 't1'"))
+        db.session.commit()
+
+        assert TripEconomy.snapshot_balances() == {'checked': 2, 'drifted': 1}
+        snapshot = TripBalanceSnapshot.query.filter_by(traveler_id='t1').one()
+        assert (snapshot.balance, snapshot.ledger_balance, snapshot.drift) == (57, 50, 7)
+
+    def test_only_new_activity_checked(self, app):
+        """Test later snapshots cover only travelers with new ledger entries unless full"""
+        TripEconomy.award_trip('t1', TripEconomy.TransactionType.SNAP_POST, reference_id='snap-1')
+        TripEconomy.snapshot_balances()
+        TripEconomy.award_trip('t2', TripEconomy.TransactionType.SNAP_POST, reference_id='snap-2')
+
+        assert TripEconomy.snapshot_balances() == {'checked': 1, 'drifted': 0}
+        assert TripEconomy.snapshot_balances(full=True) == {'checked': 2, 'drifted': 0}
@@ -0,0 +1,271 @@
+"""
+Tests for VoteStreamWorker.apply_events (vote stream -> votes table)
+"""
+import pytest
+from flask import Flask
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from config import config
+from extensions import db
+
+
+@pytest.fixture(scope='module')
+def app():
+    """Test app with only the tables apply_events touches"""
+    from models.vote import Vote
+    from models.vote_event import VoteEvent
+
+    app = Flask(__name__)
+    app.config.from_object(config['testing'])
+    db.init_app(app)
+
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=[Vote.__table__, VoteEvent.__table__])
+        db.session.execute(text(
+            "CREATE TABLE projects (id VARCHAR(36) PRIMARY KEY, upvotes INTEGER, downvotes INTEGER)"
+        ))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.session.execute(text("DROP TABLE projects"))
+        db.metadata.drop_all(db.engine, tables=[Vote.__table__, VoteEvent.__table__])
+
+
+@pytest.fixture(autouse=True)
+def clean_db(app, monkeypatch):
+    """Fresh votes/events and one project with no votes"""
+    from services.content_index import ContentIndexService
+
+    monkeypatch.setattr(ContentIndexService, 'content_type_of', staticmethod(lambda content_id: 'project'))
+    monkeypatch.setattr(ContentIndexService, 'update_counts', staticmethod(lambda *args, **kwargs: None))
+
+    with app.app_context():
+        db.session.execute(text("DELETE FROM votes"))
+        db.session.execute(text("DELETE FROM vote_events"))
+        db.session.execute(text("DELETE FROM projects"))
+        db.session.execute(text("INSERT INTO projects (id, upvotes, downvotes) VALUES ('p1', 0, 0)"))
+        db.session.commit()
+        yield
+        db.session.rollback()
+
+
+def make_event(request_id, user_id, vote_type, action, project_id='p1'):
+    return {
+        'request_id': request_id,
+        'user_id': user_id,
+        'project_id': project_id,
+        'vote_type': vote_type,
+        'action': action
+    }
+
+
+class StubRedis:
+    """Records the stream commands _process issues"""
+
+    def __init__(self):
+        self.acked = []
+        self.dead = []
+
+    def xack(self, stream, group, *ids):
+        self.acked.extend(ids)
+
+    def xadd(self, stream, entry_id, fields):
+        self.dead.append(fields)
+
+    def pipeline(self):
+        return self
+
+    def hset(self, key, values=None):
+        return self
+
+    def exec(self):
+        return []
+
+
+class StubVoteService:
+    def __init__(self):
+        self.redis = StubRedis()
+        self.failed = []
+
+    def update_request_status(self, request_id, status, error=None):
+        self.failed.append(request_id)
+
+
+def make_worker():
+    from workers.vote_stream_worker import VoteStreamWorker
+    return VoteStreamWorker(vote_service=StubVoteService(), consumer='test')
+
+
+def new_stats():
+    return {'read': 0, 'applied': 0, 'skipped': 0, 'dead': 0, 'batches': 0}
+
+
+def stored_counts():
+    return tuple(db.session.execute(text("SELECT upvotes, downvotes FROM projects WHERE id = 'p1'")).first())
+
+
+def user_votes():
+    from models.vote import Vote
+    return {vote.user_id: vote.vote_type for vote in Vote.query.all()}
+
+
+class TestApplyEvents:
+    """Test applying vote events to votes and stored counters"""
+
+    def test_new_votes_move_counts(self, app):
+        """Test created votes are inserted and counted"""
+        from workers.vote_stream_worker import VoteStreamWorker
+
+        with app.app_context():
+            result = VoteStreamWorker.apply_events([
+                make_event('r1', 'u1', 'up', 'created'),
+                make_event('r2', 'u2', 'down', 'created'),
+            ])
+
+            assert len(result['applied']) == 2
+            assert result['counts'] == {'p1': (1, 1)}
+            assert stored_counts() == (1, 1)
+            assert user_votes() == {'u1': 'up', 'u2': 'down'}
+
+    def test_duplicate_request_id_skipped(self, app):
+        """Test a request_id is applied once, within a batch and across batches"""
+        from models.vote_event import VoteEvent
+        from workers.vote_stream_worker import VoteStreamWorker
+
+        with app.app_context():
+            result = VoteStreamWorker.apply_events([
+                make_event('r1', 'u1', 'up', 'created'),
+                make_event('r1', 'u1', 'up', 'created'),
+            ])
+            assert len(result['applied']) == 1
+            assert result['skipped'] == 1
+
+            replayed = VoteStreamWorker.apply_events([make_event('r1', 'u1', 'up', 'created')])
+            assert replayed['applied'] == []
+            assert replayed['skipped'] == 1
+
+            assert VoteEvent.query.count() == 1
+            assert stored_counts() == (1, 0)
+
+    def test_same_user_and_item_in_one_batch(self, app):
+        """Test the last event per (user, item) wins and counts move by the net change"""
+        from models.vote_event import VoteEvent
+        from workers.vote_stream_worker import VoteStreamWorker
+
+        with app.app_context():
+            result = VoteStreamWorker.apply_events([
+                make_event('r1', 'u1', 'up', 'created'),
+                make_event('r2', 'u1', 'down', 'changed'),
+                make_event('r3', 'u2', 'up', 'created'),
+                make_event('r4', 'u2', 'up', 'removed'),
+            ])
+
+            assert len(result['applied']) == 4
+            assert VoteEvent.query.count() == 4
+            assert user_votes() == {'u1': 'down'}
+            assert stored_counts() == (0, 1)
+            assert result['created'] == [('u1', 'p1', 'down')]
+
+    def test_up_to_down_delta(self, app):
+        """Test changing an existing upvote to a downvote moves both counters"""
+        from workers.vote_stream_worker import VoteStreamWorker
+
+        with app.app_context():
+            VoteStreamWorker.apply_events([
+                make_event('r1', 'u1', 'up', 'created'),
+                make_event('r2', 'u2', 'up', 'created'),
+            ])
+            assert stored_counts() == (2, 0)
+
+            result = VoteStreamWorker.apply_events([make_event('r3', 'u1', 'down', 'changed')])
+
+            assert result['counts'] == {'p1': (1, 1)}
+            assert stored_counts() == (1, 1)
+            assert user_votes() == {'u1': 'down', 'u2': 'up'}
+            assert result['created'] == []
+
+    def test_up_to_removed_delta(self, app):
+        """Test removing an existing upvote only decrements upvotes"""
+        from workers.vote_stream_worker import VoteStreamWorker
+
+        with app.app_context():
+            VoteStreamWorker.apply_events([
+                make_event('r1', 'u1', 'up', 'created'),
+                make_event('r2', 'u2', 'down', 'created'),
+            ])
+
+            result = VoteStreamWorker.apply_events([make_event('r3', 'u1', 'up', 'removed')])
+
+            assert result['counts'] == {'p1': (0, 1)}
+            assert stored_counts() == (0, 1)
+            assert user_votes() == {'u2': 'down'}
+
+    def test_repeated_target_state_is_noop(self, app):
+        """Test an event matching the stored vote records the request but leaves counts alone"""
+        from models.vote_event import VoteEvent
+        from workers.vote_stream_worker import VoteStreamWorker
+
+        with app.app_context():
+            VoteStreamWorker.apply_events([make_event('r1', 'u1', 'up', 'created')])
+            result = VoteStreamWorker.apply_events([make_event('r2', 'u1', 'up', 'changed')])
+
+            assert len(result['applied']) == 1
+            assert result['counts'] == {}
+            assert VoteEvent.query.count() == 2
+            assert stored_counts() == (1, 0)
+
+
+class TestProcessConflicts:
+    """Test _process against unique-key conflicts from concurrent writers"""
+
+    def test_conflict_with_concurrent_writer_is_retried(self, app, monkeypatch):
+        """Test an event the fallback path applied first is skipped and acked, not dead-lettered"""
+        from workers.vote_stream_worker import VoteStreamWorker
+
+        real_apply = VoteStreamWorker.apply_events
+        calls = []
+
+        def racing_apply(events):
+            calls.append(len(events))
+            if len(calls) == 1:
+                # process_vote_event commits the same request between our read and our commit
+                real_apply([make_event('r1', 'u1', 'up', 'created')])
+                raise IntegrityError('INSERT INTO vote_events', {}, Exception('duplicate request_id'))
+            return real_apply(events)
+
+        monkeypatch.setattr(VoteStreamWorker, 'apply_events', staticmethod(racing_apply))
+        worker = make_worker()
+        stats = new_stats()
+
+        with app.app_context():
+            worker._process([
+                ('1-0', make_event('r1', 'u1', 'up', 'created')),
+                ('2-0', make_event('r2', 'u2', 'up', 'created')),
+            ], stats)
+
+            assert calls == [2, 2]
+            assert worker.redis.acked == ['1-0', '2-0']
+            assert worker.redis.dead == []
+            assert worker.vote_service.failed == []
+            assert stats['applied'] == 1 and stats['skipped'] == 1 and stats['dead'] == 0
+            assert stored_counts() == (2, 0)
+
+    def test_repeated_integrity_error_dead_letters_the_entry(self, app, monkeypatch):
+        """Test an entry that conflicts on every attempt is isolated and dead-lettered"""
+        from workers.vote_stream_worker import VoteStreamWorker
+
+        def broken_apply(events):
+            raise IntegrityError('INSERT INTO votes', {}, Exception('constraint failed'))
+
+        monkeypatch.setattr(VoteStreamWorker, 'apply_events', staticmethod(broken_apply))
+        worker = make_worker()
+        stats = new_stats()
+
+        with app.app_context():
+            worker._process([('1-0', make_event('r1', 'u1', 'up', 'created'))], stats)
+
+            assert worker.redis.acked == ['1-0']
+            assert len(worker.redis.dead) == 1
+            assert worker.vote_service.failed == ['r1']
+            assert stats['dead'] == 1
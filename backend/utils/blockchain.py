@@ -1,11 +1,11 @@
 """
 Blockchain utilities for 0xCerts verification
 """
-from web3 import Web3
 from flask import current_app
 import json
-import requests
-from typing import Optional
+from typing import Dict, Iterable, Optional
+
+from utils.chain_reader import ChainReader
 
 
 class BlockchainService:
@@ -45,98 +45,78 @@ class BlockchainService:
     ]
     ''')
 
+    @staticmethod
+    def get_rpc_url() -> str:
+        return current_app.config['KAIA_TESTNET_RPC']
+
     @staticmethod
     def get_web3_instance():
-        """Get Web3 instance"""
-        rpc_url = current_app.config['KAIA_TESTNET_RPC']
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
-        return w3
+        """Get Web3 instance (shared per process)"""
+        return ChainReader.web3(BlockchainService.get_rpc_url())
+
+    @staticmethod
+    def get_contract(contract_address: str):
+        """ERC721 contract instance on the shared provider"""
+        w3 = BlockchainService.get_web3_instance()
+        return w3.eth.contract(
+            address=BlockchainService.normalize_address(contract_address),
+            abi=BlockchainService.ERC721_ABI
+        )
 
     @staticmethod
     def is_valid_address(address: str) -> bool:
         """Validate Ethereum address"""
         if not address or not address.startswith('0x'):
             return False
+        from web3 import Web3
         return Web3.is_address(address)
 
     @staticmethod
     def normalize_address(address: str) -> str:
         """Normalize address to checksum format"""
+        from web3 import Web3
         return Web3.to_checksum_address(address)
 
     @staticmethod
     def fetch_nft_metadata(token_uri: str) -> Optional[dict]:
         """
-        Fetch NFT metadata from token URI
+        Fetch NFT metadata from token URI (cached by URI)
         """
-        try:
-            # Handle IPFS URIs
-            if token_uri.startswith('ipfs://'):
-                token_uri = token_uri.replace('ipfs://', 'https://ipfs.io/ipfs/')
-
-            response = requests.get(token_uri, timeout=10)
-            if response.status_code == 200:
-                return response.json()
-            return None
-        except Exception as e:
-            print(f"Error fetching NFT metadata: {str(e)}")
-            return None
+        return ChainReader.fetch_metadata(token_uri)
 
     @staticmethod
-    def get_nft_details(wallet_address: str, contract_address: str, token_id: int) -> dict:
+    def get_nft_details(wallet_address: str, contract_address: str, token_id: int,
+                        token_uri: Optional[str] = None) -> dict:
         """
         Get detailed NFT information including metadata and transaction
         """
-        try:
-            w3 = BlockchainService.get_web3_instance()
-            contract = w3.eth.contract(
-                address=BlockchainService.normalize_address(contract_address),
-                abi=BlockchainService.ERC721_ABI
-            )
-
-            # Get token URI
+        if token_uri is None:
             try:
-                token_uri = contract.functions.tokenURI(token_id).call()
-                metadata = BlockchainService.fetch_nft_metadata(token_uri)
+                token_uri = BlockchainService.get_contract(contract_address).functions.tokenURI(token_id).call()
             except Exception:
                 token_uri = None
-                metadata = None
 
-            # Try to find the most recent transfer event for this token
-            # This is a simplified approach - in production you might want to use event logs
-            tx_hash = None
-            try:
-                # Get recent blocks to search for transfer events
-                current_block = w3.eth.block_number
-                # Search last 1000 blocks (adjust based on your needs)
-                from_block = max(0, current_block - 1000)
-
-                # This is a placeholder - actual implementation would query Transfer events
-                # For now, we'll return None and let frontend handle it
-                tx_hash = None
-            except Exception:
-                tx_hash = None
-
-            return {
-                'token_id': token_id,
-                'token_uri': token_uri,
-                'metadata': metadata,
-                'tx_hash': tx_hash,
-                'explorer_url': f"https://kairos.kaiascan.io/token/{contract_address}?a={token_id}"
-            }
+        return {
+            'token_id': token_id,
+            'token_uri': token_uri,
+            'metadata': BlockchainService.fetch_nft_metadata(token_uri) if token_uri else None,
+            # Transfer-event lookup not implemented; frontend handles a missing hash
+            'tx_hash': None,
+            'explorer_url': f"https://kairos.kaiascan.io/token/{contract_address}?a={token_id}"
+        }
 
-        except Exception as e:
-            print(f"Error getting NFT details: {str(e)}")
-            return {
-                'token_id': token_id,
-                'token_uri': None,
-                'metadata': None,
-                'tx_hash': None,
-                'explorer_url': f"https://kairos.kaiascan.io/token/{contract_address}?a={token_id}"
-            }
+    @staticmethod
+    def _ownership_error(error: str) -> dict:
+        return {
+            'has_cert': False,
+            'balance': 0,
+            'token_id': None,
+            'nft_details': None,
+            'error': error
+        }
 
     @staticmethod
-    def check_oxcert_ownership(wallet_address: str) -> dict:
+    def check_oxcert_ownership(wallet_address: str, use_cache: bool = True) -> dict:
         """
         Check if address owns 0xCert NFT
         Returns: {
@@ -147,87 +127,109 @@ class BlockchainService:
             'error': str or None
         }
         """
-        try:
-            if not BlockchainService.is_valid_address(wallet_address):
-                return {
-                    'has_cert': False,
-                    'balance': 0,
-                    'token_id': None,
-                    'nft_details': None,
-                    'error': 'Invalid wallet address'
-                }
+        return BlockchainService.check_oxcert_ownership_many([wallet_address], use_cache)[wallet_address]
 
-            w3 = BlockchainService.get_web3_instance()
-            contract_address = current_app.config['OXCERTS_CONTRACT_ADDRESS']
+    @staticmethod
+    def check_oxcert_ownership_many(wallet_addresses: Iterable[str], use_cache: bool = True) -> Dict[str, dict]:
+        """
+        0xCert ownership for many wallets at once
 
-            if not BlockchainService.is_valid_address(contract_address):
-                return {
-                    'has_cert': False,
-                    'balance': 0,
-                    'token_id': None,
-                    'nft_details': None,
-                    'error': 'Invalid contract address configured'
-                }
+        Uncached wallets are read in two batched rounds (balanceOf +
+        tokenOfOwnerByIndex, then tokenURI for holders), pinned to one block.
+        Results are cached per wallet for CHAIN_OWNERSHIP_CACHE_SECONDS.
 
-            # Create contract instance
-            contract = w3.eth.contract(
-                address=BlockchainService.normalize_address(contract_address),
-                abi=BlockchainService.ERC721_ABI
-            )
+        Returns:
+            {wallet_address: check_oxcert_ownership result}
+        """
+        wallet_addresses = list(dict.fromkeys(wallet_addresses))
+        results = {}
+        valid = []
+        for wallet in wallet_addresses:
+            if BlockchainService.is_valid_address(wallet):
+                valid.append(wallet)
+            else:
+                results[wallet] = BlockchainService._ownership_error('Invalid wallet address')
+        if not valid:
+            return results
+
+        contract_address = current_app.config['OXCERTS_CONTRACT_ADDRESS']
+        if not BlockchainService.is_valid_address(contract_address):
+            results.update({wallet: BlockchainService._ownership_error('Invalid contract address configured')
+                            for wallet in valid})
+            return results
+
+        if use_cache:
+            results.update(ChainReader.get_cached_ownership('oxcert', contract_address, valid))
+        pending = [wallet for wallet in valid if wallet not in results]
+        if not pending:
+            return results
 
-            # Check balance
-            normalized_address = BlockchainService.normalize_address(wallet_address)
-            balance = contract.functions.balanceOf(normalized_address).call()
+        try:
+            rpc_url = BlockchainService.get_rpc_url()
+            w3 = BlockchainService.get_web3_instance()
+            contract = BlockchainService.get_contract(contract_address)
+            block_number = w3.eth.block_number
+            owners = [BlockchainService.normalize_address(wallet) for wallet in pending]
+
+            # Round 1: balance and first token id of every wallet
+            calls = []
+            for owner in owners:
+                calls.append(contract.functions.balanceOf(owner))
+                calls.append(contract.functions.tokenOfOwnerByIndex(owner, 0))
+            values = ChainReader.aggregate(w3, rpc_url, calls, block_identifier=block_number)
+            if all(value is None for value in values[::2]):
+                raise ValueError('balanceOf reverted for every wallet')
+            balances = [value or 0 for value in values[::2]]
+            token_ids = values[1::2]
+
+            # Round 2: token URIs of holders with an enumerable token
+            holders = [i for i, balance in enumerate(balances) if balance > 0 and token_ids[i] is not None]
+            uris = ChainReader.aggregate(
+                w3, rpc_url, [contract.functions.tokenURI(token_ids[i]) for i in holders], block_identifier=block_number
+            )
+            token_uris = dict(zip(holders, uris))
+        except Exception as e:
+            results.update({wallet: BlockchainService._ownership_error(f'Blockchain check failed: {str(e)}')
+                            for wallet in pending})
+            return results
 
-            token_id = None
+        for i, wallet in enumerate(pending):
+            balance = balances[i]
+            token_id = token_ids[i] if balance > 0 else None
             nft_details = None
+            if balance > 0 and token_id is not None:
+                nft_details = BlockchainService.get_nft_details(
+                    wallet, contract_address, token_id, token_uri=token_uris.get(i) or ''
+                )
+            elif balance > 0:
+                # If enumeration not supported, create basic details
+                nft_details = {
+                    'token_id': None,
+                    'token_uri': None,
+                    'metadata': {
+                        'name': '0xCert NFT',
+                        'description': f'Verified 0xCert holder with {balance} NFT(s)',
+                        'image': None,
+                        'attributes': [
+                            {'trait_type': 'Balance', 'value': balance},
+                            {'trait_type': 'Verified', 'value': 'Yes'}
+                        ]
+                    },
+                    'tx_hash': None,
+                    'explorer_url': f"https://kairos.kaiascan.io/account/{wallet}"
+                }
 
-            # If user has at least one NFT, get the first one's details
-            if balance > 0:
-                try:
-                    # Get first token ID owned by this address
-                    token_id = contract.functions.tokenOfOwnerByIndex(normalized_address, 0).call()
-                    nft_details = BlockchainService.get_nft_details(
-                        wallet_address,
-                        contract_address,
-                        token_id
-                    )
-                except Exception as e:
-                    print(f"Error getting token details: {str(e)}")
-                    # If enumeration not supported, create basic details
-                    token_id = None
-                    nft_details = {
-                        'token_id': None,
-                        'token_uri': None,
-                        'metadata': {
-                            'name': '0xCert NFT',
-                            'description': f'Verified 0xCert holder with {balance} NFT(s)',
-                            'image': None,
-                            'attributes': [
-                                {'trait_type': 'Balance', 'value': balance},
-                                {'trait_type': 'Verified', 'value': 'Yes'}
-                            ]
-                        },
-                        'tx_hash': None,
-                        'explorer_url': f"https://kairos.kaiascan.io/account/{wallet_address}"
-                    }
-
-            return {
+            result = {
                 'has_cert': balance > 0,
                 'balance': balance,
                 'token_id': token_id,
                 'nft_details': nft_details,
                 'error': None
             }
+            ChainReader.cache_ownership('oxcert', contract_address, wallet, result, block_number)
+            results[wallet] = result
 
-        except Exception as e:
-            return {
-                'has_cert': False,
-                'balance': 0,
-                'token_id': None,
-                'nft_details': None,
-                'error': f'Blockchain check failed: {str(e)}'
-            }
+        return results
 
     @staticmethod
     def get_network_status() -> dict:
@@ -2,8 +2,13 @@
 Caching utilities using Upstash Redis
 """
 import json
+import logging
+
 from upstash_redis import Redis
 from flask import current_app
+from utils.cache_demand import CacheDemand
+
+logger = logging.getLogger(__name__)
 
 
 class CacheService:
@@ -13,23 +18,26 @@ class CacheService:
     _redis_client = None
 
     @classmethod
-    def initialize(cls, upstash_url: str, upstash_token: str):
-        """Initialize Upstash Redis connection (call once on app startup)"""
+    def initialize(cls, upstash_url: str, upstash_token: str, ping: bool = True):
+        """
+        Initialize Upstash Redis connection (call once on app startup)
+
+        Args:
+            ping: Verify the connection eagerly. Web workers pass False so boot
+                  doesn't wait on a network round-trip.
+        """
         try:
-            print(f"[CacheService] Initializing Upstash Redis connection to: {upstash_url}")
-
             # Initialize Upstash Redis client
             cls._redis_client = Redis(url=upstash_url, token=upstash_token)
 
+            if not ping:
+                return
+
             # Test connection
-            print(f"[CacheService] Testing connection...")
             cls._redis_client.ping()
-
-            print(f"[CacheService] Connected to Upstash Redis: {upstash_url}")
-        except Exception as e:
-            import traceback
-            print(f"[CacheService] Upstash Redis connection failed: {e}")
-            print(f"[CacheService] Traceback: {traceback.format_exc()}")
+            logger.info("Connected to Upstash Redis: %s", upstash_url)
+        except Exception:
+            logger.exception("Upstash Redis connection failed")
             cls._redis_client = None
 
     @staticmethod
@@ -44,7 +52,7 @@ class CacheService:
             # Prevent caching Flask Response objects
             from flask import Response
             if isinstance(value, Response):
-                print(f"Cache set error: Cannot cache Flask Response object (key: {key})")
+                logger.error("Cannot cache Flask Response object (key: %s)", key)
                 return False
 
             client = CacheService.get_redis_client()
@@ -53,18 +61,29 @@ class CacheService:
                 if not isinstance(value, str):
                     value = json.dumps(value)
                 client.setex(key, ttl, value)
+                CacheDemand.record_fill(key, ttl)
                 return True
         except Exception as e:
-            print(f"Cache set error: {e}")
+            logger.warning("Cache set error: %s", e)
         return False
 
     @staticmethod
     def get(key: str):
-        """Get cache value"""
+        """
+        Get cache value
+
+        Reads are counted for adaptive warming (utils/cache_demand.py). A warm
+        replay of this key's source request sees a miss so the route rebuilds it.
+        """
         try:
             client = CacheService.get_redis_client()
             if client:
+                warming = CacheDemand.warming_key()
+                if warming == key:
+                    return None
                 value = client.get(key)
+                if warming is None:
+                    CacheDemand.record_read(key, hit=bool(value))
                 if value:
                     # Try to deserialize
                     try:
@@ -72,9 +91,55 @@ class CacheService:
                     except:
                         return value
         except Exception as e:
-            print(f"Cache get error: {e}")
+            logger.warning("Cache get error: %s", e)
         return None
 
+    @staticmethod
+    def get_many(keys: list) -> dict:
+        """
+        Get several cache values in one round-trip (MGET)
+
+        Returns:
+            dict: key -> deserialized value, for the keys that were present
+        """
+        if not keys:
+            return {}
+        try:
+            client = CacheService.get_redis_client()
+            if client:
+                values = client.mget(*keys)
+                found = {}
+                for key, value in zip(keys, values):
+                    CacheDemand.record_read(key, hit=bool(value))
+                    if value:
+                        try:
+                            found[key] = json.loads(value)
+                        except:
+                            found[key] = value
+                return found
+        except Exception as e:
+            logger.warning("Cache get_many error: %s", e)
+        return {}
+
+    @staticmethod
+    def set_many(mapping: dict, ttl: int = 3600):
+        """Set several cache values with the same TTL in one pipeline"""
+        if not mapping:
+            return False
+        try:
+            client = CacheService.get_redis_client()
+            if client:
+                pipe = client.pipeline()
+                for key, value in mapping.items():
+                    pipe.setex(key, ttl, value if isinstance(value, str) else json.dumps(value))
+                pipe.exec()
+                for key in mapping:
+                    CacheDemand.record_fill(key, ttl)
+                return True
+        except Exception as e:
+            logger.warning("Cache set_many error: %s", e)
+        return False
+
     @staticmethod
     def delete(key: str):
         """Delete cache key"""
@@ -84,7 +149,7 @@ class CacheService:
                 client.delete(key)
                 return True
         except Exception as e:
-            print(f"Cache delete error: {e}")
+            logger.warning("Cache delete error: %s", e)
         return False
 
     @staticmethod
@@ -98,7 +163,7 @@ class CacheService:
                     client.delete(*keys)
                 return True
         except Exception as e:
-            print(f"Cache clear error: {e}")
+            logger.warning("Cache clear error: %s", e)
         return False
 
     @staticmethod
@@ -199,14 +264,23 @@ class CacheService:
 
     @staticmethod
     def invalidate_itinerary(itinerary_id: str):
-        """Invalidate itinerary cache and related feeds"""
+        """
+        Invalidate one itinerary's detail, feed card and intel caches
+
+        Feed id lists are left alone: they only hold ids, so the next page
+        read picks up the rebuilt card. Callers that change which itineraries
+        are listed (create/delete/publish) also call invalidate_itinerary_feed.
+        The featured / rising stars payloads still embed full cards.
+        """
         CacheService.delete(f"itinerary:{itinerary_id}")
-        CacheService.invalidate_itinerary_feed()
+        CacheService.delete(f"itinerary_card:{itinerary_id}")
+        CacheService.delete("featured_itineraries")
+        CacheService.delete("rising_stars_itineraries")
         CacheService.invalidate_itinerary_intel(itinerary_id)
 
     @staticmethod
     def invalidate_itinerary_feed():
-        """Invalidate all itinerary feed caches when itineraries change"""
+        """Invalidate all itinerary feed caches when itineraries change (id lists included)"""
         CacheService.clear_pattern("itinerary_feed:*")
         CacheService.delete("featured_itineraries")
         CacheService.delete("rising_stars_itineraries")
@@ -221,6 +295,7 @@ class CacheService:
         """Invalidate itinerary intel caches"""
         CacheService.clear_pattern(f"itinerary_intel:{itinerary_id}:*")
         CacheService.clear_pattern(f"travel_intel:{itinerary_id}:*")
+        CacheService.invalidate_threads('travel_intel', itinerary_id)
 
     # ============================================================================
     # CHAIN CACHING
@@ -377,6 +452,7 @@ class CacheService:
     def invalidate_project_comments(project_id: str):
         """Invalidate project comments cache"""
         CacheService.clear_pattern(f"comments:project:{project_id}:*")
+        CacheService.invalidate_threads('comments', project_id)
 
     # ============================================================================
     # FEEDBACK CACHING
@@ -617,6 +693,27 @@ class CacheService:
         """Invalidate single chain post cache"""
         CacheService.delete(f"chain_post:{post_id}")
 
+    # ============================================================================
+    # THREAD CACHING (services/thread_loader.py)
+    # ============================================================================
+
+    @staticmethod
+    def cache_thread(kind: str, scope_id: str, params_key: str, data: dict, ttl: int = 300):
+        """Cache an assembled discussion tree page (5 minutes)"""
+        key = f"thread:{kind}:{scope_id}:{params_key}"
+        return CacheService.set(key, data, ttl)
+
+    @staticmethod
+    def get_cached_thread(kind: str, scope_id: str, params_key: str):
+        """Get cached discussion tree page"""
+        key = f"thread:{kind}:{scope_id}:{params_key}"
+        return CacheService.get(key)
+
+    @staticmethod
+    def invalidate_threads(kind: str, scope_id: str):
+        """Invalidate every cached tree of one discussion"""
+        CacheService.clear_pattern(f"thread:{kind}:{scope_id}:*")
+
     # ============================================================================
     # BLOCKCHAIN/CERT CACHING
     # ============================================================================
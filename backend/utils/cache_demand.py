@@ -0,0 +1,308 @@
+"""
+Cache Demand Tracker - Sampled read counts that drive adaptive cache warming
+
+CacheService.get samples reads of shared (warmable) keys into a per-process
+buffer that a daemon thread flushes to Redis in one pipeline every few
+seconds (requests never wait on it):
+- cache:demand:{bucket}    sorted set key -> estimated reads in a 5-minute bucket
+- cache:demand:expiry      hash key -> [expires_at, ttl] recorded on every set
+- cache:demand:sources     hash key -> request path that filled it (replayed to rebuild)
+- cache:metrics            hash of hit/miss/warm counters per key family
+
+CacheWarmer.warm_hot_keys reads the last two buckets and re-warms only keys
+that are hot and about to expire. Per-user keys are never tracked.
+"""
+import json
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+from flask import current_app, has_app_context, has_request_context, request
+
+
+class CacheDemand:
+    """Per-key access counters, TTL tracking and hit-rate metrics"""
+
+    KEY_BUCKET = "cache:demand:{bucket}"
+    KEY_EXPIRY = "cache:demand:expiry"
+    KEY_SOURCES = "cache:demand:sources"
+    KEY_METRICS = "cache:metrics"
+    KEY_LAST_CYCLE = "cache:metrics:last_warm"
+
+    BUCKET_SECONDS = 300
+    BUCKET_TTL = 3 * BUCKET_SECONDS
+    PREVIOUS_BUCKET_WEIGHT = 0.5  # The previous bucket counts half
+    FLUSH_SECONDS = 10
+    FLUSH_MAX_KEYS = 500
+    STALE_SOURCE_SECONDS = 86400  # Forget keys that haven't been filled for a day
+
+    # Shared caches worth warming (prefix -> family name in metrics)
+    WARMABLE_PREFIXES = {
+        'feed:': 'project_feed',
+        'itinerary_feed:': 'itinerary_feed',
+        'chains:list:': 'chain_list',
+        'events:list:': 'event_list',
+        'chain_posts:': 'chain_posts',
+        'leaderboard:': 'leaderboard',
+        'featured_': 'featured',
+        'most_requested_': 'most_requested',
+        'rising_stars': 'rising_stars',
+        'recent_connections': 'recent_connections',
+        'category_projects_': 'category',
+        'destination_itineraries_': 'destination',
+        'user_profile:v2:': 'user_profile',
+    }
+    _prefixes = tuple(WARMABLE_PREFIXES)
+
+    # WSGI environ flag set on warm replays (not settable by HTTP clients)
+    WARM_ENVIRON_KEY = 'tripit.cache_warm_key'
+
+    _lock = threading.Lock()
+    _reads: Dict[str, float] = {}
+    _expiry: Dict[str, str] = {}
+    _sources: Dict[str, str] = {}
+    _counters: Dict[str, int] = {}
+    _last_flush = time.monotonic()
+    _flushing = False
+
+    # ------------------------------------------------------------------
+    # Recording (hot path - in-process only, flushed in the background)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _redis():
+        from utils.cache import CacheService
+        return CacheService.get_redis_client()
+
+    @staticmethod
+    def _config(name: str, default):
+        if has_app_context():
+            return current_app.config.get(name, default)
+        return default
+
+    @classmethod
+    def family(cls, key: str) -> str:
+        """Metrics family of a key ('other' for untracked keys)"""
+        if key.startswith(cls._prefixes):
+            for prefix, family in cls.WARMABLE_PREFIXES.items():
+                if key.startswith(prefix):
+                    return family
+        return 'other'
+
+    @classmethod
+    def warming_key(cls) -> Optional[str]:
+        """Key being rebuilt by the current warm replay, if any"""
+        if has_request_context():
+            return request.environ.get(cls.WARM_ENVIRON_KEY)
+        return None
+
+    @classmethod
+    def record_read(cls, key: str, hit: bool):
+        """Count a cache read (hit/miss exactly, per-key demand sampled)"""
+        family = cls.family(key)
+        rate = cls._config('CACHE_DEMAND_SAMPLE_RATE', 0.1)
+        sampled = family != 'other' and rate > 0 and random.random() < rate
+
+        with cls._lock:
+            field = f"{family}:{'hits' if hit else 'misses'}"
+            cls._counters[field] = cls._counters.get(field, 0) + 1
+            if sampled:
+                cls._reads[key] = cls._reads.get(key, 0.0) + 1.0 / rate
+            due = not cls._flushing and (
+                time.monotonic() - cls._last_flush >= cls.FLUSH_SECONDS
+                or len(cls._reads) >= cls.FLUSH_MAX_KEYS
+            )
+            if due:
+                cls._flushing = True
+        if due:
+            threading.Thread(target=cls._background_flush, name='cache-demand-flush', daemon=True).start()
+
+    @classmethod
+    def _background_flush(cls):
+        try:
+            cls.flush()
+        finally:
+            cls._flushing = False
+
+    @classmethod
+    def record_fill(cls, key: str, ttl: int):
+        """Remember when a warmable key expires and which GET request filled it"""
+        if not key.startswith(cls._prefixes):
+            return
+
+        path = None
+        if has_request_context() and request.method == 'GET':
+            path = request.full_path.rstrip('?')
+
+        with cls._lock:
+            cls._expiry[key] = json.dumps([time.time() + ttl, ttl])
+            if path:
+                cls._sources[key] = path
+
+    @classmethod
+    def flush(cls):
+        """Write buffered counters to Redis in one pipeline (never raises)"""
+        with cls._lock:
+            reads, cls._reads = cls._reads, {}
+            expiry, cls._expiry = cls._expiry, {}
+            sources, cls._sources = cls._sources, {}
+            counters, cls._counters = cls._counters, {}
+            cls._last_flush = time.monotonic()
+
+        client = cls._redis()
+        if not client or not (reads or expiry or sources or counters):
+            return
+
+        try:
+            bucket_key = cls.KEY_BUCKET.format(bucket=int(time.time() // cls.BUCKET_SECONDS))
+            pipe = client.pipeline()
+            for key, reads_estimate in reads.items():
+                pipe.zincrby(bucket_key, reads_estimate, key)
+            if reads:
+                pipe.expire(bucket_key, cls.BUCKET_TTL)
+            if expiry:
+                pipe.hset(cls.KEY_EXPIRY, values=expiry)
+            if sources:
+                pipe.hset(cls.KEY_SOURCES, values=sources)
+            for field, count in counters.items():
+                pipe.hincrby(cls.KEY_METRICS, field, count)
+            pipe.exec()
+        except Exception as e:
+            print(f"[CACHE DEMAND] Flush failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Warm planning
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def hot_keys(cls, limit: int = 500) -> Dict[str, float]:
+        """Estimated reads per key over the current and previous bucket"""
+        client = cls._redis()
+        if not client:
+            return {}
+
+        bucket = int(time.time() // cls.BUCKET_SECONDS)
+        pipe = client.pipeline()
+        pipe.zrange(cls.KEY_BUCKET.format(bucket=bucket), 0, limit - 1, rev=True, withscores=True)
+        pipe.zrange(cls.KEY_BUCKET.format(bucket=bucket - 1), 0, limit - 1, rev=True, withscores=True)
+        current, previous = pipe.exec()
+
+        scores = {}
+        for members, weight in ((current, 1.0), (previous, cls.PREVIOUS_BUCKET_WEIGHT)):
+            for key, score in members or []:
+                scores[key] = scores.get(key, 0.0) + float(score) * weight
+        return scores
+
+    @classmethod
+    def due_keys(cls, min_reads: float, lead_seconds: float, limit: int = 500) -> List[dict]:
+        """
+        Hot keys that expire within their lead time, hottest first
+
+        A key is due when at most max(lead_seconds, 10% of its TTL) remains.
+        Keys with no recorded source (never filled by a GET request) are
+        skipped, as are cold keys below min_reads.
+
+        Returns:
+            [{'key', 'path', 'reads', 'remaining'}]
+        """
+        hot = {key: reads for key, reads in cls.hot_keys(limit).items() if reads >= min_reads}
+        if not hot:
+            return []
+
+        keys = list(hot)
+        client = cls._redis()
+        pipe = client.pipeline()
+        pipe.hmget(cls.KEY_SOURCES, *keys)
+        pipe.hmget(cls.KEY_EXPIRY, *keys)
+        paths, expiries = pipe.exec()
+
+        now = time.time()
+        due = []
+        for key, path, expiry in zip(keys, paths, expiries):
+            if not path:
+                continue
+            expires_at, ttl = json.loads(expiry) if expiry else (now, 0)
+            remaining = expires_at - now
+            if remaining <= max(lead_seconds, ttl * 0.1):
+                due.append({'key': key, 'path': path, 'reads': hot[key], 'remaining': max(remaining, 0)})
+
+        due.sort(key=lambda item: item['reads'], reverse=True)
+        return due
+
+    @classmethod
+    def prune_sources(cls):
+        """Drop expiry/source records of keys nobody has filled for a day"""
+        client = cls._redis()
+        if not client:
+            return 0
+
+        cutoff = time.time() - cls.STALE_SOURCE_SECONDS
+        stale = [
+            key for key, value in (client.hgetall(cls.KEY_EXPIRY) or {}).items()
+            if json.loads(value)[0] < cutoff
+        ]
+        if stale:
+            pipe = client.pipeline()
+            pipe.hdel(cls.KEY_EXPIRY, *stale)
+            pipe.hdel(cls.KEY_SOURCES, *stale)
+            pipe.exec()
+        return len(stale)
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def record_warm_cycle(cls, summary: dict, by_family: Dict[str, dict]):
+        """Add a warm cycle's cost to the totals and keep it as the last cycle"""
+        client = cls._redis()
+        if not client:
+            return
+
+        try:
+            pipe = client.pipeline()
+            for family, stats in by_family.items():
+                pipe.hincrby(cls.KEY_METRICS, f"{family}:warmed", stats['warmed'])
+                pipe.hincrby(cls.KEY_METRICS, f"{family}:warm_failed", stats['failed'])
+                pipe.hincrbyfloat(cls.KEY_METRICS, f"{family}:warm_ms", stats['ms'])
+            pipe.hincrby(cls.KEY_METRICS, "cycles", 1)
+            pipe.set(cls.KEY_LAST_CYCLE, json.dumps(summary), ex=86400)
+            pipe.exec()
+        except Exception as e:
+            print(f"[CACHE DEMAND] Failed to record warm cycle: {e}")
+
+    @classmethod
+    def get_metrics(cls) -> dict:
+        """Hit rate and warm cost per key family, plus the last warm cycle"""
+        cls.flush()
+        client = cls._redis()
+        if not client:
+            return {'families': {}, 'last_cycle': None}
+
+        pipe = client.pipeline()
+        pipe.hgetall(cls.KEY_METRICS)
+        pipe.get(cls.KEY_LAST_CYCLE)
+        raw, last_cycle = pipe.exec()
+
+        families = {}
+        cycles = 0
+        for field, value in (raw or {}).items():
+            if field == 'cycles':
+                cycles = int(value)
+                continue
+            family, _, name = field.rpartition(':')
+            families.setdefault(family, {})[name] = float(value)
+
+        for stats in families.values():
+            hits = stats.get('hits', 0)
+            misses = stats.get('misses', 0)
+            warmed = stats.get('warmed', 0)
+            stats['hit_rate'] = round(hits / (hits + misses), 4) if hits + misses else None
+            stats['avg_warm_ms'] = round(stats.get('warm_ms', 0) / warmed, 1) if warmed else None
+
+        return {
+            'families': families,
+            'warm_cycles': cycles,
+            'last_cycle': json.loads(last_cycle) if last_cycle else None,
+        }
@@ -1,209 +1,112 @@
 """
-Background Cache Warmer - Pre-heats critical caches for instant response times
-Runs as background job to keep hot paths always cached
+Background Cache Warmer - Re-warms the caches users actually read, just before they expire
+
+Demand comes from utils/cache_demand.CacheDemand: CacheService.get samples
+reads of shared keys, and CacheService.set records each key's expiry and the
+GET request that filled it. Every cycle the warmer takes the hot keys that
+are about to expire and replays their source request (with the cache read
+for that key bypassed), so the route itself rebuilds the entry. Cold keys
+are left to expire, and each cycle is capped by a key and time budget.
 """
 import time
-from threading import Thread
-from datetime import datetime, timedelta
-from flask import current_app
-from extensions import db
-from utils.cache import CacheService
-from models.project import Project
-from models.user import User
-from models.user_stats import UserDashboardStats
-from models.chain import Chain
-from models.notification import Notification
-from sqlalchemy.orm import joinedload, contains_eager
-from sqlalchemy import func
-
-
-class CacheWarmer:
-    """Intelligent cache warmer for critical routes"""
-
-    @staticmethod
-    def warm_feed_cache():
-        """Pre-warm feed caches for instant loading"""
-        print(f"[{datetime.now()}] Warming feed caches...")
-
-        try:
-            # Use existing app context instead of creating new one
-            # Warm trending feed (most accessed)
-            for page in range(1, 4):  # First 3 pages
-                try:
-                    query = Project.query.filter_by(is_deleted=False)\
-                        .options(joinedload(Project.creator))\
-                        .order_by(Project.proof_score.desc(), Project.created_at.desc())\
-                        .limit(20).offset((page - 1) * 20)
-
-                    projects = query.all()
-                    data = [p.to_dict(include_creator=True) for p in projects]
-
-                    # Cache with long TTL
-                    CacheService.cache_feed(page, 'trending', {
-                        'status': 'success',
-                        'data': data,
-                        'pagination': {'page': page, 'per_page': 20}
-                    }, ttl=3600)
-
-                    print(f"  [OK] Warmed feed page {page} (trending)")
-                except Exception as e:
-                    print(f"  [FAIL] Failed to warm feed page {page}: {e}")
-
-            # Warm newest feed
-            for page in range(1, 3):
-                try:
-                    query = Project.query.filter_by(is_deleted=False)\
-                        .options(joinedload(Project.creator))\
-                        .order_by(Project.created_at.desc())\
-                        .limit(20).offset((page - 1) * 20)
-
-                    projects = query.all()
-                    data = [p.to_dict(include_creator=True) for p in projects]
-
-                    CacheService.cache_feed(page, 'newest', {
-                        'status': 'success',
-                        'data': data,
-                        'pagination': {'page': page, 'per_page': 20}
-                    }, ttl=1800)
-
-                    print(f"  [OK] Warmed feed page {page} (newest)")
-                except Exception as e:
-                    print(f"  [FAIL] Failed to warm newest page {page}: {e}")
-
-        except Exception as e:
-            print(f"  [FAIL] Feed cache warming failed: {e}")
-
-    @staticmethod
-    def warm_leaderboard_cache():
-        """Pre-warm leaderboard for instant access"""
-        print(f"[{datetime.now()}] Warming leaderboard cache...")
-
-        try:
-            # Top projects
-            top_projects = Project.query.filter_by(is_deleted=False)\
-                .order_by(Project.proof_score.desc())\
-                .limit(50).all()
-
-            leaderboard_data = {
-                'top_projects': [p.to_dict(include_creator=True) for p in top_projects],
-                'generated_at': datetime.utcnow().isoformat()
-            }
+from datetime import datetime
 
-            # Cache directly with key
-            CacheService.set("leaderboard:all_time", leaderboard_data, ttl=1800)
-            print(f"  [OK] Warmed leaderboard (50 projects)")
+from flask import current_app
 
-        except Exception as e:
-            print(f"  [FAIL] Leaderboard cache warming failed: {e}")
+from utils.cache_demand import CacheDemand
 
-    @staticmethod
-    def warm_top_profiles():
-        """Pre-warm top user profiles"""
-        print(f"[{datetime.now()}] Warming top profiles...")
 
-        try:
-            # Top 20 users by karma (denormalized stats)
-            karma_score = func.coalesce(UserDashboardStats.karma_score, 0)
-            top_users = User.query.filter_by(is_active=True)\
-                .outerjoin(UserDashboardStats, UserDashboardStats.user_id == User.id)\
-                .options(contains_eager(User.dashboard_stats))\
-                .order_by(karma_score.desc(), User.created_at.asc())\
-                .limit(20).all()
-
-            for user in top_users:
-                try:
-                    user_data = user.to_dict(include_email=False)
-                    CacheService.set(f"user_profile:{user.username}", user_data, ttl=1800)
-                except Exception as e:
-                    print(f"  [FAIL] Failed to warm profile {user.username}: {e}")
-
-            print(f"  [OK] Warmed {len(top_users)} top profiles")
+class CacheWarmer:
+    """Demand-driven cache warmer"""
 
-        except Exception as e:
-            print(f"  [FAIL] Profile cache warming failed: {e}")
+    # Hard cap per cycle, well under the scheduler's 30s leadership lease
+    MAX_BUDGET_SECONDS = 10
 
     @staticmethod
-    def warm_trending_chains():
-        """Pre-warm trending chains"""
-        print(f"[{datetime.now()}] Warming trending chains...")
-
-        try:
-            chains = Chain.query.filter_by(is_public=True, is_active=True)\
-                .order_by(
-                    (Chain.project_count * 0.6 + Chain.follower_count * 0.3).desc()
-                ).limit(20).all()
-
-            for chain in chains:
-                try:
-                    # Warm chain posts (first page)
-                    from models.chain_post import ChainPost
-                    posts = ChainPost.query.filter_by(
-                        chain_id=chain.id,
-                        parent_id=None,
-                        is_deleted=False,
-                        is_hidden=False
-                    ).options(joinedload(ChainPost.author))\
-                    .order_by(
-                        ChainPost.is_pinned.desc(),
-                        ChainPost.upvote_count.desc(),
-                        ChainPost.created_at.desc()
-                    ).limit(20).all()
-
-                    posts_data = [p.to_dict(include_author=True) for p in posts]
-                    CacheService.cache_chain_posts(chain.slug, 'hot', 1, {
-                        'posts': posts_data,
-                        'total': len(posts),
-                        'page': 1,
-                        'per_page': 20
-                    }, ttl=300)
-
-                except Exception as e:
-                    print(f"  [FAIL] Failed to warm chain {chain.slug}: {e}")
-
-            print(f"  [OK] Warmed {len(chains)} trending chains")
-
-        except Exception as e:
-            print(f"  [FAIL] Chain cache warming failed: {e}")
+    def warm_hot_keys(budget_keys: int = None, budget_seconds: float = None) -> dict:
+        """
+        Re-warm hot keys that are close to expiry
+
+        Args:
+            budget_keys: Max keys rebuilt per cycle (CACHE_WARM_BUDGET_KEYS)
+            budget_seconds: Max time spent per cycle (CACHE_WARM_BUDGET_SECONDS, at most MAX_BUDGET_SECONDS)
+
+        Returns:
+            dict: {'due': int, 'warmed': int, 'failed': int, 'deferred': int, 'duration_ms': float}
+        """
+        config = current_app.config
+        budget_keys = budget_keys or config.get('CACHE_WARM_BUDGET_KEYS', 50)
+        budget_seconds = min(budget_seconds or config.get('CACHE_WARM_BUDGET_SECONDS', 5),
+                             CacheWarmer.MAX_BUDGET_SECONDS)
+
+        started = time.monotonic()
+        CacheDemand.flush()
+        due = CacheDemand.due_keys(
+            min_reads=config.get('CACHE_WARM_MIN_READS', 5),
+            lead_seconds=config.get('CACHE_WARM_LEAD_SECONDS', 90)
+        )
+
+        client = current_app.test_client()
+        by_family = {}
+        warmed = failed = deferred = 0
+        for item in due:
+            if warmed + failed >= budget_keys or time.monotonic() - started >= budget_seconds:
+                deferred += 1
+                continue
+
+            family = CacheDemand.family(item['key'])
+            stats = by_family.setdefault(family, {'warmed': 0, 'failed': 0, 'ms': 0.0})
+            key_started = time.monotonic()
+            try:
+                response = client.get(item['path'], environ_base={CacheDemand.WARM_ENVIRON_KEY: item['key']})
+                ok = response.status_code == 200
+            except Exception as e:
+                print(f"  [FAIL] Failed to warm {item['key']}: {e}")
+                ok = False
+
+            stats['ms'] += (time.monotonic() - key_started) * 1000
+            if ok:
+                warmed += 1
+                stats['warmed'] += 1
+            else:
+                failed += 1
+                stats['failed'] += 1
+
+        summary = {
+            'due': len(due),
+            'warmed': warmed,
+            'failed': failed,
+            'deferred': deferred,
+            'duration_ms': round((time.monotonic() - started) * 1000, 1),
+            'finished_at': datetime.utcnow().isoformat(),
+        }
+        CacheDemand.flush()  # Expiries recorded by the replays
+        CacheDemand.record_warm_cycle(summary, by_family)
+
+        if due:
+            print(f"[{datetime.now()}] Cache warm: {warmed} warmed, {failed} failed, "
+                  f"{deferred} deferred of {len(due)} due ({summary['duration_ms']}ms)")
+        return summary
 
     @staticmethod
     def warm_all():
-        """Warm all critical caches sequentially (safer than parallel)"""
-        print(f"\n{'='*60}")
-        print(f"[{datetime.now()}] Starting cache warming...")
-        print(f"{'='*60}\n")
-
+        """Run one warm cycle (scheduler job entry point)"""
         try:
-            # Run sequentially to avoid overwhelming the database
-            CacheWarmer.warm_feed_cache()
-            CacheWarmer.warm_leaderboard_cache()
-            CacheWarmer.warm_top_profiles()
-            CacheWarmer.warm_trending_chains()
+            return CacheWarmer.warm_hot_keys()
         except Exception as e:
             print(f"[ERROR] Cache warming failed: {e}")
 
-        print(f"\n{'='*60}")
-        print(f"[{datetime.now()}] Cache warming completed!")
-        print(f"{'='*60}\n")
-
     @staticmethod
-    def start_background_warmer(app, interval=300):
-        """Start background cache warmer that runs every interval seconds"""
-        def warmer_loop():
-            while True:
-                try:
-                    # Use app context for all database operations
-                    with app.app_context():
-                        CacheWarmer.warm_all()
-                    time.sleep(interval)
-                except Exception as e:
-                    print(f"[ERROR] Cache warmer failed: {e}")
-                    time.sleep(60)  # Wait 1 minute before retrying
-
-        thread = Thread(target=warmer_loop, daemon=True)
-        thread.start()
-        print(f"[CACHE WARMER] Started background cache warming (interval: {interval}s)")
-
+    def prune():
+        """Forget keys nobody has filled for a day"""
+        removed = CacheDemand.prune_sources()
+        if removed:
+            print(f"[{datetime.now()}] Cache warm: pruned {removed} stale keys")
+        return removed
 
 if __name__ == "__main__":
-    # Test cache warmer
-    CacheWarmer.warm_all()
+    from app import create_app
+
+    with create_app().app_context():
+        print(CacheWarmer.warm_all())
+        print(CacheDemand.get_metrics())
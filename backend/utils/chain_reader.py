@@ -0,0 +1,236 @@
+"""
+Chain Reader - shared providers and batched, cached contract reads
+
+- one Web3 provider per RPC URL per process, over a pooled HTTP session
+- Multicall3 aggregate3 folds many eth_calls into one request (falls back to
+  sequential calls on chains without Multicall3, e.g. a fresh Hardhat node)
+- token metadata is cached by URI (IPFS URIs are content-addressed, so
+  they are kept for a day)
+"""
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import requests
+from flask import current_app
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.cache import CacheService
+
+logger = logging.getLogger(__name__)
+
+
+MULTICALL3_ABI = [{
+    "inputs": [{
+        "components": [
+            {"name": "target", "type": "address"},
+            {"name": "allowFailure", "type": "bool"},
+            {"name": "callData", "type": "bytes"}
+        ],
+        "name": "calls",
+        "type": "tuple[]"
+    }],
+    "name": "aggregate3",
+    "outputs": [{
+        "components": [
+            {"name": "success", "type": "bool"},
+            {"name": "returnData", "type": "bytes"}
+        ],
+        "name": "returnData",
+        "type": "tuple[]"
+    }],
+    "stateMutability": "payable",
+    "type": "function"
+}]
+
+
+class ChainReader:
+    """Shared Web3 providers and batched read helpers"""
+
+    MULTICALL_CHUNK = 200  # Calls per aggregate3 request
+    METADATA_TTL = 86400  # ipfs:// URIs (immutable)
+    HTTP_METADATA_TTL = 3600
+    METADATA_MISS_TTL = 300
+
+    _lock = threading.Lock()
+    _session = None
+    _providers = {}
+    _multicall = {}  # rpc url -> Multicall3 contract, or False when not deployed
+
+    # ------------------------------------------------------------------
+    # Providers
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def http(cls) -> requests.Session:
+        """Pooled session shared by RPC providers and metadata fetches"""
+        with cls._lock:
+            if cls._session is None:
+                retry = Retry(total=2, backoff_factor=0.5, status_forcelist=(502, 503, 504),
+                              allowed_methods=["GET", "POST"])
+                adapter = HTTPAdapter(max_retries=retry, pool_connections=8, pool_maxsize=32)
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                cls._session = session
+            return cls._session
+
+    @classmethod
+    def web3(cls, rpc_url: str, check_connection: bool = False):
+        """
+        Shared Web3 instance for an RPC URL
+
+        Args:
+            rpc_url: JSON-RPC endpoint
+            check_connection: Raise ConnectionError if the node is unreachable
+                (only checked when the provider is first created)
+        """
+        from web3 import Web3
+
+        with cls._lock:
+            w3 = cls._providers.get(rpc_url)
+        if w3 is not None:
+            return w3
+
+        w3 = Web3(Web3.HTTPProvider(rpc_url, request_kwargs={'timeout': 30}, session=cls.http()))
+        if check_connection and not w3.is_connected():
+            raise ConnectionError(f"Failed to connect to blockchain network at {rpc_url}")
+
+        with cls._lock:
+            return cls._providers.setdefault(rpc_url, w3)
+
+    @classmethod
+    def multicall(cls, w3, rpc_url: str):
+        """Multicall3 contract on this chain, or None if it isn't deployed"""
+        from web3 import Web3
+
+        contract = cls._multicall.get(rpc_url)
+        if contract is None:
+            address = current_app.config.get('MULTICALL3_ADDRESS')
+            contract = False
+            if address:
+                address = Web3.to_checksum_address(address)
+                try:
+                    if w3.eth.get_code(address):
+                        contract = w3.eth.contract(address=address, abi=MULTICALL3_ABI)
+                except Exception as e:
+                    logger.warning("Multicall3 lookup failed on %s: %s", rpc_url, e)
+            cls._multicall[rpc_url] = contract
+        return contract or None
+
+    # ------------------------------------------------------------------
+    # Batched calls
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _decode(w3, fn, data: bytes):
+        from eth_utils.abi import collapse_if_tuple
+
+        outputs = fn.abi.get('outputs') or []
+        values = w3.codec.decode([collapse_if_tuple(output) for output in outputs], data)
+        return values[0] if len(values) == 1 else tuple(values)
+
+    @classmethod
+    def aggregate(cls, w3, rpc_url: str, calls: Sequence, block_identifier='latest') -> List:
+        """
+        Run contract function calls, batched through Multicall3 when available
+
+        Args:
+            calls: Bound contract functions, e.g. contract.functions.balanceOf(wallet)
+            block_identifier: Block every call is evaluated at
+
+        Returns:
+            One decoded result per call (None for a call that reverted)
+        """
+        if not calls:
+            return []
+
+        multicall = cls.multicall(w3, rpc_url)
+        if multicall is None:
+            results = []
+            for fn in calls:
+                try:
+                    results.append(fn.call(block_identifier=block_identifier))
+                except Exception:
+                    results.append(None)
+            return results
+
+        results = []
+        for start in range(0, len(calls), cls.MULTICALL_CHUNK):
+            chunk = calls[start:start + cls.MULTICALL_CHUNK]
+            requests_ = [(fn.address, True, fn._encode_transaction_data()) for fn in chunk]
+            responses = multicall.functions.aggregate3(requests_).call(block_identifier=block_identifier)
+            for fn, (success, data) in zip(chunk, responses):
+                if not success or not data:
+                    results.append(None)
+                    continue
+                try:
+                    results.append(cls._decode(w3, fn, data))
+                except Exception:
+                    results.append(None)
+        return results
+
+    # ------------------------------------------------------------------
+    # Token metadata
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _metadata_key(token_uri: str) -> str:
+        return f"chain:metadata:{hashlib.sha1(token_uri.encode('utf-8')).hexdigest()}"
+
+    @classmethod
+    def fetch_metadata(cls, token_uri: Optional[str]) -> Optional[dict]:
+        """Token metadata JSON for a URI (cached by URI, misses included)"""
+        if not token_uri:
+            return None
+
+        key = cls._metadata_key(token_uri)
+        cached = CacheService.get(key)
+        if cached:
+            return cached.get('metadata')
+
+        url = token_uri
+        if url.startswith('ipfs://'):
+            url = url.replace('ipfs://', current_app.config.get('IPFS_GATEWAY_URL', 'https://ipfs.io/ipfs/'), 1)
+
+        metadata = None
+        try:
+            response = cls.http().get(url, timeout=10)
+            if response.status_code == 200:
+                metadata = response.json()
+        except Exception as e:
+            logger.warning("Error fetching NFT metadata from %s: %s", url, e)
+
+        if metadata is None:
+            ttl = cls.METADATA_MISS_TTL
+        else:
+            ttl = cls.METADATA_TTL if token_uri.startswith('ipfs://') else cls.HTTP_METADATA_TTL
+        CacheService.set(key, {'metadata': metadata}, ttl=ttl)
+        return metadata
+
+    # ------------------------------------------------------------------
+    # Ownership cache
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def ownership_key(kind: str, contract_address: str, wallet_address: str) -> str:
+        return f"chain:owner:{kind}:{contract_address.lower()}:{wallet_address.lower()}"
+
+    @classmethod
+    def get_cached_ownership(cls, kind: str, contract_address: str, wallets: Sequence[str]) -> Dict[str, dict]:
+        """Cached ownership results by wallet, read with one MGET (missing wallets are absent)"""
+        keys = {cls.ownership_key(kind, contract_address, wallet): wallet for wallet in wallets}
+        cached = CacheService.get_many(list(keys))
+        return {keys[key]: value for key, value in cached.items() if value}
+
+    @classmethod
+    def cache_ownership(cls, kind: str, contract_address: str, wallet: str, result: dict, block_number: int):
+        ttl = current_app.config.get('CHAIN_OWNERSHIP_CACHE_SECONDS', 60)
+        CacheService.set(cls.ownership_key(kind, contract_address, wallet), {**result, 'block_number': block_number}, ttl=ttl)
+
+    @classmethod
+    def invalidate_ownership(cls, kind: str, contract_address: str, wallet: str):
+        """Drop a cached ownership result (after a mint / revoke we sent ourselves)"""
+        CacheService.delete(cls.ownership_key(kind, contract_address, wallet))
@@ -1,9 +1,46 @@
 """
 Utility functions for content management across Project and Itinerary tables
+
+Cross-type lookups, listings and counts go through the content_index table
+(models/content_index.py, maintained by services/content_index.py), so each
+is one indexed query instead of a query per table merged in Python. Until the
+index has been backfilled the listings read the source tables instead.
 """
 from models.project import Project
 from models.itinerary import Itinerary
-from sqlalchemy import or_, and_, func
+from services.content_index import ContentIndexService
+
+# sort_by -> source column for the pre-backfill fallback
+SOURCE_SORT_COLUMNS = {'created_at': 'created_at', 'score': 'proof_score', 'votes': 'upvotes'}
+
+
+def _source_queries(owner_id=None, featured_only=False, include_deleted=False):
+    """Filtered Project and Itinerary queries (fallback while content_index is empty)"""
+    queries = []
+    for model, owner_column in ((Project, Project.user_id), (Itinerary, Itinerary.created_by_traveler_id)):
+        query = model.query
+        if not include_deleted:
+            query = query.filter(model.is_deleted == False)
+        if owner_id:
+            query = query.filter(owner_column == owner_id)
+        if featured_only:
+            query = query.filter(model.is_featured == True)
+        queries.append((model, query))
+    return queries
+
+
+def _source_content(limit=None, sort_by='created_at', **filters):
+    """Merged, sorted source rows; each table contributes at most `limit` rows"""
+    column = SOURCE_SORT_COLUMNS.get(sort_by, 'created_at')
+    content = []
+    for model, query in _source_queries(**filters):
+        query = query.order_by(getattr(model, column).desc().nullslast(), model.id.desc())
+        if limit:
+            query = query.limit(limit)
+        content.extend(query.all())
+
+    content.sort(key=lambda obj: (getattr(obj, column) is not None, getattr(obj, column) or 0, obj.id), reverse=True)
+    return content[:limit] if limit else content
 
 
 def get_all_content(user_id=None, limit=None, sort_by='created_at', include_deleted=False):
@@ -13,41 +50,32 @@ def get_all_content(user_id=None, limit=None, sort_by='created_at', include_dele
     Args:
         user_id: Optional user ID to get content for specific user viewing context
         limit: Optional limit on total results
-        sort_by: Sort field ('created_at', 'score', etc.)
+        sort_by: Sort field ('created_at', 'score', 'votes')
         include_deleted: Include deleted items
 
     Returns:
         List of projects and itineraries combined
     """
-    # Get projects from old system
-    project_query = Project.query
-    if not include_deleted:
-        project_query = project_query.filter_by(is_deleted=False)
-
-    # Get itineraries from new system
-    itinerary_query = Itinerary.query
-    if not include_deleted:
-        itinerary_query = itinerary_query.filter_by(is_deleted=False)
+    if not ContentIndexService.is_populated():
+        return _source_content(limit=limit, sort_by=sort_by, include_deleted=include_deleted)
 
-    # Apply limit to each query if specified
+    query = ContentIndexService.order(ContentIndexService.query(include_deleted=include_deleted), sort_by)
     if limit:
-        half_limit = limit // 2
-        projects = project_query.limit(half_limit).all()
-        itineraries = itinerary_query.limit(half_limit).all()
-    else:
-        projects = project_query.all()
-        itineraries = itinerary_query.all()
+        query = query.limit(limit)
+    return ContentIndexService.hydrate(query.all())
 
-    # Combine results
-    all_content = list(projects) + list(itineraries)
 
-    # Sort combined results
-    if sort_by == 'created_at':
-        all_content.sort(key=lambda x: x.created_at if x.created_at else '', reverse=True)
-    elif sort_by == 'score':
-        all_content.sort(key=lambda x: getattr(x, 'proof_score', 0) or 0, reverse=True)
+def get_content_cards(limit=20, offset=0, sort_by='created_at', owner_id=None, featured_only=False, search=None):
+    """
+    Compact cards for mixed content listings, straight from the index (no source-table reads)
 
-    return all_content if not limit else all_content[:limit]
+    Returns:
+        (cards, total)
+    """
+    query = ContentIndexService.query(owner_id=owner_id, featured_only=featured_only, search=search)
+    total = query.count()
+    entries = ContentIndexService.order(query, sort_by).limit(limit).offset(offset).all()
+    return [entry.to_card() for entry in entries], total
 
 
 def search_all_content(query, limit=50, user_id=None):
@@ -62,31 +90,14 @@ def search_all_content(query, limit=50, user_id=None):
     Returns:
         Tuple of (projects, itineraries)
     """
-    search_pattern = f'%{query}%'
-
-    # Search projects (old system)
-    projects = Project.query.filter(
-        Project.is_deleted == False,
-        or_(
-            Project.title.ilike(search_pattern),
-            Project.tagline.ilike(search_pattern),
-            Project.description.ilike(search_pattern),
-            Project.hackathon_name.ilike(search_pattern)
-        )
-    ).limit(limit).all()
-
-    # Search itineraries (new system)
-    itineraries = Itinerary.query.filter(
-        Itinerary.is_deleted == False,
-        or_(
-            Itinerary.title.ilike(search_pattern),
-            Itinerary.description.ilike(search_pattern),
-            Itinerary.destination.ilike(search_pattern),
-            Itinerary.travel_style.ilike(search_pattern)
+    # One query per type so a burst of one type can't crowd out the other
+    return tuple(
+        ContentIndexService.hydrate(
+            ContentIndexService.order(ContentIndexService.query(search=query, content_type=content_type))
+            .limit(limit).all()
         )
-    ).limit(limit).all()
-
-    return projects, itineraries
+        for content_type in ('project', 'itinerary')
+    )
 
 
 def get_content_by_id(content_id, content_type=None):
@@ -100,12 +111,15 @@ def get_content_by_id(content_id, content_type=None):
     Returns:
         Project or Itinerary object, or None if not found
     """
+    if content_type is None:
+        content_type = ContentIndexService.content_type_of(content_id)
+
     if content_type == 'project':
         return Project.query.get(content_id)
     elif content_type == 'itinerary':
         return Itinerary.query.get(content_id)
 
-    # Try both if type not specified
+    # Not indexed (yet): try both
     content = Itinerary.query.get(content_id)
     if content:
         return content
@@ -124,23 +138,13 @@ def get_user_content(user_id, limit=None):
     Returns:
         List of projects and itineraries
     """
-    # Get projects from old system (user_id FK)
-    projects = Project.query.filter_by(
-        user_id=user_id,
-        is_deleted=False
-    ).all()
-
-    # Get itineraries from new system (created_by_traveler_id FK)
-    itineraries = Itinerary.query.filter_by(
-        created_by_traveler_id=user_id,
-        is_deleted=False
-    ).all()
+    if not ContentIndexService.is_populated():
+        return _source_content(limit=limit, owner_id=user_id)
 
-    # Combine and sort by created_at
-    all_content = list(projects) + list(itineraries)
-    all_content.sort(key=lambda x: x.created_at if x.created_at else '', reverse=True)
-
-    return all_content if not limit else all_content[:limit]
+    query = ContentIndexService.order(ContentIndexService.query(owner_id=user_id))
+    if limit:
+        query = query.limit(limit)
+    return ContentIndexService.hydrate(query.all())
 
 
 def get_featured_content(limit=10):
@@ -153,21 +157,11 @@ def get_featured_content(limit=10):
     Returns:
         List of featured projects and itineraries
     """
-    # Get featured projects
-    featured_projects = Project.query.filter_by(
-        is_featured=True,
-        is_deleted=False
-    ).limit(limit).all()
+    if not ContentIndexService.is_populated():
+        return _source_content(limit=limit, featured_only=True)
 
-    # Get featured itineraries
-    featured_itineraries = Itinerary.query.filter_by(
-        is_featured=True,
-        is_deleted=False
-    ).limit(limit).all()
-
-    # Combine and limit
-    featured = list(featured_projects) + list(featured_itineraries)
-    return featured[:limit]
+    query = ContentIndexService.order(ContentIndexService.query(featured_only=True))
+    return ContentIndexService.hydrate(query.limit(limit).all())
 
 
 def count_user_content(user_id):
@@ -180,14 +174,7 @@ def count_user_content(user_id):
     Returns:
         Integer count of total content
     """
-    project_count = Project.query.filter_by(
-        user_id=user_id,
-        is_deleted=False
-    ).count()
-
-    itinerary_count = Itinerary.query.filter_by(
-        created_by_traveler_id=user_id,
-        is_deleted=False
-    ).count()
+    if not ContentIndexService.is_populated():
+        return sum(query.count() for _, query in _source_queries(owner_id=user_id))
 
-    return project_count + itinerary_count
+    return ContentIndexService.query(owner_id=user_id).count()
@@ -5,29 +5,23 @@ from functools import wraps
 from flask import jsonify, session, request, g
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
 import jwt
-from models.user import User
-from models.traveler import Traveler
 from extensions import db
+from utils.principal import get_current_user, get_principal
 
 
 def get_user_from_either_table(user_id):
-    """Helper to get user from either User or Traveler table"""
-    # Try Traveler table first (Google OAuth users)
-    user = Traveler.query.get(user_id)
-    if user:
-        return user
-    # Fallback to User table (email/password users)
-    return User.query.get(user_id)
+    """Helper to get user from either User or Traveler table (memoized per request)"""
+    return get_current_user(user_id)
 
 
 def token_required(f):
-    """Decorator to require JWT token"""
+    """Decorator to require JWT token (principal cached, see utils/principal.py)"""
     @wraps(f)
     def decorated(*args, **kwargs):
         try:
             verify_jwt_in_request()
             user_id = get_jwt_identity()
-            user = get_user_from_either_table(user_id)
+            user = get_principal(user_id)
             if not user or not user.is_active:
                 return jsonify({'error': 'User not found or inactive'}), 401
         except Exception as e:
@@ -45,7 +39,7 @@ def admin_required(f):
         try:
             verify_jwt_in_request()
             user_id = get_jwt_identity()
-            user = get_user_from_either_table(user_id)
+            user = get_principal(user_id)
             if not user or not user.is_active:
                 return jsonify({'error': 'User not found or inactive'}), 401
             if not user.is_admin:
@@ -65,7 +59,7 @@ def validator_required(f):
         try:
             verify_jwt_in_request()
             user_id = get_jwt_identity()
-            user = get_user_from_either_table(user_id)
+            user = get_principal(user_id)
             if not user or not user.is_active:
                 return jsonify({'error': 'User not found or inactive'}), 401
             if not (hasattr(user, 'is_validator') and user.is_validator):
@@ -85,7 +79,7 @@ def admin_or_validator_required(f):
         try:
             verify_jwt_in_request()
             user_id = get_jwt_identity()
-            user = get_user_from_either_table(user_id)
+            user = get_principal(user_id)
             if not user or not user.is_active:
                 return jsonify({'error': 'User not found or inactive'}), 401
             is_validator = hasattr(user, 'is_validator') and user.is_validator
@@ -107,7 +101,7 @@ def optional_auth(f):
         try:
             verify_jwt_in_request()
             user_id = get_jwt_identity()
-            user = get_user_from_either_table(user_id)
+            user = get_principal(user_id)
             if user and not user.is_active:
                 user_id = None
         except Exception:
@@ -132,7 +126,7 @@ def admin_or_session_required(f):
         try:
             verify_jwt_in_request()
             user_id = get_jwt_identity()
-            user = get_user_from_either_table(user_id)
+            user = get_principal(user_id)
             if not user or not user.is_active:
                 return jsonify({'error': 'User not found or inactive'}), 401
             if not user.is_admin:
@@ -0,0 +1,135 @@
+"""
+Gazetteer - Aho-Corasick matcher over known place names
+
+Built once per process; a day's text is scanned in a single pass no matter
+how many places are known, instead of one substring search per place.
+"""
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Known places -> canonical, geocodable name
+KNOWN_PLACES = {
+    'hampi': 'Hampi, Karnataka, India',
+    'rishikesh': 'Rishikesh, Uttarakhand, India',
+    'leh': 'Leh, Ladakh, India',
+    'ladakh': 'Ladakh, India',
+    'manali': 'Manali, Himachal Pradesh, India',
+    'shimla': 'Shimla, Himachal Pradesh, India',
+    'dharamshala': 'Dharamshala, Himachal Pradesh, India',
+    'varanasi': 'Varanasi, Uttar Pradesh, India',
+    'jaipur': 'Jaipur, Rajasthan, India',
+    'udaipur': 'Udaipur, Rajasthan, India',
+    'jodhpur': 'Jodhpur, Rajasthan, India',
+    'agra': 'Agra, Uttar Pradesh, India',
+    'delhi': 'Delhi, India',
+    'mumbai': 'Mumbai, Maharashtra, India',
+    'goa': 'Goa, India',
+    'kerala': 'Kerala, India',
+    'alleppey': 'Alleppey, Kerala, India',
+    'kochi': 'Kochi, Kerala, India',
+    'munnar': 'Munnar, Kerala, India',
+    'ooty': 'Ooty, Tamil Nadu, India',
+    'mysore': 'Mysore, Karnataka, India',
+    'bangalore': 'Bangalore, Karnataka, India',
+    'hyderabad': 'Hyderabad, Telangana, India',
+    'chennai': 'Chennai, Tamil Nadu, India',
+    'pondicherry': 'Pondicherry, India',
+    'darjeeling': 'Darjeeling, West Bengal, India',
+    'gangtok': 'Gangtok, Sikkim, India',
+    'shillong': 'Shillong, Meghalaya, India',
+    'guwahati': 'Guwahati, Assam, India',
+    'andaman': 'Andaman Islands, India',
+    'havelock': 'Havelock Island, Andaman, India',
+    'spiti': 'Spiti Valley, Himachal Pradesh, India',
+    'kasol': 'Kasol, Himachal Pradesh, India',
+    'mcleodganj': 'McLeod Ganj, Himachal Pradesh, India',
+    'pushkar': 'Pushkar, Rajasthan, India',
+    'ranthambore': 'Ranthambore, Rajasthan, India',
+    'khajuraho': 'Khajuraho, Madhya Pradesh, India',
+    'nubra': 'Nubra Valley, Ladakh, India',
+    'pangong': 'Pangong Lake, Ladakh, India',
+    'tso moriri': 'Tso Moriri, Ladakh, India',
+    'zanskar': 'Zanskar, Ladakh, India',
+    'srinagar': 'Srinagar, Jammu and Kashmir, India',
+    'pahalgam': 'Pahalgam, Jammu and Kashmir, India',
+    'kodaikanal': 'Kodaikanal, Tamil Nadu, India',
+    'coorg': 'Coorg, Karnataka, India',
+    'hampta': 'Hampta Pass, Himachal Pradesh, India',
+    'triund': 'Triund, Himachal Pradesh, India',
+    'kedarnath': 'Kedarnath, Uttarakhand, India',
+    'badrinath': 'Badrinath, Uttarakhand, India',
+}
+
+
+class Gazetteer:
+    """Aho-Corasick automaton matching whole-word place names, case-insensitive"""
+
+    def __init__(self, places: Dict[str, str]):
+        self.places = {key.lower(): value for key, value in places.items()}
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+
+        for key in self.places:
+            self._add(key)
+        self._build_failure_links()
+
+    def _add(self, key: str):
+        state = 0
+        for char in key:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = nxt
+        self._output[state].append(key)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(char, 0)
+                self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+
+    def find_all(self, text: str) -> Iterable[Tuple[int, int, str]]:
+        """(start, end, key) of every whole-word match, in order of end position"""
+        text = text.lower()
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for key in self._output[state]:
+                start, end = index - len(key) + 1, index + 1
+                if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+                    yield start, end, key
+
+    def first(self, text: str) -> Optional[str]:
+        """Canonical name of the earliest (longest on ties) place mentioned"""
+        best = None
+        for start, end, key in self.find_all(text):
+            if best is None or start < best[0] or (start == best[0] and end > best[1]):
+                best = (start, end, key)
+        return self.places[best[2]] if best else None
+
+    def contains_any(self, text: str) -> bool:
+        return next(iter(self.find_all(text)), None) is not None
+
+
+_gazetteer = None
+
+
+def get_gazetteer() -> Gazetteer:
+    """Process-wide gazetteer over KNOWN_PLACES"""
+    global _gazetteer
+    if _gazetteer is None:
+        _gazetteer = Gazetteer(KNOWN_PLACES)
+    return _gazetteer
@@ -0,0 +1,173 @@
+"""
+Geospatial helpers - GPS parsing, geohash encoding and distance math
+
+Coordinates are stored across the models as "lat,lon" strings; everything
+here works on (lat, lon) float tuples in degrees.
+"""
+import math
+from typing import Iterable, List, Optional, Set, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+
+_GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Approximate cell size (height_km, width_km at the equator) per geohash length
+GEOHASH_CELL_KM = {
+    1: (5000.0, 5000.0),
+    2: (625.0, 1250.0),
+    3: (156.0, 156.0),
+    4: (19.5, 39.1),
+    5: (4.89, 4.89),
+    6: (0.61, 1.22),
+    7: (0.153, 0.153),
+    8: (0.019, 0.038),
+    9: (0.0048, 0.0048),
+}
+
+# Stored precision (~5m cells); queries use a shorter prefix of it
+GEOHASH_PRECISION = 9
+
+
+def parse_gps(value) -> Optional[Tuple[float, float]]:
+    """
+    Parse a coordinate in any of the shapes used across the app
+
+    Accepts "lat,lon" strings, (lat, lon) sequences and {lat, lon}/{lat, lng}
+    dicts. Returns None for missing or out-of-range values.
+    """
+    if value is None:
+        return None
+
+    try:
+        if isinstance(value, str):
+            parts = value.replace(';', ',').split(',')
+            if len(parts) != 2:
+                return None
+            lat, lon = float(parts[0].strip()), float(parts[1].strip())
+        elif isinstance(value, dict):
+            lat = float(value.get('lat', value.get('latitude')))
+            lon = float(value.get('lon', value.get('lng', value.get('longitude'))))
+        else:
+            lat, lon = float(value[0]), float(value[1])
+    except (TypeError, ValueError, IndexError):
+        return None
+
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
+        return None
+    if math.isnan(lat) or math.isnan(lon):
+        return None
+    return lat, lon
+
+
+def encode_geohash(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Standard base32 geohash of a point"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    geohash = []
+    bits, bit_count, even = 0, 0, True
+
+    while len(geohash) < precision:
+        rng, val = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if val >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(_GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+
+    return ''.join(geohash)
+
+
+def haversine_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    """Great-circle distance between two (lat, lon) points"""
+    lat1, lon1 = map(math.radians, a)
+    lat2, lon2 = map(math.radians, b)
+    dlat, dlon = lat2 - lat1, lon2 - lon1
+    h = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+
+def bbox_around(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """(min_lat, min_lon, max_lat, max_lon) enclosing a radius (clamped at the poles)"""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(lat))
+    dlon = 180.0 if cos_lat < 1e-6 else min(180.0, math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat)))
+    return max(-90.0, lat - dlat), lon - dlon, min(90.0, lat + dlat), lon + dlon
+
+
+def split_bbox(min_lat, min_lon, max_lat, max_lon) -> List[Tuple[float, float, float, float]]:
+    """Split a box crossing the antimeridian into boxes within [-180, 180]"""
+    if max_lon - min_lon >= 360.0:
+        return [(min_lat, -180.0, max_lat, 180.0)]
+    if min_lon < -180.0:
+        return [(min_lat, min_lon + 360.0, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lon)]
+    if max_lon > 180.0:
+        return [(min_lat, min_lon, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lon - 360.0)]
+    return [(min_lat, min_lon, max_lat, max_lon)]
+
+
+def geohash_cells(boxes: Iterable[Tuple[float, float, float, float]], max_cells: int = 64) -> Set[str]:
+    """
+    Geohash prefixes covering the boxes - as long as possible while staying
+    under `max_cells`, so each prefix maps to a tight index range scan
+    """
+    boxes = list(boxes)
+    best = {''}
+
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        height_km, width_km = GEOHASH_CELL_KM[precision]
+        step_lat = math.degrees(height_km / EARTH_RADIUS_KM) / 2
+        step_lon = math.degrees(width_km / EARTH_RADIUS_KM) / 2
+
+        cells = set()
+        for min_lat, min_lon, max_lat, max_lon in boxes:
+            lat_steps = int((max_lat - min_lat) / step_lat) + 2
+            lon_steps = int((max_lon - min_lon) / step_lon) + 2
+            if len(cells) + lat_steps * lon_steps > max_cells * 8:
+                return best
+            for i in range(lat_steps):
+                lat = min(max_lat, min_lat + i * step_lat)
+                for j in range(lon_steps):
+                    lon = min(max_lon, min_lon + j * step_lon)
+                    cells.add(encode_geohash(lat, lon, precision))
+
+        if len(cells) > max_cells:
+            return best
+        best = cells
+
+    return best
+
+
+def point_segment_distance_km(p, a, b) -> float:
+    """Distance from point p to segment a-b (equirectangular, fine below ~1000 km)"""
+    lat0 = math.radians((a[0] + b[0] + p[0]) / 3)
+
+    def project(q):
+        return (math.radians(q[1]) * math.cos(lat0) * EARTH_RADIUS_KM,
+                math.radians(q[0]) * EARTH_RADIUS_KM)
+
+    px, py = project(p)
+    ax, ay = project(a)
+    bx, by = project(b)
+    dx, dy = bx - ax, by - ay
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0:
+        return haversine_km(p, a)
+
+    t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length_sq))
+    return math.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+def distance_to_route_km(point, route: List[Tuple[float, float]]) -> float:
+    """Shortest distance from a point to a polyline"""
+    if not route:
+        return float('inf')
+    if len(route) == 1:
+        return haversine_km(point, route[0])
+    return min(point_segment_distance_km(point, a, b) for a, b in zip(route, route[1:]))
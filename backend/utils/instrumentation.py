@@ -0,0 +1,425 @@
+"""
+Request instrumentation - latency histograms, per-request query accounting,
+Redis / outbound HTTP timing and a Prometheus text endpoint
+
+init_instrumentation(app) installs:
+- before/after_request hooks recording http_request_duration_seconds per
+  endpoint (url rule, not raw path) and the request's query / Redis / HTTP totals
+- SQLAlchemy cursor events timing every statement; statements over
+  SLOW_QUERY_MS are logged, and a statement run N_PLUS_ONE_THRESHOLD or more
+  times in one request is logged and counted as an N+1 pattern
+- timing wrappers around upstash_redis commands / pipelines and
+  requests / httpx sends (Upstash's own HTTP calls are counted as Redis only)
+- GET /metrics in Prometheus text format, served to `Authorization: Bearer
+  <METRICS_TOKEN>` or, with no token configured, to loopback clients only
+- opt-in profiles: with PROFILING_ENABLED and METRICS_TOKEN set, a request
+  carrying `X-Profile: 1` and `X-Metrics-Token: <METRICS_TOKEN>` runs under
+  cProfile and writes {PROFILE_DIR}/<time>-<endpoint>.prof / .txt, named in
+  X-Profile-File with a Server-Timing breakdown
+
+Metrics are process-local: every gunicorn worker keeps its own registry and
+/metrics reports the worker that served the scrape.
+"""
+import cProfile
+import hmac
+import io
+import logging
+import os
+import pstats
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CLIENT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Metrics:
+    """Process-local counters and histograms rendered in Prometheus text format"""
+
+    _lock = threading.Lock()
+    _types: Dict[str, str] = {}                   # name -> 'counter' | 'histogram'
+    _help: Dict[str, str] = {}
+    _buckets: Dict[str, Tuple[float, ...]] = {}
+    _counters: Dict[Tuple, float] = defaultdict(float)   # (name, labels) -> value
+    _histograms: Dict[Tuple, list] = {}                   # (name, labels) -> [bucket counts..., sum, count]
+
+    @classmethod
+    def describe(cls, name: str, metric_type: str, help_text: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        cls._types[name] = metric_type
+        cls._help[name] = help_text
+        if metric_type == 'histogram':
+            cls._buckets[name] = buckets
+
+    @classmethod
+    def inc(cls, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with cls._lock:
+            cls._counters[key] += value
+
+    @classmethod
+    def observe(cls, name: str, value: float, **labels):
+        buckets = cls._buckets.get(name, LATENCY_BUCKETS)
+        key = (name, tuple(sorted(labels.items())))
+        with cls._lock:
+            series = cls._histograms.get(key)
+            if series is None:
+                series = cls._histograms[key] = [0] * len(buckets) + [0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @classmethod
+    def render(cls) -> str:
+        """Exposition text for every series"""
+        with cls._lock:
+            counters = dict(cls._counters)
+            histograms = {key: list(series) for key, series in cls._histograms.items()}
+
+        by_name = defaultdict(list)
+        for (name, labels), value in counters.items():
+            by_name[name].append((labels, value))
+        for (name, labels), series in histograms.items():
+            by_name[name].append((labels, series))
+
+        lines = []
+        for name in sorted(by_name):
+            metric_type = cls._types.get(name, 'counter')
+            if name in cls._help:
+                lines.append(f"# HELP {name} {cls._help[name]}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in sorted(by_name[name], key=lambda item: item[0]):
+                if metric_type != 'histogram':
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                    continue
+                buckets = cls._buckets.get(name, LATENCY_BUCKETS)
+                for bound, count in zip(buckets, value):
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', _number(bound)),))} {count}")
+                lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {value[-1]}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(value[-2])}")
+                lines.append(f"{name}_count{_labels(labels)} {value[-1]}")
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._counters.clear()
+            cls._histograms.clear()
+
+
+def _labels(labels: Tuple) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value: float) -> str:
+    return repr(int(value)) if float(value).is_integer() else repr(round(value, 6))
+
+
+Metrics.describe('http_request_duration_seconds', 'histogram', 'Request latency by endpoint')
+Metrics.describe('http_request_db_queries', 'histogram', 'SQL statements per request', COUNT_BUCKETS)
+Metrics.describe('http_request_db_seconds_total', 'counter', 'Time in SQL statements by endpoint')
+Metrics.describe('http_request_redis_seconds_total', 'counter', 'Time in Redis calls by endpoint')
+Metrics.describe('http_request_n_plus_one_total', 'counter', 'Requests repeating one statement N_PLUS_ONE_THRESHOLD+ times')
+Metrics.describe('db_query_duration_seconds', 'histogram', 'SQL statement latency', CLIENT_BUCKETS)
+Metrics.describe('db_slow_queries_total', 'counter', 'SQL statements slower than SLOW_QUERY_MS')
+Metrics.describe('redis_command_duration_seconds', 'histogram', 'Upstash Redis command latency', CLIENT_BUCKETS)
+Metrics.describe('http_client_request_duration_seconds', 'histogram', 'Outbound HTTP latency by host', CLIENT_BUCKETS)
+Metrics.describe('http_client_errors_total', 'counter', 'Outbound HTTP requests that raised')
+
+
+# ----------------------------------------------------------------------
+# Per-request accounting
+# ----------------------------------------------------------------------
+
+class RequestStats:
+    """Totals for the current request (stored on flask.g)"""
+
+    __slots__ = ('started', 'db_count', 'db_seconds', 'statements', 'redis_count', 'redis_seconds',
+                 'http_count', 'http_seconds', 'profiler')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_count = 0
+        self.db_seconds = 0.0
+        self.statements = Counter()
+        self.redis_count = 0
+        self.redis_seconds = 0.0
+        self.http_count = 0
+        self.http_seconds = 0.0
+        self.profiler = None
+
+
+def current_stats() -> Optional[RequestStats]:
+    if has_request_context():
+        return g.get('_request_stats')
+    return None
+
+
+_WHITESPACE = re.compile(r'\s+')
+_client_state = threading.local()  # .in_redis: the HTTP call being timed belongs to a Redis command
+
+
+# ----------------------------------------------------------------------
+# SQLAlchemy
+# ----------------------------------------------------------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_query_started', []).append(time.perf_counter())
+
+
+def _handle_error(exception_context):
+    started = exception_context.connection.info.get('_query_started') if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('_query_started')
+    if not started:
+        return
+    duration = time.perf_counter() - started.pop()
+    Metrics.observe('db_query_duration_seconds', duration)
+
+    if duration * 1000 >= _settings['slow_query_ms']:
+        Metrics.inc('db_slow_queries_total')
+        logger.warning("Slow query (%.0fms): %s", duration * 1000, _WHITESPACE.sub(' ', statement)[:500])
+
+    stats = current_stats()
+    if stats is not None:
+        stats.db_count += 1
+        stats.db_seconds += duration
+        stats.statements[statement] += 1
+
+
+# ----------------------------------------------------------------------
+# Redis / HTTP clients
+# ----------------------------------------------------------------------
+
+def _record_redis(command: str, duration: float):
+    Metrics.observe('redis_command_duration_seconds', duration, command=command)
+    stats = current_stats()
+    if stats is not None:
+        stats.redis_count += 1
+        stats.redis_seconds += duration
+
+
+def _timed_redis_execute(execute):
+    def wrapper(self, command, *args, **kwargs):
+        started = time.perf_counter()
+        _client_state.in_redis = True
+        try:
+            return execute(self, command, *args, **kwargs)
+        finally:
+            _client_state.in_redis = False
+            _record_redis(str(command[0]).upper() if command else 'UNKNOWN', time.perf_counter() - started)
+    wrapper._instrumented = True
+    return wrapper
+
+
+def _timed_pipeline_exec(exec_):
+    def wrapper(self, *args, **kwargs):
+        started = time.perf_counter()
+        _client_state.in_redis = True
+        try:
+            return exec_(self, *args, **kwargs)
+        finally:
+            _client_state.in_redis = False
+            _record_redis('PIPELINE', time.perf_counter() - started)
+    wrapper._instrumented = True
+    return wrapper
+
+
+def _timed_http_send(send, host_of):
+    def wrapper(self, http_request, *args, **kwargs):
+        if getattr(_client_state, 'in_redis', False):
+            return send(self, http_request, *args, **kwargs)
+
+        host = host_of(http_request)
+        started = time.perf_counter()
+        try:
+            return send(self, http_request, *args, **kwargs)
+        except Exception:
+            Metrics.inc('http_client_errors_total', host=host)
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            Metrics.observe('http_client_request_duration_seconds', duration, host=host)
+            stats = current_stats()
+            if stats is not None:
+                stats.http_count += 1
+                stats.http_seconds += duration
+    wrapper._instrumented = True
+    return wrapper
+
+
+def _wrap(owner, name, factory, *args):
+    original = getattr(owner, name, None)
+    if original is None or getattr(original, '_instrumented', False):
+        return
+    setattr(owner, name, factory(original, *args))
+
+
+def _instrument_clients():
+    """Wrap client classes once per process (idempotent)"""
+    try:
+        from upstash_redis import Redis
+        from upstash_redis.client import Pipeline
+        _wrap(Redis, 'execute', _timed_redis_execute)
+        _wrap(Pipeline, 'exec', _timed_pipeline_exec)
+    except ImportError:
+        pass
+
+    try:
+        import requests
+        from urllib.parse import urlsplit
+        _wrap(requests.Session, 'send', _timed_http_send, lambda prepared: urlsplit(prepared.url).hostname or 'unknown')
+    except ImportError:
+        pass
+
+    try:
+        import httpx
+        _wrap(httpx.Client, 'send', _timed_http_send, lambda http_request: http_request.url.host or 'unknown')
+    except ImportError:
+        pass
+
+
+# ----------------------------------------------------------------------
+# Flask hooks
+# ----------------------------------------------------------------------
+
+_settings = {'slow_query_ms': 200, 'n_plus_one_threshold': 10}
+_installed = {'engine': False}
+
+
+def _endpoint() -> str:
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+_LOOPBACK = ('127.0.0.1', '::1')
+
+
+def _token_matches(supplied: Optional[str]) -> bool:
+    token = current_app.config.get('METRICS_TOKEN')
+    return bool(token and supplied) and hmac.compare_digest(supplied.encode(), token.encode())
+
+
+def _before_request():
+    stats = g._request_stats = RequestStats()
+    # Authorization carries the caller's JWT on API routes, so the token rides in its own header
+    if (current_app.config.get('PROFILING_ENABLED') and request.headers.get('X-Profile') == '1'
+            and _token_matches(request.headers.get('X-Metrics-Token'))):
+        stats.profiler = cProfile.Profile()
+        stats.profiler.enable()
+
+
+def _after_request(response):
+    stats = current_stats()
+    if stats is None or request.path == '/metrics':
+        return response
+
+    if stats.profiler is not None:
+        stats.profiler.disable()
+
+    duration = time.perf_counter() - stats.started
+    endpoint = _endpoint()
+    Metrics.observe('http_request_duration_seconds', duration,
+                    method=request.method, endpoint=endpoint, status=f"{response.status_code // 100}xx")
+    Metrics.observe('http_request_db_queries', stats.db_count, endpoint=endpoint)
+    if stats.db_seconds:
+        Metrics.inc('http_request_db_seconds_total', stats.db_seconds, endpoint=endpoint)
+    if stats.redis_seconds:
+        Metrics.inc('http_request_redis_seconds_total', stats.redis_seconds, endpoint=endpoint)
+
+    repeated = [(count, statement) for statement, count in stats.statements.items()
+                if count >= _settings['n_plus_one_threshold']]
+    if repeated:
+        Metrics.inc('http_request_n_plus_one_total', endpoint=endpoint)
+        count, statement = max(repeated)
+        logger.warning("Possible N+1 on %s %s: %d x %s", request.method, endpoint, count,
+                       _WHITESPACE.sub(' ', statement)[:300])
+
+    if stats.profiler is not None:
+        path = _dump_profile(stats, endpoint, duration)
+        response.headers['X-Profile-File'] = os.path.basename(path)
+        response.headers['Server-Timing'] = (
+            f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.db_count} queries", '
+            f'redis;dur={stats.redis_seconds * 1000:.1f};desc="{stats.redis_count} calls", '
+            f'http;dur={stats.http_seconds * 1000:.1f};desc="{stats.http_count} calls", '
+            f'total;dur={duration * 1000:.1f}'
+        )
+    return response
+
+
+def _dump_profile(stats: RequestStats, endpoint: str, duration: float) -> str:
+    """Write <PROFILE_DIR>/<time>-<endpoint>.prof (cProfile) and .txt (summary), return the base path"""
+    directory = current_app.config.get('PROFILE_DIR') or '/tmp/tripit-profiles'
+    os.makedirs(directory, exist_ok=True)
+    name = re.sub(r'[^A-Za-z0-9]+', '_', endpoint).strip('_') or 'root'
+    base = os.path.join(directory, f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{request.method}-{name}")
+    stats.profiler.dump_stats(base + '.prof')
+
+    text = io.StringIO()
+    text.write(f"{request.method} {request.full_path}  {duration * 1000:.1f}ms\n")
+    text.write(f"db: {stats.db_count} queries, {stats.db_seconds * 1000:.1f}ms\n")
+    text.write(f"redis: {stats.redis_count} calls, {stats.redis_seconds * 1000:.1f}ms\n")
+    text.write(f"http: {stats.http_count} calls, {stats.http_seconds * 1000:.1f}ms\n\n")
+    text.write("Statements by count:\n")
+    for statement, count in stats.statements.most_common(20):
+        text.write(f"{count:5d}  {_WHITESPACE.sub(' ', statement)[:300]}\n")
+    text.write("\n")
+    pstats.Stats(stats.profiler, stream=text).sort_stats('cumulative').print_stats(40)
+    with open(base + '.txt', 'w') as f:
+        f.write(text.getvalue())
+
+    logger.info("Profile for %s %s written to %s.txt", request.method, endpoint, base)
+    return base
+
+
+def _metrics_view():
+    if current_app.config.get('METRICS_TOKEN'):
+        authorization = request.headers.get('Authorization', '')
+        if not authorization.startswith('Bearer ') or not _token_matches(authorization[len('Bearer '):]):
+            return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    elif request.remote_addr not in _LOOPBACK or request.headers.get('X-Forwarded-For'):
+        # No token configured: only a scraper on the same host, never a proxied request
+        return Response('Not Found\n', status=404, mimetype='text/plain')
+    return Response(Metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+def init_instrumentation(app):
+    """Install request hooks, SQL / client timing and GET /metrics (no-op if METRICS_ENABLED is off)"""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    _settings['slow_query_ms'] = app.config.get('SLOW_QUERY_MS', 200)
+    _settings['n_plus_one_threshold'] = app.config.get('N_PLUS_ONE_THRESHOLD', 10)
+
+    if not _installed['engine']:
+        # Class-level listeners cover every engine, including per-worker ones
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+        _installed['engine'] = True
+    _instrument_clients()
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.add_url_rule('/metrics', 'metrics', _metrics_view, methods=['GET'])
@@ -1,10 +1,16 @@
 """
 Notification utility functions for creating and sending notifications
 """
+import logging
+from datetime import datetime
+from uuid import uuid4
+
 from extensions import db, socketio
 from models.notification import Notification
 from models.chain import ChainFollower
 
+logger = logging.getLogger(__name__)
+
 
 def create_notification(user_id, notification_type, title, message,
                         project_id=None, chain_id=None, comment_id=None, actor_id=None, redirect_url=None):
@@ -25,9 +31,6 @@ def create_notification(user_id, notification_type, title, message,
     Returns:
         Notification object
     """
-    print(f"\n[Notifications] Creating notification for user {user_id}")
-    print(f"[Notifications] Type: {notification_type}, Title: {title}")
-
     # Build notification with all fields except comment_id (pending migration)
     notification = Notification(
         user_id=user_id,
@@ -43,27 +46,70 @@ def create_notification(user_id, notification_type, title, message,
     )
     db.session.add(notification)
     db.session.commit()
-    print(f"[Notifications] ✅ Notification saved to database: ID={notification.id}")
+    logger.debug("Notification %s (%s) saved for user %s", notification.id, notification_type, user_id)
 
     # Emit real-time notification via WebSocket
     # CRITICAL: Room name must match the room user joined in app.py (str(user_id), not f'user_{user_id}')
     try:
         # Serialize notification to dict BEFORE emitting
         notification_dict = notification.to_dict(include_relations=True)
-        print(f"[Notifications] 📤 Emitting to room: {str(user_id)}")
-        print(f"[Notifications] Notification data: {notification_dict}")
         socketio.emit('new_notification', notification_dict, room=str(user_id))
-        print(f"[Notifications] ✅ Socket.IO emit successful to room {str(user_id)}")
-    except Exception as e:
-        print(f"\n[Notifications] ❌ ERROR emitting WebSocket notification to user {user_id}")
-        print(f"[Notifications] Exception type: {type(e).__name__}")
-        print(f"[Notifications] Exception message: {str(e)}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Emitting WebSocket notification to user %s failed", user_id)
 
     return notification
 
 
+def create_notifications_bulk(user_ids, notification_type, title, message,
+                              project_id=None, chain_id=None, actor_id=None, redirect_url=None):
+    """
+    Create the same notification for many users with one multi-row INSERT
+
+    Used for fan-out (AI alerts) where create_notification's per-row
+    add/commit would cost one round trip per recipient.
+
+    Args:
+        user_ids: IDs of the users to notify
+        notification_type, title, message, project_id, chain_id, actor_id, redirect_url:
+            As for create_notification
+
+    Returns:
+        Number of notifications created
+    """
+    user_ids = list(dict.fromkeys(user_id for user_id in user_ids if user_id))
+    if not user_ids:
+        return 0
+
+    now = datetime.utcnow()
+    rows = [{
+        'id': str(uuid4()),
+        'user_id': user_id,
+        'notification_type': notification_type,
+        'title': title,
+        'message': message,
+        'project_id': project_id,
+        'chain_id': chain_id,
+        'actor_id': actor_id,
+        'redirect_url': redirect_url,
+        'is_read': False,
+        'created_at': now,
+    } for user_id in user_ids]
+
+    db.session.execute(Notification.__table__.insert(), rows)
+    db.session.commit()
+    logger.info("Bulk-inserted %d '%s' notifications", len(rows), notification_type)
+
+    # Emit real-time notifications (room name = str(user_id), as in create_notification)
+    for row in rows:
+        try:
+            payload = {**row, 'created_at': now.isoformat(), 'read_at': None}
+            socketio.emit('new_notification', payload, room=str(row['user_id']))
+        except Exception as e:
+            logger.warning("Emitting WebSocket notification to user %s failed: %s", row['user_id'], e)
+
+    return len(rows)
+
+
 def notify_chain_new_project(chain, project, actor):
     """
     Notify chain followers when a new project is added
@@ -351,15 +397,8 @@ def notify_project_vote(project_owner_id, project, voter, vote_type):
         vote_type: 'up' or 'down'
     """
     try:
-        print(f"\n[Notifications] notify_project_vote called:")
-        print(f"  Project owner: {project_owner_id}")
-        print(f"  Voter: {voter.id} (@{voter.username})")
-        print(f"  Vote type: {vote_type}")
-        print(f"  Project: {project.id} ({project.title})")
-
         # Don't notify if owner voted for their own project
         if project_owner_id == voter.id:
-            print(f"[Notifications] Skipping notification - owner voted on own project")
             return
 
         vote_label = "upvoted" if vote_type == "up" else "downvoted"
@@ -373,10 +412,8 @@ def notify_project_vote(project_owner_id, project, voter, vote_type):
             actor_id=voter.id,
             redirect_url=f"/project/{project.id}"
         )
-    except Exception as e:
-        print(f"[Notifications] ❌ ERROR in notify_project_vote: {str(e)}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("notify_project_vote failed")
 
 
 def notify_comment_posted(project_owner_id, project, comment, commenter):
@@ -390,14 +427,8 @@ def notify_comment_posted(project_owner_id, project, comment, commenter):
         commenter: User who commented
     """
     try:
-        print(f"\n[Notifications] notify_comment_posted called:")
-        print(f"  Project owner: {project_owner_id}")
-        print(f"  Commenter: {commenter.id} (@{commenter.username})")
-        print(f"  Project: {project.id} ({project.title})")
-
         # Don't notify if owner commented on their own project
         if project_owner_id == commenter.id:
-            print(f"[Notifications] Skipping notification - owner commented on own project")
             return
 
         # Preview first 50 characters of comment
@@ -414,10 +445,8 @@ def notify_comment_posted(project_owner_id, project, comment, commenter):
             actor_id=commenter.id,
             redirect_url=f"/project/{project.id}#comment-{comment.id}"
         )
-    except Exception as e:
-        print(f"[Notifications] ❌ ERROR in notify_comment_posted: {str(e)}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("notify_comment_posted failed")
 
 
 def notify_comment_reply(comment_author_id, original_comment, reply_comment, replier):
@@ -452,10 +481,8 @@ def notify_comment_reply(comment_author_id, original_comment, reply_comment, rep
             actor_id=replier.id,
             redirect_url=f"/project/{project.id}#comment-{reply_comment.id}"
         )
-    except Exception as e:
-        print(f"[Notifications] ERROR in notify_comment_reply: {str(e)}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("notify_comment_reply failed")
 
 
 def notify_investor_request_approved(user_id, investor_name=None):
@@ -467,10 +494,6 @@ def notify_investor_request_approved(user_id, investor_name=None):
         investor_name: Optional name of the investor (for context)
     """
     try:
-        print(f"\n[Notifications] notify_investor_request_approved called:")
-        print(f"  User: {user_id}")
-        print(f"  Investor name: {investor_name}")
-
         create_notification(
             user_id=user_id,
             notification_type='investor_request_approved',
@@ -478,10 +501,8 @@ def notify_investor_request_approved(user_id, investor_name=None):
             message="Congratulations! Your investor profile has been approved and is now active.",
             redirect_url="/investor/dashboard"
         )
-    except Exception as e:
-        print(f"[Notifications] ❌ ERROR in notify_investor_request_approved: {str(e)}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("notify_investor_request_approved failed")
 
 
 def notify_investor_request_rejected(user_id, reason=None):
@@ -493,10 +514,6 @@ def notify_investor_request_rejected(user_id, reason=None):
         reason: Optional rejection reason
     """
     try:
-        print(f"\n[Notifications] notify_investor_request_rejected called:")
-        print(f"  User: {user_id}")
-        print(f"  Reason: {reason}")
-
         message = "Your investor request has been reviewed and unfortunately could not be approved at this time."
         if reason:
             message += f" Reason: {reason}"
@@ -508,7 +525,5 @@ def notify_investor_request_rejected(user_id, reason=None):
             message=message,
             redirect_url="/investor"
         )
-    except Exception as e:
-        print(f"[Notifications] ❌ ERROR in notify_investor_request_rejected: {str(e)}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("notify_investor_request_rejected failed")
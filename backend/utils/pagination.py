@@ -0,0 +1,245 @@
+"""
+Keyset (cursor) pagination helpers
+
+Cursor mode is opt-in per request (`?cursor=` - empty for the first page) so
+existing page/per_page clients keep working. A cursor is an opaque, URL-safe
+encoding of the last row's sort key + id; the next page is a
+`WHERE (sort_key, id) < (:last)` range scan, so page 500 costs the same as
+page 1. Totals are optional (`include_total=true`) and estimated.
+"""
+import base64
+import hashlib
+import json
+from datetime import date, datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from flask import jsonify
+from sqlalchemy import and_, func, literal, or_, tuple_
+
+from extensions import db
+
+
+class CursorError(ValueError):
+    """Raised for malformed or mismatched cursors"""
+
+
+class SortKey:
+    """
+    One column of a keyset ordering
+
+    Args:
+        expr: Column (or SQL expression) to order by
+        descending: Sort direction
+        default: Substituted for NULLs (coalesce) so rows with NULL keys are
+            neither skipped nor repeated; match it in the supporting index
+        value: Getter for the row's value (defaults to the column attribute)
+    """
+
+    def __init__(self, expr, descending: bool = True, default: Any = None,
+                 value: Optional[Callable[[Any], Any]] = None):
+        self.column = expr
+        self.descending = descending
+        self.default = default
+        self.expr = func.coalesce(expr, default) if default is not None else expr
+        self._value = value or (lambda row, key=getattr(expr, 'key', None): getattr(row, key))
+
+    def value_of(self, row):
+        value = self._value(row)
+        return self.default if value is None else value
+
+    def order_by(self):
+        return self.expr.desc() if self.descending else self.expr.asc()
+
+
+# ----------------------------------------------------------------------
+# Cursor encoding
+# ----------------------------------------------------------------------
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'$dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'$d': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if '$dt' in value:
+            return datetime.fromisoformat(value['$dt'])
+        if '$d' in value:
+            return date.fromisoformat(value['$d'])
+        raise CursorError('Invalid cursor')
+    return value
+
+
+def encode_cursor(values: Sequence, scope: str = '') -> str:
+    """Opaque cursor for a row's key values, bound to a scope (endpoint + sort)"""
+    payload = json.dumps({'s': _scope_tag(scope), 'v': [_encode_value(v) for v in values]},
+                         separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, expected_len: int, scope: str = '') -> List:
+    """Key values from a cursor; raises CursorError if it is malformed or from another listing"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        values = [_decode_value(v) for v in payload['v']]
+    except CursorError:
+        raise
+    except Exception:
+        raise CursorError('Invalid cursor')
+
+    if payload.get('s') != _scope_tag(scope) or len(values) != expected_len:
+        raise CursorError('Cursor does not match this listing')
+    return values
+
+
+def _scope_tag(scope: str) -> str:
+    return hashlib.sha1(scope.encode('utf-8')).hexdigest()[:8] if scope else ''
+
+
+# ----------------------------------------------------------------------
+# Request params / pagination
+# ----------------------------------------------------------------------
+
+def get_cursor_params(request, default_per_page=20, max_per_page=100) -> Optional[Tuple[str, int]]:
+    """
+    (cursor, per_page) when the client asked for cursor pagination, else None
+
+    `?cursor=` (empty) requests the first page in cursor mode.
+    """
+    if 'cursor' not in request.args:
+        return None
+
+    try:
+        per_page = int(request.args.get('per_page', request.args.get('limit', default_per_page)))
+    except (ValueError, TypeError):
+        per_page = default_per_page
+    per_page = max(1, min(per_page, max_per_page))
+
+    return request.args.get('cursor', ''), per_page
+
+
+def keyset_paginate(query, keys: List[SortKey], cursor: str, per_page: int, scope: str = ''):
+    """
+    Apply ordering + keyset predicate and fetch one page
+
+    The last key must be unique (normally the primary key) so the ordering
+    is total. Returns (items, next_cursor); next_cursor is None on the last page.
+    """
+    query = query.order_by(*[key.order_by() for key in keys])
+
+    if cursor:
+        values = decode_cursor(cursor, len(keys), scope)
+        query = query.filter(_after(keys, values))
+
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    items = rows[:per_page]
+
+    next_cursor = None
+    if has_more and items:
+        next_cursor = encode_cursor([key.value_of(items[-1]) for key in keys], scope)
+
+    return items, next_cursor
+
+
+def _after(keys: List[SortKey], values: List):
+    """Rows strictly after `values` in the keys' ordering"""
+    # Uniform direction: a row-value comparison the planner can serve from one index range
+    if all(k.descending for k in keys) or not any(k.descending for k in keys):
+        left = tuple_(*[k.expr for k in keys])
+        right = tuple_(*[literal(v, type_=k.expr.type) for k, v in zip(keys, values)])
+        return left < right if keys[0].descending else left > right
+
+    # Mixed directions: (a < x) OR (a = x AND b > y) OR ...
+    clauses = []
+    for i, key in enumerate(keys):
+        equal = [keys[j].expr == values[j] for j in range(i)]
+        step = key.expr < values[i] if key.descending else key.expr > values[i]
+        clauses.append(and_(*equal, step))
+    return or_(*clauses)
+
+
+# ----------------------------------------------------------------------
+# Totals
+# ----------------------------------------------------------------------
+
+def _planner_estimate(query) -> Optional[int]:
+    """Row estimate from the Postgres planner (pg_class.reltuples + column stats)"""
+    if db.engine.dialect.name != 'postgresql':
+        return None
+    try:
+        compiled = query.order_by(None).statement.compile(db.engine, compile_kwargs={'render_postcompile': True})
+        plan = db.session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+    except Exception:
+        db.session.rollback()
+        return None
+
+
+def cached_count(query, ttl: int = 120) -> int:
+    """
+    count() of a filtered query, cached in Redis by its SQL + params
+
+    Deep infinite-scroll pages reuse the count from the first page instead of
+    re-counting the whole filtered set on every request.
+    """
+    from utils.cache import CacheService
+
+    statement = query.statement.compile(db.engine)
+    digest = hashlib.sha1(
+        (str(statement) + json.dumps(statement.params, default=str, sort_keys=True)).encode('utf-8')
+    ).hexdigest()
+    cache_key = f"count:{digest}"
+
+    cached = CacheService.get(cache_key)
+    if cached is not None:
+        return int(cached)
+
+    total = query.order_by(None).count()
+    CacheService.set(cache_key, total, ttl=ttl)
+    return total
+
+
+def optional_total(request, query, exact_below: int = 10000) -> Tuple[Optional[int], bool]:
+    """
+    (total, estimated) for cursor mode - (None, False) unless ?include_total=true
+
+    Large result sets use the planner estimate (no scan at all); smaller ones
+    get an exact count, cached so deep pages do not re-count.
+    """
+    if request.args.get('include_total', '').lower() != 'true':
+        return None, False
+
+    estimate = _planner_estimate(query)
+    if estimate is not None and estimate >= exact_below:
+        return estimate, True
+    return cached_count(query), False
+
+
+def cursor_pagination(next_cursor, per_page, total=None, total_estimated=False) -> dict:
+    """Cursor-mode `pagination` block, for endpoints with their own response shape"""
+    pagination = {
+        'per_page': per_page,
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+    }
+    if total is not None:
+        pagination['total'] = total
+        pagination['total_estimated'] = total_estimated
+    return pagination
+
+
+def cursor_response(items, next_cursor, per_page, total=None, total_estimated=False, message='Success'):
+    """Cursor-mode counterpart of helpers.paginated_response"""
+    return jsonify({
+        'status': 'success',
+        'message': message,
+        'data': items,
+        'pagination': cursor_pagination(next_cursor, per_page, total, total_estimated),
+    }), 200
@@ -0,0 +1,151 @@
+"""
+Principal cache - the account facts the auth decorators check, without a
+database round trip per request
+
+A principal is resolved from a short-TTL in-process map, then Redis, then
+the Traveler/User tables, and is stored on `flask.g` for the rest of the
+request. Admin actions that change these facts call invalidate_principal();
+other workers' in-process entries expire within LOCAL_TTL seconds.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from flask import g, has_request_context
+
+from utils.cache import CacheService
+
+LOCAL_TTL = 30        # seconds; bounds staleness across workers after a ban
+REDIS_TTL = 300
+LOCAL_MAX_ENTRIES = 10000
+
+_local = OrderedDict()
+_local_lock = threading.Lock()
+
+
+class Principal:
+    """Authenticated account as seen by the decorators"""
+
+    __slots__ = ('id', 'kind', 'username', 'is_active', 'is_admin', 'is_validator')
+
+    def __init__(self, id, kind, username=None, is_active=False, is_admin=False, is_validator=False):
+        self.id = id
+        self.kind = kind  # 'traveler' or 'user' (which table the account lives in)
+        self.username = username
+        self.is_active = bool(is_active)
+        self.is_admin = bool(is_admin)
+        self.is_validator = bool(is_validator)
+
+    @classmethod
+    def from_account(cls, account, kind):
+        return cls(
+            id=account.id,
+            kind=kind,
+            username=account.username,
+            is_active=account.is_active,
+            is_admin=account.is_admin,
+            is_validator=getattr(account, 'is_validator', False),
+        )
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+def get_principal(user_id) -> Optional[Principal]:
+    """Principal for a user id (None if no such account); memoized on flask.g"""
+    if not user_id:
+        return None
+
+    if has_request_context():
+        current = g.get('principal')
+        if current is not None and current.id == user_id:
+            return current
+
+    principal = _local_get(user_id)
+    if principal is None:
+        cached = CacheService.get(f"principal:{user_id}")
+        if cached:
+            principal = Principal(**cached)
+        else:
+            principal = _load(user_id)
+            if principal is not None:
+                CacheService.set(f"principal:{user_id}", principal.to_dict(), ttl=REDIS_TTL)
+        if principal is not None:
+            _local_put(principal)
+
+    if has_request_context():
+        g.principal = principal
+    return principal
+
+
+def get_current_user(user_id):
+    """
+    Full Traveler/User row for the authenticated user, loaded once per request
+
+    Uses the principal's table, so User accounts skip the Traveler miss.
+    """
+    current = g.get('current_user') if has_request_context() else None
+    if current is not None and current.id == user_id:
+        return current
+
+    from models.traveler import Traveler
+    from models.user import User
+
+    principal = get_principal(user_id)
+    if principal is None:
+        return None
+    model = Traveler if principal.kind == 'traveler' else User
+    user = model.query.get(user_id)
+
+    if has_request_context():
+        g.current_user = user
+    return user
+
+
+def invalidate_principal(user_id):
+    """Forget a cached principal (ban/unban, role or profile changes)"""
+    with _local_lock:
+        _local.pop(user_id, None)
+    CacheService.delete(f"principal:{user_id}")
+    if has_request_context():
+        current = g.get('principal')
+        if current is not None and current.id == user_id:
+            g.principal = None
+        user = g.get('current_user')
+        if user is not None and user.id == user_id:
+            g.current_user = None
+
+
+def _load(user_id) -> Optional[Principal]:
+    from models.traveler import Traveler
+    from models.user import User
+
+    # Traveler table first (Google OAuth users), then User (email/password users)
+    account = Traveler.query.get(user_id)
+    if account:
+        return Principal.from_account(account, 'traveler')
+    account = User.query.get(user_id)
+    if account:
+        return Principal.from_account(account, 'user')
+    return None
+
+
+def _local_get(user_id) -> Optional[Principal]:
+    with _local_lock:
+        entry = _local.get(user_id)
+        if entry is None:
+            return None
+        principal, expires_at = entry
+        if expires_at < time.monotonic():
+            del _local[user_id]
+            return None
+        return principal
+
+
+def _local_put(principal: Principal):
+    with _local_lock:
+        _local[principal.id] = (principal, time.monotonic() + LOCAL_TTL)
+        _local.move_to_end(principal.id)
+        while len(_local) > LOCAL_MAX_ENTRIES:
+            _local.popitem(last=False)
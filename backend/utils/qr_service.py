@@ -6,8 +6,6 @@ import secrets
 import json
 from io import BytesIO
 
-import qrcode
-from qrcode.constants import ERROR_CORRECT_H
 
 from utils.ipfs import PinataService
 
@@ -50,6 +48,10 @@ def generate_qr_code(verification_token: str, user_name: str) -> BytesIO:
     # Convert to JSON string
     qr_json = json.dumps(qr_data, separators=(',', ':'))  # Compact JSON
 
+    # Lazy import: qrcode/PIL are only needed when an image is generated
+    import qrcode
+    from qrcode.constants import ERROR_CORRECT_H
+
     # Create QR code instance with high error correction
     qr = qrcode.QRCode(
         version=None,  # Auto-determine size
@@ -0,0 +1,306 @@
+"""
+Route geometry - GPX parsing, polyline encoding and multi-resolution simplification
+
+A track is parsed once (on upload) into (lat, lon, elevation) points, stored as
+encoded polylines and summarized (bbox, distance, elevation gain). Douglas-Peucker
+runs a single time to rank every point by significance; any resolution is then
+"the N most significant points", so preview/medium/full levels share one pass.
+"""
+import math
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from utils.geo import EARTH_RADIUS_KM, haversine_km, parse_gps
+
+Point = Tuple[float, float, Optional[float]]  # (lat, lon, elevation_m)
+
+MAX_GPX_BYTES = 10 * 1024 * 1024
+
+# Point budgets per resolution (None = every point)
+RESOLUTIONS = {
+    'preview': 64,
+    'medium': 1000,
+    'full': None,
+}
+
+# Elevation changes below this are treated as GPS noise when summing gain/loss
+ELEVATION_NOISE_M = 3.0
+
+POLYLINE_PRECISION = 5
+
+
+class RouteGeometryError(ValueError):
+    """Raised for GPX that cannot be parsed"""
+
+
+# ----------------------------------------------------------------------
+# Parsing
+# ----------------------------------------------------------------------
+
+def _local(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+
+def parse_gpx(gpx_text: str) -> List[Point]:
+    """
+    Points of a GPX document: track points, else route points, else waypoints
+
+    Namespace-agnostic so GPX 1.0/1.1 and vendor extensions all parse.
+    """
+    if not gpx_text or not gpx_text.strip():
+        return []
+    if len(gpx_text) > MAX_GPX_BYTES:
+        raise RouteGeometryError('GPX file too large')
+
+    try:
+        root = ET.fromstring(gpx_text.strip())
+    except ET.ParseError as e:
+        raise RouteGeometryError(f'Invalid GPX: {e}')
+
+    found = {'trkpt': [], 'rtept': [], 'wpt': []}
+    for element in root.iter():
+        tag = _local(element.tag)
+        if tag not in found:
+            continue
+        coords = parse_gps((element.get('lat'), element.get('lon')))
+        if not coords:
+            continue
+        elevation = None
+        for child in element:
+            if _local(child.tag) == 'ele' and child.text:
+                try:
+                    elevation = float(child.text)
+                except ValueError:
+                    pass
+                break
+        found[tag].append((coords[0], coords[1], elevation))
+
+    return found['trkpt'] or found['rtept'] or found['wpt']
+
+
+def points_from_waypoints(waypoints: Iterable) -> List[Point]:
+    """Points of a route_waypoints JSON list ([{lat, lon, elevation}, ...])"""
+    points = []
+    for waypoint in waypoints or []:
+        coords = parse_gps(waypoint)
+        if not coords:
+            continue
+        elevation = None
+        if isinstance(waypoint, dict):
+            try:
+                raw = waypoint.get('elevation', waypoint.get('ele'))
+                elevation = float(raw) if raw is not None else None
+            except (TypeError, ValueError):
+                elevation = None
+        points.append((coords[0], coords[1], elevation))
+    return points
+
+
+# ----------------------------------------------------------------------
+# Encoded polylines (Google polyline algorithm)
+# ----------------------------------------------------------------------
+
+def _encode_value(value: int, out: List[str]):
+    value = ~(value << 1) if value < 0 else value << 1
+    while value >= 0x20:
+        out.append(chr((0x20 | (value & 0x1f)) + 63))
+        value >>= 5
+    out.append(chr(value + 63))
+
+
+def encode_values(values: Iterable[float], precision: int = 0) -> str:
+    """Delta + varint encode a 1-D series (e.g. elevations)"""
+    factor = 10 ** precision
+    out, previous = [], 0
+    for value in values:
+        current = int(round(value * factor))
+        _encode_value(current - previous, out)
+        previous = current
+    return ''.join(out)
+
+
+def _decode_ints(encoded: str) -> Iterator[int]:
+    index, length = 0, len(encoded)
+    while index < length:
+        result, shift = 0, 0
+        while True:
+            byte = ord(encoded[index]) - 63
+            index += 1
+            result |= (byte & 0x1f) << shift
+            shift += 5
+            if byte < 0x20:
+                break
+        yield ~(result >> 1) if result & 1 else result >> 1
+
+
+def decode_values(encoded: str, precision: int = 0) -> List[float]:
+    """Inverse of encode_values"""
+    factor = 10 ** precision
+    values, current = [], 0
+    for delta in _decode_ints(encoded or ''):
+        current += delta
+        values.append(current / factor)
+    return values
+
+
+def encode_polyline(coords: Iterable[Sequence[float]], precision: int = POLYLINE_PRECISION) -> str:
+    """Encode (lat, lon) pairs as a polyline string"""
+    factor = 10 ** precision
+    out, prev_lat, prev_lon = [], 0, 0
+    for coord in coords:
+        lat, lon = int(round(coord[0] * factor)), int(round(coord[1] * factor))
+        _encode_value(lat - prev_lat, out)
+        _encode_value(lon - prev_lon, out)
+        prev_lat, prev_lon = lat, lon
+    return ''.join(out)
+
+
+def iter_polyline(encoded: str, precision: int = POLYLINE_PRECISION) -> Iterator[Tuple[float, float]]:
+    """Lazily decode a polyline into (lat, lon) pairs"""
+    factor = 10 ** precision
+    lat = lon = 0
+    ints = _decode_ints(encoded or '')
+    for d_lat in ints:
+        lat += d_lat
+        lon += next(ints)
+        yield lat / factor, lon / factor
+
+
+def decode_polyline(encoded: str, precision: int = POLYLINE_PRECISION) -> List[Tuple[float, float]]:
+    return list(iter_polyline(encoded, precision))
+
+
+# ----------------------------------------------------------------------
+# Simplification
+# ----------------------------------------------------------------------
+
+def dp_significance(points: Sequence[Point]) -> List[float]:
+    """
+    Douglas-Peucker significance of every point (in km)
+
+    Endpoints are infinite; each other point gets the deviation at which DP
+    would keep it, capped by its parent split so the ranking is hierarchical:
+    keeping everything above a threshold equals DP at that tolerance.
+    """
+    n = len(points)
+    if n <= 2:
+        return [math.inf] * n
+
+    # Equirectangular projection around the track's mean latitude
+    lat0 = math.radians(sum(p[0] for p in points) / n)
+    cos_lat0 = math.cos(lat0)
+    xy = [
+        (math.radians(p[1]) * cos_lat0 * EARTH_RADIUS_KM, math.radians(p[0]) * EARTH_RADIUS_KM)
+        for p in points
+    ]
+
+    significance = [0.0] * n
+    significance[0] = significance[-1] = math.inf
+
+    # Iterative to survive tracks with hundreds of thousands of points
+    stack = [(0, n - 1, math.inf)]
+    while stack:
+        first, last, parent = stack.pop()
+        if last - first < 2:
+            continue
+
+        ax, ay = xy[first]
+        bx, by = xy[last]
+        dx, dy = bx - ax, by - ay
+        length_sq = dx * dx + dy * dy
+
+        best_index, best_distance = first + 1, -1.0
+        for i in range(first + 1, last):
+            px, py = xy[i]
+            if length_sq == 0:
+                distance = math.hypot(px - ax, py - ay)
+            else:
+                t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length_sq))
+                distance = math.hypot(px - (ax + t * dx), py - (ay + t * dy))
+            if distance > best_distance:
+                best_index, best_distance = i, distance
+
+        value = min(best_distance, parent)
+        significance[best_index] = value
+        stack.append((first, best_index, value))
+        stack.append((best_index, last, value))
+
+    return significance
+
+
+def simplify_by_budget(points: Sequence[Point], significance: Sequence[float],
+                       budget: Optional[int]) -> List[Point]:
+    """Keep the `budget` most significant points, in track order"""
+    if budget is None or len(points) <= budget:
+        return list(points)
+    # Ties broken by track order so equal-significance runs stay contiguous
+    ranked = sorted(range(len(points)), key=lambda i: (-significance[i], i))[:budget]
+    return [points[i] for i in sorted(ranked)]
+
+
+# ----------------------------------------------------------------------
+# Summary
+# ----------------------------------------------------------------------
+
+def summarize(points: Sequence[Point]) -> Dict:
+    """Bounding box, distance and noise-filtered elevation gain/loss"""
+    lats = [p[0] for p in points]
+    lons = [p[1] for p in points]
+
+    distance_km = sum(haversine_km(a[:2], b[:2]) for a, b in zip(points, points[1:]))
+
+    gain = loss = 0.0
+    elevations = [p[2] for p in points if p[2] is not None]
+    if elevations:
+        anchor = elevations[0]
+        for elevation in elevations[1:]:
+            delta = elevation - anchor
+            if abs(delta) >= ELEVATION_NOISE_M:
+                if delta > 0:
+                    gain += delta
+                else:
+                    loss -= delta
+                anchor = elevation
+
+    return {
+        'point_count': len(points),
+        'min_lat': min(lats),
+        'min_lon': min(lons),
+        'max_lat': max(lats),
+        'max_lon': max(lons),
+        'distance_km': round(distance_km, 3),
+        'elevation_gain_m': round(gain, 1) if elevations else None,
+        'elevation_loss_m': round(loss, 1) if elevations else None,
+        'min_elevation_m': min(elevations) if elevations else None,
+        'max_elevation_m': max(elevations) if elevations else None,
+    }
+
+
+def build_geometry(points: Sequence[Point]) -> Optional[Dict]:
+    """
+    Everything stored for a track: summary plus one polyline per resolution
+
+    Returns None when the track has no usable points.
+    """
+    if not points:
+        return None
+
+    significance = dp_significance(points)
+    geometry = summarize(points)
+
+    for name, budget in RESOLUTIONS.items():
+        level = simplify_by_budget(points, significance, budget)
+        geometry[f'{name}_polyline'] = encode_polyline(level)
+        geometry[f'{name}_point_count'] = len(level)
+
+    if any(p[2] is not None for p in points):
+        # Carry the last known elevation across gaps so the series stays aligned
+        last, series = next(p[2] for p in points if p[2] is not None), []
+        for p in points:
+            last = p[2] if p[2] is not None else last
+            series.append(last)
+        geometry['full_elevations'] = encode_values(series)
+    else:
+        geometry['full_elevations'] = None
+
+    return geometry
@@ -2,14 +2,20 @@
 SBT Service - Backend signer for minting Soul-Bound Tokens
 Purpose: Backend-controlled wallet mints SBTs on behalf of users
 Security: Backend holds private key, signs transactions, pays gas
+
+Writes (mint, reputation, profile hash) are queued in chain_transactions and
+signed/broadcast by services/chain_transactions.py; callers never wait for a
+receipt. The Web3 provider, chain id and contract are cached per process, and
+ownership reads are batched and cached through utils/chain_reader.py.
 """
-from web3 import Web3
 from flask import current_app
 import json
 import os
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, Iterable, Tuple
 from datetime import datetime
 
+from utils.chain_reader import ChainReader
+
 
 class SBTService:
     """Service for SBT minting and management on Base network"""
@@ -17,28 +23,39 @@ class SBTService:
     # Cache for contract ABI (loaded once)
     _contract_abi = None
 
+    # Per-process chain id / contract cache, keyed by RPC URL
+    _chain_ids = {}
+    _contracts = {}
+
     @staticmethod
-    def get_web3_instance() -> Web3:
-        """
-        Get Web3 instance for blockchain network (Hardhat local, Base Sepolia, or Base Mainnet)
-        Returns:
-            Web3 instance connected to the configured RPC
-        """
+    def get_rpc_url() -> str:
+        """RPC URL of the configured network"""
         network = current_app.config.get('BLOCKCHAIN_NETWORK', 'hardhat')
 
         if network == 'base_mainnet':
-            rpc_url = current_app.config['BASE_MAINNET_RPC']
+            return current_app.config['BASE_MAINNET_RPC']
         elif network == 'base_sepolia':
-            rpc_url = current_app.config['BASE_SEPOLIA_RPC']
-        else:  # hardhat or localhost
-            rpc_url = current_app.config['HARDHAT_LOCAL_RPC']
+            return current_app.config['BASE_SEPOLIA_RPC']
+        return current_app.config['HARDHAT_LOCAL_RPC']  # hardhat or localhost
 
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
-
-        if not w3.is_connected():
-            raise ConnectionError(f"Failed to connect to blockchain network at {rpc_url}")
+    @staticmethod
+    def get_web3_instance():
+        """
+        Get Web3 instance for blockchain network (Hardhat local, Base Sepolia, or Base Mainnet)
+        Returns:
+            Web3 instance connected to the configured RPC (shared per process)
+        """
+        return ChainReader.web3(SBTService.get_rpc_url(), check_connection=True)
 
-        return w3
+    @staticmethod
+    def get_chain_id() -> int:
+        """Chain id of the configured network (cached per process)"""
+        rpc_url = SBTService.get_rpc_url()
+        chain_id = SBTService._chain_ids.get(rpc_url)
+        if chain_id is None:
+            chain_id = SBTService.get_web3_instance().eth.chain_id
+            SBTService._chain_ids[rpc_url] = chain_id
+        return chain_id
 
     @staticmethod
     def load_contract_abi() -> list:
@@ -74,9 +91,8 @@ class SBTService:
         """
         Get TravelSBT contract instance
         Returns:
-            Contract instance
+            Contract instance (cached per process)
         """
-        w3 = SBTService.get_web3_instance()
         contract_address = current_app.config['SBT_CONTRACT_ADDRESS']
 
         if not contract_address or contract_address == '0x0000000000000000000000000000000000000000':
@@ -85,12 +101,21 @@ class SBTService:
                 "Please deploy contracts and set the address."
             )
 
+        cache_key = (SBTService.get_rpc_url(), contract_address.lower())
+        contract = SBTService._contracts.get(cache_key)
+        if contract is not None:
+            return contract
+
+        w3 = SBTService.get_web3_instance()
         abi = SBTService.load_contract_abi()
 
-        return w3.eth.contract(
+        from web3 import Web3
+        contract = w3.eth.contract(
             address=Web3.to_checksum_address(contract_address),
             abi=abi
         )
+        SBTService._contracts[cache_key] = contract
+        return contract
 
     @staticmethod
     def get_backend_signer() -> Tuple[str, str]:
@@ -115,27 +140,27 @@ class SBTService:
         traveler_wallet: str,
         profile_hash: str,
         reputation_score: float,
-        metadata_uri: Optional[str] = None
+        metadata_uri: Optional[str] = None,
+        traveler_id: Optional[str] = None
     ) -> Dict[str, any]:
         """
-        Mint SBT to traveler's wallet (backend signs transaction)
+        Queue an SBT mint to traveler's wallet (backend signs transaction)
         Args:
             traveler_wallet: Traveler's wallet address
             profile_hash: SHA-256 hash of profile data
             reputation_score: Reputation score (0.00 to 100.00)
             metadata_uri: Optional IPFS or HTTP URI for token metadata
+            traveler_id: Traveler whose rows are updated once the mint confirms
         Returns:
             Dict with:
                 - success (bool)
-                - tx_hash (str): Transaction hash
-                - sbt_id (str): Token ID
-                - gas_used (int): Gas used
+                - transaction_id (str): Queued ChainTransaction id
+                - status (str): queued / submitted
                 - error (str): Error message if failed
         """
         try:
-            w3 = SBTService.get_web3_instance()
-            contract = SBTService.get_sbt_contract()
-            backend_address, backend_key = SBTService.get_backend_signer()
+            from web3 import Web3
+            from services.chain_transactions import ChainTxQueue
 
             # Validate inputs
             if not Web3.is_address(traveler_wallet):
@@ -149,69 +174,30 @@ class SBTService:
             if reputation_int < 0 or reputation_int > 10000:
                 return {'success': False, 'error': 'Reputation score must be between 0 and 100'}
 
-            # Normalize addresses
-            traveler_wallet = Web3.to_checksum_address(traveler_wallet)
-            backend_address = Web3.to_checksum_address(backend_address)
-
-            # Get current nonce
-            nonce = w3.eth.get_transaction_count(backend_address)
-
-            # Build transaction
-            tx = contract.functions.mintSBT(
-                traveler_wallet,
-                profile_hash,
-                reputation_int,
-                metadata_uri or ''
-            ).build_transaction({
-                'from': backend_address,
-                'nonce': nonce,
-                'gas': 500000,  # Conservative gas limit
-                'gasPrice': w3.eth.gas_price,
-                'chainId': w3.eth.chain_id
-            })
-
-            # Sign transaction
-            signed_tx = w3.eth.account.sign_transaction(tx, backend_key)
-
-            # Send transaction (web3.py v6+ uses raw_transaction instead of rawTransaction)
-            raw_tx = signed_tx.raw_transaction if hasattr(signed_tx, 'raw_transaction') else signed_tx.rawTransaction
-            tx_hash = w3.eth.send_raw_transaction(raw_tx)
-
-            # Wait for receipt (with timeout)
-            receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
-
-            if receipt['status'] == 1:
-                # Parse Transfer event to get token ID
-                transfer_events = contract.events.Transfer().process_receipt(receipt)
-                sbt_id = str(transfer_events[0]['args']['tokenId']) if transfer_events else None
-
-                return {
-                    'success': True,
-                    'tx_hash': tx_hash.hex(),
-                    'sbt_id': sbt_id,
-                    'gas_used': receipt['gasUsed'],
-                    'block_number': receipt['blockNumber']
-                }
-            else:
-                return {
-                    'success': False,
-                    'error': 'Transaction reverted',
-                    'tx_hash': tx_hash.hex()
-                }
+            transaction = ChainTxQueue.enqueue('mint', {
+                'wallet': Web3.to_checksum_address(traveler_wallet),
+                'profile_hash': profile_hash,
+                'reputation': reputation_int,
+                'metadata_uri': metadata_uri or '',
+            }, traveler_id=traveler_id)
+
+            return {
+                'success': True,
+                'transaction_id': transaction.id,
+                'status': transaction.status,
+                'tx_hash': transaction.tx_hash
+            }
 
-        except ValueError as e:
-            return {'success': False, 'error': f'Value error: {str(e)}'}
-        except ConnectionError as e:
-            return {'success': False, 'error': f'Connection error: {str(e)}'}
         except Exception as e:
             return {'success': False, 'error': f'Unexpected error: {str(e)}'}
 
     @staticmethod
-    def verify_sbt_ownership(wallet_address: str) -> Dict[str, any]:
+    def verify_sbt_ownership(wallet_address: str, use_cache: bool = True) -> Dict[str, any]:
         """
         Check if wallet owns a TravelSBT
         Args:
             wallet_address: Wallet address to check
+            use_cache: Accept a result cached within CHAIN_OWNERSHIP_CACHE_SECONDS
         Returns:
             Dict with:
                 - has_sbt (bool)
@@ -221,156 +207,138 @@ class SBTService:
                 - is_active (bool): Whether SBT is active
                 - error (str): Error message if failed
         """
-        try:
-            w3 = SBTService.get_web3_instance()
-            contract = SBTService.get_sbt_contract()
+        return SBTService.verify_sbt_ownership_many([wallet_address], use_cache)[wallet_address]
 
-            # Validate and normalize address
-            if not Web3.is_address(wallet_address):
-                return {'has_sbt': False, 'error': 'Invalid wallet address'}
-
-            wallet_address = Web3.to_checksum_address(wallet_address)
-
-            # Check balance
-            balance = contract.functions.balanceOf(wallet_address).call()
-
-            if balance > 0:
-                # Get token ID
-                result = contract.functions.getTokenIdByWallet(wallet_address).call()
-                sbt_id = result[0]
+    @staticmethod
+    def verify_sbt_ownership_many(wallet_addresses: Iterable[str], use_cache: bool = True) -> Dict[str, Dict]:
+        """
+        TravelSBT ownership for many wallets (e.g. a page of travelers)
 
-                # Get profile data
-                profile = contract.functions.getProfile(sbt_id).call()
+        Two batched rounds pinned to one block: getTokenIdByWallet for every
+        wallet, then getProfile for holders.
+        Returns:
+            {wallet_address: verify_sbt_ownership result}
+        """
+        from web3 import Web3
+
+        wallet_addresses = list(dict.fromkeys(wallet_addresses))
+        results = {}
+        valid = []
+        for wallet in wallet_addresses:
+            if Web3.is_address(wallet):
+                valid.append(wallet)
+            else:
+                results[wallet] = {'has_sbt': False, 'error': 'Invalid wallet address'}
+        if not valid:
+            return results
 
-                return {
+        try:
+            contract_address = current_app.config['SBT_CONTRACT_ADDRESS']
+            if use_cache:
+                results.update(ChainReader.get_cached_ownership('sbt', contract_address, valid))
+            pending = [wallet for wallet in valid if wallet not in results]
+            if not pending:
+                return results
+
+            rpc_url = SBTService.get_rpc_url()
+            w3 = SBTService.get_web3_instance()
+            contract = SBTService.get_sbt_contract()
+            block_number = w3.eth.block_number
+
+            lookups = ChainReader.aggregate(w3, rpc_url, [
+                contract.functions.getTokenIdByWallet(Web3.to_checksum_address(wallet)) for wallet in pending
+            ], block_identifier=block_number)
+            if all(lookup is None for lookup in lookups):
+                raise ValueError('getTokenIdByWallet reverted for every wallet')
+
+            holders = [i for i, lookup in enumerate(lookups) if lookup and lookup[1]]
+            profiles = ChainReader.aggregate(w3, rpc_url, [
+                contract.functions.getProfile(lookups[i][0]) for i in holders
+            ], block_identifier=block_number)
+            profiles = dict(zip(holders, profiles))
+        except ValueError as e:
+            results.update({wallet: {'has_sbt': False, 'error': f'Value error: {str(e)}'}
+                            for wallet in valid if wallet not in results})
+            return results
+        except Exception as e:
+            results.update({wallet: {'has_sbt': False, 'error': f'Unexpected error: {str(e)}'}
+                            for wallet in valid if wallet not in results})
+            return results
+
+        for i, wallet in enumerate(pending):
+            profile = profiles.get(i)
+            if i in profiles and profile is None:
+                # Holder whose profile read failed - report it, don't cache it
+                results[wallet] = {'has_sbt': True, 'sbt_id': str(lookups[i][0]), 'error': 'Profile lookup failed'}
+                continue
+            if profile:
+                result = {
                     'has_sbt': True,
-                    'sbt_id': str(sbt_id),
+                    'sbt_id': str(lookups[i][0]),
                     'profile_hash': profile[0],  # profileHash
                     'reputation_score': profile[1] / 100.0,  # Convert back to 0-100
                     'minted_at': profile[2],  # timestamp
                     'is_active': profile[3]  # isActive
                 }
             else:
-                return {'has_sbt': False}
+                result = {'has_sbt': False}
+            ChainReader.cache_ownership('sbt', contract_address, wallet, result, block_number)
+            results[wallet] = result
 
-        except ValueError as e:
-            return {'has_sbt': False, 'error': f'Value error: {str(e)}'}
-        except Exception as e:
-            return {'has_sbt': False, 'error': f'Unexpected error: {str(e)}'}
+        return results
 
     @staticmethod
-    def update_reputation_score(sbt_id: int, new_score: float) -> Dict[str, any]:
+    def update_reputation_score(sbt_id: int, new_score: float, traveler_id: Optional[str] = None) -> Dict[str, any]:
         """
-        Update reputation score for an SBT
+        Queue a reputation score update for an SBT
+        Updates to the same token that have not been signed yet are coalesced,
+        and queued updates for several tokens share one multicall transaction
+        when the contract supports it.
         Args:
             sbt_id: Token ID
             new_score: New reputation score (0-100)
+            traveler_id: Owning traveler (optional)
         Returns:
-            Dict with success, tx_hash, error
+            Dict with success, transaction_id, status, error
         """
         try:
-            w3 = SBTService.get_web3_instance()
-            contract = SBTService.get_sbt_contract()
-            backend_address, backend_key = SBTService.get_backend_signer()
+            from services.chain_transactions import ChainTxQueue
 
             # Convert score to integer
             reputation_int = int(new_score * 100)
             if reputation_int < 0 or reputation_int > 10000:
                 return {'success': False, 'error': 'Reputation score must be between 0 and 100'}
 
-            # Get nonce
-            nonce = w3.eth.get_transaction_count(Web3.to_checksum_address(backend_address))
-
-            # Build transaction
-            tx = contract.functions.updateReputationScore(
-                sbt_id,
-                reputation_int
-            ).build_transaction({
-                'from': Web3.to_checksum_address(backend_address),
-                'nonce': nonce,
-                'gas': 200000,
-                'gasPrice': w3.eth.gas_price,
-                'chainId': w3.eth.chain_id
-            })
-
-            # Sign and send
-            signed_tx = w3.eth.account.sign_transaction(tx, backend_key)
-            raw_tx = signed_tx.raw_transaction if hasattr(signed_tx, 'raw_transaction') else signed_tx.rawTransaction
-            tx_hash = w3.eth.send_raw_transaction(raw_tx)
-
-            # Wait for receipt
-            receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
-
-            if receipt['status'] == 1:
-                return {
-                    'success': True,
-                    'tx_hash': tx_hash.hex(),
-                    'gas_used': receipt['gasUsed']
-                }
-            else:
-                return {
-                    'success': False,
-                    'error': 'Transaction reverted',
-                    'tx_hash': tx_hash.hex()
-                }
+            transaction = ChainTxQueue.enqueue(
+                'reputation', {'reputation': reputation_int}, traveler_id=traveler_id, sbt_id=sbt_id
+            )
+            return {'success': True, 'transaction_id': transaction.id, 'status': transaction.status}
 
         except Exception as e:
             return {'success': False, 'error': f'Error: {str(e)}'}
 
     @staticmethod
-    def update_profile_hash(sbt_id: int, new_profile_hash: str) -> Dict[str, any]:
+    def update_profile_hash(sbt_id: int, new_profile_hash: str, traveler_id: Optional[str] = None) -> Dict[str, any]:
         """
-        Update profile hash for an SBT (e.g., when emergency contacts change)
+        Queue a profile hash update for an SBT (e.g., when emergency contacts change)
         Args:
             sbt_id: Token ID
             new_profile_hash: New SHA-256 profile hash
+            traveler_id: Owning traveler (optional)
         Returns:
-            Dict with success, tx_hash, error
+            Dict with success, transaction_id, status, error
         """
         try:
-            w3 = SBTService.get_web3_instance()
-            contract = SBTService.get_sbt_contract()
-            backend_address, backend_key = SBTService.get_backend_signer()
+            from services.chain_transactions import ChainTxQueue
 
             # Validate hash
             if not new_profile_hash or len(new_profile_hash) != 64:
                 return {'success': False, 'error': 'Invalid profile hash'}
 
-            # Get nonce
-            nonce = w3.eth.get_transaction_count(Web3.to_checksum_address(backend_address))
-
-            # Build transaction
-            tx = contract.functions.updateProfileHash(
-                sbt_id,
-                new_profile_hash
-            ).build_transaction({
-                'from': Web3.to_checksum_address(backend_address),
-                'nonce': nonce,
-                'gas': 200000,
-                'gasPrice': w3.eth.gas_price,
-                'chainId': w3.eth.chain_id
-            })
-
-            # Sign and send
-            signed_tx = w3.eth.account.sign_transaction(tx, backend_key)
-            raw_tx = signed_tx.raw_transaction if hasattr(signed_tx, 'raw_transaction') else signed_tx.rawTransaction
-            tx_hash = w3.eth.send_raw_transaction(raw_tx)
-
-            # Wait for receipt
-            receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
-
-            if receipt['status'] == 1:
-                return {
-                    'success': True,
-                    'tx_hash': tx_hash.hex(),
-                    'gas_used': receipt['gasUsed']
-                }
-            else:
-                return {
-                    'success': False,
-                    'error': 'Transaction reverted',
-                    'tx_hash': tx_hash.hex()
-                }
+            transaction = ChainTxQueue.enqueue(
+                'profile_hash', {'profile_hash': new_profile_hash}, traveler_id=traveler_id, sbt_id=sbt_id
+            )
+            return {'success': True, 'transaction_id': transaction.id, 'status': transaction.status}
 
         except Exception as e:
             return {'success': False, 'error': f'Error: {str(e)}'}
@@ -1,100 +1,306 @@
 """
-Trending Tags Tracker - Tracks most-used activity tags over 24hr window
-Refreshes every hour to identify trending tags
+Trending Tags Tracker - Tracks most-used activity tags over a sliding 24hr window
+
+Counters live in Redis so every gunicorn worker reads the same ranking:
+- trending:tags:h:{YYYYMMDDHH}   hash tag -> score for that hour
+- trending:tag_itins:{tag}       sorted set itinerary_id -> engagement (top N kept)
+- trending:tags:snapshot         merged, decayed top tags (short TTL)
+
+Counters are bumped incrementally when itineraries are published, viewed (first
+view per viewer), voted on (net up-vote change) or commented on, so
+/trending/tags is an O(k) read instead of a table scan.
+Without Redis the tracker falls back to a per-process DB computation.
 """
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple
-from collections import Counter
+from typing import List, Dict, Tuple, Optional
+from collections import Counter, defaultdict
 from extensions import db
 from models.itinerary import Itinerary
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 class TrendingTagsTracker:
     """Track and compute trending activity tags"""
 
-    # In-memory cache for trending tags (refreshed hourly)
+    KEY_BUCKET = "trending:tags:h:{bucket}"
+    KEY_TAG_ITINERARIES = "trending:tag_itins:{tag}"
+    KEY_SNAPSHOT = "trending:tags:snapshot"
+    KEY_REBUILD_LOCK = "trending:tags:rebuild_lock"
+
+    WINDOW_HOURS = 24
+    HALF_LIFE_HOURS = 12          # An hour-old bucket counts 0.5^(1/12) of a fresh one
+    SNAPSHOT_TTL = 60             # Seconds workers share one merged ranking
+    BUCKET_TTL = (WINDOW_HOURS + 2) * 3600
+    TAG_ITINERARIES_MAX = 200     # Per-tag candidates kept for /trending/itineraries
+
+    # Tag score contributed per event. Engagement weights match the original
+    # "1 point per 100 engagement" bonus (views * 0.1, votes * 2, comments * 3)
+    EVENT_WEIGHTS = {
+        'published': 1.0,
+        'view': 0.001,
+        'vote': 0.02,
+        'comment': 0.03,
+    }
+    # Raw engagement points added to the itinerary's per-tag score
+    ENGAGEMENT_POINTS = {
+        'published': 0,
+        'view': 0.1,
+        'vote': 2,
+        'comment': 3,
+    }
+
+    # Per-process fallback cache (used only when Redis is unavailable)
     _trending_tags_cache: List[Tuple[str, int]] = []
     _last_refresh: datetime = None
     _refresh_interval_minutes = 60  # Refresh every hour
 
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _redis():
+        from utils.cache import CacheService
+        return CacheService.get_redis_client()
+
+    @classmethod
+    def _bucket(cls, when: datetime) -> str:
+        return when.strftime('%Y%m%d%H')
+
+    @staticmethod
+    def _clean_tags(tags) -> List[str]:
+        return list({tag for tag in (tags or []) if tag and isinstance(tag, str)})
+
+    @staticmethod
+    def _engagement(itinerary) -> float:
+        return (
+            (itinerary.view_count or 0) * 0.1 +
+            (itinerary.helpful_votes or 0) * 2 +
+            (itinerary.comment_count or 0) * 3 +
+            (itinerary.proof_score or 0)
+        )
+
+    @classmethod
+    def record_event(cls, itinerary, event: str = 'published', when: Optional[datetime] = None,
+                     count: int = 1):
+        """
+        Bump tag counters for an itinerary event ('published', 'view', 'vote', 'comment')
+
+        count scales the event; a negative count takes it back (e.g. an
+        up-vote that was removed). Never raises - trending is best-effort and
+        must not fail the request.
+        """
+        client = cls._redis()
+        tags = cls._clean_tags(getattr(itinerary, 'activity_tags', None))
+        if not client or not tags or not count or event not in cls.EVENT_WEIGHTS:
+            return
+
+        try:
+            bucket_key = cls.KEY_BUCKET.format(bucket=cls._bucket(when or datetime.utcnow()))
+            points = cls.ENGAGEMENT_POINTS[event] * count
+
+            pipe = client.pipeline()
+            for tag in tags:
+                pipe.hincrbyfloat(bucket_key, tag, cls.EVENT_WEIGHTS[event] * count)
+
+                tag_key = cls.KEY_TAG_ITINERARIES.format(tag=tag)
+                if event == 'published':
+                    pipe.zadd(tag_key, {itinerary.id: cls._engagement(itinerary)})
+                elif points:
+                    pipe.zincrby(tag_key, points, itinerary.id)
+                pipe.zremrangebyrank(tag_key, 0, -(cls.TAG_ITINERARIES_MAX + 1))
+            pipe.expire(bucket_key, cls.BUCKET_TTL)
+            pipe.exec()
+        except Exception as e:
+            logger.warning("Error recording %s: %s", event, e)
+
+    @classmethod
+    def record_published(cls, itinerary):
+        """Count a newly published itinerary's tags"""
+        if getattr(itinerary, 'is_published', True):
+            cls.record_event(itinerary, 'published')
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
     @classmethod
     def get_trending_tags(cls, limit: int = 10) -> List[Dict[str, any]]:
         """
         Get trending activity tags with counts
         Returns list of dicts: [{'tag': 'Trekking', 'count': 15, 'percentage': 25.5}, ...]
         """
-        # Check if cache needs refresh
-        now = datetime.utcnow()
-        if (cls._last_refresh is None or
-            (now - cls._last_refresh).total_seconds() > cls._refresh_interval_minutes * 60):
-            cls._refresh_trending_tags()
+        top_tags = cls._get_top_tags()
 
         # Convert to dict format
-        total = sum(count for _, count in cls._trending_tags_cache)
+        total = sum(count for _, count in top_tags)
         result = []
-        for tag, count in cls._trending_tags_cache[:limit]:
+        for tag, count in top_tags[:limit]:
             percentage = (count / total * 100) if total > 0 else 0
             result.append({
                 'tag': tag,
-                'count': count,
+                'count': round(count),
                 'percentage': round(percentage, 1)
             })
 
         return result
 
     @classmethod
-    def _refresh_trending_tags(cls):
-        """Refresh trending tags from database (24hr window)"""
+    def get_last_updated(cls) -> Optional[str]:
+        """ISO timestamp of the ranking currently being served"""
+        client = cls._redis()
+        if client:
+            try:
+                snapshot = client.get(cls.KEY_SNAPSHOT)
+                if snapshot:
+                    return json.loads(snapshot).get('computed_at')
+            except Exception:
+                pass
+        return cls._last_refresh.isoformat() if cls._last_refresh else None
+
+    @classmethod
+    def _get_top_tags(cls) -> List[Tuple[str, float]]:
+        """Top 20 (tag, score) pairs, shared across workers via the Redis snapshot"""
+        client = cls._redis()
+        if not client:
+            return cls._get_top_tags_from_db()
+
         try:
-            # Get itineraries from last 24 hours (or all if less than 50)
-            cutoff_time = datetime.utcnow() - timedelta(hours=24)
+            snapshot = client.get(cls.KEY_SNAPSHOT)
+            if snapshot:
+                return [tuple(pair) for pair in json.loads(snapshot)['tags']]
+
+            top_tags = cls._merge_buckets(client)
+            if not top_tags:
+                # Cold Redis (new deploy / flushed) - backfill once, cluster-wide
+                if client.set(cls.KEY_REBUILD_LOCK, '1', nx=True, ex=300):
+                    cls.rebuild()
+                    top_tags = cls._merge_buckets(client)
+
+            client.set(cls.KEY_SNAPSHOT, json.dumps({
+                'tags': top_tags,
+                'computed_at': datetime.utcnow().isoformat()
+            }), ex=cls.SNAPSHOT_TTL)
+            return top_tags
+
+        except Exception as e:
+            logger.warning("Redis read failed, using DB: %s", e)
+            return cls._get_top_tags_from_db()
+
+    @classmethod
+    def _merge_buckets(cls, client) -> List[Tuple[str, float]]:
+        """Sum the hourly buckets in the window with exponential time decay"""
+        now = datetime.utcnow()
+        buckets = [now - timedelta(hours=age) for age in range(cls.WINDOW_HOURS)]
+
+        pipe = client.pipeline()
+        for when in buckets:
+            pipe.hgetall(cls.KEY_BUCKET.format(bucket=cls._bucket(when)))
+        bucket_counts = pipe.exec()
 
-            recent_itineraries = Itinerary.query.filter(
-                Itinerary.is_published == True,
-                Itinerary.created_at >= cutoff_time
-            ).all()
+        scores = defaultdict(float)
+        for age, counts in enumerate(bucket_counts):
+            decay = 0.5 ** (age / cls.HALF_LIFE_HOURS)
+            for tag, value in (counts or {}).items():
+                scores[tag] += float(value) * decay
 
-            # If less than 20 recent itineraries, use all published itineraries
-            if len(recent_itineraries) < 20:
-                recent_itineraries = Itinerary.query.filter(
-                    Itinerary.is_published == True
-                ).order_by(Itinerary.created_at.desc()).limit(100).all()
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return [(tag, round(score, 3)) for tag, score in ranked[:20] if score > 0]
 
-            # Count all activity tags
+    @classmethod
+    def _get_top_tags_from_db(cls) -> List[Tuple[str, float]]:
+        """Per-process fallback when Redis is unavailable (refreshed hourly)"""
+        now = datetime.utcnow()
+        if (cls._last_refresh is None or
+            (now - cls._last_refresh).total_seconds() > cls._refresh_interval_minutes * 60):
+            cls._refresh_trending_tags()
+        return cls._trending_tags_cache
+
+    @classmethod
+    def _load_recent_rows(cls):
+        """
+        Lightweight rows for the last 24h of published itineraries
+        (or the latest 100 if there are fewer than 20)
+        """
+        columns = (
+            Itinerary.id, Itinerary.activity_tags, Itinerary.created_at,
+            Itinerary.view_count, Itinerary.helpful_votes,
+            Itinerary.comment_count, Itinerary.proof_score
+        )
+        cutoff_time = datetime.utcnow() - timedelta(hours=cls.WINDOW_HOURS)
+
+        rows = db.session.query(*columns).filter(
+            Itinerary.is_published == True,
+            Itinerary.created_at >= cutoff_time
+        ).all()
+
+        if len(rows) < 20:
+            rows = db.session.query(*columns).filter(
+                Itinerary.is_published == True
+            ).order_by(Itinerary.created_at.desc()).limit(100).all()
+
+        return rows
+
+    @classmethod
+    def _refresh_trending_tags(cls):
+        """Refresh the per-process fallback ranking from the database"""
+        try:
             tag_counter = Counter()
-            for itinerary in recent_itineraries:
-                if itinerary.activity_tags:
-                    for tag in itinerary.activity_tags:
-                        if tag and isinstance(tag, str):
-                            tag_counter[tag] += 1
-
-            # Weight by engagement (views, votes, comments)
-            for itinerary in recent_itineraries:
-                if itinerary.activity_tags:
-                    # Calculate engagement weight
-                    engagement_score = (
-                        (itinerary.view_count or 0) * 0.1 +
-                        (itinerary.helpful_votes or 0) * 2 +
-                        (itinerary.comment_count or 0) * 3
-                    )
-                    # Add bonus weight based on engagement
-                    bonus = int(engagement_score / 100)  # 1 point per 100 engagement
-
-                    for tag in itinerary.activity_tags:
-                        if tag and isinstance(tag, str):
-                            tag_counter[tag] += bonus
-
-            # Store top tags
+            for row in cls._load_recent_rows():
+                # 1 point per use + 1 point per 100 engagement
+                bonus = int(cls._engagement(row) / 100)
+                for tag in cls._clean_tags(row.activity_tags):
+                    tag_counter[tag] += 1 + bonus
+
             cls._trending_tags_cache = tag_counter.most_common(20)
             cls._last_refresh = datetime.utcnow()
 
-            print(f"[TRENDING TAGS] Refreshed at {cls._last_refresh.isoformat()}")
-            print(f"[TRENDING TAGS] Top 5: {cls._trending_tags_cache[:5]}")
+            logger.info("Refreshed at %s, top 5: %s", cls._last_refresh.isoformat(),
+                        cls._trending_tags_cache[:5])
 
         except Exception as e:
-            print(f"[TRENDING TAGS] Error refreshing: {e}")
+            logger.warning("Error refreshing: %s", e)
             # Keep old cache on error
 
+    @classmethod
+    def rebuild(cls):
+        """
+        Rebuild the Redis counters from the database
+
+        Older itineraries (latest-100 fallback) are placed in the oldest bucket
+        of the window so fresh activity overtakes them naturally.
+        """
+        client = cls._redis()
+        if not client:
+            cls._refresh_trending_tags()
+            return
+
+        now = datetime.utcnow()
+        oldest = now - timedelta(hours=cls.WINDOW_HOURS - 1)
+
+        pipe = client.pipeline()
+        for age in range(cls.WINDOW_HOURS):
+            pipe.delete(cls.KEY_BUCKET.format(bucket=cls._bucket(now - timedelta(hours=age))))
+        pipe.delete(cls.KEY_SNAPSHOT)
+        pipe.exec()
+
+        rows = cls._load_recent_rows()
+        for row in rows:
+            when = row.created_at if row.created_at and row.created_at >= oldest else oldest
+            cls.record_event(row, 'published', when=when)
+
+            # Seed the historic engagement the incremental events never saw
+            engagement = (row.view_count or 0) * 0.1 + (row.helpful_votes or 0) * 2 + (row.comment_count or 0) * 3
+            if engagement:
+                bucket_key = cls.KEY_BUCKET.format(bucket=cls._bucket(when))
+                for tag in cls._clean_tags(row.activity_tags):
+                    client.hincrbyfloat(bucket_key, tag, engagement / 100)
+
+        cls._last_refresh = now
+        logger.info("Rebuilt Redis counters from %d itineraries", len(rows))
+
     @classmethod
     def get_leading_tag(cls) -> Dict[str, any]:
         """Get the single most trending tag with details"""
@@ -119,10 +325,53 @@ class TrendingTagsTracker:
         # Get tag names
         top_tag_names = [t['tag'] for t in trending_tags]
 
-        # Find itineraries with these tags
+        # Score = matches * 100 + engagement, from the per-tag candidate sets
+        scores = cls._score_candidates(top_tag_names)
+        if scores is None:
+            return cls._scan_itineraries_with_tags(top_tag_names, limit)
+
+        ranked_ids = sorted(scores, key=scores.get, reverse=True)[:limit]
+        if not ranked_ids:
+            return []
+
+        itineraries = Itinerary.query.filter(
+            Itinerary.id.in_(ranked_ids),
+            Itinerary.is_published == True,
+            Itinerary.is_deleted == False
+        ).all()
+        by_id = {itin.id: itin for itin in itineraries}
+        return [by_id[itin_id] for itin_id in ranked_ids if itin_id in by_id]
+
+    @classmethod
+    def _score_candidates(cls, tag_names: List[str]) -> Optional[Dict[str, float]]:
+        """Merge the per-tag sorted sets; None if Redis is unavailable"""
+        client = cls._redis()
+        if not client:
+            return None
+
+        try:
+            pipe = client.pipeline()
+            for tag in tag_names:
+                pipe.zrange(cls.KEY_TAG_ITINERARIES.format(tag=tag), 0, -1, rev=True, withscores=True)
+            results = pipe.exec()
+        except Exception as e:
+            logger.warning("Redis candidate read failed, using DB: %s", e)
+            return None
+
+        matches = Counter()
+        engagement = {}
+        for members in results:
+            for itin_id, score in members or []:
+                matches[itin_id] += 1
+                engagement[itin_id] = float(score)
+
+        return {itin_id: matches[itin_id] * 100 + engagement[itin_id] for itin_id in matches}
+
+    @classmethod
+    def _scan_itineraries_with_tags(cls, top_tag_names: List[str], limit: int) -> List[Itinerary]:
+        """Fallback: score every published itinerary in Python"""
         all_itineraries = Itinerary.query.filter_by(is_published=True).all()
 
-        # Score each itinerary by trending tag matches
         scored_itineraries = []
         for itin in all_itineraries:
             if not itin.activity_tags:
@@ -131,14 +380,7 @@ class TrendingTagsTracker:
             # Count matching trending tags
             matches = sum(1 for tag in itin.activity_tags if tag in top_tag_names)
             if matches > 0:
-                # Score = matches * 100 + engagement score
-                engagement = (
-                    (itin.view_count or 0) * 0.1 +
-                    (itin.helpful_votes or 0) * 2 +
-                    (itin.comment_count or 0) * 3 +
-                    (itin.proof_score or 0)
-                )
-                score = matches * 100 + engagement
+                score = matches * 100 + cls._engagement(itin)
                 scored_itineraries.append((itin, score))
 
         # Sort by score and return top N
@@ -147,9 +389,9 @@ class TrendingTagsTracker:
 
     @classmethod
     def force_refresh(cls):
-        """Force immediate refresh of trending tags"""
+        """Force immediate rebuild of trending tags"""
         cls._last_refresh = None
-        cls._refresh_trending_tags()
+        cls.rebuild()
 
 
 # Initialize on module load
@@ -158,4 +400,4 @@ def init_trending_tags():
     try:
         TrendingTagsTracker.force_refresh()
     except Exception as e:
-        print(f"[TRENDING TAGS] Failed to initialize: {e}")
+        logger.warning("Failed to initialize: %s", e)
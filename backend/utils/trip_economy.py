@@ -20,20 +20,32 @@ Spend Rates:
 """
 
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+from uuid import uuid4
+
+from flask import current_app
+from sqlalchemy import and_, bindparam, case, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
 from extensions import db
 from models.traveler import Traveler
-from flask import current_app
+from models.trip_ledger import TripLedgerEntry, TripBalanceSnapshot
 
 
 class TripEconomy:
     """
     Manages TRIP token transactions for travelers.
 
-    This is an off-chain token system stored in the travelers table.
+    This is an off-chain token system. Every balance change is appended to
+    the trip_ledger table; the totals on the travelers row are adjusted with
+    a single atomic UPDATE in the same transaction (no read-modify-write),
+    and snapshot_balances() periodically checks them against the ledger.
     Future enhancement: Move to on-chain ERC-20 token on Base.
     """
 
+    _travelers = Traveler.__table__
+    _ledger = TripLedgerEntry.__table__
+
     # Transaction Types
     class TransactionType:
         # Earn types
@@ -68,13 +80,87 @@ class TripEconomy:
         # TIP_CREATOR is variable, set by user
     }
 
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+
     @staticmethod
+    def award_key(traveler_id: str, transaction_type: str, reference_id: Optional[str]) -> Optional[str]:
+        """Idempotency key of an award (None when there is no reference to dedupe on)"""
+        if not reference_id:
+            return None
+        return f"{transaction_type}:{reference_id}:{traveler_id}"
+
+    @classmethod
+    def _credit(cls, traveler_id: str, amount: float):
+        """Atomically add an earned amount; returns the new balance or None if the traveler is missing"""
+        t = cls._travelers
+        return db.session.execute(
+            update(t)
+            .where(t.c.id == traveler_id)
+            .values(
+                trip_token_balance=func.coalesce(t.c.trip_token_balance, 0) + amount,
+                trip_earnings_total=func.coalesce(t.c.trip_earnings_total, 0) + amount,
+            )
+            .returning(t.c.trip_token_balance)
+        ).scalar()
+
+    @classmethod
+    def _debit(cls, traveler_id: str, amount: float):
+        """
+        Atomically deduct a spent amount if the balance covers it
+
+        Returns the new balance, or None when the traveler is missing or the
+        balance is insufficient (the conditional UPDATE matches no row).
+        """
+        t = cls._travelers
+        return db.session.execute(
+            update(t)
+            .where(and_(t.c.id == traveler_id, func.coalesce(t.c.trip_token_balance, 0) >= amount))
+            .values(
+                trip_token_balance=func.coalesce(t.c.trip_token_balance, 0) - amount,
+                trip_spent_total=func.coalesce(t.c.trip_spent_total, 0) + amount,
+            )
+            .returning(t.c.trip_token_balance)
+        ).scalar()
+
+    @classmethod
+    def _stored_balance(cls, traveler_id: str):
+        t = cls._travelers
+        return db.session.execute(
+            select(t.c.trip_token_balance).where(t.c.id == traveler_id)
+        ).first()
+
+    @classmethod
+    def _append(cls, traveler_id: str, entry_type: str, transaction_type: str, amount: float,
+                balance_after=None, reference_id=None, description=None,
+                transfer_id=None, idempotency_key=None):
+        db.session.execute(insert(cls._ledger).values(
+            traveler_id=traveler_id,
+            entry_type=entry_type,
+            transaction_type=transaction_type,
+            amount=amount,
+            balance_after=balance_after,
+            reference_id=str(reference_id) if reference_id is not None else None,
+            transfer_id=transfer_id,
+            idempotency_key=idempotency_key,
+            description=description,
+            created_at=datetime.utcnow(),
+        ))
+
+    # ------------------------------------------------------------------
+    # Awards
+    # ------------------------------------------------------------------
+
+    @classmethod
     def award_trip(
+        cls,
         traveler_id: str,
         transaction_type: str,
         amount: Optional[int] = None,
         reference_id: Optional[str] = None,
-        description: Optional[str] = None
+        description: Optional[str] = None,
+        idempotency_key: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Award TRIP tokens to a traveler.
@@ -85,39 +171,51 @@ class TripEconomy:
             amount: Optional custom amount (uses EARN_RATES if None)
             reference_id: Optional reference to related object (itinerary_id, post_id, etc.)
             description: Optional description for the transaction
+            idempotency_key: Optional dedupe key (defaults to type + reference + traveler,
+                so the same contribution is never awarded twice)
 
         Returns:
             dict: {'success': bool, 'new_balance': int, 'amount_awarded': int, 'message': str}
         """
         try:
-            traveler = Traveler.query.get(traveler_id)
-            if not traveler:
-                return {
-                    'success': False,
-                    'error': 'Traveler not found',
-                    'new_balance': 0,
-                    'amount_awarded': 0
-                }
-
             # Get amount from rates or use custom amount
             if amount is None:
                 if transaction_type not in TripEconomy.EARN_RATES:
+                    row = cls._stored_balance(traveler_id)
                     return {
                         'success': False,
                         'error': f'Unknown transaction type: {transaction_type}',
-                        'new_balance': traveler.trip_token_balance or 0,
+                        'new_balance': (row[0] or 0) if row else 0,
                         'amount_awarded': 0
                     }
                 amount = TripEconomy.EARN_RATES[transaction_type]
 
-            # Update balances
-            if traveler.trip_token_balance is None:
-                traveler.trip_token_balance = 0
-            if traveler.trip_earnings_total is None:
-                traveler.trip_earnings_total = 0
+            key = idempotency_key or cls.award_key(traveler_id, transaction_type, reference_id)
 
-            traveler.trip_token_balance += amount
-            traveler.trip_earnings_total += amount
+            new_balance = cls._credit(traveler_id, amount)
+            if new_balance is None:
+                db.session.rollback()
+                return {
+                    'success': False,
+                    'error': 'Traveler not found',
+                    'new_balance': 0,
+                    'amount_awarded': 0
+                }
+
+            try:
+                cls._append(traveler_id, 'earn', transaction_type, amount, new_balance,
+                            reference_id, description, idempotency_key=key)
+            except IntegrityError:
+                # Already awarded for this key - undo the credit
+                db.session.rollback()
+                row = cls._stored_balance(traveler_id)
+                return {
+                    'success': False,
+                    'error': 'Already awarded',
+                    'duplicate': True,
+                    'new_balance': (row[0] or 0) if row else 0,
+                    'amount_awarded': 0
+                }
 
             db.session.commit()
 
@@ -129,7 +227,7 @@ class TripEconomy:
 
             return {
                 'success': True,
-                'new_balance': traveler.trip_token_balance,
+                'new_balance': new_balance,
                 'amount_awarded': amount,
                 'message': f'Awarded {amount} TRIP tokens!',
                 'transaction_type': transaction_type,
@@ -146,8 +244,124 @@ class TripEconomy:
                 'amount_awarded': 0
             }
 
-    @staticmethod
+    @classmethod
+    def award_trip_many(cls, awards: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Award TRIP to many travelers in one transaction (bulk actions, backfills).
+
+        One query filters out already-applied idempotency keys, one multi-row
+        INSERT appends the ledger entries and one executemany UPDATE adjusts
+        each traveler once with their summed amount (rows are updated in id
+        order so concurrent batches can't deadlock).
+
+        Args:
+            awards: Dicts with traveler_id, transaction_type and optional
+                amount, reference_id, description, idempotency_key
+
+        Returns:
+            dict: {'success': bool, 'awarded': int, 'skipped': int, 'total_amount': int,
+                   'by_traveler': {traveler_id: amount_added}}
+        """
+        try:
+            entries = []
+            seen = set()
+            skipped = 0
+            for award in awards:
+                transaction_type = award.get('transaction_type')
+                amount = award.get('amount')
+                if amount is None:
+                    amount = TripEconomy.EARN_RATES.get(transaction_type)
+                if not award.get('traveler_id') or not amount or amount <= 0:
+                    skipped += 1
+                    continue
+
+                key = award.get('idempotency_key') or cls.award_key(
+                    award['traveler_id'], transaction_type, award.get('reference_id')
+                )
+                if key is not None:
+                    if key in seen:
+                        skipped += 1
+                        continue
+                    seen.add(key)
+
+                reference_id = award.get('reference_id')
+                entries.append({
+                    'traveler_id': award['traveler_id'],
+                    'entry_type': 'earn',
+                    'transaction_type': transaction_type,
+                    'amount': amount,
+                    'balance_after': None,
+                    'reference_id': str(reference_id) if reference_id is not None else None,
+                    'transfer_id': None,
+                    'idempotency_key': key,
+                    'description': award.get('description'),
+                    'created_at': datetime.utcnow(),
+                })
+
+            # Drop keys that were already applied and travelers that don't exist
+            if seen:
+                applied = set(db.session.execute(
+                    select(cls._ledger.c.idempotency_key).where(cls._ledger.c.idempotency_key.in_(list(seen)))
+                ).scalars())
+            else:
+                applied = set()
+            traveler_ids = {entry['traveler_id'] for entry in entries}
+            existing = set(db.session.execute(
+                select(cls._travelers.c.id).where(cls._travelers.c.id.in_(list(traveler_ids)))
+            ).scalars()) if traveler_ids else set()
+
+            kept = [
+                entry for entry in entries
+                if entry['traveler_id'] in existing and entry['idempotency_key'] not in applied
+            ]
+            skipped += len(entries) - len(kept)
+            if not kept:
+                return {'success': True, 'awarded': 0, 'skipped': skipped, 'total_amount': 0, 'by_traveler': {}}
+
+            totals = {}
+            for entry in kept:
+                totals[entry['traveler_id']] = totals.get(entry['traveler_id'], 0) + entry['amount']
+
+            db.session.execute(insert(cls._ledger), kept)
+
+            t = cls._travelers
+            db.session.execute(
+                update(t)
+                .where(t.c.id == bindparam('tid'))
+                .values(
+                    trip_token_balance=func.coalesce(t.c.trip_token_balance, 0) + bindparam('amt'),
+                    trip_earnings_total=func.coalesce(t.c.trip_earnings_total, 0) + bindparam('amt'),
+                ),
+                [{'tid': traveler_id, 'amt': totals[traveler_id]} for traveler_id in sorted(totals)]
+            )
+            db.session.commit()
+
+            total_amount = sum(totals.values())
+            current_app.logger.info(
+                f"TRIP AWARD BATCH: {total_amount} TRIP across {len(totals)} travelers "
+                f"({len(kept)} awards, {skipped} skipped)"
+            )
+
+            return {
+                'success': True,
+                'awarded': len(kept),
+                'skipped': skipped,
+                'total_amount': total_amount,
+                'by_traveler': totals
+            }
+
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error awarding TRIP batch: {str(e)}")
+            return {'success': False, 'error': str(e), 'awarded': 0, 'skipped': len(awards), 'total_amount': 0}
+
+    # ------------------------------------------------------------------
+    # Spending
+    # ------------------------------------------------------------------
+
+    @classmethod
     def spend_trip(
+        cls,
         traveler_id: str,
         transaction_type: str,
         amount: Optional[int] = None,
@@ -157,6 +371,9 @@ class TripEconomy:
         """
         Spend TRIP tokens from a traveler's balance.
 
+        The balance check and deduction are one conditional UPDATE, so two
+        concurrent spends can never overdraw the balance.
+
         Args:
             traveler_id: ID of the traveler
             transaction_type: Type of transaction (must be in SPEND_RATES or TIP_CREATOR)
@@ -168,29 +385,30 @@ class TripEconomy:
             dict: {'success': bool, 'new_balance': int, 'amount_spent': int, 'message': str}
         """
         try:
-            traveler = Traveler.query.get(traveler_id)
-            if not traveler:
-                return {
-                    'success': False,
-                    'error': 'Traveler not found',
-                    'new_balance': 0,
-                    'amount_spent': 0
-                }
-
             # Get amount from rates or use custom amount
             if amount is None:
                 if transaction_type not in TripEconomy.SPEND_RATES:
+                    row = cls._stored_balance(traveler_id)
                     return {
                         'success': False,
                         'error': f'Amount required for transaction type: {transaction_type}',
-                        'new_balance': traveler.trip_token_balance or 0,
+                        'new_balance': (row[0] or 0) if row else 0,
                         'amount_spent': 0
                     }
                 amount = TripEconomy.SPEND_RATES[transaction_type]
 
-            # Check if traveler has sufficient balance
-            current_balance = traveler.trip_token_balance or 0
-            if current_balance < amount:
+            new_balance = cls._debit(traveler_id, amount)
+            if new_balance is None:
+                db.session.rollback()
+                row = cls._stored_balance(traveler_id)
+                if not row:
+                    return {
+                        'success': False,
+                        'error': 'Traveler not found',
+                        'new_balance': 0,
+                        'amount_spent': 0
+                    }
+                current_balance = row[0] or 0
                 return {
                     'success': False,
                     'error': f'Insufficient TRIP balance. Required: {amount}, Available: {current_balance}',
@@ -198,13 +416,8 @@ class TripEconomy:
                     'amount_spent': 0
                 }
 
-            # Update balances
-            if traveler.trip_spent_total is None:
-                traveler.trip_spent_total = 0
-
-            traveler.trip_token_balance -= amount
-            traveler.trip_spent_total += amount
-
+            cls._append(traveler_id, 'spend', transaction_type, -amount, new_balance,
+                        reference_id, description)
             db.session.commit()
 
             # Log the transaction
@@ -215,7 +428,7 @@ class TripEconomy:
 
             return {
                 'success': True,
-                'new_balance': traveler.trip_token_balance,
+                'new_balance': new_balance,
                 'amount_spent': amount,
                 'message': f'Spent {amount} TRIP tokens!',
                 'transaction_type': transaction_type,
@@ -232,8 +445,9 @@ class TripEconomy:
                 'amount_spent': 0
             }
 
-    @staticmethod
+    @classmethod
     def transfer_trip(
+        cls,
         from_traveler_id: str,
         to_traveler_id: str,
         amount: int,
@@ -245,6 +459,10 @@ class TripEconomy:
         Transfer TRIP tokens from one traveler to another.
         Used for tipping creators.
 
+        Debit, credit and both ledger entries (linked by transfer_id) commit
+        together. The two traveler rows are updated in id order so opposite
+        transfers between the same pair can't deadlock.
+
         Args:
             from_traveler_id: ID of the sender
             to_traveler_id: ID of the recipient
@@ -257,44 +475,37 @@ class TripEconomy:
             dict: {'success': bool, 'sender_balance': int, 'recipient_balance': int, 'amount': int}
         """
         try:
-            # Validate travelers exist
-            sender = Traveler.query.get(from_traveler_id)
-            recipient = Traveler.query.get(to_traveler_id)
-
-            if not sender:
-                return {'success': False, 'error': 'Sender not found'}
-            if not recipient:
-                return {'success': False, 'error': 'Recipient not found'}
-
             if amount <= 0:
                 return {'success': False, 'error': 'Amount must be positive'}
-
-            # Spend from sender
-            spend_result = TripEconomy.spend_trip(
-                from_traveler_id,
-                transaction_type,
-                amount,
-                reference_id,
-                f"Transfer to {to_traveler_id}: {description or ''}"
-            )
-
-            if not spend_result['success']:
-                return spend_result
-
-            # Award to recipient
-            award_result = TripEconomy.award_trip(
-                to_traveler_id,
-                transaction_type,
-                amount,
-                reference_id,
-                f"Transfer from {from_traveler_id}: {description or ''}"
-            )
-
-            if not award_result['success']:
-                # Rollback sender's spend
-                db.session.rollback()
-                return {'success': False, 'error': 'Failed to award to recipient'}
-
+            if from_traveler_id == to_traveler_id:
+                return {'success': False, 'error': 'Cannot transfer to yourself'}
+
+            sender_balance = recipient_balance = None
+            for traveler_id in sorted((from_traveler_id, to_traveler_id)):
+                if traveler_id == from_traveler_id:
+                    sender_balance = cls._debit(from_traveler_id, amount)
+                    if sender_balance is None:
+                        db.session.rollback()
+                        row = cls._stored_balance(from_traveler_id)
+                        if not row:
+                            return {'success': False, 'error': 'Sender not found'}
+                        return {
+                            'success': False,
+                            'error': f'Insufficient TRIP balance. Required: {amount}, Available: {row[0] or 0}',
+                            'new_balance': row[0] or 0,
+                            'amount_spent': 0
+                        }
+                else:
+                    recipient_balance = cls._credit(to_traveler_id, amount)
+                    if recipient_balance is None:
+                        db.session.rollback()
+                        return {'success': False, 'error': 'Recipient not found'}
+
+            transfer_id = str(uuid4())
+            cls._append(from_traveler_id, 'spend', transaction_type, -amount, sender_balance, reference_id,
+                        f"Transfer to {to_traveler_id}: {description or ''}", transfer_id=transfer_id)
+            cls._append(to_traveler_id, 'earn', transaction_type, amount, recipient_balance, reference_id,
+                        f"Transfer from {from_traveler_id}: {description or ''}", transfer_id=transfer_id)
             db.session.commit()
 
             current_app.logger.info(
@@ -303,8 +514,8 @@ class TripEconomy:
 
             return {
                 'success': True,
-                'sender_balance': spend_result['new_balance'],
-                'recipient_balance': award_result['new_balance'],
+                'sender_balance': sender_balance,
+                'recipient_balance': recipient_balance,
                 'amount': amount,
                 'message': f'Transferred {amount} TRIP tokens successfully!'
             }
@@ -314,8 +525,12 @@ class TripEconomy:
             current_app.logger.error(f"Error transferring TRIP: {str(e)}")
             return {'success': False, 'error': str(e)}
 
-    @staticmethod
-    def get_balance(traveler_id: str) -> Dict[str, Any]:
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def get_balance(cls, traveler_id: str) -> Dict[str, Any]:
         """
         Get TRIP token balance and stats for a traveler.
 
@@ -331,8 +546,12 @@ class TripEconomy:
             }
         """
         try:
-            traveler = Traveler.query.get(traveler_id)
-            if not traveler:
+            t = cls._travelers
+            row = db.session.execute(
+                select(t.c.trip_token_balance, t.c.trip_earnings_total, t.c.trip_spent_total)
+                .where(t.c.id == traveler_id)
+            ).first()
+            if not row:
                 return {
                     'balance': 0,
                     'total_earned': 0,
@@ -341,11 +560,12 @@ class TripEconomy:
                     'error': 'Traveler not found'
                 }
 
+            balance, earned, spent = (value or 0 for value in row)
             return {
-                'balance': traveler.trip_token_balance or 0,
-                'total_earned': traveler.trip_earnings_total or 0,
-                'total_spent': traveler.trip_spent_total or 0,
-                'net_earnings': (traveler.trip_earnings_total or 0) - (traveler.trip_spent_total or 0)
+                'balance': balance,
+                'total_earned': earned,
+                'total_spent': spent,
+                'net_earnings': earned - spent
             }
 
         except Exception as e:
@@ -357,3 +577,102 @@ class TripEconomy:
                 'net_earnings': 0,
                 'error': str(e)
             }
+
+    @classmethod
+    def get_history(cls, traveler_id: str, limit: int = 50, before_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Newest-first ledger entries of a traveler (keyset paginated by entry id)"""
+        query = TripLedgerEntry.query.filter(TripLedgerEntry.traveler_id == traveler_id)
+        if before_id:
+            query = query.filter(TripLedgerEntry.id < before_id)
+        return [entry.to_dict() for entry in query.order_by(TripLedgerEntry.id.desc()).limit(limit)]
+
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+
+    DRIFT_TOLERANCE = 1e-6
+
+    @classmethod
+    def snapshot_balances(cls, batch_size: int = 1000, full: bool = False) -> Dict[str, int]:
+        """
+        Snapshot stored totals of travelers with new ledger activity and
+        record how far they drift from the ledger.
+
+        Stored totals and ledger sums are read in one statement, so they see
+        the same committed state (ledger entries and balance updates always
+        commit together). Drift is logged, never auto-corrected.
+
+        Args:
+            batch_size: Snapshot rows inserted per statement
+            full: Check every traveler with ledger entries, not only the
+                ones with activity since the last snapshot (nightly sweep)
+
+        Returns:
+            dict: {'checked': int, 'drifted': int}
+        """
+        t = cls._travelers
+        ledger = cls._ledger
+        snapshots = TripBalanceSnapshot.__table__
+
+        since = 0 if full else db.session.execute(select(func.max(snapshots.c.ledger_entry_id))).scalar() or 0
+        active = select(ledger.c.traveler_id).where(ledger.c.id > since).distinct().subquery()
+        totals = (
+            select(
+                ledger.c.traveler_id,
+                func.sum(ledger.c.amount).label('ledger_balance'),
+                func.sum(case((ledger.c.entry_type == 'earn', ledger.c.amount), else_=0)).label('ledger_earned'),
+                func.sum(case((ledger.c.entry_type == 'spend', -ledger.c.amount), else_=0)).label('ledger_spent'),
+                func.max(ledger.c.id).label('last_entry_id'),
+            )
+            .where(ledger.c.traveler_id.in_(select(active.c.traveler_id)))
+            .group_by(ledger.c.traveler_id)
+            .subquery()
+        )
+        result = db.session.execute(
+            select(
+                t.c.id,
+                func.coalesce(t.c.trip_token_balance, 0),
+                func.coalesce(t.c.trip_earnings_total, 0),
+                func.coalesce(t.c.trip_spent_total, 0),
+                totals.c.ledger_balance,
+                totals.c.ledger_earned,
+                totals.c.ledger_spent,
+                totals.c.last_entry_id,
+            ).join(totals, totals.c.traveler_id == t.c.id)
+        )
+
+        checked = drifted = 0
+        now = datetime.utcnow()
+        while True:
+            rows = result.fetchmany(batch_size)
+            if not rows:
+                break
+
+            batch = []
+            for (traveler_id, balance, earned, spent,
+                 ledger_balance, ledger_earned, ledger_spent, last_entry_id) in rows:
+                drift = round(balance - ledger_balance, 6)
+                if (abs(drift) > cls.DRIFT_TOLERANCE
+                        or abs(earned - ledger_earned) > cls.DRIFT_TOLERANCE
+                        or abs(spent - ledger_spent) > cls.DRIFT_TOLERANCE):
+                    drifted += 1
+                    current_app.logger.warning(
+                        f"TRIP DRIFT: traveler {traveler_id} balance={balance} ledger={ledger_balance} "
+                        f"earned={earned}/{ledger_earned} spent={spent}/{ledger_spent}"
+                    )
+                batch.append({
+                    'traveler_id': traveler_id,
+                    'ledger_entry_id': last_entry_id,
+                    'balance': balance,
+                    'earned': earned,
+                    'spent': spent,
+                    'ledger_balance': ledger_balance,
+                    'drift': drift,
+                    'created_at': now,
+                })
+            checked += len(batch)
+            db.session.execute(insert(snapshots), batch)
+
+        db.session.commit()
+        current_app.logger.info(f"TRIP SNAPSHOT: {checked} travelers checked, {drifted} drifted")
+        return {'checked': checked, 'drifted': drifted}
@@ -1,6 +1,7 @@
 """
 Utility functions for user management across User and Traveler tables
 """
+from flask import g, has_request_context
 from models.user import User
 from models.traveler import Traveler
 from sqlalchemy import and_, or_, func
@@ -16,6 +17,12 @@ def get_user_by_id(user_id):
     Returns:
         User or Traveler object, or None if not found
     """
+    # The authenticated user: reuse the request's principal / loaded row
+    principal = g.get('principal') if has_request_context() else None
+    if principal is not None and principal.id == user_id:
+        from utils.principal import get_current_user
+        return get_current_user(user_id)
+
     # Try Traveler table first (Google OAuth users)
     user = Traveler.query.get(user_id)
     if user:
@@ -0,0 +1,72 @@
+"""
+Background Worker Entry Point
+=============================
+Runs the Celery worker and the scoring events bridge outside the web process.
+
+Services:
+- Scoring events subscriber (Celery -> Redis -> Socket.IO bridge)
+- Celery worker (AI scoring, vote sync, feed cache tasks) in the foreground
+
+Periodic jobs (MV refresh, cache warming, reconciliation) are leader-elected
+and live in scheduler.py, so worker.py can be scaled horizontally.
+
+Usage:
+    flask --app app init-db    # once per deploy, before starting workers
+    python worker.py
+
+    Skip the Celery worker (e.g. when it runs as its own process):
+    DISABLE_CELERY=true python worker.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, 'false').lower() in ('true', '1', 'yes')
+
+
+def start_background_services(app):
+    """Start the daemon-thread services (returns immediately)"""
+    from services.scoring_events_subscriber import ScoringEventsSubscriber
+    ScoringEventsSubscriber.start_subscriber(app)
+
+
+def run_celery_worker():
+    """Run the Celery worker in the foreground (blocks)"""
+    from celery_app import celery
+
+    worker = celery.Worker(
+        pool='solo',  # Use solo pool for Windows compatibility
+        loglevel='info',
+        concurrency=2
+    )
+    worker.start()
+
+
+def main():
+    from app import create_app
+
+    # Schema creation is a deploy step (`flask init-db`), not per-replica startup;
+    # create_app still honours AUTO_INIT_DB=true for local dev
+    app = create_app()
+
+    start_background_services(app)
+
+    if not _env_flag('DISABLE_CELERY'):
+        print("[WORKER] Starting Celery worker")
+        run_celery_worker()
+        return
+
+    # Celery runs elsewhere - keep the daemon threads alive
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print("[WORKER] Received shutdown signal")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,558 @@
+"""
+Leader-Elected Background Job Runner
+====================================
+Runs periodic jobs (cache warming, MV refresh, reconciliation, vote sync)
+exactly once cluster-wide, no matter how many scheduler processes are started.
+
+Features:
+- Leader election via Postgres session advisory lock (falls back to a Redis
+  lease on Upstash, or to single-process mode on SQLite/dev)
+- Jittered interval and daily schedules so replicas don't stampede the DB
+- Jobs run on a thread pool with one slot per job: a slow job (reconciliation,
+  MV refresh, cache warming) never delays another (e.g. vote_stream), and a
+  job is not started again while its previous run is still going
+- Leadership is renewed by a dedicated heartbeat thread, independent of how
+  long any job takes
+- LISTEN/NOTIFY wakeups for queue-driven jobs (e.g. mv_refresh_queue) with a
+  slow polling fallback instead of a tight 2-second loop; a job that returns
+  a datetime (work that is queued but not yet due) runs again at that time
+- Per-job duration/success metrics, published to Redis for the admin API
+- Last-run timestamps persisted in Redis so a failover leader doesn't rerun
+  a job that just completed elsewhere
+
+Usage:
+    runner = JobRunner(app, name='scheduler')
+    runner.add_interval_job('cache_warmer', CacheWarmer.warm_all, interval=60)
+    runner.add_daily_job('reconciliation', run_reconciliation, hour=3)
+    runner.add_notify_job('mv_refresh', worker.process_queue, channel='mv_refresh')
+    runner.run()  # blocks; followers wait for leadership
+"""
+
+import hashlib
+import os
+import random
+import select
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+from extensions import db
+
+
+def _advisory_key(name: str) -> int:
+    """Stable signed 64-bit key for pg_advisory_lock (hashtext() isn't stable across versions)"""
+    digest = hashlib.sha1(name.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big', signed=True)
+
+
+def _instance_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class PostgresAdvisoryLock:
+    """
+    Leadership backed by a session-level advisory lock on a dedicated connection
+
+    The lock lives exactly as long as the connection, so a crashed leader
+    releases it automatically and a standby takes over on its next attempt.
+    """
+
+    def __init__(self, engine, name: str):
+        self.engine = engine
+        self.key = _advisory_key(f"job_runner:{name}")
+        self._conn = None
+
+    def try_acquire(self) -> bool:
+        try:
+            if self._conn is None:
+                self._conn = self.engine.connect()
+            acquired = self._conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {'key': self.key}
+            ).scalar()
+            self._conn.commit()
+            if not acquired:
+                self._close()
+            return bool(acquired)
+        except Exception:
+            self._close()
+            return False
+
+    def is_held(self) -> bool:
+        """Heartbeat: the lock is held as long as the session is alive"""
+        if self._conn is None:
+            return False
+        try:
+            self._conn.execute(text("SELECT 1"))
+            self._conn.commit()
+            return True
+        except Exception:
+            self._close()
+            return False
+
+    def release(self):
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': self.key})
+            self._conn.commit()
+        except Exception:
+            pass
+        self._close()
+
+    def _close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+
+class RedisLeaseLock:
+    """Leadership backed by a Redis key with a TTL that the leader keeps renewing"""
+
+    # Renew only if we still own the key (atomic compare-and-expire)
+    RENEW_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('expire', KEYS[1], ARGV[2])
+    end
+    return 0
+    """
+
+    RELEASE_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('del', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, client, name: str, ttl: int = 30):
+        self.client = client
+        self.key = f"job_runner:leader:{name}"
+        self.ttl = ttl
+        self.owner = _instance_id()
+
+    def try_acquire(self) -> bool:
+        try:
+            return bool(self.client.set(self.key, self.owner, nx=True, ex=self.ttl))
+        except Exception:
+            return False
+
+    def is_held(self) -> bool:
+        try:
+            return bool(self.client.eval(self.RENEW_SCRIPT, keys=[self.key], args=[self.owner, str(self.ttl)]))
+        except Exception:
+            return False
+
+    def release(self):
+        try:
+            self.client.eval(self.RELEASE_SCRIPT, keys=[self.key], args=[self.owner])
+        except Exception:
+            pass
+
+
+class LocalLock:
+    """Single-process fallback (SQLite tests, local dev without Redis)"""
+
+    def try_acquire(self) -> bool:
+        return True
+
+    def is_held(self) -> bool:
+        return True
+
+    def release(self):
+        pass
+
+
+class PgNotificationListener:
+    """
+    Waits on Postgres LISTEN channels so queue-driven jobs wake up immediately
+
+    Uses a raw psycopg2 connection in autocommit mode; `wait()` returns the
+    channels that fired (empty list on timeout).
+    """
+
+    def __init__(self, engine, channels: List[str]):
+        self.engine = engine
+        self.channels = channels
+        self._raw = None
+
+    def _connect(self):
+        self._raw = self.engine.raw_connection()
+        # Detach so the autocommit/LISTEN session never goes back into the pool
+        self._raw.detach()
+        driver_conn = self._raw.driver_connection
+        driver_conn.set_session(autocommit=True)
+        cursor = driver_conn.cursor()
+        for channel in self.channels:
+            cursor.execute(f'LISTEN "{channel}"')
+        cursor.close()
+
+    def wait(self, timeout: float) -> List[str]:
+        try:
+            if self._raw is None:
+                self._connect()
+            driver_conn = self._raw.driver_connection
+
+            readable, _, _ = select.select([driver_conn], [], [], max(timeout, 0))
+            if not readable:
+                return []
+
+            driver_conn.poll()
+            fired = []
+            while driver_conn.notifies:
+                notify = driver_conn.notifies.pop(0)
+                if notify.channel not in fired:
+                    fired.append(notify.channel)
+            return fired
+        except Exception:
+            # Connection dropped - reconnect on next wait, fall back to a plain sleep now
+            self.close()
+            time.sleep(min(timeout, 5))
+            return []
+
+    def close(self):
+        if self._raw is not None:
+            try:
+                self._raw.close()
+            except Exception:
+                pass
+            self._raw = None
+
+
+class ScheduledJob:
+    """A single periodic job and its run statistics"""
+
+    def __init__(self, name: str, func: Callable, interval: Optional[float] = None,
+                 daily_hour: Optional[int] = None, channel: Optional[str] = None,
+                 jitter: float = 0.1, run_on_start: bool = False):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.daily_hour = daily_hour
+        self.channel = channel
+        self.jitter = jitter
+        self.run_on_start = run_on_start
+        self.next_run: Optional[datetime] = None
+        self.future = None  # In-flight run (None when idle)
+        self.metrics = {
+            'runs': 0,
+            'successes': 0,
+            'failures': 0,
+            'last_duration_ms': None,
+            'avg_duration_ms': None,
+            'max_duration_ms': None,
+            'last_run_at': None,
+            'last_success_at': None,
+            'last_error': None,
+        }
+
+    def schedule_next(self, now: datetime, last_run: Optional[datetime] = None):
+        """Compute the next jittered run time"""
+        if self.daily_hour is not None:
+            target = now.replace(hour=self.daily_hour, minute=0, second=0, microsecond=0)
+            if target <= now or (last_run and last_run >= target):
+                target += timedelta(days=1)
+            # Spread daily jobs over a few minutes rather than firing on the hour
+            self.next_run = target + timedelta(seconds=random.uniform(0, 3000 * self.jitter))
+            return
+
+        base = last_run or now
+        spread = self.interval * self.jitter
+        self.next_run = base + timedelta(seconds=self.interval + random.uniform(-spread, spread))
+
+    def record(self, started: float, error: Optional[Exception]):
+        duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        m = self.metrics
+        m['runs'] += 1
+        m['last_duration_ms'] = duration_ms
+        m['max_duration_ms'] = max(m['max_duration_ms'] or 0, duration_ms)
+        prev_avg = m['avg_duration_ms'] or 0
+        m['avg_duration_ms'] = round(prev_avg + (duration_ms - prev_avg) / m['runs'], 1)
+        m['last_run_at'] = datetime.utcnow().isoformat()
+        if error is None:
+            m['successes'] += 1
+            m['last_success_at'] = m['last_run_at']
+            m['last_error'] = None
+        else:
+            m['failures'] += 1
+            m['last_error'] = str(error)[:500]
+
+
+class JobRunner:
+    """
+    Runs registered jobs only while this process holds cluster-wide leadership
+    """
+
+    METRICS_KEY = "jobs:metrics:{runner}"
+    LAST_RUN_KEY = "jobs:last_run:{job}"
+
+    def __init__(self, app, name: str = 'scheduler', leader_retry: float = 15.0,
+                 heartbeat_interval: float = 10.0, notify_fallback: float = 30.0,
+                 on_leadership_lost: Optional[Callable] = None):
+        """
+        Args:
+            app: Flask app instance
+            name: Runner name (one leader per name)
+            leader_retry: Seconds between leadership attempts for followers
+            heartbeat_interval: Seconds between leadership checks while leading
+            notify_fallback: Max seconds a LISTEN job waits before polling anyway
+            on_leadership_lost: Called when the lock is lost (e.g. to exit a
+                process that also runs Celery beat)
+        """
+        self.on_leadership_lost = on_leadership_lost
+        self.app = app
+        self.name = name
+        self.leader_retry = leader_retry
+        self.heartbeat_interval = heartbeat_interval
+        self.notify_fallback = notify_fallback
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self.running = False
+        self.is_leader = False
+        self._lock = None
+        self._listener: Optional[PgNotificationListener] = None
+        self._wake = threading.Event()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._heartbeat: Optional[threading.Thread] = None
+        self._leadership_lost = threading.Event()
+
+    def log(self, message, level='INFO'):
+        """Log with timestamp"""
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        print(f"[{timestamp}] [JobRunner:{self.name}] [{level}] {message}", flush=True)
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+
+    def add_interval_job(self, name: str, func: Callable, interval: float,
+                         jitter: float = 0.1, run_on_start: bool = False):
+        self.jobs[name] = ScheduledJob(name, func, interval=interval, jitter=jitter,
+                                       run_on_start=run_on_start)
+
+    def add_daily_job(self, name: str, func: Callable, hour: int, jitter: float = 0.1):
+        self.jobs[name] = ScheduledJob(name, func, daily_hour=hour, jitter=jitter)
+
+    def add_notify_job(self, name: str, func: Callable, channel: str,
+                       fallback_interval: Optional[float] = None):
+        """Run `func` whenever `channel` is notified, or every fallback_interval seconds"""
+        self.jobs[name] = ScheduledJob(
+            name, func, interval=fallback_interval or self.notify_fallback,
+            channel=channel, jitter=0.05, run_on_start=True
+        )
+
+    def trigger(self, name: str):
+        """Make a job due immediately (e.g. from an in-process producer)"""
+        job = self.jobs.get(name)
+        if job:
+            job.next_run = datetime.now()
+            self._wake.set()
+
+    # ------------------------------------------------------------------
+    # Leadership
+    # ------------------------------------------------------------------
+
+    def _make_lock(self):
+        with self.app.app_context():
+            engine = db.engine
+            if engine.dialect.name == 'postgresql':
+                return PostgresAdvisoryLock(engine, self.name)
+
+            from utils.cache import CacheService
+            client = CacheService.get_redis_client()
+            if client:
+                return RedisLeaseLock(client, self.name, ttl=int(self.heartbeat_interval * 3))
+
+        return LocalLock()
+
+    def wait_for_leadership(self):
+        """Block until this process is the leader (followers retry with jitter)"""
+        if self._lock is None:
+            self._lock = self._make_lock()
+
+        announced = False
+        while not self._lock.try_acquire():
+            if not announced:
+                self.log(f"Another instance is leader - standing by ({type(self._lock).__name__})")
+                announced = True
+            time.sleep(self.leader_retry * random.uniform(0.8, 1.2))
+
+        self.is_leader = True
+        self.log(f"Acquired leadership as {_instance_id()} ({type(self._lock).__name__})")
+
+    def _heartbeat_loop(self):
+        """Renew leadership every heartbeat_interval, whatever the jobs are doing"""
+        while self.running and not self._leadership_lost.wait(self.heartbeat_interval):
+            if not (self._lock and self._lock.is_held()):
+                self.is_leader = False
+                self._leadership_lost.set()
+                self._wake.set()
+                self.log("Lost leadership - stopping jobs", level='WARNING')
+                if self.on_leadership_lost:
+                    self.on_leadership_lost()
+                return
+            try:
+                self.publish_metrics()
+            except Exception as e:
+                self.log(f"Publishing metrics failed: {e}", level='WARNING')
+
+    def _start_heartbeat(self):
+        self._leadership_lost.clear()
+        self._heartbeat = threading.Thread(target=self._heartbeat_loop, daemon=True,
+                                           name=f'JobRunner-{self.name}-heartbeat')
+        self._heartbeat.start()
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+
+    def _load_last_run(self, job: ScheduledJob) -> Optional[datetime]:
+        from utils.cache import CacheService
+        value = CacheService.get(self.LAST_RUN_KEY.format(job=job.name))
+        try:
+            return datetime.fromisoformat(value) if value else None
+        except (TypeError, ValueError):
+            return None
+
+    def _store_last_run(self, job: ScheduledJob, ran_at: datetime):
+        from utils.cache import CacheService
+        ttl = int((job.interval or 86400) * 2) + 60
+        CacheService.set(self.LAST_RUN_KEY.format(job=job.name), ran_at.isoformat(), ttl=ttl)
+
+    def _initial_schedule(self):
+        now = datetime.now()
+        with self.app.app_context():
+            for job in self.jobs.values():
+                last_run = self._load_last_run(job)
+                if job.run_on_start and not (last_run and job.interval and
+                                             (now - last_run).total_seconds() < job.interval):
+                    job.next_run = now
+                else:
+                    job.schedule_next(now, last_run)
+
+    def run_job(self, job: ScheduledJob):
+        """Execute one job inside an app context and record its metrics"""
+        started = time.perf_counter()
+        error = None
+        due = None
+        with self.app.app_context():
+            try:
+                due = job.func()
+            except Exception as e:
+                error = e
+                db.session.rollback()
+                self.log(f"Job '{job.name}' failed: {e}", level='ERROR')
+            finally:
+                db.session.remove()
+            job.record(started, error)
+            ran_at = datetime.now()
+            self._store_last_run(job, ran_at)
+            job.schedule_next(ran_at, ran_at)
+            if isinstance(due, datetime) and due < job.next_run:
+                job.next_run = max(due, ran_at)
+
+    def _dispatch(self, job: ScheduledJob):
+        """Start a due job on its pool slot unless its previous run is still going"""
+        if job.future is not None and not job.future.done():
+            return
+        job.next_run = None  # Rescheduled by run_job when this run finishes
+        job.future = self._executor.submit(self.run_job, job)
+        job.future.add_done_callback(lambda _: self._wake.set())
+
+    def publish_metrics(self):
+        """Store job metrics in Redis so the web process can report them"""
+        from utils.cache import CacheService
+        payload = {
+            'runner': self.name,
+            'leader': _instance_id() if self.is_leader else None,
+            'updated_at': datetime.utcnow().isoformat(),
+            'jobs': {
+                name: dict(job.metrics, next_run=job.next_run.isoformat() if job.next_run else None)
+                for name, job in self.jobs.items()
+            }
+        }
+        with self.app.app_context():
+            CacheService.set(self.METRICS_KEY.format(runner=self.name), payload, ttl=3600)
+
+    @classmethod
+    def get_published_metrics(cls, runner: str = 'scheduler') -> Optional[dict]:
+        """Read metrics published by the current leader (call inside app context)"""
+        from utils.cache import CacheService
+        return CacheService.get(cls.METRICS_KEY.format(runner=runner))
+
+    def _wait(self, seconds: float):
+        """Sleep until the next due job, waking early on NOTIFY or trigger()"""
+        seconds = max(0.0, min(seconds, self.heartbeat_interval))
+        if self._listener is not None:
+            fired = self._listener.wait(seconds)
+            now = datetime.now()
+            for job in self.jobs.values():
+                if job.channel in fired:
+                    job.next_run = now
+        else:
+            self._wake.wait(seconds)
+            self._wake.clear()
+
+    def _setup_listener(self):
+        channels = sorted({job.channel for job in self.jobs.values() if job.channel})
+        if not channels:
+            return
+        with self.app.app_context():
+            engine = db.engine
+            if engine.dialect.name == 'postgresql':
+                self._listener = PgNotificationListener(engine, channels)
+                self.log(f"Listening on channels: {', '.join(channels)}")
+
+    def run(self):
+        """Main loop: acquire leadership, then dispatch due jobs until stopped"""
+        self.running = True
+        while self.running:
+            if not self.is_leader:
+                self.wait_for_leadership()
+            self._setup_listener()
+            self._initial_schedule()
+            self._executor = ThreadPoolExecutor(max_workers=max(len(self.jobs), 1),
+                                                thread_name_prefix=f'JobRunner-{self.name}')
+            self._start_heartbeat()
+            self.log(f"Running {len(self.jobs)} job(s): {', '.join(self.jobs)}")
+
+            while self.running and not self._leadership_lost.is_set():
+                now = datetime.now()
+                for job in sorted(self.jobs.values(), key=lambda j: j.next_run or now):
+                    if job.next_run and job.next_run <= now:
+                        self._dispatch(job)
+
+                upcoming = min((j.next_run for j in self.jobs.values() if j.next_run), default=None)
+                delay = (upcoming - datetime.now()).total_seconds() if upcoming else self.heartbeat_interval
+                if any(j.future is not None and not j.future.done() for j in self.jobs.values()):
+                    # A finishing job reschedules itself; don't sleep past its next run
+                    delay = min(delay, 1.0)
+                self._wait(delay)
+
+            # In-flight runs can't be interrupted; let them finish before standing by
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            for job in self.jobs.values():
+                job.future = None
+            if self._listener:
+                self._listener.close()
+                self._listener = None
+
+    def start_background(self) -> threading.Thread:
+        """Run the loop in a daemon thread"""
+        thread = threading.Thread(target=self.run, daemon=True, name=f'JobRunner-{self.name}')
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.running = False
+        self._wake.set()
+        if self._lock:
+            self._lock.release()
+        self.is_leader = False
+        self.log("Runner stopped")
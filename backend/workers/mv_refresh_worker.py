@@ -4,24 +4,31 @@ Materialized View Refresh Worker
 Background worker that processes the MV refresh queue with 5-second debouncing
 
 Features:
-- Processes queue every 2 seconds
-- Respects 5-second debounce window
-- Concurrent refresh using ThreadPoolExecutor
+- Wakes on NOTIFY mv_refresh (migrations/add_mv_refresh_notify.sql), polls as fallback
+- Coalesces queued requests per view within the debounce window (max-wait capped)
+- Refreshes independent views in parallel, one connection each, with
+  REFRESH MATERIALIZED VIEW CONCURRENTLY
+- Incremental mode for feed/leaderboard tables (migrations/add_incremental_mv_refresh.sql):
+  only rows listed in mv_refresh_delta are recomputed
 - Error handling and retry logic
 - Monitoring and logging
 
 Usage:
+    Registered as the 'mv_refresh' job in scheduler.py (leader-elected, runs once cluster-wide)
+
+    Standalone:
     python workers/mv_refresh_worker.py
 
     Or run as daemon:
     nohup python workers/mv_refresh_worker.py > logs/mv_worker.log 2>&1 &
 """
 
+import logging
 import time
 import sys
 import os
 import threading
-from datetime import datetime
+from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add parent directory to path for imports
@@ -30,24 +37,62 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from extensions import db
 from sqlalchemy import text
 
+logger = logging.getLogger(__name__)
+
+
+# Views that add_incremental_mv_refresh.sql turns into delta-maintained tables.
+# source: plain view with the original MV definition (same column order)
+# rank_key: ascending sort key of the rank column ('-' negates; a total order,
+#           backed by an index on the same expressions), None if unranked
+INCREMENTAL_VIEWS = {
+    'mv_feed_projects': {
+        'source': 'v_feed_projects_source',
+        'rank_key': None
+    },
+    'mv_leaderboard_projects': {
+        'source': 'v_leaderboard_projects_source',
+        'rank_key': ('-proof_score', 'created_at', 'id')
+    },
+    'mv_leaderboard_builders': {
+        'source': 'v_leaderboard_builders_source',
+        'rank_key': ('-total_karma', 'created_at', 'id')
+    },
+}
+
+
+def _key_sql(columns, alias=None, direction=''):
+    """SQL for a rank_key, e.g. ('-score', 'id') -> '-v.score, v.id'"""
+    prefix = f'{alias}.' if alias else ''
+    return ', '.join(
+        f'-{prefix}{column[1:]}{direction}' if column.startswith('-') else f'{prefix}{column}{direction}'
+        for column in columns
+    )
+
 
 class MVRefreshWorker:
     """
     Background worker for processing materialized view refresh queue
     """
 
-    def __init__(self, app, poll_interval=2, max_workers=3):
+    def __init__(self, app, poll_interval=2, max_workers=3, debounce_seconds=5,
+                 max_wait_seconds=60, full_rebuild_threshold=5000):
         """
         Initialize worker
 
         Args:
             app: Flask app instance
             poll_interval: Seconds between queue checks
-            max_workers: Max concurrent refreshes
+            max_workers: Max concurrent refreshes (one DB connection each)
+            debounce_seconds: Quiet period before a queued view is refreshed
+            max_wait_seconds: Refresh anyway if the last refresh is older than this
+            full_rebuild_threshold: Delta size above which incremental tables are rebuilt
         """
         self.app = app
         self.poll_interval = poll_interval
         self.max_workers = max_workers
+        self.debounce_seconds = debounce_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self.full_rebuild_threshold = full_rebuild_threshold
         self.running = False
         self.stats = {
             'total_refreshes': 0,
@@ -57,48 +102,330 @@ class MVRefreshWorker:
             'started_at': None
         }
 
+    # Worker tags -> logging levels (tags without an entry log at INFO)
+    LOG_LEVELS = {'AUTOCOMMIT': logging.DEBUG, 'WARN': logging.WARNING, 'ERROR': logging.ERROR, 'FATAL': logging.CRITICAL}
+
     def log(self, message, level='INFO'):
-        """Log with timestamp"""
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        print(f"[{timestamp}] [{level}] {message}", flush=True)
+        """Log through the module logger, keeping the worker's tag in the message"""
+        logger.log(self.LOG_LEVELS.get(level, logging.INFO), "[%s] %s", level, message)
 
     def process_queue(self):
-        """Process all pending refreshes in the queue"""
+        """
+        Claim and refresh every due view in the queue
+
+        Requests for the same view collapse into its single queue row, and a
+        row is only claimed once it has been quiet for `debounce_seconds`
+        (or has waited `max_wait_seconds`, so a hot view can't starve).
+        Claimed views are refreshed in parallel on separate connections.
+
+        Returns:
+            When the earliest still-pending row comes due (None if none are
+            pending). The NOTIFY that queued a row wakes this run before the
+            row is claimable, so JobRunner schedules the next run for then.
+        """
         with self.app.app_context():
             try:
-                # Call the Postgres function to process queue
-                result = db.session.execute(text("SELECT * FROM process_mv_refresh_queue()"))
-                refreshes = result.fetchall()
+                claimed = db.session.execute(text("""
+                    UPDATE mv_refresh_queue
+                    SET status = 'in_progress',
+                        refresh_started_at = CURRENT_TIMESTAMP
+                    WHERE status = 'pending'
+                      AND (
+                          refresh_requested_at <= CURRENT_TIMESTAMP - make_interval(secs => :debounce)
+                          OR refresh_completed_at <= CURRENT_TIMESTAMP - make_interval(secs => :max_wait)
+                      )
+                    RETURNING view_name, triggered_by
+                """), {'debounce': self.debounce_seconds, 'max_wait': self.max_wait_seconds}).fetchall()
+                db.session.commit()
+            except Exception as e:
+                self.log(f"Error claiming queue: {e}", level='ERROR')
+                db.session.rollback()
+                return None
 
-                if refreshes:
-                    for refresh in refreshes:
-                        view_name, status, duration_ms, row_count = refresh
+            if claimed:
+                triggered_by = {row[0]: row[1] for row in claimed}
+                results = self.refresh_views(list(triggered_by))
 
-                        self.stats['total_refreshes'] += 1
+                for result in results:
+                    self._record_result(result, triggered_by.get(result['view_name']))
 
-                        if status == 'completed':
-                            self.stats['successful_refreshes'] += 1
-                            self.stats['total_duration_ms'] += duration_ms
+            return self._next_due()
 
-                            self.log(
-                                f"[OK] Refreshed {view_name}: {row_count} rows in {duration_ms}ms",
-                                level='SUCCESS'
-                            )
-                        else:
-                            self.stats['failed_refreshes'] += 1
-                            self.log(
-                                f"[FAIL] Failed to refresh {view_name}",
-                                level='ERROR'
-                            )
+    def _next_due(self):
+        """Local time at which the earliest pending row can be claimed (None if none are pending)"""
+        try:
+            # The wait is computed by the database, whose clock the claim uses
+            seconds = db.session.execute(text("""
+                SELECT EXTRACT(EPOCH FROM (MIN(LEAST(
+                    refresh_requested_at + make_interval(secs => :debounce),
+                    refresh_completed_at + make_interval(secs => :max_wait)
+                )) - CURRENT_TIMESTAMP))
+                FROM mv_refresh_queue
+                WHERE status = 'pending'
+            """), {'debounce': self.debounce_seconds, 'max_wait': self.max_wait_seconds}).scalar()
+            db.session.commit()
+        except Exception as e:
+            self.log(f"Error reading queue due time: {e}", level='WARN')
+            db.session.rollback()
+            return None
 
-                    db.session.commit()
+        if seconds is None:
+            return None
+        return datetime.now() + timedelta(seconds=max(float(seconds), 0.0))
 
-                return len(refreshes)
+    def refresh_views(self, view_names, full=False):
+        """
+        Refresh independent views in parallel (one connection per view)
 
-            except Exception as e:
-                self.log(f"Error processing queue: {e}", level='ERROR')
-                db.session.rollback()
-                return 0
+        Args:
+            view_names: Views to refresh
+            full: Rebuild incremental tables from scratch instead of draining deltas
+
+        Returns:
+            List of result dicts (view_name, status, mode, duration_ms, row_count, error)
+        """
+        if not view_names:
+            return []
+
+        with self.app.app_context():
+            engine = db.engine
+
+        results = []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(view_names))) as executor:
+            futures = {
+                executor.submit(self.refresh_view, engine, view_name, full): view_name
+                for view_name in view_names
+            }
+            for future in as_completed(futures):
+                results.append(future.result())
+
+        return results
+
+    def refresh_view(self, engine, view_name, full=False):
+        """
+        Refresh a single view on its own connection
+
+        Real materialized views use REFRESH ... CONCURRENTLY (readers are never
+        blocked). Views converted to tables by add_incremental_mv_refresh.sql
+        are patched from mv_refresh_delta, or rebuilt when `full` is set or
+        the delta is larger than `full_rebuild_threshold`.
+        """
+        started_at = datetime.now()
+        start = time.perf_counter()
+        result = {
+            'view_name': view_name,
+            'status': 'completed',
+            'mode': 'concurrent',
+            'started_at': started_at,
+            'duration_ms': 0,
+            'row_count': 0,
+            'error': None
+        }
+
+        try:
+            with engine.connect() as conn:
+                relkind = conn.execute(
+                    text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"),
+                    {'name': view_name}
+                ).scalar()
+
+            if relkind == 'r' and view_name in INCREMENTAL_VIEWS:
+                with engine.begin() as conn:
+                    result['mode'], result['rows_patched'] = self._apply_incremental(
+                        conn, view_name, full
+                    )
+            else:
+                # REFRESH ... CONCURRENTLY can't run inside a transaction block
+                with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+                    result['mode'] = self._refresh_materialized(conn, view_name)
+
+            with engine.connect() as conn:
+                result['row_count'] = conn.execute(
+                    text("SELECT reltuples::BIGINT FROM pg_class WHERE oid = to_regclass(:name)"),
+                    {'name': view_name}
+                ).scalar() or 0
+
+        except Exception as e:
+            result['status'] = 'failed'
+            result['error'] = str(e)
+
+        result['duration_ms'] = int((time.perf_counter() - start) * 1000)
+        return result
+
+    def _refresh_materialized(self, conn, view_name):
+        """REFRESH CONCURRENTLY, falling back to a blocking refresh (e.g. never populated)"""
+        try:
+            conn.execute(text(f'REFRESH MATERIALIZED VIEW CONCURRENTLY "{view_name}"'))
+            return 'concurrent'
+        except Exception as e:
+            self.log(f"Concurrent refresh of {view_name} failed ({e}) - retrying without CONCURRENTLY",
+                     level='WARN')
+            conn.execute(text(f'REFRESH MATERIALIZED VIEW "{view_name}"'))
+            return 'full'
+
+    def _apply_incremental(self, conn, view_name, full):
+        """Patch changed rows of an incremental table inside the caller's transaction"""
+        spec = INCREMENTAL_VIEWS[view_name]
+
+        # Draining and applying in one transaction: a concurrent writer's ids
+        # either land in this batch or stay queued for the next one
+        ids = [row[0] for row in conn.execute(text("""
+            DELETE FROM mv_refresh_delta
+            WHERE view_name = :view_name
+            RETURNING row_id
+        """), {'view_name': view_name})]
+
+        if full or len(ids) > self.full_rebuild_threshold:
+            conn.execute(text(f'DELETE FROM "{view_name}"'))
+            conn.execute(text(f'INSERT INTO "{view_name}" SELECT * FROM {spec["source"]}'))
+            if spec['rank_key']:
+                conn.execute(text(f"""
+                    UPDATE "{view_name}" t
+                    SET rank = r.rank
+                    FROM (
+                        SELECT id, ROW_NUMBER() OVER (ORDER BY {_key_sql(spec['rank_key'])}) as rank
+                        FROM "{view_name}"
+                    ) r
+                    WHERE t.id = r.id
+                """))
+            return 'rebuild', None
+
+        if not ids:
+            return 'incremental', 0
+
+        old = None
+        if spec['rank_key']:
+            old = conn.execute(
+                text(f'SELECT MIN(rank), MAX(rank), COUNT(*) FROM "{view_name}" WHERE id = ANY(:ids)'),
+                {'ids': ids}
+            ).first()
+
+        conn.execute(text(f'DELETE FROM "{view_name}" WHERE id = ANY(:ids)'), {'ids': ids})
+        conn.execute(
+            text(f'INSERT INTO "{view_name}" SELECT * FROM {spec["source"]} WHERE id = ANY(:ids)'),
+            {'ids': ids}
+        )
+
+        if spec['rank_key']:
+            self._rerank_window(conn, view_name, spec['rank_key'], ids, old)
+
+        return 'incremental', len(ids)
+
+    @staticmethod
+    def _rerank_window(conn, view_name, rank_key, ids, old):
+        """
+        Re-rank only the rows whose position can have changed
+
+        Patched rows were re-inserted with rank NULL; every other row still
+        holds its old rank, which is ordered by rank_key. Ranks before the
+        first old or new position of a patched row cannot move, nor can ranks
+        after the last one except by the net row-count change. The window in
+        between is renumbered and the tail shifted, so a vote that moves a row
+        a few places touches a few rows instead of the whole table.
+        """
+        old_lo, old_hi, old_count = old
+        key, patched_key = _key_sql(rank_key, 'v'), _key_sql(rank_key, 'p')
+
+        # New slot of each patched row: just after its nearest unchanged row
+        # ahead, just before its nearest unchanged row behind (index lookups)
+        new_lo, new_hi, new_count, open_ended = conn.execute(text(f"""
+            SELECT MIN(COALESCE(ahead.rank, 0) + 1),
+                   MAX(behind.rank - 1),
+                   COUNT(*),
+                   BOOL_OR(behind.rank IS NULL)
+            FROM "{view_name}" p
+            LEFT JOIN LATERAL (
+                SELECT v.rank FROM "{view_name}" v
+                WHERE v.rank IS NOT NULL AND ({key}) < ({patched_key})
+                ORDER BY {_key_sql(rank_key, 'v', ' DESC')} LIMIT 1
+            ) ahead ON true
+            LEFT JOIN LATERAL (
+                SELECT v.rank FROM "{view_name}" v
+                WHERE v.rank IS NOT NULL AND ({key}) > ({patched_key})
+                ORDER BY {key} LIMIT 1
+            ) behind ON true
+            WHERE p.id = ANY(:ids)
+        """), {'ids': ids}).first()
+
+        bounds_lo = [bound for bound in (old_lo, new_lo) if bound is not None]
+        if not bounds_lo:
+            return
+        lo = min(bounds_lo)
+        hi = None if open_ended else max(bound for bound in (old_hi, new_hi, lo) if bound is not None)
+
+        if hi is None:
+            window, tail = 'rank >= :lo OR rank IS NULL', ''
+        else:
+            window = 'rank BETWEEN :lo AND :hi OR rank IS NULL'
+            # Rows past the window only move by the net row-count change
+            tail = '' if new_count == old_count else f"""
+                UNION ALL
+                SELECT id, rank + :shift FROM "{view_name}" WHERE rank > :hi
+            """
+
+        # One statement, so the tail shift and the window see the same snapshot
+        conn.execute(text(f"""
+            UPDATE "{view_name}" t
+            SET rank = r.rank
+            FROM (
+                SELECT id, :lo - 1 + ROW_NUMBER() OVER (ORDER BY {_key_sql(rank_key)}) as rank
+                FROM "{view_name}"
+                WHERE {window}
+                {tail}
+            ) r
+            WHERE t.id = r.id AND t.rank IS DISTINCT FROM r.rank
+        """), {'lo': lo, 'hi': hi, 'shift': new_count - old_count})
+
+    def _record_result(self, result, triggered_by):
+        """Mark the queue row done, append to mv_refresh_log and update stats"""
+        view_name = result['view_name']
+        self.stats['total_refreshes'] += 1
+
+        try:
+            # A request that arrived mid-refresh flipped the row back to
+            # 'pending' - leave it so the next pass picks it up
+            db.session.execute(text("""
+                UPDATE mv_refresh_queue
+                SET status = :status,
+                    refresh_completed_at = CURRENT_TIMESTAMP,
+                    last_refresh_duration_ms = :duration_ms,
+                    error_message = :error
+                WHERE view_name = :view_name AND status = 'in_progress'
+            """), {
+                'status': result['status'],
+                'duration_ms': result['duration_ms'],
+                'error': result['error'],
+                'view_name': view_name
+            })
+            db.session.execute(text("""
+                INSERT INTO mv_refresh_log
+                    (view_name, refresh_started_at, refresh_completed_at, duration_ms, row_count, triggered_by, status)
+                VALUES (:view_name, :started_at, CURRENT_TIMESTAMP, :duration_ms, :row_count, :triggered_by, :status)
+            """), {
+                'view_name': view_name,
+                'started_at': result['started_at'],
+                'duration_ms': result['duration_ms'],
+                'row_count': result['row_count'],
+                'triggered_by': triggered_by,
+                'status': result['status']
+            })
+            db.session.commit()
+        except Exception as e:
+            self.log(f"Error recording refresh of {view_name}: {e}", level='ERROR')
+            db.session.rollback()
+
+        if result['status'] == 'completed':
+            self.stats['successful_refreshes'] += 1
+            self.stats['total_duration_ms'] += result['duration_ms']
+            detail = (f"{result['rows_patched']} rows patched"
+                      if result.get('rows_patched') is not None else f"~{result['row_count']} rows")
+            self.log(
+                f"[OK] Refreshed {view_name} ({result['mode']}): {detail} in {result['duration_ms']}ms",
+                level='SUCCESS'
+            )
+        else:
+            self.stats['failed_refreshes'] += 1
+            self.log(f"[FAIL] Failed to refresh {view_name}: {result['error']}", level='ERROR')
 
     def cleanup_completed_queue(self):
         """Clean up old completed/failed entries from queue (keep last 100)"""
@@ -149,19 +476,20 @@ class MVRefreshWorker:
         self.log("=" * 62)
         self.log(f"  Poll Interval:        {self.poll_interval}s")
         self.log(f"  Max Workers:          {self.max_workers}")
-        self.log(f"  Debounce Window:      5s")
+        self.log(f"  Debounce Window:      {self.debounce_seconds}s (max wait {self.max_wait_seconds}s)")
         self.log("=" * 62)
 
         iteration = 0
         last_cleanup = time.time()
         last_stats = time.time()
+        listener = self._create_listener()
 
         try:
             while self.running:
                 iteration += 1
 
                 # Process queue
-                refreshes_processed = self.process_queue()
+                next_due = self.process_queue()
 
                 # Cleanup every 5 minutes
                 if time.time() - last_cleanup > 300:
@@ -174,8 +502,14 @@ class MVRefreshWorker:
                     self.print_stats()
                     last_stats = time.time()
 
-                # Sleep
-                time.sleep(self.poll_interval)
+                # Sleep until the next NOTIFY or debounce expiry (or poll_interval as a fallback)
+                wait = self.poll_interval
+                if next_due is not None:
+                    wait = min(wait, max((next_due - datetime.now()).total_seconds(), 0.05))
+                if listener:
+                    listener.wait(wait)
+                else:
+                    time.sleep(wait)
 
         except KeyboardInterrupt:
             self.log("Received shutdown signal", level='INFO')
@@ -185,6 +519,15 @@ class MVRefreshWorker:
             self.log(f"Fatal error: {e}", level='FATAL')
             self.stop()
 
+    def _create_listener(self):
+        """LISTEN for queue inserts on Postgres; None on other databases"""
+        from workers.job_runner import PgNotificationListener
+
+        with self.app.app_context():
+            if db.engine.dialect.name != 'postgresql':
+                return None
+            return PgNotificationListener(db.engine, ['mv_refresh'])
+
     def stop(self):
         """Stop worker gracefully"""
         self.running = False
@@ -221,13 +564,13 @@ def main():
     # Create Flask app
     app = create_app()
 
-    # Create and start worker
-    worker = MVRefreshWorker(app, poll_interval=2, max_workers=3)
+    # Create and start worker (NOTIFY-driven; poll_interval is only the fallback)
+    worker = MVRefreshWorker(app, poll_interval=30, max_workers=3)
 
     try:
         worker.run()
-    except Exception as e:
-        print(f"Worker crashed: {e}")
+    except Exception:
+        logger.exception("Worker crashed")
         sys.exit(1)
 
 
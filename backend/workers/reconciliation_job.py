@@ -6,22 +6,33 @@ Compares denormalized data with primary tables and auto-corrects discrepancies
 Features:
 - Runs at 3 AM server time (low traffic)
 - Compares all denormalized tables with source data
-- Auto-corrects discrepancies
-- Logs all fixes for audit trail
-- Alerts on critical issues
+- Set-based: keyset-paginated chunks, grouped CTE aggregates, diff + bulk
+  UPDATE ... FROM in one statement per chunk
+- Resumable via reconciliation_checkpoints (migrations/add_reconciliation_checkpoints.sql)
+- Dry-run mode reports per-field discrepancy counts without writing
+- Logs fixes for audit trail (capped per table)
 
 Schedule:
+    Registered as the 'reconciliation' job in scheduler.py
+
     Run via cron:
     0 3 * * * cd /path/to/backend && python workers/reconciliation_job.py
 
+    Dry run / tuning:
+    python workers/reconciliation_job.py --dry-run --chunk-size 10000
+    python workers/reconciliation_job.py --no-resume
+
     Or use APScheduler in app.py:
     scheduler.add_job(reconcile_all, 'cron', hour=3)
 """
 
 import sys
 import os
+import json
+import argparse
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple
+from uuid import uuid4
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -36,23 +47,34 @@ class ReconciliationJob:
     Reconciliation job for denormalized data integrity
     """
 
-    def __init__(self, app, auto_fix=True):
+    def __init__(self, app, auto_fix=True, chunk_size=5000, resume=True, max_logged_discrepancies=50):
         """
         Initialize reconciliation job
 
         Args:
             app: Flask app instance
-            auto_fix: If True, automatically fix discrepancies
+            auto_fix: If True, automatically fix discrepancies (False = dry run)
+            chunk_size: Rows reconciled per statement/transaction
+            resume: Continue an interrupted run from its last checkpoint
+            max_logged_discrepancies: Per-table cap on individually logged rows
         """
         self.app = app
         self.auto_fix = auto_fix
+        self.chunk_size = chunk_size
+        self.resume = resume
+        self.max_logged_discrepancies = max_logged_discrepancies
+        self.checkpoints_enabled = True
+        self.run_id = uuid4().hex
         self.report = {
             'started_at': None,
             'completed_at': None,
             'duration_seconds': 0,
+            'dry_run': not auto_fix,
             'tables_checked': [],
+            'reconcilers': {},
             'discrepancies_found': 0,
             'discrepancies_fixed': 0,
+            'ledger_drift_detected': 0,  # Reported, never auto-fixed; kept out of the exit status
             'errors': []
         }
 
@@ -61,266 +83,462 @@ class ReconciliationJob:
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         print(f"[{timestamp}] [{level}] {message}", flush=True)
 
-    def log_discrepancy(self, table: str, user_id: str, field: str, expected: any, actual: any, fixed: bool):
-        """Log a discrepancy"""
+    def _count_discrepancy(self, fixed: bool):
+        """Count a discrepancy in the report without logging it"""
         self.report['discrepancies_found'] += 1
         if fixed:
             self.report['discrepancies_fixed'] += 1
 
+    def log_discrepancy(self, table: str, user_id: str, field: str, expected: any, actual: any, fixed: bool):
+        """Log a discrepancy"""
+        self._count_discrepancy(fixed)
+
         self.log(
             f"{'[FIXED]' if fixed else '[FOUND]'} {table}.{field} for user {user_id}: "
             f"Expected={expected}, Actual={actual}",
             level='WARNING' if not fixed else 'INFO'
         )
 
-    def reconcile_dashboard_stats(self) -> int:
-        """Reconcile user_dashboard_stats with primary tables"""
-        self.log("Reconciling user_dashboard_stats...")
+    # ------------------------------------------------------------------
+    # Set-based, chunked reconciliation
+    # ------------------------------------------------------------------
+    #
+    # Every reconciler walks its denormalized table in keyset-ordered chunks.
+    # For each chunk one statement computes the true aggregates with grouped
+    # CTEs (range-restricted to the chunk so indexes do the work), diffs them
+    # against the cached row in SQL and - unless this is a dry run - applies
+    # the fixes with a single UPDATE ... FROM. The chunk's checkpoint is
+    # written in the same transaction, so a crashed run resumes exactly after
+    # the last committed chunk.
+
+    def _key_tuple(self, keys: List[str], prefix: str) -> str:
+        """'(:lo_0, :lo_1)' style placeholder tuple for a keyset bound"""
+        return "(" + ", ".join(f":{prefix}_{i}" for i in range(len(keys))) + ")"
+
+    def _load_checkpoint(self, name: str):
+        """Return the last committed key of an unfinished run, or None"""
+        if not self.auto_fix or not self.resume:
+            return None, {}
+
+        try:
+            row = db.session.execute(text("""
+                SELECT last_key, rows_scanned, discrepancies_found, discrepancies_fixed
+                FROM reconciliation_checkpoints
+                WHERE reconciler = :name AND status = 'running'
+            """), {'name': name}).fetchone()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            self.log(f"Checkpoints unavailable ({e}) - starting {name} from the beginning", level='WARNING')
+            self.checkpoints_enabled = False
+            return None, {}
+
+        if not row or row[0] is None:
+            return None, {}
+
+        return list(row[0]), {'rows_scanned': row[1], 'found': row[2], 'fixed': row[3]}
+
+    def _save_checkpoint(self, name: str, last_key, progress: Dict, status: str = 'running'):
+        """Upsert progress for `name` (caller commits)"""
+        if not self.auto_fix or not self.checkpoints_enabled:
+            return
+
+        db.session.execute(text("""
+            INSERT INTO reconciliation_checkpoints
+                (reconciler, run_id, last_key, status, rows_scanned, discrepancies_found,
+                 discrepancies_fixed, started_at, updated_at)
+            VALUES (:name, :run_id, CAST(:last_key AS JSONB), :status, :rows_scanned, :found,
+                    :fixed, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+            ON CONFLICT (reconciler) DO UPDATE
+            SET started_at = CASE WHEN reconciliation_checkpoints.run_id = EXCLUDED.run_id
+                                  THEN reconciliation_checkpoints.started_at
+                                  ELSE CURRENT_TIMESTAMP END,
+                run_id = EXCLUDED.run_id,
+                last_key = EXCLUDED.last_key,
+                status = EXCLUDED.status,
+                rows_scanned = EXCLUDED.rows_scanned,
+                discrepancies_found = EXCLUDED.discrepancies_found,
+                discrepancies_fixed = EXCLUDED.discrepancies_fixed,
+                updated_at = CURRENT_TIMESTAMP
+        """), {
+            'name': name,
+            'run_id': self.run_id,
+            'last_key': json.dumps(last_key) if last_key is not None else None,
+            'status': status,
+            'rows_scanned': progress['rows_scanned'],
+            'found': progress['found'],
+            'fixed': progress['fixed']
+        })
+
+    def _reconcile_chunked(self, spec: Dict) -> int:
+        """
+        Reconcile one denormalized table described by `spec`
+
+        spec keys:
+            name: Reconciler / checkpoint name
+            table: Denormalized table (aliased `t`)
+            keys: Key columns, used for keyset pagination
+            chunk_join: Optional JOIN restricting which rows are checked
+            actual_sql: SELECT over `chunk` returning keys + true value per field.
+                        Single-key specs may use :lo_0 / :hi_0 to range-restrict
+                        the source tables.
+            fields: Columns to compare and fix
+            touch_column: Timestamp column bumped on fix
+        """
+        name, table, keys, fields = spec['name'], spec['table'], spec['keys'], spec['fields']
+        self.log(f"Reconciling {table} (chunk size {self.chunk_size}"
+                 f"{', dry run' if not self.auto_fix else ''})...")
+
+        key_cols = ", ".join(f"t.{k}" for k in keys)
+        chunk_join = spec.get('chunk_join', '')
+        lower = self._key_tuple(keys, 'lo')
+        upper = self._key_tuple(keys, 'hi')
+
+        bound_sql = text(f"""
+            SELECT * FROM (
+                SELECT {key_cols}
+                FROM {table} t {chunk_join}
+                WHERE ({key_cols}) > {lower}
+                ORDER BY {key_cols}
+                LIMIT :limit
+            ) c
+            ORDER BY {", ".join(keys)} DESC
+            LIMIT 1
+        """)
+
+        join_on = " AND ".join(f"t.{k} = d.{k}" for k in keys)
+        reconcile_sql = text(f"""
+            WITH chunk AS (
+                SELECT {key_cols}
+                FROM {table} t {chunk_join}
+                WHERE ({key_cols}) > {lower} AND ({key_cols}) <= {upper}
+            ),
+            actual AS (
+                {spec['actual_sql']}
+            ),
+            diff AS (
+                SELECT a.*, {", ".join(f"t.{f} AS cached_{f}" for f in fields)}
+                FROM {table} t
+                JOIN actual a ON {" AND ".join(f"t.{k} = a.{k}" for k in keys)}
+                WHERE ({", ".join(f"t.{f}" for f in fields)})
+                      IS DISTINCT FROM ({", ".join(f"a.{f}" for f in fields)})
+            ),
+            fixed AS (
+                UPDATE {table} t
+                SET {", ".join(f"{f} = d.{f}" for f in fields)},
+                    {spec['touch_column']} = CURRENT_TIMESTAMP
+                FROM diff d
+                WHERE {join_on} AND :apply
+                RETURNING 1
+            )
+            SELECT
+                (SELECT COUNT(*) FROM chunk) AS chunk_rows,
+                (SELECT json_agg(diff) FROM diff) AS diffs
+        """)
+
+        with self.app.app_context():
+            last_key, resumed = self._load_checkpoint(name)
+
+        progress = {
+            'rows_scanned': resumed.get('rows_scanned', 0),
+            'found': resumed.get('found', 0),
+            'fixed': resumed.get('fixed', 0),
+            'chunks': 0,
+            'fields': {f: 0 for f in fields},
+            'samples': []
+        }
+        if last_key is not None:
+            self.log(f"  Resuming {name} after key {last_key}")
 
+        # VARCHAR ids sort after '' so an empty tuple starts at the beginning
+        lo = last_key or [''] * len(keys)
         discrepancies = 0
 
         with self.app.app_context():
             try:
-                # Get all users with dashboard stats
-                result = db.session.execute(text("""
-                    SELECT
-                        u.id as user_id,
-                        uds.project_count as cached_project_count,
-                        uds.active_projects as cached_active_projects,
-                        uds.total_proof_score as cached_proof_score,
-                        uds.comment_count as cached_comment_count,
-                        uds.badges_given as cached_badges_given,
-                        uds.badges_received as cached_badges_received,
-                        uds.unread_messages as cached_unread_messages,
-                        uds.unread_notifications as cached_unread_notifications,
-
-                        -- Actual values from primary tables
-                        (SELECT COUNT(*) FROM projects WHERE user_id = u.id) as actual_project_count,
-                        (SELECT COUNT(*) FROM projects WHERE user_id = u.id AND is_deleted = FALSE) as actual_active_projects,
-                        (SELECT COALESCE(SUM(proof_score), 0) FROM projects WHERE user_id = u.id AND is_deleted = FALSE) as actual_proof_score,
-                        (SELECT COUNT(*) FROM comments WHERE user_id = u.id) as actual_comment_count,
-                        (SELECT COUNT(*) FROM validation_badges WHERE validator_id = u.id) as actual_badges_given,
-                        (SELECT COUNT(DISTINCT vb.id) FROM validation_badges vb JOIN projects p ON vb.project_id = p.id WHERE p.user_id = u.id) as actual_badges_received,
-                        (SELECT COUNT(*) FROM direct_messages WHERE recipient_id = u.id AND is_read = FALSE) as actual_unread_messages,
-                        (SELECT COUNT(*) FROM notifications WHERE user_id = u.id AND is_read = FALSE) as actual_unread_notifications
-
-                    FROM users u
-                    LEFT JOIN user_dashboard_stats uds ON u.id = uds.user_id
-                    WHERE u.is_active = TRUE
-                """))
-
-                rows = result.fetchall()
-
-                for row in rows:
-                    user_id = row[0]
-                    has_discrepancy = False
-
-                    # Check each field
-                    fields = [
-                        ('project_count', row[1], row[9]),
-                        ('active_projects', row[2], row[10]),
-                        ('total_proof_score', row[3], row[11]),
-                        ('comment_count', row[4], row[12]),
-                        ('badges_given', row[5], row[13]),
-                        ('badges_received', row[6], row[14]),
-                        ('unread_messages', row[7], row[15]),
-                        ('unread_notifications', row[8], row[16]),
-                    ]
-
-                    updates = {}
-                    for field_name, cached, actual in fields:
-                        if cached != actual:
-                            has_discrepancy = True
-                            discrepancies += 1
-                            updates[field_name] = actual
-                            self.log_discrepancy(
-                                'user_dashboard_stats',
-                                user_id,
-                                field_name,
-                                actual,
-                                cached,
-                                self.auto_fix
-                            )
-
-                    # Fix if auto_fix enabled
-                    if has_discrepancy and self.auto_fix and updates:
-                        update_sql = ", ".join([f"{k} = :{k}" for k in updates.keys()])
-                        db.session.execute(
-                            text(f"""
-                                UPDATE user_dashboard_stats
-                                SET {update_sql}, last_updated_at = CURRENT_TIMESTAMP
-                                WHERE user_id = :user_id
-                            """),
-                            {'user_id': user_id, **updates}
-                        )
+                while True:
+                    params = {f'lo_{i}': v for i, v in enumerate(lo)}
+                    hi = db.session.execute(bound_sql, {**params, 'limit': self.chunk_size}).fetchone()
+                    if hi is None:
+                        break
+                    params.update({f'hi_{i}': v for i, v in enumerate(hi)})
+
+                    chunk_rows, rows = db.session.execute(
+                        reconcile_sql, {**params, 'apply': self.auto_fix}
+                    ).fetchone()
+
+                    chunk_found = 0
+                    for row in rows or []:
+                        for field in fields:
+                            if row[f'cached_{field}'] != row[field]:
+                                chunk_found += 1
+                                progress['fields'][field] += 1
+                                if len(progress['samples']) < self.max_logged_discrepancies:
+                                    progress['samples'].append(
+                                        {'key': [row[k] for k in keys], 'field': field,
+                                         'expected': row[field], 'actual': row[f'cached_{field}']}
+                                    )
+                                    self.log_discrepancy(table, row[keys[0]], field, row[field],
+                                                         row[f'cached_{field}'], self.auto_fix)
+                                else:
+                                    self._count_discrepancy(self.auto_fix)
+
+                    discrepancies += chunk_found
+                    progress['rows_scanned'] += chunk_rows
+                    progress['found'] += chunk_found
+                    if self.auto_fix:
+                        progress['fixed'] += chunk_found
+                    progress['chunks'] += 1
+
+                    lo = list(hi)
+                    self._save_checkpoint(name, lo, progress)
+                    db.session.commit()
+
+                    if progress['chunks'] % 10 == 0:
+                        self.log(f"  {name}: {progress['rows_scanned']} rows scanned, "
+                                 f"{progress['found']} discrepancies so far")
 
+                self._save_checkpoint(name, None, progress, status='completed')
                 db.session.commit()
-                self.log(f"Dashboard stats: Found {discrepancies} discrepancies")
+                self.log(f"{table}: Found {discrepancies} discrepancies "
+                         f"in {progress['rows_scanned']} rows ({progress['chunks']} chunks)")
 
             except Exception as e:
-                self.report['errors'].append(f"dashboard_stats: {str(e)}")
-                self.log(f"Error reconciling dashboard stats: {e}", level='ERROR')
+                self.report['errors'].append(f"{name}: {str(e)}")
+                self.log(f"Error reconciling {table}: {e}", level='ERROR')
                 db.session.rollback()
 
+        self.report['reconcilers'][name] = {
+            'rows_scanned': progress['rows_scanned'],
+            'chunks': progress['chunks'],
+            'discrepancies': progress['found'],
+            'by_field': {f: n for f, n in progress['fields'].items() if n},
+            'samples': progress['samples']
+        }
         return discrepancies
 
+    def reconcile_dashboard_stats(self) -> int:
+        """Reconcile user_dashboard_stats with primary tables"""
+        return self._reconcile_chunked({
+            'name': 'dashboard_stats',
+            'table': 'user_dashboard_stats',
+            'keys': ['user_id'],
+            'chunk_join': 'JOIN users u ON u.id = t.user_id AND u.is_active = TRUE',
+            'actual_sql': """
+                SELECT
+                    c.user_id,
+                    COALESCE(p.project_count, 0) AS project_count,
+                    COALESCE(p.active_projects, 0) AS active_projects,
+                    COALESCE(p.total_proof_score, 0) AS total_proof_score,
+                    COALESCE(cm.comment_count, 0) AS comment_count,
+                    COALESCE(bg.badges_given, 0) AS badges_given,
+                    COALESCE(br.badges_received, 0) AS badges_received,
+                    COALESCE(dm.unread_messages, 0) AS unread_messages,
+                    COALESCE(n.unread_notifications, 0) AS unread_notifications
+                FROM chunk c
+                LEFT JOIN (
+                    SELECT user_id,
+                           COUNT(*) AS project_count,
+                           COUNT(*) FILTER (WHERE is_deleted = FALSE) AS active_projects,
+                           ROUND(COALESCE(SUM(proof_score) FILTER (WHERE is_deleted = FALSE), 0))::INT AS total_proof_score
+                    FROM projects
+                    WHERE user_id > :lo_0 AND user_id <= :hi_0
+                    GROUP BY user_id
+                ) p ON p.user_id = c.user_id
+                LEFT JOIN (
+                    SELECT user_id, COUNT(*) AS comment_count
+                    FROM comments
+                    WHERE user_id > :lo_0 AND user_id <= :hi_0
+                    GROUP BY user_id
+                ) cm ON cm.user_id = c.user_id
+                LEFT JOIN (
+                    SELECT validator_id AS user_id, COUNT(*) AS badges_given
+                    FROM validation_badges
+                    WHERE validator_id > :lo_0 AND validator_id <= :hi_0
+                    GROUP BY validator_id
+                ) bg ON bg.user_id = c.user_id
+                LEFT JOIN (
+                    SELECT p.user_id, COUNT(DISTINCT vb.id) AS badges_received
+                    FROM validation_badges vb
+                    JOIN projects p ON vb.project_id = p.id
+                    WHERE p.user_id > :lo_0 AND p.user_id <= :hi_0
+                    GROUP BY p.user_id
+                ) br ON br.user_id = c.user_id
+                LEFT JOIN (
+                    SELECT recipient_id AS user_id, COUNT(*) AS unread_messages
+                    FROM direct_messages
+                    WHERE is_read = FALSE AND recipient_id > :lo_0 AND recipient_id <= :hi_0
+                    GROUP BY recipient_id
+                ) dm ON dm.user_id = c.user_id
+                LEFT JOIN (
+                    SELECT user_id, COUNT(*) AS unread_notifications
+                    FROM notifications
+                    WHERE is_read = FALSE AND user_id > :lo_0 AND user_id <= :hi_0
+                    GROUP BY user_id
+                ) n ON n.user_id = c.user_id
+            """,
+            'fields': [
+                'project_count', 'active_projects', 'total_proof_score', 'comment_count',
+                'badges_given', 'badges_received', 'unread_messages', 'unread_notifications'
+            ],
+            'touch_column': 'last_updated_at'
+        })
+
     def reconcile_message_conversations(self) -> int:
         """Reconcile message_conversations_denorm with direct_messages"""
-        self.log("Reconciling message_conversations_denorm...")
-
-        discrepancies = 0
-
-        with self.app.app_context():
-            try:
-                # Find conversations with mismatched unread counts
-                result = db.session.execute(text("""
-                    SELECT
-                        mcd.user_id,
-                        mcd.other_user_id,
-                        mcd.unread_count as cached_unread,
-                        mcd.total_messages as cached_total,
-                        (SELECT COUNT(*) FROM direct_messages
-                         WHERE recipient_id = mcd.user_id
-                           AND sender_id = mcd.other_user_id
-                           AND is_read = FALSE) as actual_unread,
-                        (SELECT COUNT(*) FROM direct_messages
-                         WHERE (sender_id = mcd.user_id AND recipient_id = mcd.other_user_id)
-                            OR (sender_id = mcd.other_user_id AND recipient_id = mcd.user_id)) as actual_total
-                    FROM message_conversations_denorm mcd
-                """))
-
-                rows = result.fetchall()
-
-                for row in rows:
-                    user_id, other_user_id, cached_unread, cached_total, actual_unread, actual_total = row
-
-                    has_discrepancy = False
-                    updates = {}
-
-                    if cached_unread != actual_unread:
-                        has_discrepancy = True
-                        discrepancies += 1
-                        updates['unread_count'] = actual_unread
-                        self.log_discrepancy(
-                            'message_conversations_denorm',
-                            user_id,
-                            'unread_count',
-                            actual_unread,
-                            cached_unread,
-                            self.auto_fix
-                        )
-
-                    if cached_total != actual_total:
-                        has_discrepancy = True
-                        discrepancies += 1
-                        updates['total_messages'] = actual_total
-                        self.log_discrepancy(
-                            'message_conversations_denorm',
-                            user_id,
-                            'total_messages',
-                            actual_total,
-                            cached_total,
-                            self.auto_fix
-                        )
-
-                    # Fix if auto_fix enabled
-                    if has_discrepancy and self.auto_fix and updates:
-                        update_sql = ", ".join([f"{k} = :{k}" for k in updates.keys()])
-                        db.session.execute(
-                            text(f"""
-                                UPDATE message_conversations_denorm
-                                SET {update_sql}, updated_at = CURRENT_TIMESTAMP
-                                WHERE user_id = :user_id AND other_user_id = :other_user_id
-                            """),
-                            {'user_id': user_id, 'other_user_id': other_user_id, **updates}
-                        )
-
-                db.session.commit()
-                self.log(f"Message conversations: Found {discrepancies} discrepancies")
-
-            except Exception as e:
-                self.report['errors'].append(f"message_conversations: {str(e)}")
-                self.log(f"Error reconciling message conversations: {e}", level='ERROR')
-                db.session.rollback()
-
-        return discrepancies
+        return self._reconcile_chunked({
+            'name': 'message_conversations',
+            'table': 'message_conversations_denorm',
+            'keys': ['user_id', 'other_user_id'],
+            'actual_sql': """
+                SELECT
+                    c.user_id,
+                    c.other_user_id,
+                    COALESCE(SUM(m.unread), 0)::INT AS unread_count,
+                    COALESCE(SUM(m.total), 0)::INT AS total_messages
+                FROM chunk c
+                LEFT JOIN LATERAL (
+                    SELECT COUNT(*) FILTER (WHERE is_read = FALSE) AS unread, COUNT(*) AS total
+                    FROM direct_messages
+                    WHERE sender_id = c.other_user_id AND recipient_id = c.user_id
+                    UNION ALL
+                    SELECT 0, COUNT(*)
+                    FROM direct_messages
+                    WHERE sender_id = c.user_id AND recipient_id = c.other_user_id
+                ) m ON TRUE
+                GROUP BY c.user_id, c.other_user_id
+            """,
+            'fields': ['unread_count', 'total_messages'],
+            'touch_column': 'updated_at'
+        })
 
     def reconcile_intro_request_stats(self) -> int:
         """Reconcile intro_request_stats with intro_requests"""
-        self.log("Reconciling intro_request_stats...")
-
-        discrepancies = 0
+        return self._reconcile_chunked({
+            'name': 'intro_request_stats',
+            'table': 'intro_request_stats',
+            'keys': ['user_id'],
+            'chunk_join': 'JOIN users u ON u.id = t.user_id AND u.is_active = TRUE',
+            'actual_sql': """
+                SELECT
+                    c.user_id,
+                    COALESCE(b.pending_requests, 0) AS pending_requests,
+                    COALESCE(b.approved_requests, 0) AS approved_requests,
+                    COALESCE(b.rejected_requests, 0) AS rejected_requests,
+                    COALESCE(i.sent_requests, 0) AS sent_requests
+                FROM chunk c
+                LEFT JOIN (
+                    SELECT builder_id AS user_id,
+                           COUNT(*) FILTER (WHERE status = 'pending') AS pending_requests,
+                           COUNT(*) FILTER (WHERE status = 'approved') AS approved_requests,
+                           COUNT(*) FILTER (WHERE status = 'rejected') AS rejected_requests
+                    FROM intro_requests
+                    WHERE builder_id > :lo_0 AND builder_id <= :hi_0
+                    GROUP BY builder_id
+                ) b ON b.user_id = c.user_id
+                LEFT JOIN (
+                    SELECT investor_id AS user_id, COUNT(*) AS sent_requests
+                    FROM intro_requests
+                    WHERE investor_id > :lo_0 AND investor_id <= :hi_0
+                    GROUP BY investor_id
+                ) i ON i.user_id = c.user_id
+            """,
+            'fields': ['pending_requests', 'approved_requests', 'rejected_requests', 'sent_requests'],
+            'touch_column': 'last_updated_at'
+        })
+
+    def reconcile_traveler_stats(self) -> int:
+        """Reconcile traveler_stats with the traveler content tables"""
+        return self._reconcile_chunked({
+            'name': 'traveler_stats',
+            'table': 'traveler_stats',
+            'keys': ['traveler_id'],
+            'actual_sql': """
+                SELECT
+                    c.traveler_id,
+                    COALESCE(i.itinerary_count, 0) AS itinerary_count,
+                    COALESCE(i.published_itinerary_count, 0) AS published_itinerary_count,
+                    COALESCE(i.itinerary_upvotes, 0) AS itinerary_upvotes,
+                    COALESCE(s.snap_count, 0) AS snap_count,
+                    COALESCE(r.safety_rating_count, 0) AS safety_rating_count,
+                    COALESCE(ti.intel_count, 0) AS intel_count,
+                    COALESCE(cm.comment_count, 0) AS comment_count,
+                    COALESCE(tc.certification_count, 0) AS certification_count,
+                    COALESCE(tr.trip_earnings_total, 0) AS trip_earned
+                FROM chunk c
+                JOIN travelers tr ON tr.id = c.traveler_id
+                LEFT JOIN (
+                    SELECT created_by_traveler_id AS traveler_id,
+                           COUNT(*) AS itinerary_count,
+                           COUNT(*) FILTER (WHERE is_published = TRUE) AS published_itinerary_count,
+                           COALESCE(SUM(upvotes) FILTER (WHERE is_published = TRUE), 0)::INT AS itinerary_upvotes
+                    FROM itineraries
+                    WHERE is_deleted = FALSE
+                      AND created_by_traveler_id > :lo_0 AND created_by_traveler_id <= :hi_0
+                    GROUP BY created_by_traveler_id
+                ) i ON i.traveler_id = c.traveler_id
+                LEFT JOIN (
+                    SELECT user_id AS traveler_id, COUNT(*) AS snap_count
+                    FROM snaps
+                    WHERE is_deleted = FALSE AND user_id > :lo_0 AND user_id <= :hi_0
+                    GROUP BY user_id
+                ) s ON s.traveler_id = c.traveler_id
+                LEFT JOIN (
+                    SELECT traveler_id, COUNT(*) AS safety_rating_count
+                    FROM safety_ratings
+                    WHERE traveler_id > :lo_0 AND traveler_id <= :hi_0
+                    GROUP BY traveler_id
+                ) r ON r.traveler_id = c.traveler_id
+                LEFT JOIN (
+                    SELECT traveler_id, COUNT(*) AS intel_count
+                    FROM travel_intel
+                    WHERE traveler_id > :lo_0 AND traveler_id <= :hi_0
+                    GROUP BY traveler_id
+                ) ti ON ti.traveler_id = c.traveler_id
+                LEFT JOIN (
+                    SELECT user_id AS traveler_id, COUNT(*) AS comment_count
+                    FROM comments
+                    WHERE user_id > :lo_0 AND user_id <= :hi_0
+                    GROUP BY user_id
+                ) cm ON cm.traveler_id = c.traveler_id
+                LEFT JOIN (
+                    SELECT traveler_id, COUNT(*) AS certification_count
+                    FROM traveler_certifications
+                    WHERE traveler_id > :lo_0 AND traveler_id <= :hi_0
+                    GROUP BY traveler_id
+                ) tc ON tc.traveler_id = c.traveler_id
+            """,
+            'fields': [
+                'itinerary_count', 'published_itinerary_count', 'itinerary_upvotes', 'snap_count',
+                'safety_rating_count', 'intel_count', 'comment_count', 'certification_count', 'trip_earned'
+            ],
+            'touch_column': 'last_updated_at'
+        })
+
+    def check_trip_ledger(self) -> int:
+        """
+        Snapshot every traveler's TRIP totals against the ledger (report only)
 
-        with self.app.app_context():
-            try:
-                result = db.session.execute(text("""
-                    SELECT
-                        u.id as user_id,
-                        irs.pending_requests as cached_pending,
-                        irs.approved_requests as cached_approved,
-                        irs.rejected_requests as cached_rejected,
-                        irs.sent_requests as cached_sent,
-                        (SELECT COUNT(*) FROM intro_requests WHERE builder_id = u.id AND status = 'pending') as actual_pending,
-                        (SELECT COUNT(*) FROM intro_requests WHERE builder_id = u.id AND status = 'approved') as actual_approved,
-                        (SELECT COUNT(*) FROM intro_requests WHERE builder_id = u.id AND status = 'rejected') as actual_rejected,
-                        (SELECT COUNT(*) FROM intro_requests WHERE investor_id = u.id) as actual_sent
-                    FROM users u
-                    LEFT JOIN intro_request_stats irs ON u.id = irs.user_id
-                    WHERE u.is_active = TRUE
-                """))
-
-                rows = result.fetchall()
-
-                for row in rows:
-                    user_id = row[0]
-                    has_discrepancy = False
-                    updates = {}
-
-                    fields = [
-                        ('pending_requests', row[1], row[5]),
-                        ('approved_requests', row[2], row[6]),
-                        ('rejected_requests', row[3], row[7]),
-                        ('sent_requests', row[4], row[8]),
-                    ]
-
-                    for field_name, cached, actual in fields:
-                        if cached != actual:
-                            has_discrepancy = True
-                            discrepancies += 1
-                            updates[field_name] = actual
-                            self.log_discrepancy(
-                                'intro_request_stats',
-                                user_id,
-                                field_name,
-                                actual,
-                                cached,
-                                self.auto_fix
-                            )
-
-                    # Fix if auto_fix enabled
-                    if has_discrepancy and self.auto_fix and updates:
-                        update_sql = ", ".join([f"{k} = :{k}" for k in updates.keys()])
-                        db.session.execute(
-                            text(f"""
-                                UPDATE intro_request_stats
-                                SET {update_sql}, last_updated_at = CURRENT_TIMESTAMP
-                                WHERE user_id = :user_id
-                            """),
-                            {'user_id': user_id, **updates}
-                        )
+        Drift needs a human to decide which side is right, so it is counted as
+        ledger_drift_detected rather than as an unfixed discrepancy.
+        """
+        from utils.trip_economy import TripEconomy
 
-                db.session.commit()
-                self.log(f"Intro request stats: Found {discrepancies} discrepancies")
+        result = TripEconomy.snapshot_balances(full=True)
+        self.report['ledger_drift_detected'] += result['drifted']
+        self.log(f"  [OK] trip_ledger: {result['checked']} travelers checked, {result['drifted']} drifted")
+        return result['drifted']
 
-            except Exception as e:
-                self.report['errors'].append(f"intro_request_stats: {str(e)}")
-                self.log(f"Error reconciling intro request stats: {e}", level='ERROR')
-                db.session.rollback()
+    def refresh_all_materialized_views(self):
+        """
+        Force refresh all materialized views
 
-        return discrepancies
+        Independent views refresh in parallel on separate connections. The
+        incremental feed/leaderboard tables get a full rebuild, which also
+        catches anything the delta triggers can't see (e.g. chain renames).
+        """
+        from workers.mv_refresh_worker import MVRefreshWorker
 
-    def refresh_all_materialized_views(self):
-        """Force refresh all materialized views"""
         self.log("Refreshing all materialized views...")
 
         views = [
@@ -334,19 +552,14 @@ class ReconciliationJob:
             'mv_investors_directory'
         ]
 
-        with self.app.app_context():
-            for view in views:
-                try:
-                    start_time = datetime.now()
-                    db.session.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}"))
-                    db.session.commit()
-                    duration = (datetime.now() - start_time).total_seconds() * 1000
-                    self.log(f"  [OK] Refreshed {view} in {duration:.0f}ms")
-
-                except Exception as e:
-                    self.report['errors'].append(f"{view}: {str(e)}")
-                    self.log(f"  [FAIL] Failed to refresh {view}: {e}", level='ERROR')
-                    db.session.rollback()
+        refresher = MVRefreshWorker(self.app, max_workers=4)
+        for result in refresher.refresh_views(views, full=True):
+            view = result['view_name']
+            if result['status'] == 'completed':
+                self.log(f"  [OK] Refreshed {view} ({result['mode']}) in {result['duration_ms']}ms")
+            else:
+                self.report['errors'].append(f"{view}: {result['error']}")
+                self.log(f"  [FAIL] Failed to refresh {view}: {result['error']}", level='ERROR')
 
     def run(self) -> Dict:
         """Run full reconciliation"""
@@ -369,8 +582,15 @@ class ReconciliationJob:
         self.report['tables_checked'].append('intro_request_stats')
         self.reconcile_intro_request_stats()
 
-        # Refresh all materialized views
-        self.refresh_all_materialized_views()
+        self.report['tables_checked'].append('traveler_stats')
+        self.reconcile_traveler_stats()
+
+        self.report['tables_checked'].append('trip_ledger')
+        self.check_trip_ledger()
+
+        # Refresh all materialized views (a dry run leaves everything untouched)
+        if self.auto_fix:
+            self.refresh_all_materialized_views()
 
         # Finalize report
         self.report['completed_at'] = datetime.now()
@@ -388,13 +608,21 @@ class ReconciliationJob:
         self.log("=" * 62)
         self.log("         RECONCILIATION JOB COMPLETED")
         self.log("=" * 62)
+        self.log(f"  Mode:                 {'Dry run' if self.report['dry_run'] else 'Auto fix'}")
         self.log(f"  Duration:             {self.report['duration_seconds']:.1f}s")
         self.log(f"  Tables Checked:       {len(self.report['tables_checked'])}")
         self.log(f"  Discrepancies Found:  {self.report['discrepancies_found']}")
         self.log(f"  Discrepancies Fixed:  {self.report['discrepancies_fixed']}")
+        self.log(f"  Ledger Drift:         {self.report['ledger_drift_detected']} (detected, not auto-fixed)")
         self.log(f"  Errors:               {len(self.report['errors'])}")
         self.log("=" * 62)
 
+        for name, summary in self.report['reconcilers'].items():
+            self.log(f"  {name}: {summary['rows_scanned']} rows, {summary['chunks']} chunks, "
+                     f"{summary['discrepancies']} discrepancies")
+            for field, count in summary['by_field'].items():
+                self.log(f"    - {field}: {count}")
+
         if self.report['errors']:
             self.log("\nErrors encountered:", level='ERROR')
             for error in self.report['errors']:
@@ -403,17 +631,28 @@ class ReconciliationJob:
 
 def main():
     """Entry point"""
+    parser = argparse.ArgumentParser(description='Reconcile denormalized tables')
+    parser.add_argument('--dry-run', action='store_true', help='Report discrepancies without fixing')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per chunk')
+    parser.add_argument('--no-resume', action='store_true', help='Ignore checkpoints from an interrupted run')
+    args = parser.parse_args()
+
     # Create Flask app
     app = create_app()
 
     # Create and run reconciliation job
-    job = ReconciliationJob(app, auto_fix=True)
+    job = ReconciliationJob(
+        app,
+        auto_fix=not args.dry_run,
+        chunk_size=args.chunk_size,
+        resume=not args.no_resume
+    )
 
     try:
         report = job.run()
 
         # Exit with error code if discrepancies found and not fixed
-        if report['discrepancies_found'] > report['discrepancies_fixed']:
+        if not args.dry_run and report['discrepancies_found'] > report['discrepancies_fixed']:
             sys.exit(1)
 
         sys.exit(0)
@@ -11,11 +11,11 @@ Features:
 - Logging and monitoring
 
 Usage:
-    Auto-starts with app.py (configured in create_app())
+    Started by scheduler.py (the web process no longer runs background loops)
 
     To disable:
     set DISABLE_RECONCILIATION=1
-    python app.py
+    python scheduler.py
 """
 
 import time
@@ -85,7 +85,8 @@ class ReconciliationScheduler:
                 self.stats['successful_runs'] += 1
                 self.log(
                     f"Reconciliation completed successfully: "
-                    f"{report['discrepancies_fixed']}/{report['discrepancies_found']} discrepancies fixed",
+                    f"{report['discrepancies_fixed']}/{report['discrepancies_found']} discrepancies fixed, "
+                    f"{report.get('ledger_drift_detected', 0)} TRIP ledger drifts detected",
                     level='SUCCESS'
                 )
 
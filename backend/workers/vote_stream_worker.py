@@ -0,0 +1,402 @@
+"""
+Vote Stream Worker
+==================
+Applies the vote:events Redis stream (written by the VoteService fast path)
+to the votes table, exactly once per vote request.
+
+Features:
+- Consumer group 'vote-db-writer'; entries are XACKed only after the
+  transaction that applied them commits. Each run re-reads the consumer's
+  own pending entries before new ones and stops at the first batch the DB
+  rejects, so votes are always applied in stream order. Entries a crashed
+  consumer left pending are reclaimed with XAUTOCLAIM once idle for
+  claim_idle_ms.
+- Micro-batches: up to batch_size entries per transaction. Every request_id
+  is inserted into vote_events (unique) in that transaction, so redelivered
+  or replayed entries are skipped.
+- A vote sets the user's vote to its target state ('removed' -> none), and
+  projects/itineraries upvotes/downvotes move by the net change - one UPDATE
+  per content item per batch instead of recounting the votes table.
+- A unique-key conflict with a concurrent writer (replay, the synchronous
+  fallback) is retried once against the now-committed rows. An entry that
+  still fails on its own (bad data, not a DB outage) is moved to the
+  vote:events:dead stream so it cannot block the group.
+- Recovery: replay(start_id) re-applies the stream from an entry id through the
+  same idempotent path; reset_group(start_id) rewinds the consumer group.
+
+Usage:
+    Registered as the 'vote_stream' job in scheduler.py (every 2s, leader-elected)
+
+    Standalone:
+    python workers/vote_stream_worker.py                          # drain once
+    python workers/vote_stream_worker.py replay 1718000000000-0   # re-apply from an entry id
+    python workers/vote_stream_worker.py reset 1718000000000-0    # rewind the consumer group
+"""
+
+import os
+import socket
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from extensions import db
+from models.vote import Vote
+from models.vote_event import VoteEvent
+from services.vote_service import VoteService
+
+
+class VoteStreamWorker:
+    """
+    Consumer-group processor for the vote event stream
+    """
+
+    GROUP = 'vote-db-writer'
+    KEY_DEAD_LETTERS = "vote:events:dead"  # Stream: entries that could not be applied
+
+    def __init__(self, vote_service: Optional[VoteService] = None, consumer: Optional[str] = None,
+                 batch_size=200, max_batches=25, claim_idle_ms=60000):
+        """
+        Initialize worker
+
+        Args:
+            vote_service: VoteService whose Redis client holds the stream
+            consumer: Consumer name in the group (default host:pid)
+            batch_size: Entries applied per transaction
+            max_batches: Batches per run_once (the rest waits for the next run)
+            claim_idle_ms: Pending entries idle this long are reclaimed from their consumer
+        """
+        self.vote_service = vote_service or VoteService()
+        self.redis = self.vote_service.redis
+        self.stream = VoteService.KEY_VOTE_EVENTS
+        self.consumer = consumer or f"{socket.gethostname()}:{os.getpid()}"
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.claim_idle_ms = claim_idle_ms
+        self._group_ready = False
+
+    # ------------------------------------------------------------------
+    # Consuming
+    # ------------------------------------------------------------------
+
+    def ensure_group(self):
+        """Create the consumer group at the start of the stream if it doesn't exist"""
+        try:
+            self.redis.xgroup_create(self.stream, self.GROUP, id='0', mkstream=True)
+        except Exception as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+        self._group_ready = True
+
+    def run_once(self) -> Dict:
+        """Reclaim stale entries, apply pending ones, then drain new ones in micro-batches (scheduler job)"""
+        if not self._group_ready:
+            self.ensure_group()
+
+        started = time.monotonic()
+        stats = {'read': 0, 'applied': 0, 'skipped': 0, 'dead': 0, 'batches': 0}
+
+        # Take over entries a dead consumer left pending; they join this
+        # consumer's pending list and are re-read below
+        self.redis.xautoclaim(
+            self.stream, self.GROUP, self.consumer, self.claim_idle_ms, '0-0', count=self.batch_size
+        )
+
+        # Pending entries ('0') go first so a batch left unacknowledged by a DB
+        # error is applied before anything newer. A failed batch raises and
+        # ends the run, so newer entries are never read past it.
+        start_id = '0'
+        for _ in range(self.max_batches):
+            response = self.redis.xreadgroup(
+                self.GROUP, self.consumer, {self.stream: start_id}, count=self.batch_size
+            )
+            entries = self._parse(response[0][1]) if response else []
+            if not entries:
+                if start_id == '>':
+                    break
+                start_id = '>'
+                continue
+            self._process(entries, stats)
+
+        if stats['read']:
+            duration_ms = round((time.monotonic() - started) * 1000, 1)
+            print(f"[VoteStream] Applied {stats['applied']} of {stats['read']} events "
+                  f"({stats['skipped']} already applied, {stats['dead']} dead) "
+                  f"in {stats['batches']} batches, {duration_ms}ms")
+        return stats
+
+    def _process(self, entries: List[Tuple[str, Optional[Dict]]], stats: Dict):
+        """Apply one micro-batch and acknowledge it (left pending if the DB is unavailable)"""
+        events = [dict(fields, stream_id=entry_id) for entry_id, fields in entries if fields]
+        stats['read'] += len(entries)
+        stats['batches'] += 1
+
+        try:
+            try:
+                result = self.apply_events(events)
+            except IntegrityError:
+                # Usually a replay or the process_vote_event fallback committed the same
+                # request or vote first; apply_events re-reads what is applied, so retry once.
+                # A second IntegrityError is down to the data and is isolated below
+                db.session.rollback()
+                result = self.apply_events(events)
+        except OperationalError:
+            db.session.rollback()
+            raise
+        except Exception as e:
+            db.session.rollback()
+            if len(entries) > 1:
+                # Isolate the entry that fails
+                stats['batches'] -= 1
+                stats['read'] -= len(entries)
+                for entry in entries:
+                    self._process([entry], stats)
+                return
+            self._dead_letter(entries[0], e)
+            stats['dead'] += 1
+            return
+
+        self.redis.xack(self.stream, self.GROUP, *[entry_id for entry_id, _ in entries])
+        stats['applied'] += len(result['applied'])
+        stats['skipped'] += result['skipped']
+        self.after_commit(result)
+
+    def _dead_letter(self, entry: Tuple[str, Optional[Dict]], error: Exception):
+        entry_id, fields = entry
+        print(f"[VoteStream] Dead-lettering {entry_id}: {error}")
+        self.redis.xadd(self.KEY_DEAD_LETTERS, '*', dict(fields or {}, stream_id=entry_id, error=str(error)[:500]))
+        self.redis.xack(self.stream, self.GROUP, entry_id)
+        if fields and fields.get('request_id'):
+            self.vote_service.update_request_status(fields['request_id'], status='failed', error=str(error))
+
+    @staticmethod
+    def _parse(entries) -> List[Tuple[str, Optional[Dict]]]:
+        """[[id, [field, value, ...]], ...] -> [(id, {field: value})] (None for trimmed entries)"""
+        parsed = []
+        for entry in entries or []:
+            if not entry:
+                continue
+            entry_id, values = entry[0], entry[1]
+            fields = dict(zip(values[::2], values[1::2])) if values else None
+            parsed.append((entry_id, fields))
+        return parsed
+
+    # ------------------------------------------------------------------
+    # Applying
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def apply_events(events: List[Dict]) -> Dict:
+        """
+        Apply vote events, in order, in one transaction (commits)
+
+        Args:
+            events: dicts with request_id, user_id, project_id, vote_type, action
+                    (plus stream_id for stream entries)
+
+        Returns:
+            {'applied': [events], 'skipped': int, 'created': [(user_id, project_id, vote_type)],
+             'counts': {project_id: (upvotes, downvotes)}}
+        """
+        unique = {}
+        for event in events:
+            unique.setdefault(event['request_id'], event)
+
+        seen = {
+            request_id for (request_id,) in
+            db.session.query(VoteEvent.request_id).filter(VoteEvent.request_id.in_(list(unique)))
+        } if unique else set()
+        fresh = [event for request_id, event in unique.items() if request_id not in seen]
+        result = {'applied': fresh, 'skipped': len(events) - len(fresh), 'created': [], 'counts': {}}
+        if not fresh:
+            return result
+
+        db.session.add_all([
+            VoteEvent(
+                request_id=event['request_id'],
+                stream_id=event.get('stream_id'),
+                user_id=event['user_id'],
+                project_id=event['project_id'],
+                vote_type=event['vote_type'],
+                action=event['action']
+            )
+            for event in fresh
+        ])
+
+        # Target vote per (user, content); later events win
+        targets = {}
+        for event in fresh:
+            targets[(event['user_id'], event['project_id'])] = (
+                None if event['action'] == 'removed' else event['vote_type']
+            )
+
+        current = {
+            (vote.user_id, vote.project_id): vote
+            for vote in Vote.query.filter(
+                Vote.user_id.in_({user_id for user_id, _ in targets}),
+                Vote.project_id.in_({project_id for _, project_id in targets})
+            )
+        }
+
+        deltas = defaultdict(lambda: [0, 0])  # project_id -> [upvotes, downvotes]
+        for (user_id, project_id), after in targets.items():
+            vote = current.get((user_id, project_id))
+            before = vote.vote_type if vote else None
+            if before == after:
+                continue
+            if before:
+                deltas[project_id][0 if before == 'up' else 1] -= 1
+            if after:
+                deltas[project_id][0 if after == 'up' else 1] += 1
+
+            if vote is None:
+                db.session.add(Vote(user_id=user_id, project_id=project_id, vote_type=after))
+                result['created'].append((user_id, project_id, after))
+            elif after is None:
+                db.session.delete(vote)
+            else:
+                vote.vote_type = after
+
+        result['counts'] = VoteStreamWorker._apply_count_deltas(deltas)
+        db.session.commit()
+        return result
+
+    @staticmethod
+    def _apply_count_deltas(deltas: Dict[str, List[int]]) -> Dict[str, Tuple[int, int]]:
+        """Move stored upvotes/downvotes by the net change (one UPDATE per content item)"""
+        from services.content_index import ContentIndexService
+
+        counts = {}
+        for project_id, (up_delta, down_delta) in deltas.items():
+            if not up_delta and not down_delta:
+                continue
+
+            content_type = ContentIndexService.content_type_of(project_id)
+            tables = {'project': ['projects'], 'itinerary': ['itineraries']}.get(
+                content_type, ['itineraries', 'projects']
+            )
+            for table in tables:
+                row = db.session.execute(text(f"""
+                    UPDATE {table}
+                    SET upvotes = COALESCE(upvotes, 0) + :up_delta,
+                        downvotes = COALESCE(downvotes, 0) + :down_delta
+                    WHERE id = :project_id
+                    RETURNING upvotes, downvotes
+                """), {
+                    'up_delta': up_delta,
+                    'down_delta': down_delta,
+                    'project_id': project_id
+                }).first()
+                if row:
+                    # Raw SQL skips the content_index mapper events
+                    ContentIndexService.update_counts(project_id, upvotes=row[0], downvotes=row[1])
+                    counts[project_id] = (row[0], row[1])
+                    break
+
+        return counts
+
+    def after_commit(self, result: Dict):
+        """Mark applied requests completed and notify owners of new votes"""
+        if result['applied']:
+            updated_at = datetime.utcnow().isoformat()
+            pipe = self.redis.pipeline()
+            for event in result['applied']:
+                key = VoteService.KEY_VOTE_REQUEST.format(request_id=event['request_id'])
+                pipe.hset(key, values={'status': 'completed', 'updated_at': updated_at})
+            pipe.exec()
+
+        for user_id, project_id, vote_type in result['created']:
+            self._notify_owner(user_id, project_id, vote_type)
+
+    @staticmethod
+    def _notify_owner(user_id: str, project_id: str, vote_type: str):
+        """Send the vote notification to the project/itinerary owner (non-critical)"""
+        try:
+            from models.traveler import Traveler
+            from models.user import User
+            from utils.content_utils import get_content_by_id
+            from utils.notifications import notify_project_vote
+
+            voter = User.query.get(user_id) or Traveler.query.get(user_id)
+            content = get_content_by_id(project_id)
+
+            if voter and content:
+                # Get owner ID - works for both Project (user_id) and Itinerary (created_by_traveler_id)
+                owner_id = getattr(content, 'user_id', None) or getattr(content, 'created_by_traveler_id', None)
+                if owner_id and owner_id != user_id:
+                    notify_project_vote(owner_id, content, voter, vote_type)
+        except Exception as e:
+            print(f"[VoteStream] Warning: Notification failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Monitoring and recovery
+    # ------------------------------------------------------------------
+
+    def backlog(self) -> Optional[int]:
+        """Entries not yet applied (pending + undelivered), None if the group doesn't exist"""
+        try:
+            for group in self.redis.xinfo_groups(self.stream) or []:
+                info = dict(zip(group[::2], group[1::2])) if isinstance(group, list) else group
+                if info.get('name') == self.GROUP:
+                    return int(info.get('pending') or 0) + int(info.get('lag') or 0)
+        except Exception:
+            pass
+        return None
+
+    def replay(self, start_id: str, end_id: str = '+') -> Dict:
+        """
+        Re-apply stream entries from start_id (inclusive) outside the group
+
+        Entries whose request_id is already in vote_events are skipped, so
+        replaying over applied history only fills gaps.
+        """
+        stats = {'read': 0, 'applied': 0, 'skipped': 0}
+        cursor = start_id
+        while True:
+            entries = self._parse(self.redis.xrange(self.stream, cursor, end_id, count=self.batch_size))
+            if not entries:
+                break
+            result = self.apply_events([dict(fields, stream_id=entry_id) for entry_id, fields in entries if fields])
+            self.after_commit(result)
+            stats['read'] += len(entries)
+            stats['applied'] += len(result['applied'])
+            stats['skipped'] += result['skipped']
+            if len(entries) < self.batch_size:
+                break
+            cursor = f"({entries[-1][0]}"  # Exclusive start after the last entry
+        print(f"[VoteStream] Replay from {start_id}: {stats}")
+        return stats
+
+    def reset_group(self, start_id: str):
+        """Rewind the consumer group so entries after start_id are delivered again"""
+        self.ensure_group()
+        self.redis.xgroup_setid(self.stream, self.GROUP, start_id)
+        print(f"[VoteStream] Consumer group {self.GROUP} reset to {start_id}")
+
+
+def main():
+    """Entry point for running the worker standalone"""
+    # Import here to avoid circular dependency
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        worker = VoteStreamWorker()
+        command = sys.argv[1] if len(sys.argv) > 1 else 'run'
+        if command == 'replay':
+            worker.replay(sys.argv[2])
+        elif command == 'reset':
+            worker.reset_group(sys.argv[2])
+        else:
+            print(worker.run_once())
+
+
+if __name__ == '__main__':
+    main()
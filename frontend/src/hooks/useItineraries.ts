@@ -29,7 +29,7 @@ export function transformItinerary(backendItinerary: any) {
     end_date: backendItinerary.end_date,
     difficulty_level: backendItinerary.difficulty_level,
     route_map_url: backendItinerary.route_map_url,
-    route_gpx_data: backendItinerary.route_gpx_data,
+    route: backendItinerary.route || null,
     creator: backendItinerary.creator ? {
       id: backendItinerary.creator.id,
       username: backendItinerary.creator.username,
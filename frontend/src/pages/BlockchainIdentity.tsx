@@ -153,7 +153,7 @@ export default function BlockchainIdentity() {
       const response = await api.post('/identity/mint-sbt');
 
       if (response.data.status === 'success') {
-        toast.success('✓ Travel SBT minted successfully!');
+        toast.success(response.data.message || '✓ Travel SBT mint submitted!');
         await refreshUser();
       }
     } catch (error: any) {
@@ -112,6 +112,8 @@ export const itinerariesService = {
   getAll: (sort: string = 'trending', page: number = 1, includeDetailed: boolean = false) =>
     api.get(`/itineraries?sort=${sort}&page=${page}${includeDetailed ? '&include=detailed' : ''}`),
   getById: (id: string) => api.get(`/itineraries/${id}`),
+  getRoute: (id: string, resolution: 'preview' | 'medium' | 'full' = 'medium', format: 'polyline' | 'geojson' | 'gpx' = 'polyline') =>
+    api.get(`/itineraries/${id}/route?resolution=${resolution}&format=${format}`),
   create: (data: any) => api.post('/itineraries', data),
   update: (id: string, data: any) => api.put(`/itineraries/${id}`, data),
   delete: (id: string) => api.delete(`/itineraries/${id}`),
@@ -230,6 +230,18 @@ export interface TravelCredibilityScore {
   quality_score: number;
 }
 
+export interface ItineraryRouteSummary {
+  bbox: [number, number, number, number];
+  distance_km: number | null;
+  elevation_gain_m: number | null;
+  elevation_loss_m: number | null;
+  point_count: number;
+  preview_polyline: string | null;
+  preview_point_count: number;
+  source: string;
+  version: string;
+}
+
 export interface Itinerary {
   id: string;
   uuid?: string;
@@ -252,8 +264,8 @@ export interface Itinerary {
   actual_budget_spent?: number;
   budget_amount?: number;
   budget_currency?: string;
-  // Route & GPS
-  route_gpx?: string;
+  // Route & GPS (full geometry is served by GET /itineraries/:id/route)
+  route?: ItineraryRouteSummary | null;
   route_waypoints?: Array<{ lat: number; lon: number; name?: string; elevation?: number }>;
   starting_point_gps?: string;
   ending_point_gps?: string;
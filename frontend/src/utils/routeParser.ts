@@ -176,7 +176,7 @@ export async function geocodeDestination(destination: string): Promise<{ lat: nu
 async function aiExtractLocations(
   dayByDayText: string,
   destination: string
-): Promise<Array<{ day: number; location: string; description: string }>> {
+): Promise<Array<{ day: number; location: string; description: string; lat?: number; lng?: number }>> {
   try {
     const token = localStorage.getItem('token');
     if (!token) {
@@ -251,7 +251,10 @@ export async function parseAndGeocodeRoute(
   for (const dayData of parsedDays) {
     console.log(`[RouteParser] Geocoding Day ${dayData.day}: "${dayData.location}"`);
 
-    const coords = await geocodeLocation(dayData.location);
+    // The backend returns cached coordinates when it could geocode the place
+    const coords = dayData.lat != null && dayData.lng != null
+      ? { lat: dayData.lat, lng: dayData.lng }
+      : await geocodeLocation(dayData.location);
 
     if (coords) {
       console.log(`[RouteParser] ✓ Geocoded "${dayData.location}" to:`, coords);